@@ -0,0 +1,191 @@
+# src/app/controllers/live_controller.py
+
+import dataclasses
+
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtGui import QGuiApplication, QPixmap
+
+from app.views.live_presentation_window import LivePresentationWindow
+from utils.live_renderer import BLANK_SLIDE, render_slide, song_slides
+from utils.slide_layout_engine import slide_size_px
+from utils.worker import Worker, start_worker
+
+# Số slide phía sau slide hiện tại được vẽ sẵn
+LIVE_LOOKAHEAD = 3
+# Ưu tiên cao hơn các việc nền khác (chữ ký bài hát, kiểm tra bố cục) trong thread pool dùng chung
+RENDER_PRIORITY = 10
+
+class LivePresentationController(QObject):
+    """
+    Điều khiển cửa sổ trình chiếu: dựng danh sách slide từ playlist, giữ vị trí hiện tại và
+    vẽ sẵn slide hiện tại cùng LIVE_LOOKAHEAD slide kế tiếp ở luồng nền, nên chuyển slide là tức thì.
+    Ảnh đã vẽ được lưu theo LiveSlide (gồm cả theme của bài): khi playlist, cỡ chữ hoặc theme
+    thay đổi, chỉ các slide thật sự khác mới phải vẽ lại; đổi kích thước cửa sổ thì vẽ lại tất cả.
+    """
+    position_changed = Signal(int, int) # (vị trí, tổng số slide)
+    stopped = Signal()
+
+    def __init__(self, main_view, parent=None):
+        super().__init__(parent)
+        self.main_view = main_view
+        self.window = None
+        self.deck = []
+        self.position = 0
+        self.blanked = False
+        # (song_id, thứ tự slide trong bài) của từng slide, để giữ đúng chỗ khi playlist thay đổi
+        self._anchors = []
+        self._theme = None
+        self._render_size = None
+        self._generation = 0
+        self._pixmaps = {}
+        self._pending = {} # LiveSlide -> Worker đang vẽ (giữ tham chiếu tới khi xong)
+        self._drawn_here = set() # slide vẽ ở luồng giao diện, có thể thiếu ảnh nền chưa chuẩn bị xong
+
+    @property
+    def is_active(self) -> bool:
+        return self.window is not None
+
+    def start(self, songs: list, theme, overrides: dict, start_song_id=None) -> bool:
+        """Mở cửa sổ trình chiếu trên màn hình khác màn hình của cửa sổ chính (nếu có)."""
+        if self.is_active or not songs:
+            return False
+        self._theme = dataclasses.replace(theme)
+        self._build_deck(songs, overrides)
+        self.position = self._anchors.index((start_song_id, 0)) if (start_song_id, 0) in self._anchors else 0
+        self.blanked = False
+
+        slide_w, slide_h = slide_size_px(theme)
+        self.window = LivePresentationWindow(slide_w / slide_h)
+        self.window.next_requested.connect(self.next_slide)
+        self.window.previous_requested.connect(self.previous_slide)
+        self.window.blank_toggled.connect(self.toggle_blank)
+        self.window.size_changed.connect(self._on_size_changed)
+        self.window.closed.connect(self._on_window_closed)
+        self._render_size = None
+
+        main_screen = self.main_view.screen()
+        target = next((screen for screen in QGuiApplication.screens() if screen.name() != main_screen.name()), main_screen)
+        self.window.setGeometry(target.geometry())
+        self.window.showFullScreen()
+        self._render_size = self.window.render_size()
+        self._show_current()
+        return True
+
+    def stop(self):
+        if self.window is not None:
+            self.window.close()
+
+    def update(self, songs: list, theme, overrides: dict):
+        """Dựng lại danh sách slide sau khi playlist, cỡ chữ hoặc theme thay đổi, giữ nguyên slide đang chiếu."""
+        if not self.is_active:
+            return
+        if not songs:
+            self.stop()
+            return
+        # Slide cũ của theme trước không còn nằm trong danh sách nên tự bị bỏ khỏi bộ đệm ảnh
+        self._theme = dataclasses.replace(theme)
+        song_id, index = self._anchors[self.position]
+        self._build_deck(songs, overrides)
+        if (song_id, index) in self._anchors:
+            self.position = self._anchors.index((song_id, index))
+        elif (song_id, 0) in self._anchors:
+            self.position = self._anchors.index((song_id, 0))
+        else:
+            self.position = min(self.position, len(self.deck) - 1)
+        self._show_current()
+
+    def next_slide(self):
+        if self.is_active:
+            self.blanked = False
+            self.position = min(self.position + 1, len(self.deck) - 1)
+            self._show_current()
+
+    def previous_slide(self):
+        if self.is_active:
+            self.blanked = False
+            self.position = max(self.position - 1, 0)
+            self._show_current()
+
+    def toggle_blank(self):
+        if self.is_active:
+            self.blanked = not self.blanked
+            self._show_current()
+
+    def _build_deck(self, songs: list, overrides: dict):
+        """Danh sách slide của cả playlist, slide trống giữa hai bài (cách chia slide được ghi nhớ, nên dựng lại nhanh)."""
+        deck, anchors = [], []
+        for i, song in enumerate(songs):
+            slides = song_slides(song, self._theme, overrides)
+            deck.extend(slides)
+            anchors.extend((song.id, n) for n in range(len(slides)))
+            if i < len(songs) - 1:
+                deck.append(BLANK_SLIDE)
+                anchors.append((song.id, len(slides)))
+        self.deck, self._anchors = deck, anchors
+
+    def backgrounds_prepared(self):
+        """Worker vừa chuẩn bị xong ảnh nền: vẽ lại các slide đã vẽ ở luồng giao diện khi ảnh nền chưa sẵn sàng."""
+        for slide in self._drawn_here:
+            self._pixmaps.pop(slide, None)
+        self._drawn_here.clear()
+        if self.is_active:
+            self._show_current()
+
+    def _invalidate_all(self):
+        self._generation += 1
+        self._pixmaps.clear()
+        self._pending.clear()
+        self._drawn_here.clear()
+
+    def _show_current(self):
+        slide = BLANK_SLIDE if self.blanked else self.deck[self.position]
+        pixmap = self._pixmaps.get(slide)
+        if pixmap is None:
+            # Chưa kịp vẽ sẵn (lúc bắt đầu, sau khi đổi theme): vẽ ngay ở luồng giao diện, chỉ với ảnh nền đã chuẩn bị
+            pixmap = QPixmap.fromImage(render_slide(slide, self._render_size.width(), self._render_size.height(),
+                                                    prepare_background=False))
+            self._pixmaps[slide] = pixmap
+            self._drawn_here.add(slide)
+        self.window.show_pixmap(pixmap)
+        self.position_changed.emit(self.position, len(self.deck))
+        self._prerender()
+
+    def _wanted_slides(self) -> list:
+        return self.deck[max(0, self.position - 1):self.position + LIVE_LOOKAHEAD + 1] + [BLANK_SLIDE]
+
+    def _prerender(self):
+        wanted = self._wanted_slides()
+        # Chỉ giữ ảnh quanh vị trí hiện tại: ảnh toàn màn hình khá nặng
+        for slide in set(self._pixmaps).difference(wanted):
+            del self._pixmaps[slide]
+        for slide in wanted:
+            if slide not in self._pixmaps and slide not in self._pending:
+                worker = Worker(render_slide, slide, self._render_size.width(), self._render_size.height())
+                self._pending[slide] = worker
+                generation = self._generation
+                worker.signals.finished.connect(lambda image, slide=slide, generation=generation:
+                                                self._on_rendered(slide, generation, image))
+                worker.signals.error.connect(lambda _, slide=slide: self._pending.pop(slide, None))
+                start_worker(worker, RENDER_PRIORITY)
+
+    def _on_rendered(self, slide, generation: int, image):
+        if generation != self._generation or not self.is_active:
+            return # Ảnh của kích thước cũ
+        self._pending.pop(slide, None)
+        if slide in self._wanted_slides():
+            self._pixmaps.setdefault(slide, QPixmap.fromImage(image))
+
+    def _on_size_changed(self):
+        if not self.is_active or self._render_size is None:
+            return
+        size = self.window.render_size()
+        if size != self._render_size:
+            self._render_size = size
+            self._invalidate_all()
+            self._show_current()
+
+    def _on_window_closed(self):
+        self.window = None
+        self._invalidate_all()
+        self.deck, self._anchors = [], []
+        self.stopped.emit()
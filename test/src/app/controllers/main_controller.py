@@ -1,15 +1,49 @@
 # src/app/controllers/main_controller.py
 
-from PySide6.QtWidgets import QInputDialog, QMessageBox, QFileDialog
-from PySide6.QtCore import QModelIndex
+import dataclasses
+import os
+import threading
 
+from PySide6.QtWidgets import QApplication, QInputDialog, QMessageBox, QFileDialog
+from PySide6.QtCore import QModelIndex, QTimer, QDateTime
+
+from app.controllers.live_controller import LivePresentationController
+from app.controllers.prefetch_controller import SlidePrefetchController
 from app.models.database_model import DatabaseModel
 from app.models.playlist_model import PlaylistModel
 from app.models.song_model import Song
+from app.models.song_index import SongIndex
 from app.views.main_window import MainWindow
 from app.views.dialogs import AddSongDialog, ThemeDialog
+from app.views.quick_open_dialog import QuickOpenDialog
+from app.views.import_review_dialog import ImportReviewDialog
+from app.views.slide_audit_dialog import SlideAuditDialog
+from app.views.query_stats_dialog import QueryStatsDialog
+from utils.background_images import background_size, take_background_failures, theme_background
+from utils.font_fitting import fit_lyric_font_size, fit_playlist_font_sizes
+from utils.library_sync import open_peer, sync_databases
+from utils.import_jobs import ImportJob, commit_interrupted_jobs
+from utils.library_transfer import export_library, import_library
+from utils.lyric_recognizer import RecognitionStats, create_recognizer
+from utils.near_duplicates import refresh_signatures
+from utils.pdf_importer import page_count
 from utils.pptx_generator import generate_presentation
+from utils.query_stats import QUERY_STATS
+from utils.slide_image_export import export_slide_images
+from utils.slide_audit import MAX_SLIDES_PER_SONG, get_audit_report, run_slide_audit
+from utils.stall_watchdog import StallWatchdog, budget_from_environment
+from utils.slide_layout_engine import THEME_LAYOUT, THEME_UNCHANGED, classify_theme_change
+from utils.tracing import is_tracing, start_tracing, stop_tracing, traced_methods
+from utils.worker import Worker, start_worker
+
+# Chu kỳ bảo trì database (PRAGMA optimize + incremental vacuum)
+MAINTENANCE_INTERVAL_MS = 30 * 60 * 1000
+# Số loạt bài hát tối đa đã gửi sang hàng đợi duyệt mà giao diện chưa kịp hiển thị;
+# vượt quá thì luồng nhập tạm dừng thay vì dồn tín hiệu vào hàng đợi sự kiện
+IMPORT_BATCHES_IN_FLIGHT = 4
 
+# Mỗi thao tác của người dùng (_handle_*) và mỗi lần vẽ lại xem trước là một span "ui.<tên>" khi đang ghi vết
+@traced_methods("ui", lambda name: name.startswith("_handle_") or name in ("_update_preview", "_refresh_slides"))
 class MainController:
     """
     Lớp Controller chính, liên kết Model và View.
@@ -17,17 +51,45 @@ class MainController:
     def __init__(self, model: DatabaseModel, view: MainWindow):
         self.db_model = model
         self.view = view
+        # Canh gác giao diện bị đứng, bật trước khi tải dữ liệu để bắt cả lúc khởi động
+        self.watchdog = StallWatchdog(budget_from_environment(), self.view)
+        if self.watchdog.budget_ms:
+            self.watchdog.start()
+            # Dừng luồng canh gác trước khi vòng lặp sự kiện kết thúc (không còn nhịp để kiểm tra)
+            QApplication.instance().aboutToQuit.connect(self.watchdog.stop)
 
         self.playlist_model = PlaylistModel()
         self.all_songbooks_cache = []
+        self.song_index = SongIndex()
+        # Theme của buổi trình chiếu; bài trong playlist có thể chọn theme riêng (song_theme_ids)
+        self.themes = self.db_model.get_themes()
         self.current_theme = self.db_model.get_theme()
+        self.song_theme_ids = {}
+        self.song_backgrounds = {} # song_id -> ảnh nền riêng của bài
         self.current_selected_playlist_song_id = None
         self.font_overrides = {}
+        self._signature_worker = None
+        self._signature_refresh_pending = False
+        self.live = LivePresentationController(self.view)
+        self.prefetch = SlidePrefetchController(self.view)
 
         self._connect_signals()
+        self._populate_themes()
         self._initial_load()
         self._update_preview()
 
+        self.maintenance_timer = QTimer(self.view)
+        self.maintenance_timer.setInterval(MAINTENANCE_INTERVAL_MS)
+        self.maintenance_timer.timeout.connect(self.db_model.run_maintenance)
+        self.maintenance_timer.start()
+        self._backup_worker = None
+        self._transfer_worker = None
+        self._audit_worker = None
+        self._background_worker = None
+        self._prepared_backgrounds = set() # (ảnh gốc, kích thước) đã chuẩn bị trong phiên này
+        self._prepare_backgrounds()
+        self._commit_interrupted_imports()
+
     def _connect_signals(self):
         sb_view = self.view.songbook_view
         pl_view = self.view.playlist_view
@@ -36,6 +98,7 @@ class MainController:
         # Bất cứ khi nào playlist thay đổi, cả 2 view đều tự động cập nhật
         self.playlist_model.playlist_updated.connect(pl_view.on_playlist_updated)
         self.playlist_model.playlist_updated.connect(sb_view.on_playlist_updated)
+        self.playlist_model.playlist_updated.connect(lambda *_: self._refresh_slides())
 
         # --- Kết nối tín hiệu từ View đến Controller ---
         sb_view.add_songbook_clicked.connect(self._handle_add_songbook)
@@ -46,29 +109,92 @@ class MainController:
         sb_view.rename_songbook_clicked.connect(self._handle_rename_songbook)
         sb_view.delete_songbook_clicked.connect(self._handle_delete_songbook)
         sb_view.search_widget.filters_changed.connect(self._handle_filters_changed)
+        # Người dùng đang gõ tìm kiếm: nhường thread pool cho tìm kiếm, chuẩn bị slide sau
+        sb_view.search_widget.filters_changed.connect(self.prefetch.pause)
 
         pl_view.export_button_clicked.connect(self._handle_export_pptx)
         pl_view.song_selected.connect(self._handle_playlist_song_selected)
         pl_view.theme_button_clicked.connect(self._handle_open_theme_dialog)
+        pl_view.service_theme_selected.connect(self._handle_service_theme_selected)
         pl_view.song_removed.connect(self._handle_remove_from_playlist) # Tín hiệu mới
         pl_view.playlist_reordered.connect(self._handle_playlist_reordered) # Tín hiệu mới
 
         pr_view.font_size_changed.connect(self._handle_font_size_changed)
+        pr_view.auto_fit_requested.connect(self._handle_auto_fit_song)
+        pr_view.song_theme_changed.connect(self._handle_song_theme_changed)
+        pr_view.song_background_changed.connect(self._handle_song_background_changed)
+
+        self.view.quick_open_requested.connect(self._handle_quick_open)
+        self.view.backup_requested.connect(self._handle_backup)
+        self.view.export_library_requested.connect(self._handle_export_library)
+        self.view.import_library_requested.connect(self._handle_import_library)
+        self.view.sync_library_requested.connect(self._handle_sync_library)
+        self.view.import_pdf_requested.connect(lambda: self._handle_import_from_file('pdf'))
+        self.view.import_images_requested.connect(lambda: self._handle_import_from_file('image'))
+        self.view.export_slide_images_requested.connect(self._handle_export_slide_images)
+        self.view.slide_audit_requested.connect(self._handle_slide_audit)
+        self.view.auto_fit_playlist_requested.connect(self._handle_auto_fit_playlist)
+        self.view.tracing_action.setChecked(is_tracing()) # Đã bật sẵn bằng biến môi trường
+        self.view.tracing_toggled.connect(self._handle_tracing_toggled)
+        self.view.query_stats_requested.connect(self._handle_query_stats)
+        self.view.stall_report_requested.connect(self._handle_stall_report)
+        self.view.live_start_requested.connect(self._handle_start_live)
+        self.view.live_next_requested.connect(self.live.next_slide)
+        self.view.live_previous_requested.connect(self.live.previous_slide)
+        self.view.live_blank_requested.connect(self.live.toggle_blank)
+        self.view.live_stop_requested.connect(self.live.stop)
+        self.live.position_changed.connect(
+            lambda position, total: self.view.statusBar().showMessage(f"Đang trình chiếu: slide {position + 1}/{total}"))
+        self.live.stopped.connect(self._on_live_stopped)
 
     def _initial_load(self):
-        self.all_songbooks_cache = self.db_model.get_songbooks_with_songs()
+        # Chỉ tải danh sách sách; bài hát được tải theo trang khi mở từng sách
+        self.all_songbooks_cache = self.db_model.get_songbooks()
         self.view.songbook_view.search_widget.populate_songbooks(self.all_songbooks_cache)
-        self.view.songbook_view.populate_tree(self.all_songbooks_cache)
+        self._handle_filters_changed()
+        # Chỉ mục mở nhanh được dựng một lần, sau đó cập nhật từng phần khi chỉnh sửa
+        self.song_index = SongIndex.build(self.all_songbooks_cache, self.db_model.get_song_index_rows())
+        self._schedule_signature_refresh()
 
     def _reload_all_data(self):
-        self.all_songbooks_cache = self.db_model.get_songbooks_with_songs()
+        self.all_songbooks_cache = self.db_model.get_songbooks()
         self.view.songbook_view.search_widget.populate_songbooks(self.all_songbooks_cache)
         self._handle_filters_changed()
+        self._schedule_signature_refresh()
+
+    def _schedule_signature_refresh(self):
+        """Cập nhật chữ ký phát hiện bài gần trùng ở luồng nền; chỉ các bài mới/vừa sửa được tính lại."""
+        if self._signature_worker is not None:
+            self._signature_refresh_pending = True
+            return
+
+        def run():
+            db_model = self.db_model.clone()
+            try:
+                return refresh_signatures(db_model)
+            finally:
+                db_model.close()
+
+        worker = Worker(run)
+        worker.signals.finished.connect(self._on_signature_refresh_done)
+        worker.signals.error.connect(self._on_signature_refresh_done)
+        self._signature_worker = start_worker(worker)
+
+    def _on_signature_refresh_done(self, _):
+        self._signature_worker = None
+        if self._signature_refresh_pending:
+            self._signature_refresh_pending = False
+            self._schedule_signature_refresh()
 
     def _handle_filters_changed(self):
         filters = self.view.songbook_view.search_widget.get_filters()
-        search_results = self.db_model.search_songs(**filters)
-        self.view.songbook_view.populate_tree(search_results)
+        songbooks = self.db_model.get_songbook_summaries(**filters)
+
+        def load_page(songbook_id, after_title, limit):
+            return self.db_model.get_songs_page(songbook_id, after_title, limit,
+                                                keyword=filters['keyword'], search_by=filters['search_by'])
+
+        self.view.songbook_view.populate_tree(songbooks, load_page, expand_all=bool(filters['keyword']))
 
     def _update_songbook_view_buttons(self):
         """
@@ -82,6 +208,7 @@ class MainController:
         if ok and text:
             songbook_id = self.db_model.add_songbook(text)
             if songbook_id:
+                self.song_index.add_songbook(songbook_id, text)
                 QMessageBox.information(self.view, "Thành công", f"Đã tạo sách bài hát '{text}'.")
                 self._reload_all_data()
             else:
@@ -92,10 +219,13 @@ class MainController:
             QMessageBox.warning(self.view, "Chưa có Sách bài hát", "Vui lòng tạo một sách bài hát trước.")
             return
         dialog = AddSongDialog(self.all_songbooks_cache, model=self.db_model, parent=self.view)
+        dialog.import_from_file_clicked.connect(lambda kind: self._handle_import_from_file(kind, dialog))
         if dialog.exec():
             data = dialog.get_song_data()
             new_song = Song(id=None, **data)
-            self.db_model.add_song(new_song)
+            new_song.id = self.db_model.add_song(new_song)
+            if new_song.id:
+                self.song_index.upsert_song(new_song)
             QMessageBox.information(self.view, "Thành công", f"Đã thêm bài hát '{data['title']}'.")
             self._reload_all_data()
 
@@ -109,11 +239,13 @@ class MainController:
             song=song_to_edit, 
             parent=self.view
         )
-        
+        dialog.import_from_file_clicked.connect(lambda kind: self._handle_import_from_file(kind, dialog))
+
         if dialog.exec():
             data = dialog.get_song_data()
             updated_song = Song(id=song_id, **data)
             self.db_model.update_song(updated_song)
+            self.song_index.upsert_song(updated_song)
             QMessageBox.information(self.view, "Thành công", f"Đã cập nhật bài hát '{data['title']}'.")
             self._reload_all_data()
 
@@ -125,6 +257,7 @@ class MainController:
                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
             self.db_model.delete_song(song_id)
+            self.song_index.remove_song(song_id)
             self._reload_all_data()
 
     def _handle_rename_songbook(self, songbook_id: int):
@@ -139,6 +272,7 @@ class MainController:
             if not self.db_model.rename_songbook(songbook_id, new_name):
                 QMessageBox.warning(self.view, "Lỗi", "Tên sách bài hát này đã tồn tại.")
             else:
+                self.song_index.rename_songbook(songbook_id, new_name)
                 self._reload_all_data()
 
     def _handle_delete_songbook(self, songbook_id: int):
@@ -152,6 +286,7 @@ class MainController:
                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
             self.db_model.delete_songbook(songbook_id)
+            self.song_index.remove_songbook(songbook_id)
             self.playlist_model.clear() # Ra lệnh cho model xóa playlist
             self._reload_all_data()
 
@@ -160,18 +295,388 @@ class MainController:
         if song:
             self.playlist_model.add_song(song)
 
+    def _handle_quick_open(self):
+        dialog = QuickOpenDialog(self.song_index.search, self.view)
+        dialog.song_chosen.connect(self._handle_add_to_playlist)
+        dialog.exec()
+
+    def _handle_backup(self):
+        if self._backup_worker is not None:
+            QMessageBox.information(self.view, "Đang sao lưu", "Một bản sao lưu đang được tạo, vui lòng đợi.")
+            return
+        default_name = f"lyrics-backup-{QDateTime.currentDateTime().toString('yyyyMMdd-HHmm')}.db"
+        file_path, _ = QFileDialog.getSaveFileName(self.view, "Sao lưu thư viện", default_name, "SQLite Database (*.db)")
+        if not file_path:
+            return
+        # Sao lưu chạy ở luồng nền, từng phần một, nên giao diện vẫn dùng được bình thường
+        worker = Worker(self.db_model.backup_to, file_path, with_progress=True)
+        worker.signals.progress.connect(
+            lambda done, total: self.view.statusBar().showMessage(f"Đang sao lưu... {done}/{total} trang"))
+        worker.signals.finished.connect(lambda _: self._on_backup_done(file_path, None))
+        worker.signals.error.connect(lambda message: self._on_backup_done(file_path, message))
+        self._backup_worker = start_worker(worker)
+
+    def _on_backup_done(self, file_path: str, error_message):
+        self._backup_worker = None
+        self.view.statusBar().clearMessage()
+        if error_message:
+            QMessageBox.critical(self.view, "Lỗi sao lưu", f"Đã có lỗi xảy ra:\n{error_message}")
+        else:
+            QMessageBox.information(self.view, "Hoàn tất", f"Đã sao lưu thư viện vào:\n{file_path}")
+
+    def _run_library_transfer(self, transfer, path: str, status_text: str, *args):
+        """Chạy xuất/nhập thư viện ở luồng nền, với kết nối database riêng của luồng đó."""
+        if self._transfer_worker is not None or self._backup_worker is not None:
+            QMessageBox.information(self.view, "Đang xử lý", "Một thao tác sao lưu hoặc xuất/nhập đang chạy, vui lòng đợi.")
+            return
+
+        def run(progress_callback):
+            db_model = self.db_model.clone()
+            try:
+                return transfer(db_model, path, *args, progress_callback=progress_callback)
+            finally:
+                db_model.close()
+
+        worker = Worker(run, with_progress=True)
+        worker.signals.progress.connect(
+            lambda done, total: self.view.statusBar().showMessage(f"{status_text} {done * 100 // max(1, total)}%"))
+        worker.signals.finished.connect(lambda stats: self._on_library_transfer_done(transfer, stats, None))
+        worker.signals.error.connect(lambda message: self._on_library_transfer_done(transfer, None, message))
+        self._transfer_worker = start_worker(worker)
+
+    def _handle_export_library(self):
+        default_name = f"lyrics-{QDateTime.currentDateTime().toString('yyyyMMdd')}.jsonl.gz"
+        file_path, _ = QFileDialog.getSaveFileName(self.view, "Xuất thư viện", default_name,
+                                                   "JSON Lines (*.jsonl.gz *.jsonl)")
+        if file_path:
+            self._run_library_transfer(export_library, file_path, "Đang xuất thư viện...")
+
+    def _handle_import_library(self):
+        file_path, _ = QFileDialog.getOpenFileName(self.view, "Nhập thư viện", "",
+                                                   "JSON Lines (*.jsonl.gz *.jsonl);;Tất cả (*)")
+        if not file_path:
+            return
+        modes = {"Bỏ qua bài đã có": "skip", "Ghi đè bài đã có": "overwrite", "Nhập với tựa đề mới": "rename"}
+        choice, ok = QInputDialog.getItem(self.view, "Nhập thư viện",
+                                          "Khi bài hát trùng tựa đề trong cùng sách:", list(modes), 0, False)
+        if ok:
+            self._run_library_transfer(import_library, file_path, "Đang nhập thư viện...", modes[choice])
+
+    def _handle_sync_library(self):
+        if self.db_model.is_overlay_mode():
+            QMessageBox.warning(self.view, "Không hỗ trợ", "Không thể đồng bộ khi dùng thư viện chỉ đọc đi kèm.")
+            return
+        file_path, _ = QFileDialog.getOpenFileName(self.view, "Chọn thư viện để đồng bộ", "", "SQLite Database (*.db)")
+        if not file_path:
+            return
+
+        def sync(db_model, other_path, progress_callback):
+            other = open_peer(other_path)
+            try:
+                return sync_databases(db_model, other)
+            finally:
+                other.close()
+
+        self._run_library_transfer(sync, file_path, "Đang đồng bộ...")
+
+    def _on_library_transfer_done(self, transfer, stats, error_message):
+        self._transfer_worker = None
+        self.view.statusBar().clearMessage()
+        if error_message:
+            QMessageBox.critical(self.view, "Lỗi", f"Đã có lỗi xảy ra:\n{error_message}")
+            return
+        if transfer is export_library:
+            QMessageBox.information(self.view, "Hoàn tất", f"Đã xuất {stats.summary()}")
+            return
+        # Dữ liệu thay đổi hàng loạt: tải lại danh sách sách và dựng lại chỉ mục mở nhanh
+        self._initial_load()
+        if transfer is import_library:
+            QMessageBox.information(self.view, "Hoàn tất", f"Đã nhập {stats.summary()}")
+        else:
+            QMessageBox.information(self.view, "Hoàn tất", f"Đã đồng bộ: {stats.summary()}")
+
+    # --- Nhập bài hát từ tệp PDF/ảnh ---
+    def _handle_import_from_file(self, kind: str, song_dialog: AddSongDialog = None):
+        """
+        Mở hàng đợi duyệt cho tệp được chọn. Nếu gọi từ dialog thêm/sửa bài hát,
+        người dùng có thể chọn một bài để điền vào dialog đó thay vì lưu hàng loạt.
+        """
+        if not self.all_songbooks_cache:
+            QMessageBox.warning(self.view, "Chưa có Sách bài hát", "Vui lòng tạo một sách bài hát trước.")
+            return
+        parent = song_dialog or self.view
+        if kind == 'pdf':
+            file_path, _ = QFileDialog.getOpenFileName(parent, "Chọn tệp PDF", "", "PDF (*.pdf)")
+            if not file_path:
+                return
+        else:
+            try:
+                recognizer = create_recognizer()
+            except (RuntimeError, ValueError, ImportError) as e:
+                QMessageBox.warning(parent, "Không thể nhận dạng ảnh", str(e))
+                return
+            image_paths, _ = QFileDialog.getOpenFileNames(parent, "Chọn ảnh (theo thứ tự trang)", "",
+                                                          "Ảnh (*.png *.jpg *.jpeg *.bmp *.tif *.tiff *.webp)")
+            if not image_paths:
+                return
+            image_paths.sort() # Ảnh chụp/quét thường được đặt tên theo thứ tự trang
+
+        # Đếm trang ở luồng chính: PyMuPDF không an toàn khi chạy trong luồng phụ
+        paths = [file_path] if kind == 'pdf' else image_paths
+        total_pages = page_count(file_path) if kind == 'pdf' else None
+
+        default_songbook_id = song_dialog.songbook_combo.currentData() if song_dialog else None
+        review = ImportReviewDialog(self.all_songbooks_cache, default_songbook_id,
+                                    allow_fill=song_dialog is not None, parent=parent)
+        cancel_event = threading.Event()
+        batch_slots = threading.Semaphore(IMPORT_BATCHES_IN_FLIGHT)
+        # Công việc nhập và ranh giới các trang mà hàng đợi duyệt đã nhận đủ bài
+        state = {"job": None, "settled_pages": 0}
+
+        def extract(progress_callback, partial_callback):
+            # Công việc nhập và bộ nhớ đệm nhận dạng nằm trong database: luồng nền dùng kết nối riêng
+            db_model = self.db_model.clone()
+            stats = RecognitionStats()
+            songs = None
+            count = 0
+
+            def send(batch, settled_pages):
+                # Áp lực ngược: chờ giao diện hiển thị bớt các loạt trước
+                while not batch_slots.acquire(timeout=0.1):
+                    if cancel_event.is_set():
+                        return False
+                partial_callback((batch, settled_pages))
+                return True
+
+            try:
+                job = ImportJob.open(db_model, kind, paths, total_pages)
+                state["job"] = job
+                songs = job.iter_songs(db_model, recognizer if kind == 'image' else None,
+                                       cancel_event=cancel_event, progress_callback=progress_callback, stats=stats)
+                # Gửi bài hát theo từng loạt để không phát quá nhiều tín hiệu sang luồng giao diện
+                batch = []
+                for candidate in songs:
+                    batch.append(candidate)
+                    if len(batch) >= 50:
+                        count += len(batch)
+                        if not send(batch, job.settled_pages):
+                            break
+                        batch = []
+                else:
+                    count += len(batch)
+                    send(batch, job.settled_pages)
+            finally:
+                if songs is not None:
+                    songs.close() # Lưu văn bản các trang đã xử lý dù bị hủy hay gặp lỗi
+                db_model.close()
+            message = f"Đã đọc xong tệp ({count} bài)" if kind == 'pdf' else f"Đã nhận dạng xong: {stats.summary()}"
+            if job.resumed or job.reused_pages:
+                message += f" — tiếp tục công việc trước, {job.reused_pages} trang đã có sẵn"
+            return message
+
+        def on_partial(result):
+            batch, settled_pages = result
+            review.add_candidates(batch)
+            state["settled_pages"] = settled_pages
+            batch_slots.release()
+
+        worker = Worker(extract, with_progress=True, with_partial=True)
+        worker.signals.partial.connect(on_partial)
+        worker.signals.progress.connect(review.set_progress)
+        worker.signals.finished.connect(review.set_finished)
+        worker.signals.error.connect(lambda message: review.set_finished(f"Lỗi khi đọc tệp: {message}"))
+        if song_dialog:
+            review.fill_requested.connect(
+                lambda c: song_dialog.fill_fields(c.title, c.lyrics, c.number, c.page))
+        review.songs_approved.connect(
+            lambda songbook_id, candidates: self._save_imported_songs(state, songbook_id, candidates))
+        start_worker(worker)
+        review.exec()
+        cancel_event.set() # Đóng hàng đợi thì dừng đọc tệp; các trang đã đọc được giữ lại cho lần sau
+
+    def _save_imported_songs(self, state: dict, songbook_id: int, candidates: list):
+        """Ghi kết quả duyệt vào công việc nhập rồi ghi các bài đã chọn vào thư viện trong một giao dịch."""
+        job = state["job"]
+        if job is None:
+            return
+        counts = job.save_reviewed(self.db_model, songbook_id, candidates, state["settled_pages"])
+        self._initial_load()
+        message = f"Đã lưu {counts['inserted']} bài hát."
+        if counts["skipped"]:
+            message += f"\nBỏ qua {counts['skipped']} bài trùng tựa đề trong sách."
+        QMessageBox.information(self.view, "Hoàn tất", message)
+
+    def _commit_interrupted_imports(self):
+        """Ghi nốt các bài đã duyệt của lần nhập trước bị gián đoạn trước khi kịp lưu."""
+        counts = commit_interrupted_jobs(self.db_model)
+        if counts["jobs"]:
+            self._initial_load()
+            self.view.statusBar().showMessage(
+                f"Đã lưu nốt {counts['inserted']} bài hát đã duyệt từ lần nhập trước.", 10000)
+
+    def _handle_slide_audit(self):
+        """Kiểm tra bố cục slide của mọi bài với theme hiện tại; chỉ các bài mới/vừa sửa được chia slide lại."""
+        if self._audit_worker is not None:
+            QMessageBox.information(self.view, "Đang kiểm tra", "Việc kiểm tra bố cục slide đang chạy, vui lòng đợi.")
+            return
+        theme = self.current_theme
+
+        def run(progress_callback):
+            db_model = self.db_model.clone()
+            try:
+                stats = run_slide_audit(db_model, theme, progress_callback=progress_callback)
+                return get_audit_report(db_model, theme), stats.summary()
+            finally:
+                db_model.close()
+
+        worker = Worker(run, with_progress=True)
+        worker.signals.progress.connect(
+            lambda done, total: self.view.statusBar().showMessage(f"Đang kiểm tra bố cục slide... {done}/{total} bài"))
+        worker.signals.finished.connect(self._on_slide_audit_done)
+        worker.signals.error.connect(lambda message: self._on_slide_audit_done(None, message))
+        self._audit_worker = start_worker(worker)
+
+    def _on_slide_audit_done(self, result, error_message=None):
+        self._audit_worker = None
+        self.view.statusBar().clearMessage()
+        if error_message:
+            QMessageBox.critical(self.view, "Lỗi kiểm tra bố cục", f"Đã có lỗi xảy ra:\n{error_message}")
+            return
+        results, summary = result
+        dialog = SlideAuditDialog(results, summary, MAX_SLIDES_PER_SONG, self.view)
+        dialog.song_chosen.connect(self._handle_add_to_playlist)
+        dialog.exec()
+
     # --- Các hàm xử lý cho Playlist và Preview ---
     def _handle_playlist_song_selected(self, song_id: int):
         self.current_selected_playlist_song_id = song_id
         self._update_preview()
 
+    def _populate_themes(self):
+        self.view.playlist_view.set_themes(self.themes, self.current_theme.id)
+        self.view.preview_view.set_themes(self.themes)
+
+    def _theme_for(self, song_id: int):
+        """Theme của một bài trong playlist: theme riêng của bài nếu có, nếu không là theme của buổi trình chiếu."""
+        theme = next((t for t in self.themes if t.id == self.song_theme_ids.get(song_id)), None)
+        if theme is None or theme.id == self.current_theme.id:
+            theme = self.current_theme
+        else:
+            # Một tệp .pptx chỉ có một khổ slide: theme riêng của bài dùng khổ slide của buổi trình chiếu
+            theme = dataclasses.replace(theme, slide_width=self.current_theme.slide_width,
+                                        slide_height=self.current_theme.slide_height)
+        if song_id in self.song_backgrounds:
+            theme = dataclasses.replace(theme, bg_image=self.song_backgrounds[song_id])
+        return theme
+
+    def _slide_overrides(self) -> dict:
+        """Bản sao font_overrides kèm theme riêng của từng bài (khóa 'theme'), để xuất file và trình chiếu."""
+        overrides = {song_id: dict(sizes) for song_id, sizes in self.font_overrides.items()}
+        for song_id in self.song_theme_ids.keys() | self.song_backgrounds.keys():
+            theme = self._theme_for(song_id)
+            if theme is not self.current_theme:
+                overrides.setdefault(song_id, {})['theme'] = theme
+        return overrides
+
     def _handle_open_theme_dialog(self):
+        old_theme = self.current_theme
         dialog = ThemeDialog(self.current_theme, self.view)
-        if dialog.exec():
-            self.current_theme = dialog.get_theme_data()
-            self.db_model.save_theme(self.current_theme)
-            self._update_preview()
-            QMessageBox.information(self.view, "Thành công", "Đã lưu thiết lập Theme.")
+        if not dialog.exec():
+            return
+        if dialog.delete_requested:
+            self.db_model.delete_theme(old_theme.id)
+            self.song_theme_ids = {song_id: theme_id for song_id, theme_id in self.song_theme_ids.items()
+                                   if theme_id != old_theme.id}
+            self.current_theme = self.db_model.get_theme()
+            message = f"Đã xóa theme '{old_theme.name}'."
+        else:
+            new_theme = dialog.get_theme_data()
+            if self.db_model.save_theme(new_theme) is None:
+                QMessageBox.warning(self.view, "Lỗi", f"Tên theme '{new_theme.name}' đã được dùng cho một theme khác.")
+                return
+            self.current_theme = new_theme
+            message = f"Đã lưu theme '{new_theme.name}'."
+        self.themes = self.db_model.get_themes()
+        self._populate_themes()
+        self._apply_theme_change(old_theme)
+        QMessageBox.information(self.view, "Thành công", message)
+
+    def _handle_service_theme_selected(self, theme_id: int):
+        old_theme = self.current_theme
+        self.current_theme = next((t for t in self.themes if t.id == theme_id), self.current_theme)
+        self._apply_theme_change(old_theme)
+
+    def _handle_song_theme_changed(self, theme_id):
+        song_id = self.current_selected_playlist_song_id
+        if song_id is None: return
+        old_theme = self._theme_for(song_id)
+        if theme_id is None:
+            self.song_theme_ids.pop(song_id, None)
+        else:
+            self.song_theme_ids[song_id] = theme_id
+        self._apply_theme_change(old_theme, self._theme_for(song_id))
+
+    def _handle_song_background_changed(self, path: str):
+        song_id = self.current_selected_playlist_song_id
+        if song_id is None: return
+        old_theme = self._theme_for(song_id)
+        if path:
+            self.song_backgrounds[song_id] = path
+        else:
+            self.song_backgrounds.pop(song_id, None)
+        self._apply_theme_change(old_theme, self._theme_for(song_id))
+
+    def _prepare_backgrounds(self):
+        """
+        Chuẩn bị (giải mã, thu nhỏ, nén lại) ở luồng nền mọi ảnh nền đang dùng; ảnh đã chuẩn bị
+        nằm sẵn trên đĩa nên xong rất nhanh. Xong thì vẽ lại xem trước với ảnh nền đã thu nhỏ.
+        """
+        themes = [self.current_theme] + [self._theme_for(song.id) for song in self.playlist_model.get_playlist()]
+        pending = {(theme.bg_image, background_size(theme)): theme for theme in themes if theme.bg_image}
+        for key in self._prepared_backgrounds.intersection(pending):
+            del pending[key]
+        if not pending or self._background_worker is not None:
+            return
+
+        def run():
+            for theme in pending.values():
+                theme_background(theme)
+            return set(pending)
+
+        worker = Worker(run)
+        worker.signals.finished.connect(self._on_backgrounds_prepared)
+        worker.signals.error.connect(lambda message: self._on_backgrounds_prepared(None, message))
+        self._background_worker = start_worker(worker)
+
+    def _on_backgrounds_prepared(self, prepared: set, error_message=None):
+        self._background_worker = None
+        if error_message:
+            self.view.statusBar().showMessage(f"Không chuẩn bị được ảnh nền: {error_message}", 10000)
+            return
+        failures = take_background_failures()
+        if failures:
+            self.view.statusBar().showMessage(f"Không đọc được ảnh nền {'; '.join(failures)}", 10000)
+        self._prepared_backgrounds.update(prepared)
+        # Slide/ảnh thu nhỏ vẽ ở luồng giao diện trong lúc chờ chưa có ảnh nền
+        self.prefetch.backgrounds_prepared()
+        self.live.backgrounds_prepared()
+        self._update_preview()
+        # Ảnh nền được gán trong lúc worker đang chạy: chuẩn bị nốt
+        self._prepare_backgrounds()
+
+    def _apply_theme_change(self, old_theme, new_theme=None):
+        """
+        Cập nhật xem trước và trình chiếu sau khi theme đổi. Đổi chỉ về màu sắc/kiểu chữ thì cách chia
+        slide (được ghi nhớ theo khổ slide và font) được dùng lại, chỉ phải vẽ lại các slide bị ảnh hưởng.
+        """
+        change = classify_theme_change(old_theme, new_theme or self.current_theme)
+        if change == THEME_UNCHANGED:
+            return
+        self._prepare_backgrounds()
+        self._update_preview()
+        self._refresh_slides()
+        detail = "bố cục slide được chia lại" if change == THEME_LAYOUT else "chỉ đổi màu sắc, bố cục slide được dùng lại"
+        self.view.statusBar().showMessage(f"Đã áp dụng theme ({detail}).", 5000)
 
     def _handle_remove_from_playlist(self, song_id: int):
         self.playlist_model.remove_song_by_id(song_id)
@@ -188,14 +693,47 @@ class MainController:
         filePath, _ = QFileDialog.getSaveFileName(self.view, "Lưu file PowerPoint", "", "PowerPoint Files (*.pptx)")
         if filePath:
             try:
-                generate_presentation(songs=songs_to_export, theme=self.current_theme, output_path=filePath, overrides=self.font_overrides)
+                generate_presentation(songs=songs_to_export, theme=self.current_theme, output_path=filePath, overrides=self._slide_overrides())
                 QMessageBox.information(self.view, "Hoàn tất", f"Đã xuất thành công file:\n{filePath}")
             except Exception as e:
                 QMessageBox.critical(self.view, "Lỗi xuất file", f"Đã có lỗi xảy ra:\n{e}")
                 print(f"Lỗi khi xuất PPTX: {e}")
 
+    def _handle_export_slide_images(self):
+        songs_to_export = self.playlist_model.get_playlist()
+        if not songs_to_export:
+            QMessageBox.warning(self.view, "Danh sách trống", "Playlist chưa có bài hát nào.")
+            return
+        if self._transfer_worker is not None:
+            QMessageBox.information(self.view, "Đang xử lý", "Một thao tác xuất/nhập khác đang chạy, vui lòng đợi.")
+            return
+        filePath, selected_filter = QFileDialog.getSaveFileName(self.view, "Xuất playlist ra PDF/ảnh", "",
+                                                                "PDF (*.pdf);;Ảnh PNG (*.png);;Ảnh JPEG (*.jpg)")
+        if not filePath:
+            return
+        if not os.path.splitext(filePath)[1]:
+            filePath += selected_filter[selected_filter.index("*") + 1:-1]
+        theme = dataclasses.replace(self.current_theme)
+        overrides = self._slide_overrides()
+
+        worker = Worker(export_slide_images, songs_to_export, theme, overrides, filePath, with_progress=True)
+        worker.signals.progress.connect(
+            lambda done, total: self.view.statusBar().showMessage(f"Đang xuất slide... {done}/{total}"))
+        worker.signals.finished.connect(lambda stats: self._on_slide_images_exported(filePath, stats))
+        worker.signals.error.connect(lambda message: self._on_slide_images_exported(filePath, None, message))
+        self._transfer_worker = start_worker(worker)
+
+    def _on_slide_images_exported(self, file_path: str, stats, error_message=None):
+        self._transfer_worker = None
+        self.view.statusBar().clearMessage()
+        if error_message:
+            QMessageBox.critical(self.view, "Lỗi xuất file", f"Đã có lỗi xảy ra:\n{error_message}")
+            return
+        QMessageBox.information(self.view, "Hoàn tất", f"Đã xuất {stats.summary()}:\n{file_path}")
+
     def _handle_font_size_changed(self, font_type: str, value: int):
         if self.current_selected_playlist_song_id is None: return
+        self.prefetch.pause() # Đang chỉnh cỡ chữ: các cỡ trung gian không cần chuẩn bị trước
         song_id = self.current_selected_playlist_song_id
         if song_id not in self.font_overrides:
             self.font_overrides[song_id] = {}
@@ -204,12 +742,97 @@ class MainController:
         elif font_type == 'lyric':
             self.font_overrides[song_id]['lyric'] = value
         self._update_preview()
+        self._refresh_slides()
+
+    def _handle_auto_fit_song(self):
+        song = next((s for s in self.playlist_model.get_playlist() if s.id == self.current_selected_playlist_song_id), None)
+        if song is None: return
+        self.font_overrides.setdefault(song.id, {})['lyric'] = fit_lyric_font_size(song.lyrics, self._theme_for(song.id))
+        self._update_preview()
+        self._refresh_slides()
+
+    def _handle_auto_fit_playlist(self):
+        songs = self.playlist_model.get_playlist()
+        if not songs:
+            QMessageBox.warning(self.view, "Danh sách trống", "Playlist chưa có bài hát nào.")
+            return
+        for song_id, size in fit_playlist_font_sizes(songs, self.current_theme, self._slide_overrides()).items():
+            self.font_overrides.setdefault(song_id, {})['lyric'] = size
+        self._update_preview()
+        self._refresh_slides()
+        self.view.statusBar().showMessage(f"Đã tự động chọn cỡ chữ lời cho {len(songs)} bài hát.", 5000)
+
+    def _handle_tracing_toggled(self, enabled: bool):
+        """Bật ghi vết; khi tắt thì hỏi nơi lưu tệp vết (Chrome trace JSON) để xem bằng chrome://tracing hoặc Perfetto."""
+        if enabled:
+            start_tracing()
+            self.view.statusBar().showMessage("Đang ghi vết hiệu năng. Tắt ghi vết để lưu tệp vết.", 5000)
+            return
+        default_name = f"lyrics-trace-{QDateTime.currentDateTime().toString('yyyyMMdd-HHmm')}.json"
+        file_path, _ = QFileDialog.getSaveFileName(self.view, "Lưu tệp vết hiệu năng", default_name, "Chrome trace (*.json)")
+        try:
+            event_count = stop_tracing(file_path or None)
+        except OSError as e:
+            QMessageBox.critical(self.view, "Lỗi", f"Không ghi được tệp vết:\n{e}")
+            return
+        if file_path:
+            self.view.statusBar().showMessage(f"Đã lưu {event_count} sự kiện vào {file_path}", 10000)
+
+    def _handle_query_stats(self):
+        """Bảng thống kê truy vấn; các câu SELECT chưa có kế hoạch được EXPLAIN để biết câu nào quét toàn bảng."""
+        self.db_model.explain_recorded_queries()
+        entries = QUERY_STATS.snapshot()
+        summary = (f"{len(entries)} câu lệnh, {sum(entry.calls for entry in entries)} lần gọi. Câu lệnh chậm hơn "
+                   f"{QUERY_STATS.slow_threshold_ms:.0f}ms được ghi kèm kế hoạch vào slow_queries.log trong thư mục dữ liệu người dùng.")
+        dialog = QueryStatsDialog(entries, summary, self.view)
+
+        def reset():
+            QUERY_STATS.reset()
+            dialog.populate([])
+        dialog.reset_requested.connect(reset)
+        dialog.exec()
+
+    def _handle_stall_report(self):
+        if not self.watchdog.budget_ms:
+            QMessageBox.information(self.view, "Báo cáo giao diện bị đứng", "Việc canh gác đang tắt (LYRIC_PRESENTER_STALL_MS=0).")
+            return
+        stalls = list(self.watchdog.stalls)
+        box = QMessageBox(QMessageBox.Information, "Báo cáo giao diện bị đứng",
+                          f"{len(stalls)} lần giao diện không phản hồi quá {self.watchdog.budget_ms}ms, "
+                          f"tổng {sum(stall.duration_ms for stall in stalls) / 1000:.1f}s. "
+                          "Chi tiết theo đoạn mã gây đứng ở phần dưới; mọi lần đứng cũng được ghi vào stalls.log "
+                          "trong thư mục dữ liệu người dùng.", parent=self.view)
+        box.setDetailedText(self.watchdog.report() or "Chưa có lần nào.")
+        box.exec()
+
+    def _handle_start_live(self):
+        songs = self.playlist_model.get_playlist()
+        if not songs:
+            QMessageBox.warning(self.view, "Danh sách trống", "Playlist chưa có bài hát nào.")
+            return
+        if self.live.start(songs, self.current_theme, self._slide_overrides(), self.current_selected_playlist_song_id):
+            self.view.set_live_active(True)
+
+    def _refresh_slides(self):
+        """
+        Sau khi playlist, cỡ chữ hoặc theme thay đổi: cập nhật cửa sổ trình chiếu (nếu đang mở)
+        và chuẩn bị trước ở luồng nền slide của các bài chưa có (cho cột xem trước và khi xuất file).
+        """
+        songs = self.playlist_model.get_playlist()
+        overrides = self._slide_overrides()
+        self.live.update(songs, self.current_theme, overrides)
+        self.prefetch.schedule(songs, self.current_theme, overrides)
+
+    def _on_live_stopped(self):
+        self.view.set_live_active(False)
+        self.view.statusBar().clearMessage()
 
     def _update_preview(self):
-        """Cập nhật cột xem trước với bài hát và theme hiện tại."""
+        """Cập nhật cột xem trước với bài hát và theme của bài đó."""
         song = None
-        title_size = self.current_theme.title_font_size
-        lyric_size = self.current_theme.lyric_font_size
+        theme = self.current_theme
+        title_size = theme.title_font_size
+        lyric_size = theme.lyric_font_size
         
         if self.current_selected_playlist_song_id:
             song_id = self.current_selected_playlist_song_id
@@ -220,14 +843,17 @@ class MainController:
                     song = s
                     break
             
-            if song and song_id in self.font_overrides:
-                title_size = self.font_overrides[song_id].get('title', title_size)
-                lyric_size = self.font_overrides[song_id].get('lyric', lyric_size)
+            if song:
+                theme = self._theme_for(song_id)
+                title_size = self.font_overrides.get(song_id, {}).get('title', theme.title_font_size)
+                lyric_size = self.font_overrides.get(song_id, {}).get('lyric', theme.lyric_font_size)
         
-        # Lệnh gọi này không thay đổi, nhưng hàm update_preview bên trong View đã mạnh mẽ hơn
+        slides = self.prefetch.thumbnails(song, self.current_theme, self._slide_overrides()) if song else []
         self.view.preview_view.update_preview(
-            theme=self.current_theme, 
-            song=song, 
-            title_size=title_size, 
-            lyric_size=lyric_size
-        )
\ No newline at end of file
+            song=song,
+            slides=slides,
+            title_size=title_size,
+            lyric_size=lyric_size,
+            song_theme_id=self.song_theme_ids.get(song.id) if song else None,
+            has_own_background=song is not None and song.id in self.song_backgrounds
+        )
@@ -0,0 +1,110 @@
+# src/app/controllers/prefetch_controller.py
+
+from dataclasses import astuple
+
+from PySide6.QtCore import QObject, QTimer
+from PySide6.QtGui import QPixmap
+
+from utils.live_renderer import render_slide, song_slides
+from utils.slide_layout_engine import slide_size_px
+from utils.tracing import counter, traced
+from utils.worker import Worker, cancel_worker, start_worker
+
+# Bề rộng ảnh thu nhỏ của slide trong cột xem trước (px); chiều cao theo tỉ lệ khung hình của theme
+THUMBNAIL_WIDTH = 480
+# Thấp hơn mọi việc nền khác: chỉ chạy khi thread pool đang rảnh
+PREFETCH_PRIORITY = -10
+# Sau lần chỉnh sửa cuối cùng (cỡ chữ, gõ tìm kiếm...) chờ chừng này rồi mới chuẩn bị tiếp
+RESUME_DELAY_MS = 800
+
+def _song_key(song, theme, overrides: dict) -> tuple:
+    """Mọi thứ quyết định các slide của một bài (như song_slides), tính được mà không phải chia slide."""
+    song_overrides = overrides.get(song.id, {})
+    song_theme = song_overrides.get('theme') or theme
+    return (song.id, song.title, song.lyrics, astuple(song_theme), song_overrides.get('title'), song_overrides.get('lyric'))
+
+def _thumbnail_size(theme) -> tuple:
+    slide_w, slide_h = slide_size_px(theme)
+    return THUMBNAIL_WIDTH, round(THUMBNAIL_WIDTH * slide_h / slide_w)
+
+@traced("preview.prefetch_song")
+def _prepare_song(song, theme, overrides: dict, prepare_background: bool = True) -> list:
+    """Chạy ở luồng nền: chia slide (kết quả được ghi nhớ cho cả lúc xuất file) và vẽ ảnh thu nhỏ của một bài."""
+    width, height = _thumbnail_size(theme)
+    return [render_slide(slide, width, height, prepare_background) for slide in song_slides(song, theme, overrides)]
+
+class SlidePrefetchController(QObject):
+    """
+    Chuẩn bị trước cách chia slide và ảnh thu nhỏ của mọi bài trong playlist ở luồng nền, ngay khi
+    bài được thêm vào hoặc theme/cỡ chữ thay đổi, nên chọn một bài là thấy slide ngay.
+    Mỗi bài là một Worker ưu tiên thấp; khi người dùng đang chỉnh sửa (pause), các Worker còn
+    xếp hàng bị bỏ và việc chuẩn bị chỉ tiếp tục sau RESUME_DELAY_MS không có thao tác mới.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._songs, self._theme, self._overrides = [], None, {}
+        self._images = {} # khóa bài -> [QImage] (từ luồng nền)
+        self._pixmaps = {} # khóa bài -> [QPixmap] (đã chuyển ở luồng giao diện)
+        self._pending = {} # khóa bài -> Worker đang xếp hàng/chạy
+        self._drawn_here = set() # khóa bài vẽ ở luồng giao diện, có thể thiếu ảnh nền chưa chuẩn bị xong
+        self._resume_timer = QTimer(self)
+        self._resume_timer.setSingleShot(True)
+        self._resume_timer.setInterval(RESUME_DELAY_MS)
+        self._resume_timer.timeout.connect(self._start_pending)
+
+    def schedule(self, songs: list, theme, overrides: dict):
+        """Ghi nhận playlist/theme/cỡ chữ mới và chuẩn bị các bài chưa có kết quả; kết quả của bài đã rời playlist bị bỏ."""
+        self._songs, self._theme, self._overrides = list(songs), theme, overrides
+        wanted = {_song_key(song, theme, overrides) for song in songs}
+        for cache in (self._images, self._pixmaps):
+            for key in set(cache).difference(wanted):
+                del cache[key]
+        self._drawn_here.intersection_update(wanted)
+        if not self._resume_timer.isActive():
+            self._start_pending()
+
+    def pause(self):
+        """Người dùng đang chỉnh sửa: bỏ các Worker chưa chạy, tiếp tục sau RESUME_DELAY_MS kể từ lần gọi cuối."""
+        for key, worker in list(self._pending.items()):
+            if cancel_worker(worker):
+                del self._pending[key]
+        self._resume_timer.start()
+
+    def thumbnails(self, song, theme, overrides: dict) -> list:
+        """
+        Ảnh thu nhỏ các slide của một bài; bài chưa được chuẩn bị xong thì vẽ ngay ở luồng giao diện,
+        chỉ với ảnh nền đã chuẩn bị sẵn (không giải mã ảnh gốc ở luồng giao diện).
+        """
+        key = _song_key(song, theme, overrides)
+        if key not in self._pixmaps:
+            images = self._images.pop(key, None)
+            if images is None:
+                images = _prepare_song(song, theme, overrides, prepare_background=False)
+                self._drawn_here.add(key)
+            self._pixmaps[key] = [QPixmap.fromImage(image) for image in images]
+        return self._pixmaps[key]
+
+    def backgrounds_prepared(self):
+        """Worker vừa chuẩn bị xong ảnh nền: bỏ các ảnh thu nhỏ đã vẽ ở luồng giao diện để vẽ lại với ảnh nền."""
+        for key in self._drawn_here:
+            self._pixmaps.pop(key, None)
+        self._drawn_here.clear()
+        if not self._resume_timer.isActive():
+            self._start_pending()
+
+    def _start_pending(self):
+        for song in self._songs:
+            key = _song_key(song, self._theme, self._overrides)
+            if key in self._images or key in self._pixmaps or key in self._pending:
+                continue
+            worker = Worker(_prepare_song, song, self._theme, self._overrides)
+            worker.signals.finished.connect(lambda images, key=key: self._on_prepared(key, images))
+            worker.signals.error.connect(lambda _, key=key: self._pending.pop(key, None))
+            self._pending[key] = start_worker(worker, PREFETCH_PRIORITY)
+
+    def _on_prepared(self, key: tuple, images: list):
+        self._pending.pop(key, None)
+        if key in self._pixmaps or key not in {_song_key(song, self._theme, self._overrides) for song in self._songs}:
+            return # Đã vẽ ngay ở luồng giao diện, hoặc bài/theme đã thay đổi trong lúc chuẩn bị
+        self._images[key] = images
+        counter("preview.prefetch", ready=len(self._images) + len(self._pixmaps), pending=len(self._pending))
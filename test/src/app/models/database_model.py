@@ -1,16 +1,79 @@
 # src/app/models/database_model.py
 
+import json
 import sqlite3
+import uuid
+from dataclasses import fields
+from pathlib import Path
 from typing import List, Optional, Tuple
 from.song_model import Songbook, Song, Theme
+from utils.lyric_codec import LyricCodec, dictionary_id_of
+from utils.query_stats import QUERY_STATS, InstrumentedConnection
+from utils.tracing import traced_methods
 
+# Thứ tự cột khớp với thứ tự trường của Song, để dựng bản ghi trực tiếp từ tuple
+SONG_COLUMNS = "id, songbook_id, title, lyrics, number, page"
+
+# Chủ đề mặc định (luôn tồn tại, không xóa được)
+DEFAULT_THEME_ID = 1
+
+# Ở chế độ thư viện chỉ đọc, bản ghi mới của người dùng được cấp id từ mốc này
+# để không trùng với id của thư viện đi kèm (kể cả khi thư viện được cập nhật).
+OVERLAY_ID_START = 10_000_000
+
+# Cấu hình kết nối đã tinh chỉnh:
+# - WAL: người đọc không chặn người ghi, ghi nhanh hơn (chỉ nối vào tệp -wal)
+# - synchronous=NORMAL: an toàn với WAL (chỉ có thể mất giao dịch cuối khi mất điện)
+# - mmap/cache: đọc thư viện lớn mà không phải sao chép trang qua lời gọi read()
+CONNECTION_PROFILE = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -16000, # số âm = KiB, tức khoảng 16MB
+    "temp_store": "MEMORY",
+}
+# Cấu hình khi mở thư viện của máy khác để đồng bộ trực tiếp (thư mục mạng, ổ USB):
+# WAL không dùng được trên hệ thống tệp mạng và để lại tệp -wal/-shm trên ổ rời, nên dùng
+# journal rollback (DELETE, tệp WAL cũ cũng được chuyển về), ghi đồng bộ đầy đủ và không mmap.
+PEER_CONNECTION_PROFILE = {**CONNECTION_PROFILE, "journal_mode": "DELETE", "synchronous": "FULL", "mmap_size": 0}
+# Số câu lệnh đã biên dịch được giữ lại để dùng lại (mặc định của Python là 128)
+STATEMENT_CACHE_SIZE = 512
+# Số trang được sao chép mỗi bước khi sao lưu trực tuyến; giữa các bước khóa được nhả ra
+BACKUP_PAGES_PER_STEP = 256
+
+# Mỗi phương thức công khai là một span "db.<tên>" khi đang ghi vết
+@traced_methods("db", lambda name: not name.startswith("_"))
 class DatabaseModel:
     """
     Lớp quản lý tất cả các tương tác với cơ sở dữ liệu SQLite.
     Đây là thành phần Model duy nhất giao tiếp trực tiếp với DB.
+
+    Có hai chế độ:
+    - Thông thường: một tệp database đọc-ghi (db_path).
+    - Thư viện chỉ đọc (base_path): thư viện đi kèm được mở ở dạng URI
+      `mode=ro&immutable=1` (không khóa, đọc bằng mmap được) và gắn (ATTACH) vào
+      một database "lớp phủ" nhỏ của người dùng (db_path). Mọi thay đổi được ghi
+      vào lớp phủ; các truy vấn đọc đi qua view gộp hai nguồn.
     """
-    def __init__(self, db_path: str):
-        self.conn = sqlite3.connect(db_path)
+    def __init__(self, db_path: str, base_path: Optional[str] = None, profile: dict = CONNECTION_PROFILE):
+        self._connect(db_path, base_path, profile)
+        self._apply_connection_profile()
+        self._create_tables()
+        self._create_sync_tracking()
+        if base_path:
+            self._attach_base_library(base_path)
+            self._reserve_overlay_ids()
+        self._ensure_default_theme()
+        self._load_lyric_codecs()
+
+    def _connect(self, db_path: str, base_path: Optional[str], profile: dict):
+        """Mở kết nối (chưa áp dụng pragma, chưa tạo bảng); dùng chung cho __init__ và clone()."""
+        self.db_path = db_path
+        self.base_path = base_path
+        self._profile = profile
+        # Mọi câu lệnh qua kết nối này được đo (utils.query_stats)
+        self.conn = sqlite3.connect(db_path, uri=True, cached_statements=STATEMENT_CACHE_SIZE,
+                                    factory=InstrumentedConnection)
         
         # <<< SỬA LỖI UNICODE TẠI ĐÂY >>>
         # Dòng này đảm bảo dữ liệu văn bản đọc ra từ database
@@ -18,12 +81,38 @@ class DatabaseModel:
         self.conn.text_factory = str
         
         self.conn.row_factory = sqlite3.Row
+        # song_id -> tựa đề lần đọc trước; tựa đề không đổi giữa các lần tải lại sẽ dùng chung
+        # một đối tượng chuỗi thay vì giữ nhiều bản sao. Mỗi lần tải cả danh mục, bộ nhớ này được
+        # dựng lại từ đúng các bài vừa đọc, nên không bao giờ lớn hơn danh mục
+        self._title_pool = {}
         self.conn.execute("PRAGMA foreign_keys = ON;")
-        self._create_tables()
-        self._ensure_default_theme()
+        # Nguồn để đọc bài hát/sách: bảng trực tiếp hoặc view gộp với thư viện chỉ đọc
+        self._songs = "songs"
+        self._songbooks = "songbooks"
 
     #... các phương thức còn lại giữ nguyên không thay đổi...
 
+    def _apply_connection_profile(self, schema: str = "main", connection_only: bool = False):
+        """
+        Áp dụng cấu hình kết nối (mặc định CONNECTION_PROFILE) cho một database (main hoặc thư viện 'base' đã gắn).
+        connection_only: bỏ qua các thiết lập lưu trong tệp (auto_vacuum, journal_mode) mà kết nối chính đã đặt.
+        """
+        if schema == "main":
+            if not connection_only:
+                # Chỉ có hiệu lực với database mới tạo; database cũ được chuyển đổi khi VACUUM
+                self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            for pragma, value in self._profile.items():
+                if connection_only and pragma == "journal_mode":
+                    continue
+                if pragma == "temp_store":
+                    self.conn.execute(f"PRAGMA temp_store = {value}")
+                else:
+                    self.conn.execute(f"PRAGMA main.{pragma} = {value}")
+        else:
+            # Thư viện bất biến: không có journal, chỉ cần mmap và cache
+            self.conn.execute(f"PRAGMA {schema}.mmap_size = {CONNECTION_PROFILE['mmap_size']}")
+            self.conn.execute(f"PRAGMA {schema}.cache_size = {CONNECTION_PROFILE['cache_size']}")
+
     def _create_tables(self):
         cursor = self.conn.cursor()
         # Bảng Sách bài hát
@@ -54,6 +143,7 @@ class DatabaseModel:
                 slide_width INTEGER NOT NULL,
                 slide_height INTEGER NOT NULL,
                 bg_color TEXT NOT NULL,
+                bg_image TEXT NOT NULL DEFAULT '',
                 title_font_name TEXT NOT NULL,
                 title_font_size INTEGER NOT NULL,
                 title_font_color TEXT NOT NULL,
@@ -69,62 +159,746 @@ class DatabaseModel:
                 lyric_font_underline BOOLEAN NOT NULL
             )
         """)
+        # Cột thêm sau: database tạo bởi phiên bản cũ được bổ sung khi mở
+        theme_columns = {row['name'] for row in cursor.execute("PRAGMA main.table_info(themes)")}
+        if 'bg_image' not in theme_columns:
+            cursor.execute("ALTER TABLE themes ADD COLUMN bg_image TEXT NOT NULL DEFAULT ''")
+        # Bảng đánh dấu bản ghi của thư viện chỉ đọc đã bị người dùng xóa
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS overlay_tombstones (
+                kind TEXT NOT NULL, -- 'song' hoặc 'songbook'
+                id INTEGER NOT NULL,
+                PRIMARY KEY (kind, id)
+            )
+        """)
+        # Bảng Kết quả nhận dạng lời từ ảnh, theo mã băm nội dung ảnh và backend nhận dạng
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS recognition_cache (
+                content_hash TEXT NOT NULL,
+                backend TEXT NOT NULL,
+                text TEXT NOT NULL,
+                PRIMARY KEY (content_hash, backend)
+            )
+        """)
+        # Bảng Công việc nhập tệp (PDF/tập ảnh), tiếp tục được sau khi bị gián đoạn
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS import_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL, -- 'pdf' hoặc 'image'
+                source_key TEXT NOT NULL, -- mã băm của danh sách mã băm các trang
+                sources TEXT NOT NULL, -- JSON danh sách đường dẫn tệp
+                status TEXT NOT NULL DEFAULT 'open', -- 'open' hoặc 'done'
+                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_import_jobs_source ON import_jobs (source_key, status)")
+        # Từng trang của công việc nhập: pending -> extracted -> reviewed -> committed
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS import_pages (
+                job_id INTEGER NOT NULL,
+                page_index INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                text TEXT,
+                PRIMARY KEY (job_id, page_index),
+                FOREIGN KEY (job_id) REFERENCES import_jobs (id) ON DELETE CASCADE
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_import_pages_hash ON import_pages (content_hash)")
+        # Các bài hát người dùng đã duyệt, chờ được ghi vào thư viện
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS import_candidates (
+                job_id INTEGER NOT NULL,
+                songbook_id INTEGER NOT NULL,
+                title TEXT NOT NULL,
+                lyrics TEXT NOT NULL,
+                number TEXT,
+                page TEXT,
+                FOREIGN KEY (job_id) REFERENCES import_jobs (id) ON DELETE CASCADE
+            )
+        """)
+        # Bảng Chữ ký MinHash của lời bài hát (phát hiện bài gần trùng); chữ ký rỗng = lời không có chữ
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS song_signatures (
+                song_id INTEGER PRIMARY KEY,
+                signature BLOB NOT NULL
+            )
+        """)
+        # Khóa LSH của từng dải chữ ký: các bài chung một khóa là ứng viên trùng nhau
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS song_lsh_bands (
+                band_key INTEGER NOT NULL,
+                song_id INTEGER NOT NULL,
+                PRIMARY KEY (band_key, song_id)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_song_lsh_bands_song ON song_lsh_bands (song_id)")
+        # Bảng Kết quả kiểm tra bố cục slide, theo bài hát và khóa bố cục của theme
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS slide_audit (
+                layout_key TEXT NOT NULL,
+                song_id INTEGER NOT NULL,
+                slide_count INTEGER NOT NULL,
+                long_lines INTEGER NOT NULL,
+                orphan_slides INTEGER NOT NULL,
+                overflow_slides INTEGER NOT NULL,
+                PRIMARY KEY (layout_key, song_id)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_slide_audit_song ON slide_audit (song_id)")
+        # Lời bài hát thay đổi thì chữ ký và kết quả kiểm tra cũ không còn đúng: xóa để lần sau tính lại
+        derived_tables = {"signature": ("song_signatures", "song_lsh_bands"), "slide_audit": ("slide_audit",)}
+        for name, tables in derived_tables.items():
+            for event, row in (("INSERT", "new"), ("UPDATE OF lyrics", "old"), ("DELETE", "old")):
+                trigger = event.split()[0].lower()
+                deletes = "".join(f"DELETE FROM {table} WHERE song_id = {row}.id;" for table in tables)
+                cursor.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS songs_{name}_{trigger} AFTER {event} ON songs
+                    BEGIN {deletes} END
+                """)
+        # Bảng Từ điển nén lời bài hát (chế độ lưu trữ nén, tùy chọn)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS lyric_dictionaries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                data BLOB NOT NULL,
+                active BOOLEAN NOT NULL DEFAULT 0
+            )
+        """)
+        self.conn.commit()
+
+    # --- Theo dõi thay đổi để đồng bộ giữa các máy ---
+    def _create_sync_tracking(self):
+        """
+        Mỗi sách/bài hát có một dòng trong sync_rows:
+        - uid: định danh chung giữa các máy, sinh từ tên sách / tựa đề lúc tạo
+          (hai bản sao của cùng một lyrics.db, hay cùng một bài được thêm ở hai máy, có cùng uid).
+        - clock, site: đồng hồ Lamport và máy đã ghi lần cuối; (clock, site) lớn hơn thắng khi xung đột.
+        - seq: thứ tự thay đổi trên máy này, dùng để chỉ gửi các dòng thay đổi từ lần đồng bộ trước.
+        - deleted: bia mộ của bản ghi đã xóa (local_id = NULL).
+        Các trigger cập nhật bảng này cho mọi lệnh ghi; khi đang áp dụng thay đổi từ máy khác
+        (sync_meta có khóa 'applying') thì trigger bỏ qua.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("CREATE TABLE IF NOT EXISTS sync_meta (key TEXT PRIMARY KEY, value TEXT)")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sync_rows (
+                uid TEXT PRIMARY KEY,
+                kind TEXT NOT NULL, -- 'song' hoặc 'songbook'
+                local_id INTEGER,
+                clock INTEGER NOT NULL,
+                site TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                deleted BOOLEAN NOT NULL DEFAULT 0
+            )
+        """)
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS sync_rows_local ON sync_rows (kind, local_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS sync_rows_seq ON sync_rows (seq)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS sync_rows_clock ON sync_rows (clock)")
+        # Số thứ tự thay đổi cao nhất của từng máy khác mà máy này đã nhận
+        cursor.execute("CREATE TABLE IF NOT EXISTS sync_peers (site TEXT PRIMARY KEY, last_seq INTEGER NOT NULL)")
+
+        cursor.execute("SELECT value FROM sync_meta WHERE key = 'site'")
+        if cursor.fetchone() is None:
+            cursor.execute("INSERT INTO sync_meta (key, value) VALUES ('site',?)", (uuid.uuid4().hex,))
+            # Dữ liệu có sẵn: clock = 0 (mọi chỉnh sửa thật đều thắng), seq theo id để lần đồng bộ đầu gửi đủ
+            cursor.execute("""
+                INSERT OR IGNORE INTO sync_rows (uid, kind, local_id, clock, site, seq)
+                SELECT 'b:' || name, 'songbook', id, 0, '', id FROM songbooks
+            """)
+            cursor.execute("""
+                INSERT OR IGNORE INTO sync_rows (uid, kind, local_id, clock, site, seq)
+                SELECT 'b:' || sb.name || '/' || s.title, 'song', s.id, 0, '',
+                       (SELECT COALESCE(MAX(id), 0) FROM songbooks) + s.id
+                FROM songs s JOIN songbooks sb ON sb.id = s.songbook_id
+            """)
+
+        not_applying = "NOT EXISTS (SELECT 1 FROM sync_meta WHERE key = 'applying')"
+        stamp = """clock = (SELECT COALESCE(MAX(clock), 0) + 1 FROM sync_rows),
+                   site = (SELECT value FROM sync_meta WHERE key = 'site'),
+                   seq = (SELECT COALESCE(MAX(seq), 0) + 1 FROM sync_rows)"""
+        for kind, table, uid_sql, columns in (
+            ("songbook", "songbooks", "'b:' || NEW.name", "name"),
+            ("song", "songs", "COALESCE((SELECT uid FROM sync_rows WHERE kind = 'songbook' AND local_id = NEW.songbook_id),"
+                              " 'b:#' || NEW.songbook_id) || '/' || NEW.title",
+             "songbook_id, title, number, page, lyrics"),
+        ):
+            # uid đã được dùng (vd. tạo lại bài đã đổi tên/đã xóa): thêm hậu tố để không trùng
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_sync_insert AFTER INSERT ON {table} WHEN {not_applying}
+                BEGIN
+                    INSERT INTO sync_rows (uid, kind, local_id, clock, site, seq)
+                    VALUES (CASE WHEN EXISTS (SELECT 1 FROM sync_rows WHERE uid = {uid_sql})
+                                 THEN {uid_sql} || '#' || lower(hex(randomblob(4))) ELSE {uid_sql} END,
+                            '{kind}', NEW.id, 0, '', 0);
+                    UPDATE sync_rows SET {stamp} WHERE kind = '{kind}' AND local_id = NEW.id;
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_sync_update AFTER UPDATE OF {columns} ON {table} WHEN {not_applying}
+                BEGIN
+                    UPDATE sync_rows SET {stamp} WHERE kind = '{kind}' AND local_id = NEW.id;
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_sync_delete AFTER DELETE ON {table} WHEN {not_applying}
+                BEGIN
+                    UPDATE sync_rows SET deleted = 1, local_id = NULL, {stamp} WHERE kind = '{kind}' AND local_id = OLD.id;
+                END
+            """)
+        self.conn.commit()
+
+    def _set_untracked(self, untracked: bool):
+        """Tạm tắt trigger theo dõi thay đổi trong giao dịch hiện tại (chỉ kết nối này thấy)."""
+        if untracked:
+            self.conn.execute("INSERT OR IGNORE INTO sync_meta (key, value) VALUES ('applying', '1')")
+        else:
+            self.conn.execute("DELETE FROM sync_meta WHERE key = 'applying'")
+
+    def get_sync_site(self) -> str:
+        """Định danh của database này khi đồng bộ."""
+        return self.conn.execute("SELECT value FROM sync_meta WHERE key = 'site'").fetchone()[0]
+
+    def reset_sync_site(self):
+        """
+        Cấp định danh mới cho database này. Dùng khi tệp được sao chép từ máy khác:
+        hai bản sao có cùng định danh sẽ không nhận ra thay đổi của nhau.
+        Các dòng mang định danh cũ (kể cả bài sửa trên bản sao trước lần đồng bộ đầu) được chuyển sang
+        định danh mới, nếu không máy gốc sẽ bỏ qua chúng như thay đổi của chính nó.
+        """
+        old_site, new_site = self.get_sync_site(), uuid.uuid4().hex
+        self.conn.execute("UPDATE sync_meta SET value =? WHERE key = 'site'", (new_site,))
+        self.conn.execute("UPDATE sync_rows SET site =? WHERE site =?", (new_site, old_site))
+        self.conn.execute("DELETE FROM sync_peers")
+        self.conn.commit()
+
+    def get_sync_seq(self) -> int:
+        """Số thứ tự thay đổi mới nhất trên máy này."""
+        return self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM sync_rows").fetchone()[0]
+
+    def get_peer_seq(self, site: str) -> int:
+        """Số thứ tự thay đổi cao nhất của máy `site` đã được áp dụng vào database này."""
+        row = self.conn.execute("SELECT last_seq FROM sync_peers WHERE site =?", (site,)).fetchone()
+        return row[0] if row else 0
+
+    def export_changes(self, since_seq: int = 0, exclude_site: Optional[str] = None) -> dict:
+        """
+        Tập thay đổi gồm các dòng có seq > since_seq, theo thứ tự seq.
+        Bỏ qua các dòng mà máy exclude_site là nơi ghi cuối (máy đó đã có).
+        """
+        if self.is_overlay_mode():
+            raise ValueError("Không hỗ trợ đồng bộ ở chế độ thư viện chỉ đọc.")
+        cursor = self.conn.cursor()
+        cursor.execute(f"""
+            SELECT r.uid, r.kind, r.clock, r.site, r.seq, r.deleted,
+                   sb.name, sbr.uid AS songbook_uid, s.title, s.number, s.page, s.lyrics
+            FROM sync_rows r
+            LEFT JOIN songbooks sb ON r.kind = 'songbook' AND sb.id = r.local_id
+            LEFT JOIN songs s ON r.kind = 'song' AND s.id = r.local_id
+            LEFT JOIN sync_rows sbr ON sbr.kind = 'songbook' AND sbr.local_id = s.songbook_id
+            WHERE r.seq >? AND r.site IS NOT?
+            ORDER BY r.seq
+        """, (since_seq, exclude_site))
+        changes = []
+        for row in cursor:
+            change = {"uid": row['uid'], "kind": row['kind'], "clock": row['clock'],
+                      "site": row['site'], "deleted": bool(row['deleted'])}
+            if not row['deleted']:
+                if row['kind'] == 'songbook':
+                    change["name"] = row['name']
+                else:
+                    change.update(songbook=row['songbook_uid'], title=row['title'], number=row['number'],
+                                  page=row['page'], lyrics=self._decode_lyrics(row['lyrics']))
+            changes.append(change)
+        return {"site": self.get_sync_site(), "seq": self.get_sync_seq(), "since": since_seq, "changes": changes}
+
+    def apply_changes(self, changeset: dict) -> dict:
+        """
+        Áp dụng tập thay đổi của máy khác trong một giao dịch.
+        Xung đột được giải quyết tất định: (clock, site) lớn hơn thắng, kể cả với thao tác xóa,
+        nên mọi máy nhận cùng các thay đổi sẽ hội tụ về cùng một trạng thái.
+        Trả về số dòng: applied, ignored (bản cục bộ mới hơn), skipped (sách không còn tồn tại).
+        """
+        if self.is_overlay_mode():
+            raise ValueError("Không hỗ trợ đồng bộ ở chế độ thư viện chỉ đọc.")
+        if changeset["site"] == self.get_sync_site():
+            raise ValueError("Tập thay đổi được tạo từ chính database này (hoặc một bản sao chưa được cấp định danh mới).")
+        counts = {"applied": 0, "ignored": 0, "skipped": 0}
+        cursor = self.conn.cursor()
+        with self.conn:
+            self._set_untracked(True)
+            seq = self.get_sync_seq()
+            for change in changeset["changes"]:
+                cursor.execute("SELECT local_id, clock, site FROM sync_rows WHERE uid =?", (change["uid"],))
+                local = cursor.fetchone()
+                if local and (local['clock'], local['site']) >= (change["clock"], change["site"]):
+                    counts["ignored"] += 1
+                    continue
+                local_id = local['local_id'] if local else None
+                if change["deleted"]:
+                    if local_id is not None:
+                        table = "songbooks" if change["kind"] == "songbook" else "songs"
+                        if table == "songbooks":
+                            # Bài hát trong sách bị xóa theo (ON DELETE CASCADE): ghi bia mộ cho chúng
+                            seq += 1
+                            cursor.execute("""
+                                UPDATE sync_rows SET deleted = 1, local_id = NULL, seq =?
+                                WHERE kind = 'song' AND local_id IN (SELECT id FROM songs WHERE songbook_id =?)
+                            """, (seq, local_id))
+                        else:
+                            self._title_pool.pop(local_id, None)
+                        cursor.execute(f"DELETE FROM {table} WHERE id =?", (local_id,))
+                    local_id = None
+                elif change["kind"] == "songbook":
+                    local_id = self._apply_songbook_change(change, local_id)
+                else:
+                    cursor.execute("SELECT local_id FROM sync_rows WHERE uid =? AND deleted = 0", (change["songbook"],))
+                    songbook = cursor.fetchone()
+                    if songbook is None:
+                        counts["skipped"] += 1
+                        continue
+                    local_id = self._apply_song_change(change, songbook['local_id'], local_id)
+                seq += 1
+                cursor.execute("""
+                    INSERT INTO sync_rows (uid, kind, local_id, clock, site, seq, deleted) VALUES (?,?,?,?,?,?,?)
+                    ON CONFLICT(uid) DO UPDATE SET local_id = excluded.local_id, clock = excluded.clock,
+                        site = excluded.site, seq = excluded.seq, deleted = excluded.deleted
+                """, (change["uid"], change["kind"], local_id, change["clock"], change["site"], seq, change["deleted"]))
+                counts["applied"] += 1
+            cursor.execute("""
+                INSERT INTO sync_peers (site, last_seq) VALUES (?,?)
+                ON CONFLICT(site) DO UPDATE SET last_seq = MAX(last_seq, excluded.last_seq)
+            """, (changeset["site"], changeset["seq"]))
+            self._set_untracked(False)
+        return counts
+
+    def _resolve_name_clash(self, table: str, column: str, value: str, uid: str, scope_sql: str = "", scope=()) -> str:
+        """
+        Tên/tựa đề mới trùng với một bản ghi khác (khác uid, vd. một bên đổi tên còn bên kia tạo mới).
+        Bản ghi có uid lớn hơn nhận hậu tố " (2)", " (3)"...; cả hai máy đều chọn giống nhau.
+        Trả về tên dùng cho bản ghi đến.
+        """
+        kind = "songbook" if table == "songbooks" else "song"
+        cursor = self.conn.cursor()
+        cursor.execute(f"""
+            SELECT t.id, r.uid FROM {table} t JOIN sync_rows r ON r.kind = '{kind}' AND r.local_id = t.id
+            WHERE t.{column} =? {scope_sql}
+        """, (value, *scope))
+        other = cursor.fetchone()
+        if other is None or other['uid'] == uid:
+            return value
+
+        def free_name():
+            n = 2
+            while True:
+                candidate = f"{value} ({n})"
+                cursor.execute(f"SELECT 1 FROM {table} WHERE {column} =? {scope_sql}", (candidate, *scope))
+                if cursor.fetchone() is None:
+                    return candidate
+                n += 1
+
+        if uid > other['uid']:
+            return free_name()
+        cursor.execute(f"UPDATE {table} SET {column} =? WHERE id =?", (free_name(), other['id']))
+        return value
+
+    def _apply_songbook_change(self, change: dict, local_id: Optional[int]) -> int:
+        cursor = self.conn.cursor()
+        name = self._resolve_name_clash("songbooks", "name", change["name"], change["uid"],
+                                        "AND id IS NOT?", (local_id,))
+        if local_id is None:
+            cursor.execute("INSERT INTO songbooks (name) VALUES (?)", (name,))
+            return cursor.lastrowid
+        cursor.execute("UPDATE songbooks SET name =? WHERE id =?", (name, local_id))
+        return local_id
+
+    def _apply_song_change(self, change: dict, songbook_id: int, local_id: Optional[int]) -> int:
+        cursor = self.conn.cursor()
+        title = self._resolve_name_clash("songs", "title", change["title"], change["uid"],
+                                         "AND songbook_id =? AND id IS NOT?", (songbook_id, local_id))
+        values = (songbook_id, title, change["number"], change["page"], self._encode_lyrics(change["lyrics"]))
+        if local_id is None:
+            cursor.execute("INSERT INTO songs (songbook_id, title, number, page, lyrics) VALUES (?,?,?,?,?)", values)
+            return cursor.lastrowid
+        cursor.execute("UPDATE songs SET songbook_id =?, title =?, number =?, page =?, lyrics =? WHERE id =?",
+                       (*values, local_id))
+        return local_id
+
+    # --- Thư viện chỉ đọc + lớp phủ của người dùng ---
+    def _attach_base_library(self, base_path: str):
+        """Gắn thư viện đi kèm ở chế độ chỉ đọc, bất biến và tạo các view gộp."""
+        base_uri = Path(base_path).resolve().as_uri() + "?mode=ro&immutable=1"
+        self.conn.execute("ATTACH DATABASE ? AS base", (base_uri,))
+        self._apply_connection_profile("base")
+        cursor = self.conn.cursor()
+        # Bản ghi trong lớp phủ che bản ghi cùng id của thư viện; bản ghi bị xóa được ẩn đi
+        cursor.execute("""
+            CREATE TEMP VIEW IF NOT EXISTS all_songbooks AS
+            SELECT id, name FROM main.songbooks
+            UNION ALL
+            SELECT id, name FROM base.songbooks
+            WHERE id NOT IN (SELECT id FROM main.songbooks)
+              AND id NOT IN (SELECT id FROM main.overlay_tombstones WHERE kind = 'songbook')
+        """)
+        cursor.execute(f"""
+            CREATE TEMP VIEW IF NOT EXISTS all_songs AS
+            SELECT {SONG_COLUMNS} FROM main.songs
+            UNION ALL
+            SELECT {SONG_COLUMNS} FROM base.songs
+            WHERE id NOT IN (SELECT id FROM main.songs)
+              AND id NOT IN (SELECT id FROM main.overlay_tombstones WHERE kind = 'song')
+              AND songbook_id NOT IN (SELECT id FROM main.overlay_tombstones WHERE kind = 'songbook')
+        """)
+        self._songs = "all_songs"
+        self._songbooks = "all_songbooks"
+
+    def _reserve_overlay_ids(self):
+        """Cấp id cho bản ghi mới của người dùng từ một dải riêng (ghi vào sqlite_sequence của lớp phủ)."""
+        cursor = self.conn.cursor()
+        for table in ("songs", "songbooks"):
+            base_max = cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM base.{table}").fetchone()[0]
+            start = max(base_max, OVERLAY_ID_START)
+            cursor.execute("UPDATE main.sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (start, table))
+            if cursor.rowcount == 0:
+                cursor.execute("INSERT INTO main.sqlite_sequence (name, seq) VALUES (?, ?)", (table, start))
+        self.conn.commit()
+
+    def is_overlay_mode(self) -> bool:
+        return self.base_path is not None
+
+    def _in_base(self, table: str, row_id: int) -> bool:
+        cursor = self.conn.cursor()
+        cursor.execute(f"SELECT 1 FROM base.{table} WHERE id =?", (row_id,))
+        return cursor.fetchone() is not None
+
+    def _materialize_songbook(self, songbook_id: int):
+        """Chép một sách của thư viện vào lớp phủ để bài hát của người dùng có thể tham chiếu tới (khóa ngoại)."""
+        self.conn.execute(
+            "INSERT OR IGNORE INTO main.songbooks (id, name) SELECT id, name FROM base.songbooks WHERE id =?",
+            (songbook_id,))
+
+    def _songbook_name_taken(self, name: str, exclude_id: Optional[int] = None) -> bool:
+        cursor = self.conn.cursor()
+        cursor.execute(f"SELECT id FROM {self._songbooks} WHERE name =? AND id IS NOT ?", (name, exclude_id))
+        return cursor.fetchone() is not None
+
+    # --- Lưu trữ lời bài hát dạng nén ---
+    def _load_lyric_codecs(self):
+        """
+        Nạp các từ điển nén; từ điển 'active' được dùng khi ghi lời bài hát mới.
+        Ở chế độ thư viện chỉ đọc, chỉ thư viện đi kèm có thể được nén; lớp phủ luôn lưu văn bản thường.
+        """
+        codecs = {}
+        active_codec = None
+        cursor = self.conn.cursor()
+        if self.is_overlay_mode():
+            cursor.execute("SELECT 1 FROM base.sqlite_master WHERE type = 'table' AND name = 'lyric_dictionaries'")
+            rows = []
+            if cursor.fetchone():
+                cursor.execute("SELECT id, data, 0 AS active FROM base.lyric_dictionaries")
+                rows = cursor.fetchall()
+        else:
+            cursor.execute("SELECT id, data, active FROM lyric_dictionaries")
+            rows = cursor.fetchall()
+        for row in rows:
+            codec = LyricCodec(row['id'], row['data'])
+            codecs[codec.dictionary_id] = codec
+            if row['active']:
+                active_codec = codec
+        self._use_lyric_codecs(codecs, active_codec)
+
+    def _use_lyric_codecs(self, codecs: dict, active_codec: Optional[LyricCodec]):
+        """Dùng các từ điển nén đã nạp (LyricCodec không giữ trạng thái nên dùng chung được giữa các kết nối)."""
+        self._codecs = codecs
+        self._active_codec = active_codec
+        if self._codecs:
+            # Cho phép tìm kiếm LIKE trên lời bài hát đã nén
+            self.conn.create_function("lyrics_text", 1, self._decode_lyrics, deterministic=True)
+        # Biểu thức SQL trả về lời bài hát dạng văn bản
+        self._lyrics_sql = "lyrics_text(lyrics)" if self._codecs else "lyrics"
+
+    def _encode_lyrics(self, text: str):
+        """Nén lời bài hát nếu chế độ lưu trữ nén đang bật, ngược lại giữ nguyên văn bản."""
+        if self._active_codec is None:
+            return text
+        return self._active_codec.compress(text)
+
+    def _decode_lyrics(self, value):
+        if isinstance(value, bytes):
+            return self._codecs[dictionary_id_of(value)].decompress(value)
+        return value
+
+    def _song_row_factory(self, cursor, row: tuple) -> Song:
+        """
+        Row factory dựng Song trực tiếp từ tuple (theo SONG_COLUMNS),
+        không qua sqlite3.Row hay dict trung gian.
+        """
+        song_id, songbook_id, title, lyrics, number, page = row
+        pooled_title = self._title_pool.get(song_id)
+        if pooled_title == title:
+            title = pooled_title
+        else:
+            self._title_pool[song_id] = title
+        if lyrics.__class__ is bytes:
+            lyrics = self._decode_lyrics(lyrics)
+        return Song(song_id, songbook_id, title, lyrics, number, page)
+
+    def _song_cursor(self) -> sqlite3.Cursor:
+        """Cursor trả về đối tượng Song cho các truy vấn SELECT {SONG_COLUMNS} FROM songs."""
+        cursor = self.conn.cursor()
+        cursor.row_factory = self._song_row_factory
+        return cursor
+
+    def is_lyric_compression_enabled(self) -> bool:
+        return self._active_codec is not None
+
+    def enable_lyric_compression(self, dictionary: bytes, recompress: bool = True) -> int:
+        """
+        Bật chế độ lưu trữ nén với một từ điển mới và (mặc định) nén lại toàn bộ lời bài hát.
+        Trả về id của từ điển.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("UPDATE lyric_dictionaries SET active = 0")
+        cursor.execute("INSERT INTO lyric_dictionaries (data, active) VALUES (?, 1)", (dictionary,))
+        dictionary_id = cursor.lastrowid
+        self.conn.commit()
+        self._load_lyric_codecs()
+        if recompress:
+            self._rewrite_all_lyrics()
+        return dictionary_id
+
+    def disable_lyric_compression(self):
+        """Tắt chế độ nén: giải nén toàn bộ lời bài hát về văn bản và xóa các từ điển."""
+        self._active_codec = None
+        self._rewrite_all_lyrics()
+        self.conn.execute("DELETE FROM lyric_dictionaries")
+        self.conn.commit()
+        self._load_lyric_codecs()
+
+    def _rewrite_all_lyrics(self):
+        """Ghi lại lời của mọi bài hát theo chế độ lưu trữ hiện tại, trong một giao dịch."""
+        read_cursor = self.conn.cursor()
+        read_cursor.execute("SELECT id, lyrics FROM songs")
+        updates = [(self._encode_lyrics(self._decode_lyrics(row['lyrics'])), row['id'])
+                   for row in read_cursor.fetchall()]
+        # Chỉ đổi cách lưu, nội dung không đổi: không tính là thay đổi cần đồng bộ
+        self._set_untracked(True)
+        self.conn.executemany("UPDATE songs SET lyrics =? WHERE id =?", updates)
+        self._set_untracked(False)
+        self.conn.commit()
+
+    def iter_all_lyrics(self):
+        """Duyệt lời (dạng văn bản) của mọi bài hát, dùng để huấn luyện từ điển."""
+        cursor = self.conn.cursor()
+        cursor.execute(f"SELECT lyrics FROM {self._songs}")
+        for row in cursor:
+            yield self._decode_lyrics(row['lyrics'])
+
+    def vacuum(self):
+        """
+        Thu hồi dung lượng trống trên đĩa (sau khi nén/giải nén hàng loạt).
+        Đồng thời chuyển database cũ sang chế độ auto_vacuum = INCREMENTAL.
+        """
+        self.conn.execute("VACUUM")
+
+    # --- Bảo trì và sao lưu ---
+    def run_maintenance(self, vacuum_pages: int = 500):
+        """
+        Bảo trì định kỳ, đủ nhanh để chạy khi ứng dụng đang mở:
+        - PRAGMA optimize: cập nhật thống kê cho bộ lập kế hoạch truy vấn khi cần.
+        - incremental_vacuum: trả lại tối đa `vacuum_pages` trang trống cho hệ điều hành.
+        """
+        self.conn.execute("PRAGMA optimize")
+        self.conn.execute(f"PRAGMA main.incremental_vacuum({int(vacuum_pages)})").fetchall()
         self.conn.commit()
 
+    def backup_to(self, dest_path: str, pages: int = BACKUP_PAGES_PER_STEP, progress_callback=None, sleep: float = 0.005):
+        """
+        Sao lưu trực tuyến database của người dùng sang dest_path bằng sqlite3.Connection.backup.
+        Dùng kết nối riêng nên có thể gọi từ luồng nền; sao chép từng `pages` trang một
+        và nhả khóa giữa các bước nên không chặn giao diện hay các thao tác ghi.
+        - progress_callback(copied, total): Hàm báo tiến độ (tùy chọn).
+        """
+        source = sqlite3.connect(self.db_path, uri=True)
+        target = sqlite3.connect(dest_path)
+        try:
+            def on_step(status, remaining, total):
+                if progress_callback is not None:
+                    progress_callback(total - remaining, total)
+            with target:
+                source.backup(target, pages=pages, progress=on_step, sleep=sleep)
+        finally:
+            target.close()
+            source.close()
+
     def _ensure_default_theme(self):
         """Đảm bảo rằng có một chủ đề mặc định trong DB."""
+        if not self.get_theme() and self.is_overlay_mode():
+            # Lần chạy đầu tiên với lớp phủ: lấy các chủ đề của thư viện đi kèm
+            main_columns = [row['name'] for row in self.conn.execute("PRAGMA main.table_info(themes)")]
+            base_columns = {row['name'] for row in self.conn.execute("PRAGMA base.table_info(themes)")}
+            columns = ", ".join(c for c in main_columns if c in base_columns)
+            if columns:
+                self.conn.execute(f"INSERT OR IGNORE INTO main.themes ({columns}) SELECT {columns} FROM base.themes")
+                self.conn.commit()
         if not self.get_theme():
-            default_theme = Theme()
+            default_theme = Theme(id=DEFAULT_THEME_ID)
             self.save_theme(default_theme)
 
-    def get_theme(self) -> Optional:
+    def get_theme(self, theme_id: int = DEFAULT_THEME_ID) -> Optional:
         cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM themes WHERE id = 1")
+        cursor.execute("SELECT * FROM themes WHERE id =?", (theme_id,))
         row = cursor.fetchone()
         if row:
             return Theme(**dict(row))
         return None
 
-    def save_theme(self, theme: Theme):
+    def get_themes(self) -> List[Theme]:
+        """Lấy tất cả các chủ đề đã lưu, theo thứ tự tạo."""
         cursor = self.conn.cursor()
-        # Câu lệnh INSERT OR REPLACE - Đã cập nhật
-        cursor.execute("""
-            INSERT OR REPLACE INTO themes (
-                id, name, slide_width, slide_height, bg_color, 
-                title_font_name, title_font_size, title_font_color, 
-                title_font_bold, title_font_italic, title_font_underline,
-                lyric_font_name, lyric_font_size, lyric_font_color, 
-                lyric_alignment, lyric_font_bold, lyric_font_italic, lyric_font_underline
-            )
-            VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
-        """, (
-            theme.id, theme.name, theme.slide_width, theme.slide_height, theme.bg_color,
-            theme.title_font_name, theme.title_font_size, theme.title_font_color,
-            theme.title_font_bold, theme.title_font_italic, theme.title_font_underline,
-            theme.lyric_font_name, theme.lyric_font_size, theme.lyric_font_color,
-            theme.lyric_alignment, theme.lyric_font_bold, theme.lyric_font_italic, theme.lyric_font_underline
-        ))
+        cursor.execute("SELECT * FROM themes ORDER BY id")
+        return [Theme(**dict(row)) for row in cursor.fetchall()]
+
+    def save_theme(self, theme: Theme) -> Optional[int]:
+        """
+        Lưu một chủ đề; theme.id là None thì thêm chủ đề mới và gán id cho nó.
+        Trả về id của chủ đề, hoặc None nếu tên đã được một chủ đề khác dùng (chủ đề kia không bị ghi đè).
+        """
+        columns = [f.name for f in fields(Theme) if f.name != 'id' or theme.id is not None]
+        assignments = ", ".join(f"{c} = excluded.{c}" for c in columns if c != 'id')
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(f"""
+                INSERT INTO themes ({', '.join(columns)}) VALUES ({','.join('?' for _ in columns)})
+                ON CONFLICT (id) DO UPDATE SET {assignments}
+            """, [getattr(theme, c) for c in columns])
+            self.conn.commit()
+        except sqlite3.IntegrityError:
+            return None # Tên chủ đề đã tồn tại
+        if theme.id is None:
+            theme.id = cursor.lastrowid
+        return theme.id
+
+    def delete_theme(self, theme_id: int) -> bool:
+        """Xóa một chủ đề; chủ đề mặc định không xóa được. Trả về True nếu đã xóa."""
+        if theme_id == DEFAULT_THEME_ID:
+            return False
+        cursor = self.conn.execute("DELETE FROM themes WHERE id =?", (theme_id,))
         self.conn.commit()
+        return cursor.rowcount > 0
 
     def get_songbooks_with_songs(self) -> List:
         songbooks_dict = {}
         cursor = self.conn.cursor()
         
-        cursor.execute("SELECT id, name FROM songbooks ORDER BY name")
+        cursor.execute(f"SELECT id, name FROM {self._songbooks} ORDER BY name")
         songbook_rows = cursor.fetchall()
         for row in songbook_rows:
-            songbook = Songbook(id=row['id'], name=row['name'])
+            songbook = Songbook(row['id'], row['name'])
             songbooks_dict[songbook.id] = songbook
 
-        cursor.execute("SELECT * FROM songs ORDER BY title")
-        song_rows = cursor.fetchall()
-        for row in song_rows:
-            song = Song(**dict(row))
+        song_cursor = self._song_cursor()
+        song_cursor.execute(f"SELECT {SONG_COLUMNS} FROM {self._songs} ORDER BY title")
+        songs = song_cursor.fetchall()
+        for song in songs:
             if song.songbook_id in songbooks_dict:
                 songbooks_dict[song.songbook_id].songs.append(song)
+        # Dựng lại bộ nhớ tựa đề từ danh mục vừa đọc (vẫn là các chuỗi dùng chung với lần trước):
+        # bài đã bị xóa hay đổi id theo bất kỳ đường nào đều rơi khỏi bộ nhớ
+        self._title_pool = {song.id: song.title for song in songs}
         
         return list(songbooks_dict.values())
+
+    def get_song_index_rows(self) -> List[Tuple]:
+        """
+        Lấy các cột gọn nhẹ (id, songbook_id, title, number) của mọi bài hát,
+        không kèm lời, để dựng chỉ mục mở nhanh.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(f"SELECT id, songbook_id, title, number FROM {self._songs}")
+        return [tuple(row) for row in cursor.fetchall()]
     
+    def get_songbooks(self) -> List[Songbook]:
+        """Lấy danh sách sách bài hát (không kèm bài hát), sắp xếp theo tên."""
+        cursor = self.conn.cursor()
+        cursor.execute(f"SELECT id, name FROM {self._songbooks} ORDER BY name")
+        return [Songbook(row['id'], row['name']) for row in cursor.fetchall()]
+
+    def count_songs(self) -> int:
+        """Tổng số bài hát trong thư viện."""
+        return self.conn.execute(f"SELECT COUNT(*) FROM {self._songs}").fetchone()[0]
+
+    def _build_song_filter(self, keyword: str, search_by: str) -> Optional[Tuple[str, list]]:
+        """
+        Dựng điều kiện WHERE (dạng " AND ...") cho bộ lọc tìm kiếm.
+        Trả về None nếu từ khóa không hợp lệ (ví dụ nhập chữ vào ô tìm số).
+        """
+        if not keyword:
+            return "", []
+        if search_by == 'title':
+            return " AND title LIKE?", [f"%{keyword}%"]
+        if search_by == 'lyrics':
+            return f" AND {self._lyrics_sql} LIKE?", [f"%{keyword}%"]
+        if search_by in ('number', 'page'):
+            try:
+                return f" AND {search_by} =?", [int(keyword)]
+            except ValueError:
+                return None
+        return "", []
+
+    def get_songbook_summaries(self, keyword: str = "", songbook_id: int = 0, search_by: str = "title") -> List[Songbook]:
+        """
+        Lấy các sách bài hát kèm số bài khớp bộ lọc bằng một truy vấn tổng hợp (COUNT),
+        không tải bài hát nào. Dùng cho cây sách bài hát tải lười (lazy).
+        Khi có từ khóa, chỉ trả về các sách có kết quả.
+        """
+        song_filter = self._build_song_filter(keyword, search_by)
+        if song_filter is None:
+            return []
+        filter_sql, params = song_filter
+
+        query = f"""
+            SELECT sb.id, sb.name, COUNT(songs.id) AS song_count
+            FROM {self._songbooks} sb
+            LEFT JOIN {self._songs} songs ON songs.songbook_id = sb.id{filter_sql}
+            WHERE 1=1
+        """
+        if songbook_id > 0:
+            query += " AND sb.id =?"
+            params = params + [songbook_id]
+        query += " GROUP BY sb.id"
+        if keyword:
+            query += " HAVING song_count > 0"
+        query += " ORDER BY sb.name"
+
+        cursor = self.conn.cursor()
+        cursor.execute(query, tuple(params))
+        return [Songbook(id=row['id'], name=row['name'], song_count=row['song_count'])
+                for row in cursor.fetchall()]
+
+    def get_songs_page(self, songbook_id: int, after_title: Optional[str] = None, limit: int = 100,
+                       keyword: str = "", search_by: str = "title") -> List[Song]:
+        """
+        Lấy một trang bài hát của một sách, sắp xếp theo tựa đề.
+        Phân trang theo khóa (keyset) bằng `after_title` thay vì OFFSET, tận dụng
+        chỉ mục UNIQUE(songbook_id, title) nên mỗi trang có chi phí như nhau.
+        """
+        song_filter = self._build_song_filter(keyword, search_by)
+        if song_filter is None:
+            return []
+        filter_sql, params = song_filter
+
+        query = f"SELECT {SONG_COLUMNS} FROM {self._songs} WHERE songbook_id =?" + filter_sql
+        params = [songbook_id] + params
+        if after_title is not None:
+            query += " AND title >?"
+            params.append(after_title)
+        query += " ORDER BY title LIMIT?"
+        params.append(limit)
+
+        cursor = self._song_cursor()
+        cursor.execute(query, tuple(params))
+        return cursor.fetchall()
+
     def search_songs(self, keyword: str = "", songbook_id: int = 0, search_by: str = "title") -> List:
         """
         Tìm kiếm và lọc bài hát dựa trên các tiêu chí mới.
@@ -136,33 +910,34 @@ class DatabaseModel:
         cursor = self.conn.cursor()
 
         # Luôn lấy tất cả các sách để có thể điền kết quả vào
-        cursor.execute("SELECT id, name FROM songbooks ORDER BY name")
+        cursor.execute(f"SELECT id, name FROM {self._songbooks} ORDER BY name")
         for row in cursor.fetchall():
-            songbooks_dict[row['id']] = Songbook(id=row['id'], name=row['name'])
+            songbooks_dict[row['id']] = Songbook(row['id'], row['name'])
 
         # Nếu không có từ khóa, trả về tất cả bài hát (có thể lọc theo sách)
+        song_cursor = self._song_cursor()
         if not keyword:
-            query = "SELECT * FROM songs WHERE 1=1"
+            query = f"SELECT {SONG_COLUMNS} FROM {self._songs} WHERE 1=1"
             params = []
             if songbook_id > 0:
                 query += " AND songbook_id =?"
                 params.append(songbook_id)
             
             query += " ORDER BY title"
-            cursor.execute(query, tuple(params))
-            for row in cursor.fetchall():
-                song = Song(**dict(row))
+            song_cursor.execute(query, tuple(params))
+            for song in song_cursor.fetchall():
                 if song.songbook_id in songbooks_dict:
                     songbooks_dict[song.songbook_id].songs.append(song)
             return [sb for sb in songbooks_dict.values() if sb.songs]
 
         # Xây dựng câu truy vấn động nếu có từ khóa
-        query = "SELECT * FROM songs WHERE 1=1"
+        query = f"SELECT {SONG_COLUMNS} FROM {self._songs} WHERE 1=1"
         params = []
 
         # Xử lý trường tìm kiếm
         if search_by in ('title', 'lyrics'):
-            query += f" AND {search_by} LIKE?"
+            column = self._lyrics_sql if search_by == 'lyrics' else search_by
+            query += f" AND {column} LIKE?"
             params.append(f"%{keyword}%")
         elif search_by in ('number', 'page'):
             # Cố gắng chuyển từ khóa thành số, nếu thất bại sẽ không có kết quả
@@ -181,9 +956,8 @@ class DatabaseModel:
         query += " ORDER BY title"
         
         # Thực thi truy vấn và điền kết quả
-        cursor.execute(query, tuple(params))
-        for row in cursor.fetchall():
-            song = Song(**dict(row))
+        song_cursor.execute(query, tuple(params))
+        for song in song_cursor.fetchall():
             if song.songbook_id in songbooks_dict:
                 songbooks_dict[song.songbook_id].songs.append(song)
 
@@ -191,6 +965,8 @@ class DatabaseModel:
         return [sb for sb in songbooks_dict.values() if sb.songs]
 
     def add_songbook(self, name: str) -> Optional[int]:
+        if self.is_overlay_mode() and self._songbook_name_taken(name):
+            return None # Tên đã tồn tại trong thư viện đi kèm
         try:
             cursor = self.conn.cursor()
             cursor.execute("INSERT INTO songbooks (name) VALUES (?)", (name,))
@@ -200,6 +976,10 @@ class DatabaseModel:
             return None # Tên đã tồn tại
 
     def rename_songbook(self, songbook_id: int, new_name: str) -> bool:
+        if self.is_overlay_mode():
+            if self._songbook_name_taken(new_name, exclude_id=songbook_id):
+                return False
+            self._materialize_songbook(songbook_id)
         try:
             cursor = self.conn.cursor()
             cursor.execute("UPDATE songbooks SET name =? WHERE id =?", (new_name, songbook_id))
@@ -211,15 +991,21 @@ class DatabaseModel:
     def delete_songbook(self, songbook_id: int):
         cursor = self.conn.cursor()
         cursor.execute("DELETE FROM songbooks WHERE id =?", (songbook_id,))
+        if self.is_overlay_mode() and self._in_base("songbooks", songbook_id):
+            cursor.execute("INSERT OR IGNORE INTO overlay_tombstones (kind, id) VALUES ('songbook',?)", (songbook_id,))
         self.conn.commit()
 
     def add_song(self, song: Song) -> Optional[int]:
+        if self.is_overlay_mode():
+            if self.song_exists(song.title, song.songbook_id):
+                return None # Bài hát đã tồn tại trong sách này (kể cả trong thư viện đi kèm)
+            self._materialize_songbook(song.songbook_id)
         try:
             cursor = self.conn.cursor()
             cursor.execute("""
                 INSERT INTO songs (songbook_id, title, number, page, lyrics)
                 VALUES (?,?,?,?,?)
-            """, (song.songbook_id, song.title, song.number, song.page, song.lyrics))
+            """, (song.songbook_id, song.title, song.number, song.page, self._encode_lyrics(song.lyrics)))
             self.conn.commit()
             return cursor.lastrowid
         except sqlite3.IntegrityError:
@@ -227,29 +1013,386 @@ class DatabaseModel:
 
     def update_song(self, song: Song):
         cursor = self.conn.cursor()
-        cursor.execute("""
-            UPDATE songs SET title =?, number =?, page =?, lyrics =?, songbook_id =?
-            WHERE id =?
-        """, (song.title, song.number, song.page, song.lyrics, song.songbook_id, song.id))
+        if self.is_overlay_mode():
+            # Sửa một bài của thư viện đi kèm: ghi bản sao cùng id vào lớp phủ
+            self._materialize_songbook(song.songbook_id)
+            cursor.execute("""
+                INSERT INTO songs (id, songbook_id, title, number, page, lyrics)
+                VALUES (?,?,?,?,?,?)
+                ON CONFLICT(id) DO UPDATE SET title = excluded.title, number = excluded.number,
+                    page = excluded.page, lyrics = excluded.lyrics, songbook_id = excluded.songbook_id
+            """, (song.id, song.songbook_id, song.title, song.number, song.page, self._encode_lyrics(song.lyrics)))
+        else:
+            cursor.execute("""
+                UPDATE songs SET title =?, number =?, page =?, lyrics =?, songbook_id =?
+                WHERE id =?
+            """, (song.title, song.number, song.page, self._encode_lyrics(song.lyrics), song.songbook_id, song.id))
         self.conn.commit()
 
     def delete_song(self, song_id: int):
         cursor = self.conn.cursor()
         cursor.execute("DELETE FROM songs WHERE id =?", (song_id,))
+        if self.is_overlay_mode() and self._in_base("songs", song_id):
+            cursor.execute("INSERT OR IGNORE INTO overlay_tombstones (kind, id) VALUES ('song',?)", (song_id,))
         self.conn.commit()
+        self._title_pool.pop(song_id, None)
 
-    def get_song_by_id(self, song_id: int) -> Optional:
+    # --- Xuất/nhập hàng loạt ---
+    def clone(self) -> 'DatabaseModel':
+        """
+        Mở một kết nối mới tới cùng database (dùng trong luồng nền, vì kết nối sqlite3 không chia sẻ giữa các luồng).
+        Bảng, trigger, dải id của lớp phủ và từ điển nén đã được kết nối này chuẩn bị, nên bản sao chỉ mở kết nối,
+        áp dụng pragma của kết nối và gắn thư viện chỉ đọc; không ghi gì vào database khi giao diện có thể đang ghi.
+        """
+        clone = DatabaseModel.__new__(DatabaseModel)
+        clone._connect(self.db_path, self.base_path, self._profile)
+        clone._apply_connection_profile(connection_only=True)
+        if self.base_path:
+            clone._attach_base_library(self.base_path)
+        clone._use_lyric_codecs(self._codecs, self._active_codec)
+        return clone
+
+    def iter_songs(self, batch_size: int = 1000):
+        """Duyệt lần lượt mọi bài hát (đã giải nén lời), đọc theo từng lô để bộ nhớ không tăng theo kích thước thư viện."""
+        cursor = self._song_cursor()
+        cursor.execute(f"SELECT {SONG_COLUMNS} FROM {self._songs} ORDER BY songbook_id, id")
+        while True:
+            songs = cursor.fetchmany(batch_size)
+            if not songs:
+                break
+            yield from songs
+
+    def get_theme_rows(self) -> List[dict]:
+        """Lấy tất cả các chủ đề dưới dạng dict (tên cột -> giá trị)."""
         cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM songs WHERE id =?", (song_id,))
+        cursor.execute("SELECT * FROM themes ORDER BY id")
+        return [dict(row) for row in cursor.fetchall()]
+
+    def import_theme_row(self, theme_row: dict, overwrite: bool = False) -> bool:
+        """Nhập một chủ đề theo tên; trả về True nếu đã ghi."""
+        columns = [row['name'] for row in self.conn.execute("PRAGMA main.table_info(themes)") if row['name'] != 'id']
+        values = {c: theme_row[c] for c in columns if c in theme_row}
+        if 'name' not in values:
+            return False
+        existing = self.conn.execute("SELECT id FROM themes WHERE name =?", (values['name'],)).fetchone()
+        if existing and not overwrite:
+            return False
+        if existing:
+            assignments = ", ".join(f"{c} =?" for c in values)
+            self.conn.execute(f"UPDATE themes SET {assignments} WHERE id =?", (*values.values(), existing['id']))
+        else:
+            placeholders = ",".join("?" for _ in values)
+            self.conn.execute(f"INSERT INTO themes ({', '.join(values)}) VALUES ({placeholders})", tuple(values.values()))
+        self.conn.commit()
+        return True
+
+    def ensure_songbook(self, name: str) -> int:
+        """Lấy id của sách theo tên, tạo mới nếu chưa có."""
+        cursor = self.conn.cursor()
+        cursor.execute(f"SELECT id FROM {self._songbooks} WHERE name =?", (name,))
         row = cursor.fetchone()
-        return Song(**dict(row)) if row else None
+        if row:
+            return row['id']
+        return self.add_songbook(name)
+
+    def import_songs_batch(self, songs: List[Song], on_conflict: str = "skip") -> dict:
+        """
+        Ghi một lô bài hát trong MỘT giao dịch (nhanh hơn nhiều so với commit từng bài).
+        Trùng UNIQUE(songbook_id, title) được xử lý theo on_conflict:
+        - 'skip': bỏ qua bài nhập vào.
+        - 'overwrite': ghi đè số bài, số trang và lời của bài đã có.
+        - 'rename': nhập với tựa đề mới "Tựa đề (2)", "Tựa đề (3)"...
+        Trả về số bài theo từng kết quả: inserted, updated, skipped, renamed.
+        """
+        if on_conflict not in ("skip", "overwrite", "rename"):
+            raise ValueError(f"on_conflict không hợp lệ: {on_conflict}")
+        with self.conn:
+            return self._import_songs(songs, on_conflict)
+
+    def _import_songs(self, songs: List[Song], on_conflict: str) -> dict:
+        """Phần việc của import_songs_batch, chạy trong giao dịch do hàm gọi mở."""
+        counts = {"inserted": 0, "updated": 0, "skipped": 0, "renamed": 0}
+        if not songs:
+            return counts
+
+        # Tra cứu các tựa đề đã tồn tại của lô này, nhóm theo sách
+        existing = {}
+        by_songbook = {}
+        for song in songs:
+            by_songbook.setdefault(song.songbook_id, set()).add(song.title)
+        cursor = self.conn.cursor()
+        for songbook_id, titles in by_songbook.items():
+            titles = list(titles)
+            for i in range(0, len(titles), 500):
+                chunk = titles[i:i + 500]
+                placeholders = ",".join("?" for _ in chunk)
+                cursor.execute(f"SELECT id, title FROM {self._songs} WHERE songbook_id =? AND title IN ({placeholders})",
+                               (songbook_id, *chunk))
+                for row in cursor.fetchall():
+                    existing[(songbook_id, row['title'])] = row['id']
+
+        inserts, updates = [], []
+        seen = set()
+        for song in songs:
+            key = (song.songbook_id, song.title)
+            if key in existing or key in seen:
+                if on_conflict == "skip":
+                    counts["skipped"] += 1
+                    continue
+                if on_conflict == "overwrite" and key in existing:
+                    updates.append((existing[key], song))
+                    counts["updated"] += 1
+                    continue
+                song.title = self._free_title(song.songbook_id, song.title, seen)
+                key = (song.songbook_id, song.title)
+                counts["renamed"] += 1
+            else:
+                counts["inserted"] += 1
+            seen.add(key)
+            inserts.append(song)
+
+        if self.is_overlay_mode():
+            for songbook_id in {song.songbook_id for song in songs}:
+                self._materialize_songbook(songbook_id)
+        self.conn.executemany(
+            "INSERT INTO songs (songbook_id, title, number, page, lyrics) VALUES (?,?,?,?,?)",
+            ((s.songbook_id, s.title, s.number, s.page, self._encode_lyrics(s.lyrics)) for s in inserts))
+        self.conn.executemany("""
+            INSERT INTO songs (id, songbook_id, title, number, page, lyrics) VALUES (?,?,?,?,?,?)
+            ON CONFLICT(id) DO UPDATE SET number = excluded.number, page = excluded.page, lyrics = excluded.lyrics
+        """, ((song_id, s.songbook_id, s.title, s.number, s.page, self._encode_lyrics(s.lyrics))
+              for song_id, s in updates))
+        return counts
+
+    def _free_title(self, songbook_id: int, title: str, reserved: set) -> str:
+        """Tìm tựa đề "title (n)" chưa được dùng trong sách."""
+        n = 2
+        while True:
+            candidate = f"{title} ({n})"
+            if (songbook_id, candidate) not in reserved and not self.song_exists(candidate, songbook_id):
+                return candidate
+            n += 1
+
+    # --- Bộ nhớ đệm nhận dạng ảnh ---
+    def get_cached_recognitions(self, backend: str, content_hashes: List[str]) -> dict:
+        """Trả về {mã băm: văn bản} của các ảnh đã được nhận dạng bởi backend này."""
+        found = {}
+        cursor = self.conn.cursor()
+        for i in range(0, len(content_hashes), 500):
+            chunk = content_hashes[i:i + 500]
+            placeholders = ",".join("?" for _ in chunk)
+            cursor.execute(f"SELECT content_hash, text FROM recognition_cache WHERE backend =? AND content_hash IN ({placeholders})",
+                           (backend, *chunk))
+            found.update((row['content_hash'], row['text']) for row in cursor.fetchall())
+        return found
+
+    def store_recognitions(self, backend: str, results: dict):
+        """Lưu {mã băm: văn bản} vào bộ nhớ đệm nhận dạng."""
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO recognition_cache (content_hash, backend, text) VALUES (?,?,?)",
+                                  ((content_hash, backend, text) for content_hash, text in results.items()))
+
+    # --- Chữ ký phát hiện bài hát gần trùng ---
+    def iter_song_lyrics(self, song_ids: List[int], batch_size: int = 1000):
+        """Trả về từng lô [(song_id, lời đã giải nén)] của các bài trong song_ids."""
+        for i in range(0, len(song_ids), batch_size):
+            chunk = song_ids[i:i + batch_size]
+            placeholders = ",".join("?" for _ in chunk)
+            rows = self.conn.execute(f"SELECT id, lyrics FROM {self._songs} WHERE id IN ({placeholders})", chunk)
+            yield [(row['id'], self._decode_lyrics(row['lyrics'])) for row in rows]
+
+    def _unchanged_entries(self, entries: list) -> list:
+        """
+        Giữ lại các bản ghi (song_id, lời đã dùng để tính, ...) mà lời bài hát chưa bị sửa
+        trong lúc tính; bản ghi của bài đã sửa/xóa bị bỏ để lần sau tính lại với lời mới.
+        """
+        current = {}
+        for i in range(0, len(entries), 500):
+            chunk = [entry[0] for entry in entries[i:i + 500]]
+            placeholders = ",".join("?" for _ in chunk)
+            current.update((row['id'], row['lyrics']) for row in self.conn.execute(
+                f"SELECT id, lyrics FROM {self._songs} WHERE id IN ({placeholders})", chunk))
+        return [entry for entry in entries
+                if entry[0] in current and self._decode_lyrics(current[entry[0]]) == entry[1]]
+
+    def iter_songs_without_signature(self, batch_size: int = 1000):
+        """
+        Trả về từng lô [(song_id, lời)] của các bài chưa có chữ ký. Chữ ký của bài đã bị xóa
+        (kể cả bài của thư viện chỉ đọc bị người dùng xóa) được dọn trước.
+        """
+        with self.conn:
+            self.conn.execute(f"DELETE FROM song_signatures WHERE song_id NOT IN (SELECT id FROM {self._songs})")
+            self.conn.execute(f"DELETE FROM song_lsh_bands WHERE song_id NOT IN (SELECT id FROM {self._songs})")
+        song_ids = [row[0] for row in self.conn.execute(
+            f"SELECT id FROM {self._songs} WHERE id NOT IN (SELECT song_id FROM song_signatures)")]
+        yield from self.iter_song_lyrics(song_ids, batch_size)
+
+    def store_song_signatures(self, entries: list):
+        """Lưu các (song_id, lời đã dùng để tính, chữ ký, khóa dải); bỏ qua bài đã bị sửa lời trong lúc tính."""
+        fresh = self._unchanged_entries(entries)
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO song_signatures (song_id, signature) VALUES (?,?)",
+                                  ((song_id, signature) for song_id, _, signature, _ in fresh))
+            self.conn.executemany("INSERT OR IGNORE INTO song_lsh_bands (band_key, song_id) VALUES (?,?)",
+                                  ((key, song_id) for song_id, _, _, keys in fresh for key in keys))
+
+    def get_signatures_by_band_keys(self, band_keys: List[int]) -> List[Tuple[int, bytes]]:
+        """Chữ ký của các bài có chung ít nhất một khóa dải LSH."""
+        placeholders = ",".join("?" for _ in band_keys)
+        return [(row[0], row[1]) for row in self.conn.execute(f"""
+            SELECT song_id, signature FROM song_signatures WHERE song_id IN (
+                SELECT song_id FROM song_lsh_bands WHERE band_key IN ({placeholders}))
+        """, band_keys)]
+
+    def get_lsh_buckets(self) -> List[List[int]]:
+        """Các nhóm song_id có chung một khóa dải LSH (chỉ nhóm từ 2 bài)."""
+        rows = self.conn.execute("SELECT group_concat(song_id) FROM song_lsh_bands "
+                                 "GROUP BY band_key HAVING count(*) > 1")
+        return [[int(song_id) for song_id in row[0].split(",")] for row in rows]
+
+    def get_song_signatures(self, song_ids) -> List[Tuple[int, bytes]]:
+        song_ids = list(song_ids)
+        signatures = []
+        for i in range(0, len(song_ids), 500):
+            chunk = song_ids[i:i + 500]
+            placeholders = ",".join("?" for _ in chunk)
+            signatures.extend((row[0], row[1]) for row in self.conn.execute(
+                f"SELECT song_id, signature FROM song_signatures WHERE song_id IN ({placeholders})", chunk))
+        return signatures
+
+    def get_song_labels(self, song_ids) -> dict:
+        """{song_id: (tựa đề, tên sách)} để hiển thị, không đọc lời bài hát."""
+        song_ids = list(song_ids)
+        labels = {}
+        for i in range(0, len(song_ids), 500):
+            chunk = song_ids[i:i + 500]
+            placeholders = ",".join("?" for _ in chunk)
+            labels.update((row[0], (row[1], row[2])) for row in self.conn.execute(f"""
+                SELECT s.id, s.title, sb.name FROM {self._songs} s JOIN {self._songbooks} sb ON sb.id = s.songbook_id
+                WHERE s.id IN ({placeholders})
+            """, chunk))
+        return labels
+
+    # --- Kiểm tra bố cục slide ---
+    def get_song_ids_without_audit(self, layout_key: str) -> List[int]:
+        """Các bài chưa được kiểm tra bố cục với khóa này (kết quả của bài đã xóa được dọn trước)."""
+        with self.conn:
+            self.conn.execute(f"DELETE FROM slide_audit WHERE song_id NOT IN (SELECT id FROM {self._songs})")
+        return [row[0] for row in self.conn.execute(
+            f"SELECT id FROM {self._songs} WHERE id NOT IN (SELECT song_id FROM slide_audit WHERE layout_key =?)",
+            (layout_key,))]
+
+    def store_slide_audit(self, layout_key: str, entries: list):
+        """Lưu các (song_id, lời đã kiểm tra, số slide, số dòng quá dài, số slide một dòng, số slide bị tràn)."""
+        fresh = self._unchanged_entries(entries)
+        with self.conn:
+            self.conn.executemany("""
+                INSERT OR REPLACE INTO slide_audit (layout_key, song_id, slide_count, long_lines, orphan_slides, overflow_slides)
+                VALUES (?,?,?,?,?,?)
+            """, ((layout_key, song_id, *counts) for song_id, _, *counts in fresh))
+
+    def get_slide_audit_problems(self, layout_key: str, max_slides: int) -> List[sqlite3.Row]:
+        """Các bài có vấn đề về bố cục (kèm tựa đề, tên sách), nặng nhất trước."""
+        return self.conn.execute(f"""
+            SELECT a.song_id, s.title, sb.name AS songbook_name, a.slide_count, a.long_lines,
+                   a.orphan_slides, a.overflow_slides
+            FROM slide_audit a
+            JOIN {self._songs} s ON s.id = a.song_id
+            JOIN {self._songbooks} sb ON sb.id = s.songbook_id
+            WHERE a.layout_key =? AND (a.long_lines > 0 OR a.orphan_slides > 0 OR a.overflow_slides > 0
+                                       OR a.slide_count >?)
+            ORDER BY a.overflow_slides DESC, a.long_lines DESC, a.slide_count DESC, s.title
+        """, (layout_key, max_slides)).fetchall()
+
+    # --- Công việc nhập tệp ---
+    def open_import_job(self, kind: str, source_key: str, sources: List[str], page_hashes: List[str]) -> Tuple[int, bool]:
+        """
+        Tìm công việc nhập chưa xong của cùng nguồn (cùng danh sách mã băm trang), hoặc tạo mới.
+        Trang của công việc mới có nội dung đã được trích ở công việc khác thì dùng lại văn bản đó.
+        Trả về (job_id, True nếu là công việc cũ được tiếp tục).
+        """
+        row = self.conn.execute("SELECT id FROM import_jobs WHERE source_key =? AND kind =? AND status = 'open' "
+                                "ORDER BY id DESC LIMIT 1", (source_key, kind)).fetchone()
+        if row:
+            return row['id'], True
+        with self.conn:
+            cursor = self.conn.execute("INSERT INTO import_jobs (kind, source_key, sources) VALUES (?,?,?)",
+                                       (kind, source_key, json.dumps(sources, ensure_ascii=False)))
+            job_id = cursor.lastrowid
+            self.conn.executemany("INSERT INTO import_pages (job_id, page_index, content_hash) VALUES (?,?,?)",
+                                  ((job_id, i, digest) for i, digest in enumerate(page_hashes)))
+            self.conn.execute("""
+                UPDATE import_pages SET state = 'extracted', text = (
+                    SELECT old.text FROM import_pages AS old
+                    WHERE old.content_hash = import_pages.content_hash AND old.job_id != import_pages.job_id
+                      AND old.text IS NOT NULL LIMIT 1)
+                WHERE job_id =? AND EXISTS (
+                    SELECT 1 FROM import_pages AS old
+                    WHERE old.content_hash = import_pages.content_hash AND old.job_id != import_pages.job_id
+                      AND old.text IS NOT NULL)
+            """, (job_id,))
+        return job_id, False
+
+    def get_import_pages(self, job_id: int) -> List[sqlite3.Row]:
+        """Các trang của công việc theo thứ tự: page_index, content_hash, state, text."""
+        return self.conn.execute("SELECT page_index, content_hash, state, text FROM import_pages "
+                                 "WHERE job_id =? ORDER BY page_index", (job_id,)).fetchall()
+
+    def mark_import_pages_extracted(self, job_id: int, texts: dict):
+        """Lưu văn bản {page_index: văn bản} của các trang vừa trích/nhận dạng xong."""
+        with self.conn:
+            self.conn.executemany("UPDATE import_pages SET state = 'extracted', text =? "
+                                  "WHERE job_id =? AND page_index =? AND state = 'pending'",
+                                  ((text, job_id, index) for index, text in texts.items()))
+
+    def review_import_pages(self, job_id: int, until_page: int, songbook_id: int, candidates: list):
+        """
+        Ghi nhận kết quả duyệt: các trang trước until_page chuyển sang 'reviewed'
+        và các bài được chọn (SongCandidate) được lưu lại để ghi vào thư viện.
+        """
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO import_candidates (job_id, songbook_id, title, lyrics, number, page) VALUES (?,?,?,?,?,?)",
+                ((job_id, songbook_id, c.title, c.lyrics, c.number, c.page) for c in candidates))
+            self.conn.execute("UPDATE import_pages SET state = 'reviewed' "
+                              "WHERE job_id =? AND page_index <? AND state = 'extracted'", (job_id, until_page))
+
+    def commit_import_job(self, job_id: int) -> dict:
+        """
+        Ghi các bài đã duyệt của công việc vào thư viện (bỏ qua bài trùng tựa đề) và chuyển
+        các trang 'reviewed' sang 'committed' trong CÙNG một giao dịch: bị gián đoạn giữa chừng
+        thì lần sau chỉ cần gọi lại. Công việc xong khi mọi trang đã 'committed'.
+        """
+        rows = self.conn.execute("SELECT songbook_id, title, lyrics, number, page FROM import_candidates "
+                                 "WHERE job_id =?", (job_id,)).fetchall()
+        songs = [Song(None, row['songbook_id'], row['title'], row['lyrics'], row['number'], row['page']) for row in rows]
+        with self.conn:
+            counts = self._import_songs(songs, "skip")
+            self.conn.execute("DELETE FROM import_candidates WHERE job_id =?", (job_id,))
+            self.conn.execute("UPDATE import_pages SET state = 'committed' WHERE job_id =? AND state = 'reviewed'",
+                              (job_id,))
+            self.conn.execute("""
+                UPDATE import_jobs SET status = 'done' WHERE id =? AND NOT EXISTS (
+                    SELECT 1 FROM import_pages WHERE job_id =? AND state != 'committed')
+            """, (job_id, job_id))
+        return counts
+
+    def get_import_jobs_to_commit(self) -> List[int]:
+        """Các công việc đã được duyệt nhưng chưa kịp ghi vào thư viện (ví dụ ứng dụng bị tắt đột ngột)."""
+        rows = self.conn.execute("SELECT DISTINCT job_id FROM import_pages WHERE state = 'reviewed'").fetchall()
+        return [row['job_id'] for row in rows]
+
+    def get_song_by_id(self, song_id: int) -> Optional:
+        cursor = self._song_cursor()
+        cursor.execute(f"SELECT {SONG_COLUMNS} FROM {self._songs} WHERE id =?", (song_id,))
+        return cursor.fetchone()
     def song_exists(self, title: str, songbook_id: int, exclude_song_id: Optional[int] = None) -> bool:
         """
         Kiểm tra xem một bài hát có tồn tại trong một sách bài hát hay không.
         exclude_song_id: Dùng khi chỉnh sửa, để không tự so sánh với chính nó.
         """
         cursor = self.conn.cursor()
-        query = "SELECT id FROM songs WHERE title =? AND songbook_id =?"
+        query = f"SELECT id FROM {self._songs} WHERE title =? AND songbook_id =?"
         params = (title, songbook_id)
 
         if exclude_song_id is not None:
@@ -259,5 +1402,14 @@ class DatabaseModel:
         cursor.execute(query, params)
         return cursor.fetchone() is not None
 
+    def explain_recorded_queries(self) -> int:
+        """Lấy EXPLAIN QUERY PLAN cho các câu SELECT đã ghi nhận trong thống kê mà chưa có kế hoạch."""
+        return QUERY_STATS.explain_pending(self.conn)
+
     def close(self):
+        try:
+            # Khuyến nghị của SQLite: chạy optimize trước khi đóng kết nối
+            self.conn.execute("PRAGMA optimize")
+        except sqlite3.Error:
+            pass
         self.conn.close()
\ No newline at end of file
@@ -0,0 +1,192 @@
+# src/app/models/song_index.py
+
+import bisect
+import heapq
+import unicodedata
+from typing import Iterable, NamedTuple, Optional
+
+def fold_text(text: str) -> str:
+    """
+    Chuẩn hóa chuỗi để so khớp: bỏ dấu tiếng Việt, đổi 'đ' thành 'd', chữ thường.
+    Ví dụ: "Đức Mẹ Hằng Cứu Giúp" -> "duc me hang cuu giup".
+    """
+    if not text:
+        return ""
+    text = text.replace('đ', 'd').replace('Đ', 'D')
+    decomposed = unicodedata.normalize('NFD', text)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.lower().split())
+
+def songbook_abbreviation(name: str) -> str:
+    """Viết tắt của sách bài hát từ chữ cái đầu mỗi từ, ví dụ "Nguyện Tập" -> "NT"."""
+    return "".join(word[0] for word in fold_text(name).split() if word).upper()
+
+class IndexEntry(NamedTuple):
+    """Một mục gọn nhẹ trong chỉ mục, không chứa lời bài hát."""
+    song_id: int
+    songbook_id: int
+    abbreviation: str
+    number: str
+    title: str
+    search_key: str  # "nt 245 ten bai hat" - dùng để lọc nhanh bằng phép 'in'
+    abbreviation_key: str  # "nt"
+    number_key: str  # "245"
+    title_key: str  # " ten bai hat" - có dấu cách đầu để so khớp đầu từ
+
+class SearchResult(NamedTuple):
+    song_id: int
+    label: str
+    score: int
+
+class SongIndex:
+    """
+    Chỉ mục trong bộ nhớ theo viết tắt sách, số bài và tựa đề đã bỏ dấu.
+    Được dựng một lần khi khởi động và cập nhật từng phần khi chỉnh sửa,
+    để bảng lệnh mở nhanh (quick-open) không phải truy vấn SQLite mỗi lần gõ phím.
+    """
+    def __init__(self):
+        self._entries: dict[int, IndexEntry] = {}
+        self._songbooks: dict[int, tuple[str, str]] = {}  # id -> (tên, viết tắt)
+        # Toàn bộ search_key nối thành một chuỗi để tìm bằng str.find (chạy ở tầng C)
+        self._blob = ""
+        self._blob_starts: list[int] = []
+        self._blob_entries: list[IndexEntry] = []
+        self._blob_dirty = True
+        # Kết quả lọc của lần gõ trước, dùng lại khi người dùng gõ thêm ký tự
+        self._last_query = None
+        self._last_candidates: list[IndexEntry] = []
+
+    @classmethod
+    def build(cls, songbooks: Iterable, song_rows: Iterable) -> 'SongIndex':
+        """
+        Dựng chỉ mục từ danh sách sách và các dòng (id, songbook_id, title, number).
+        """
+        index = cls()
+        for sb in songbooks:
+            index.add_songbook(sb.id, sb.name)
+        for song_id, songbook_id, title, number in song_rows:
+            index._put(song_id, songbook_id, title, number)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # --- Cập nhật từng phần ---
+    def add_songbook(self, songbook_id: int, name: str):
+        self._songbooks[songbook_id] = (name, songbook_abbreviation(name))
+
+    def rename_songbook(self, songbook_id: int, new_name: str):
+        self.add_songbook(songbook_id, new_name)
+        for entry in [e for e in self._entries.values() if e.songbook_id == songbook_id]:
+            self._put(entry.song_id, songbook_id, entry.title, entry.number)
+
+    def remove_songbook(self, songbook_id: int):
+        self._songbooks.pop(songbook_id, None)
+        for song_id in [e.song_id for e in self._entries.values() if e.songbook_id == songbook_id]:
+            del self._entries[song_id]
+        self._invalidate()
+
+    def upsert_song(self, song):
+        """Thêm mới hoặc cập nhật một bài hát (sau khi thêm/sửa)."""
+        self._put(song.id, song.songbook_id, song.title, song.number)
+
+    def remove_song(self, song_id: int):
+        if self._entries.pop(song_id, None) is not None:
+            self._invalidate()
+
+    def _invalidate(self):
+        self._blob_dirty = True
+        self._last_query = None
+
+    def _put(self, song_id: int, songbook_id: int, title: str, number: Optional[str]):
+        _, abbreviation = self._songbooks.get(songbook_id, ("", ""))
+        number = (number or "").strip()
+        abbreviation_key, number_key = abbreviation.lower(), number.lower()
+        title_key = " " + fold_text(title)
+        search_key = f"{abbreviation_key} {number_key}{title_key}"
+        self._entries[song_id] = IndexEntry(song_id, songbook_id, abbreviation, number, title,
+                                            search_key, abbreviation_key, number_key, title_key)
+        self._invalidate()
+
+    def _rebuild_blob(self):
+        self._blob_entries = list(self._entries.values())
+        self._blob_starts = []
+        offset = 0
+        for entry in self._blob_entries:
+            self._blob_starts.append(offset)
+            offset += len(entry.search_key) + 1
+        self._blob = "\n".join(entry.search_key for entry in self._blob_entries)
+        self._blob_dirty = False
+
+    def _find_candidates(self, tokens: list) -> list:
+        """Tìm các mục chứa từ khóa dài nhất bằng str.find, rồi kiểm tra các từ còn lại."""
+        if self._blob_dirty:
+            self._rebuild_blob()
+        # Lọc theo vị trí, không theo đối tượng: từ lặp lại (vd. "a a") có thể là cùng một chuỗi
+        index = max(range(len(tokens)), key=lambda i: len(tokens[i]))
+        longest = tokens[index]
+        others = tokens[:index] + tokens[index + 1:]
+        blob, starts, entries = self._blob, self._blob_starts, self._blob_entries
+        candidates = []
+        position = blob.find(longest)
+        while position != -1:
+            row = bisect.bisect_right(starts, position) - 1
+            entry = entries[row]
+            if all(token in entry.search_key for token in others):
+                candidates.append(entry)
+            # Nhảy sang mục kế tiếp để không trùng lặp
+            next_start = starts[row + 1] if row + 1 < len(starts) else len(blob)
+            position = blob.find(longest, next_start)
+        return candidates
+
+    # --- Tìm kiếm ---
+    def search(self, query: str, limit: int = 30) -> list:
+        """
+        Tìm bài hát theo chuỗi như "NT 245", "nt me hang" hoặc vài chữ của tựa đề.
+        Mọi từ trong truy vấn đều phải khớp; kết quả được xếp hạng theo độ phù hợp.
+        """
+        tokens = fold_text(query).split()
+        if not tokens:
+            return []
+
+        # Bước 1: lọc nhanh bằng phép so khớp chuỗi con. Nếu người dùng chỉ gõ thêm
+        # ký tự, tập kết quả mới luôn là tập con của lần trước nên chỉ cần lọc lại.
+        folded_query = " ".join(tokens)
+        if self._last_query is not None and folded_query.startswith(self._last_query):
+            candidates = [e for e in self._last_candidates
+                          if all(token in e.search_key for token in tokens)]
+        else:
+            candidates = self._find_candidates(tokens)
+        self._last_query, self._last_candidates = folded_query, candidates
+
+        # Bước 2: chấm điểm các ứng viên còn lại, chỉ giữ lại `limit` kết quả tốt nhất
+        scored = ((self._score(entry, tokens), entry) for entry in candidates)
+        best = heapq.nlargest(limit, ((score, entry) for score, entry in scored if score > 0),
+                              key=lambda pair: pair[0])
+        return [SearchResult(entry.song_id, self._label(entry), score) for score, entry in best]
+
+    def _score(self, entry: IndexEntry, tokens: list) -> int:
+        abbreviation, number, title_key = entry.abbreviation_key, entry.number_key, entry.title_key
+        score = 0
+        for token in tokens:
+            if number and token == number:
+                score += 100
+            elif abbreviation and token == abbreviation:
+                score += 50
+            elif " " + token in title_key:
+                # Khớp đầu một từ trong tựa đề
+                score += 10
+            elif token in title_key:
+                score += 2
+            elif number.startswith(token) or abbreviation.startswith(token):
+                score += 5
+            else:
+                # Từ khóa chỉ khớp khi nối ngang qua các trường, bỏ qua
+                return 0
+        if title_key.startswith(" " + " ".join(tokens)):
+            score += 30
+        return score
+
+    def _label(self, entry: IndexEntry) -> str:
+        prefix = " ".join(part for part in (entry.abbreviation, entry.number) if part)
+        return f"{prefix} — {entry.title}" if prefix else entry.title
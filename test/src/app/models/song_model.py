@@ -1,7 +1,10 @@
 from dataclasses import dataclass, field
 from typing import Optional
 
-@dataclass
+# Các bản ghi dùng __slots__ (không có __dict__ cho mỗi đối tượng) để danh mục
+# hàng chục nghìn bài hát trong bộ nhớ gọn hơn.
+
+@dataclass(slots=True)
 class Song:
     """Lớp dữ liệu đại diện cho một bài hát."""
     id: int
@@ -11,21 +14,23 @@ class Song:
     number: Optional[str] = None
     page: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class Songbook:
     """Lớp dữ liệu đại diện cho một sách bài hát."""
     id: int
     name: str
     songs: list = field(default_factory=list)
+    song_count: int = 0 # Số bài hát (lấy từ truy vấn tổng hợp, không cần tải bài hát)
 
-@dataclass
+@dataclass(slots=True)
 class Theme:
     """Lớp dữ liệu đại diện cho một chủ đề trình chiếu."""
-    id: int = 1
+    id: Optional[int] = None # None = chủ đề mới, database cấp id khi lưu
     name: str = "Default"
     slide_width: int = 12192000  # 16:9 in EMUs
     slide_height: int = 6858000 # 16:9 in EMUs
     bg_color: str = "#000000"
+    bg_image: str = "" # Đường dẫn ảnh nền (rỗng = chỉ dùng màu nền)
     
     # Thuộc tính Tựa đề
     title_font_name: str = "Arial"
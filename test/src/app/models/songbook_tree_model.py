@@ -0,0 +1,85 @@
+# src/app/models/songbook_tree_model.py
+
+from PySide6.QtCore import Qt, QModelIndex
+from PySide6.QtGui import QStandardItemModel, QStandardItem
+
+SONGBOOK_ROLE = Qt.UserRole + 1
+SONG_ROLE = Qt.UserRole + 2
+
+class SongbookTreeModel(QStandardItemModel):
+    """
+    Mô hình cây sách bài hát tải lười (lazy).
+    Ban đầu chỉ có các nút sách (kèm số bài từ truy vấn COUNT); bài hát được
+    lấy theo từng trang từ DatabaseModel khi sách được mở ra hoặc cuộn tới,
+    thông qua cơ chế canFetchMore/fetchMore của Qt.
+    """
+    PAGE_SIZE = 100
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # page_loader(songbook_id, after_title, limit) -> list[Song]
+        self._page_loader = None
+        # songbook_id -> {'count': tổng số bài, 'loaded': số bài đã tải, 'last_title': tựa đề cuối}
+        self._pages = {}
+        # Chặn gọi lồng: QTreeView có thể gọi lại fetchMore ngay trong tín hiệu rowsInserted
+        self._fetching = False
+
+    def set_songbooks(self, songbooks: list, page_loader):
+        """Đặt lại cây với danh sách sách (có song_count) và hàm tải trang bài hát."""
+        self.clear()
+        self._page_loader = page_loader
+        self._pages.clear()
+        root_node = self.invisibleRootItem()
+        for sb in songbooks:
+            songbook_item = QStandardItem()
+            songbook_item.setEditable(False)
+            songbook_item.setData(sb, SONGBOOK_ROLE)
+            self._pages[sb.id] = {'count': sb.song_count, 'loaded': 0, 'last_title': None}
+            root_node.appendRow(songbook_item)
+
+    def songbook_at(self, index: QModelIndex):
+        """Trả về đối tượng Songbook nếu index là một nút sách, ngược lại None."""
+        if not index.isValid() or index.parent().isValid():
+            return None
+        return index.data(SONGBOOK_ROLE)
+
+    # --- Cơ chế tải lười của Qt ---
+    def hasChildren(self, parent=QModelIndex()) -> bool:
+        songbook = self.songbook_at(parent)
+        if songbook is not None:
+            return self._pages[songbook.id]['count'] > 0
+        return super().hasChildren(parent)
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        songbook = self.songbook_at(parent)
+        if songbook is None or self._page_loader is None or self._fetching:
+            return False
+        page = self._pages[songbook.id]
+        return page['loaded'] < page['count']
+
+    def fetchMore(self, parent: QModelIndex):
+        songbook = self.songbook_at(parent)
+        if songbook is None or not self.canFetchMore(parent):
+            return
+        page = self._pages[songbook.id]
+        songs = self._page_loader(songbook.id, page['last_title'], self.PAGE_SIZE)
+        if not songs:
+            # Dữ liệu đã thay đổi so với số đếm, dừng tải để tránh lặp vô hạn
+            page['count'] = page['loaded']
+            return
+
+        songbook_item = self.itemFromIndex(parent)
+        items = []
+        for song in songs:
+            song_item = QStandardItem()
+            song_item.setEditable(False)
+            song_item.setData(song, SONG_ROLE)
+            items.append(song_item)
+        page['loaded'] += len(songs)
+        page['last_title'] = songs[-1].title
+        # Chèn cả trang trong một lần để view chỉ nhận một tín hiệu rowsInserted
+        self._fetching = True
+        try:
+            songbook_item.appendRows(items)
+        finally:
+            self._fetching = False
@@ -3,11 +3,17 @@ from PySide6.QtWidgets import (QDialog, QVBoxLayout, QFormLayout, QLineEdit,
                                QPushButton, QColorDialog, QFontDialog, QSpinBox,
                                QCheckBox, QGroupBox, QHBoxLayout, QLabel, QMessageBox)
 from PySide6.QtGui import QColor, QFont
-from PySide6.QtCore import Signal
+from PySide6.QtCore import Signal, QTimer
 from app.models.song_model import Song, Songbook, Theme
 from typing import Optional
-from app.models.database_model import DatabaseModel
+from app.models.database_model import DEFAULT_THEME_ID, DatabaseModel
+from utils.near_duplicates import find_similar_songs
 import copy
+import os
+
+# Thời gian chờ sau lần gõ cuối cùng trước khi kiểm tra bài gần trùng
+DUPLICATE_CHECK_DELAY_MS = 400
+BACKGROUND_IMAGE_FILTER = "Ảnh (*.png *.jpg *.jpeg *.bmp *.webp)"
 
 class AddSongDialog(QDialog):
     """Dialog để thêm hoặc sửa một bài hát."""
@@ -38,6 +44,12 @@ class AddSongDialog(QDialog):
         form_layout.addRow("Số thứ tự:", self.number_edit)
         form_layout.addRow("Số trang:", self.page_edit)
         form_layout.addRow("Lời bài hát:", self.lyrics_edit)
+        # Cảnh báo bài có lời gần giống đã có trong thư viện (có thể ở sách khác, tựa đề khác)
+        self.duplicate_label = QLabel()
+        self.duplicate_label.setWordWrap(True)
+        self.duplicate_label.setStyleSheet("color: #b26a00;")
+        self.duplicate_label.setVisible(False)
+        form_layout.addRow("", self.duplicate_label)
 
         self.layout.addLayout(form_layout)
 
@@ -60,6 +72,11 @@ class AddSongDialog(QDialog):
         # Kết nối tín hiệu
         self.import_pdf_button.clicked.connect(lambda: self.import_from_file_clicked.emit('pdf'))
         self.import_image_button.clicked.connect(lambda: self.import_from_file_clicked.emit('image'))
+        self.duplicate_timer = QTimer(self)
+        self.duplicate_timer.setSingleShot(True)
+        self.duplicate_timer.setInterval(DUPLICATE_CHECK_DELAY_MS)
+        self.duplicate_timer.timeout.connect(self._check_near_duplicates)
+        self.lyrics_edit.textChanged.connect(self.duplicate_timer.start)
 
         # Điền dữ liệu nếu là sửa bài hát
         if song:
@@ -70,6 +87,20 @@ class AddSongDialog(QDialog):
             index = self.songbook_combo.findData(song.songbook_id)
             if index >= 0:
                 self.songbook_combo.setCurrentIndex(index)
+
+    def _check_near_duplicates(self):
+        """Tìm các bài có lời gần giống lời đang nhập (MinHash/LSH, chỉ vài truy vấn nhỏ)."""
+        matches = find_similar_songs(self.model, self.lyrics_edit.toPlainText(), exclude_song_id=self.existing_song_id,
+                                     limit=3)
+        if not matches:
+            self.duplicate_label.setVisible(False)
+            return
+        labels = self.model.get_song_labels([song_id for song_id, _ in matches])
+        lines = [f"• {labels[song_id][0]} ({labels[song_id][1]}) — giống {score:.0%}"
+                 for song_id, score in matches if song_id in labels]
+        self.duplicate_label.setText("Có thể trùng với bài đã có:\n" + "\n".join(lines))
+        self.duplicate_label.setVisible(bool(lines))
+
     def validate_and_accept(self):
         """Kiểm tra dữ liệu, nếu hợp lệ thì mới đóng dialog."""
         data = self.get_song_data()
@@ -104,17 +135,30 @@ class AddSongDialog(QDialog):
     def set_lyrics(self, text: str):
         self.lyrics_edit.setPlainText(text)
 
+    def fill_fields(self, title: str, lyrics: str, number: Optional[str] = None, page: Optional[str] = None):
+        """Điền dữ liệu nhập từ tệp; các ô số thứ tự/số trang chỉ được ghi khi có giá trị."""
+        self.title_edit.setText(title)
+        if number:
+            self.number_edit.setText(number)
+        if page:
+            self.page_edit.setText(page)
+        self.set_lyrics(lyrics)
+
 # (Code cho ThemeDialog sẽ tương tự, với các widget để chỉnh sửa màu sắc, font chữ, v.v.)
 
 class ThemeDialog(QDialog):
-    """Dialog để chỉnh sửa Theme trình chiếu mặc định."""
+    """
+    Dialog để chỉnh sửa một Theme trình chiếu đã lưu, lưu thành theme mới (bản sao có tên khác)
+    hoặc xóa theme đó. Sau khi accept, Controller đọc get_theme_data() và delete_requested.
+    """
     def __init__(self, current_theme: Theme, parent=None):
         super().__init__(parent)
-        self.setWindowTitle("Thiết lập Theme Mặc định")
+        self.setWindowTitle("Thiết lập Theme")
         self.setMinimumWidth(450)
 
         # Quan trọng: Làm việc trên một bản sao để có thể hủy bỏ thay đổi
         self.theme = copy.deepcopy(current_theme)
+        self.delete_requested = False
 
         # Lưu trữ các đối tượng QFont để mở FontDialog
         self.title_font = QFont(self.theme.title_font_name)
@@ -126,6 +170,10 @@ class ThemeDialog(QDialog):
         # --- Cài đặt chung ---
         general_group = QGroupBox("Cài đặt chung")
         general_layout = QFormLayout()
+        self.name_edit = QLineEdit()
+        self.save_as_new_check = QCheckBox("Lưu thành theme mới")
+        general_layout.addRow("Tên theme:", self.name_edit)
+        general_layout.addRow("", self.save_as_new_check)
         self.slide_size_combo = QComboBox()
         self.slide_size_combo.addItems(["16:9", "4:3"])
         self.bg_color_button = QPushButton()
@@ -133,6 +181,16 @@ class ThemeDialog(QDialog):
         self.bg_color_button.clicked.connect(self._pick_bg_color)
         general_layout.addRow("Kích thước Slide:", self.slide_size_combo)
         general_layout.addRow("Màu nền:", self.bg_color_button)
+        bg_image_layout = QHBoxLayout()
+        self.bg_image_label = QLabel()
+        self.bg_image_button = QPushButton("Chọn ảnh...")
+        self.bg_image_button.clicked.connect(self._pick_bg_image)
+        self.bg_image_clear_button = QPushButton("Bỏ ảnh")
+        self.bg_image_clear_button.clicked.connect(lambda: self._set_bg_image(""))
+        bg_image_layout.addWidget(self.bg_image_label, 1)
+        bg_image_layout.addWidget(self.bg_image_button)
+        bg_image_layout.addWidget(self.bg_image_clear_button)
+        general_layout.addRow("Ảnh nền:", bg_image_layout)
         general_group.setLayout(general_layout)
         self.layout.addWidget(general_group)
 
@@ -191,20 +249,38 @@ class ThemeDialog(QDialog):
 
         # --- Nút OK / Cancel ---
         self.button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
-        self.button_box.accepted.connect(self.accept)
+        self.delete_button = self.button_box.addButton("Xóa theme này", QDialogButtonBox.DestructiveRole)
+        self.delete_button.setEnabled(self.theme.id != DEFAULT_THEME_ID)
+        self.delete_button.clicked.connect(self._request_delete)
+        self.button_box.accepted.connect(self._validate_and_accept)
         self.button_box.rejected.connect(self.reject)
         self.layout.addWidget(self.button_box)
 
         self._populate_data()
 
+    def _validate_and_accept(self):
+        if not self.name_edit.text().strip():
+            QMessageBox.warning(self, "Thiếu tên", "Vui lòng đặt tên cho theme.")
+            return
+        self.accept()
+
+    def _request_delete(self):
+        answer = QMessageBox.question(self, "Xóa theme", f"Xóa theme '{self.theme.name}'?\n"
+                                      "Các bài đang dùng theme này sẽ trở về theme của buổi trình chiếu.")
+        if answer == QMessageBox.Yes:
+            self.delete_requested = True
+            self.accept()
+
     def _populate_data(self):
         """Điền dữ liệu từ theme hiện tại vào các widget."""
         # General
+        self.name_edit.setText(self.theme.name)
         if self.theme.slide_width == 9144000: # 4:3
             self.slide_size_combo.setCurrentIndex(1)
         else:
             self.slide_size_combo.setCurrentIndex(0)
         self._update_color_button(self.bg_color_button, self.theme.bg_color)
+        self._set_bg_image(self.theme.bg_image)
         
         # Title
         self.title_font_label.setText(f"{self.theme.title_font_name}")
@@ -237,6 +313,17 @@ class ThemeDialog(QDialog):
         self.theme.bg_color = new_color
         self._update_color_button(self.bg_color_button, new_color)
 
+    def _pick_bg_image(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Chọn ảnh nền", "", BACKGROUND_IMAGE_FILTER)
+        if path:
+            self._set_bg_image(path)
+
+    def _set_bg_image(self, path: str):
+        self.theme.bg_image = path
+        self.bg_image_label.setText(os.path.basename(path) if path else "(không có)")
+        self.bg_image_label.setToolTip(path)
+        self.bg_image_clear_button.setEnabled(bool(path))
+
     def _pick_title_color(self):
         new_color = self._pick_color(self.theme.title_font_color)
         self.theme.title_font_color = new_color
@@ -265,6 +352,9 @@ class ThemeDialog(QDialog):
         Hàm này được Controller gọi sau khi dialog được accept.
         """
         # General
+        self.theme.name = self.name_edit.text().strip()
+        if self.save_as_new_check.isChecked():
+            self.theme.id = None # Database cấp id mới khi lưu
         if self.slide_size_combo.currentIndex() == 1: # 4:3
             self.theme.slide_width = 9144000
             self.theme.slide_height = 6858000
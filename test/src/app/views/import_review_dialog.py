@@ -0,0 +1,148 @@
+# src/app/views/import_review_dialog.py
+
+from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QSplitter,
+                               QListWidget, QListWidgetItem, QLineEdit, QTextEdit, QLabel,
+                               QProgressBar, QComboBox, QPushButton, QWidget)
+from PySide6.QtCore import Signal, Qt
+
+class ImportReviewDialog(QDialog):
+    """
+    Hàng đợi duyệt các bài hát tách được từ tệp nhập (PDF/ảnh).
+    Bài hát được thêm dần vào danh sách trong khi tệp vẫn đang được xử lý;
+    người dùng có thể sửa tựa đề/lời, bỏ chọn bài không đúng rồi lưu các bài đã chọn.
+    """
+    songs_approved = Signal(int, list) # (songbook_id, danh sách SongCandidate)
+    fill_requested = Signal(object)    # SongCandidate dùng cho bài đang thêm
+
+    def __init__(self, songbooks: list, default_songbook_id=None, allow_fill: bool = False, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Duyệt bài hát nhập từ tệp")
+        self.resize(900, 600)
+        self._candidates = []
+        self._current = None
+        self._status_prefix = "Đang đọc tệp..."
+
+        self.layout = QVBoxLayout(self)
+        self.status_label = QLabel("Đang đọc tệp...")
+        self.progress_bar = QProgressBar()
+        self.layout.addWidget(self.status_label)
+        self.layout.addWidget(self.progress_bar)
+
+        splitter = QSplitter(Qt.Horizontal)
+        self.candidate_list = QListWidget()
+        splitter.addWidget(self.candidate_list)
+
+        editor = QWidget()
+        form_layout = QFormLayout(editor)
+        self.title_edit = QLineEdit()
+        self.number_edit = QLineEdit()
+        self.page_edit = QLineEdit()
+        self.lyrics_edit = QTextEdit()
+        self.lyrics_edit.setAcceptRichText(False)
+        form_layout.addRow("Tựa đề:", self.title_edit)
+        form_layout.addRow("Số thứ tự:", self.number_edit)
+        form_layout.addRow("Số trang:", self.page_edit)
+        form_layout.addRow("Lời bài hát:", self.lyrics_edit)
+        splitter.addWidget(editor)
+        splitter.setSizes([1, 2])
+        self.layout.addWidget(splitter)
+
+        bottom_layout = QHBoxLayout()
+        self.songbook_combo = QComboBox()
+        for sb in songbooks:
+            self.songbook_combo.addItem(sb.name, sb.id)
+        index = self.songbook_combo.findData(default_songbook_id)
+        if index >= 0:
+            self.songbook_combo.setCurrentIndex(index)
+        bottom_layout.addWidget(QLabel("Lưu vào sách:"))
+        bottom_layout.addWidget(self.songbook_combo, 1)
+        self.fill_button = QPushButton("Dùng cho bài đang thêm")
+        self.fill_button.setVisible(allow_fill)
+        self.save_button = QPushButton("Lưu các bài đã chọn")
+        self.close_button = QPushButton("Đóng")
+        bottom_layout.addWidget(self.fill_button)
+        bottom_layout.addWidget(self.save_button)
+        bottom_layout.addWidget(self.close_button)
+        self.layout.addLayout(bottom_layout)
+
+        self.candidate_list.currentRowChanged.connect(self._show_candidate)
+        self.candidate_list.itemChanged.connect(self._on_item_changed)
+        self.fill_button.clicked.connect(self._request_fill)
+        self.save_button.clicked.connect(self._approve_checked)
+        self.close_button.clicked.connect(self.reject)
+
+    @staticmethod
+    def _label(candidate) -> str:
+        return f"{candidate.number}. {candidate.title}" if candidate.number else candidate.title
+
+    def add_candidates(self, candidates: list):
+        """Thêm một loạt bài hát vừa tách được vào cuối danh sách."""
+        self.candidate_list.blockSignals(True)
+        for candidate in candidates:
+            item = QListWidgetItem(self._label(candidate))
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked if candidate.approved else Qt.Unchecked)
+            self.candidate_list.addItem(item)
+            self._candidates.append(candidate)
+        self.candidate_list.blockSignals(False)
+        if self.candidate_list.currentRow() < 0 and self._candidates:
+            self.candidate_list.setCurrentRow(0)
+        self._update_status()
+
+    def set_progress(self, done: int, total: int):
+        self.progress_bar.setMaximum(max(1, total))
+        self.progress_bar.setValue(done)
+        self._update_status(f"Đang đọc trang {done}/{total}")
+
+    def set_finished(self, message: str = ""):
+        self.progress_bar.setValue(self.progress_bar.maximum())
+        self._update_status(message or "Đã đọc xong tệp")
+
+    def _update_status(self, prefix: str = None):
+        if prefix:
+            self._status_prefix = prefix
+        selected = sum(1 for c in self._candidates if c.approved)
+        self.status_label.setText(f"{self._status_prefix} — {len(self._candidates)} bài, đã chọn {selected}")
+
+    def _store_current(self):
+        """Ghi lại các chỉnh sửa trên bài đang xem vào SongCandidate tương ứng."""
+        if self._current is None:
+            return
+        candidate = self._candidates[self._current]
+        candidate.title = self.title_edit.text().strip()
+        candidate.number = self.number_edit.text().strip() or None
+        candidate.page = self.page_edit.text().strip() or None
+        candidate.lyrics = self.lyrics_edit.toPlainText().strip()
+        item = self.candidate_list.item(self._current)
+        self.candidate_list.blockSignals(True)
+        item.setText(self._label(candidate))
+        self.candidate_list.blockSignals(False)
+
+    def _show_candidate(self, row: int):
+        self._store_current()
+        self._current = row if 0 <= row < len(self._candidates) else None
+        if self._current is None:
+            return
+        candidate = self._candidates[row]
+        self.title_edit.setText(candidate.title)
+        self.number_edit.setText(candidate.number or "")
+        self.page_edit.setText(candidate.page or "")
+        self.lyrics_edit.setPlainText(candidate.lyrics)
+
+    def _on_item_changed(self, item: QListWidgetItem):
+        row = self.candidate_list.row(item)
+        self._candidates[row].approved = item.checkState() == Qt.Checked
+        self._update_status()
+
+    def _request_fill(self):
+        self._store_current()
+        if self._current is not None:
+            self.fill_requested.emit(self._candidates[self._current])
+            self.accept()
+
+    def _approve_checked(self):
+        self._store_current()
+        approved = [c for c in self._candidates if c.approved and c.title and c.lyrics]
+        # Phát cả khi không chọn bài nào: bỏ qua toàn bộ cũng là một kết quả duyệt
+        self.songs_approved.emit(self.songbook_combo.currentData(), approved)
+        self.accept()
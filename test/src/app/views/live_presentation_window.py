@@ -0,0 +1,75 @@
+# src/app/views/live_presentation_window.py
+
+from typing import Optional
+
+from PySide6.QtWidgets import QWidget
+from PySide6.QtGui import QPainter, QPixmap, QColor
+from PySide6.QtCore import Qt, Signal, QSize
+
+class LivePresentationWindow(QWidget):
+    """
+    Cửa sổ trình chiếu toàn màn hình (thường trên màn hình thứ hai).
+    Chỉ hiển thị ảnh slide đã được vẽ sẵn; mọi điều khiển đi qua tín hiệu tới controller.
+    """
+    next_requested = Signal()
+    previous_requested = Signal()
+    blank_toggled = Signal()
+    closed = Signal()
+    size_changed = Signal()
+
+    def __init__(self, aspect_ratio: float, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Trình chiếu")
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self.setCursor(Qt.BlankCursor)
+        self.aspect_ratio = aspect_ratio
+        self._pixmap: Optional[QPixmap] = None
+
+    def render_size(self) -> QSize:
+        """Kích thước ảnh slide (pixel thật) vừa khít cửa sổ theo tỉ lệ khung hình của theme."""
+        ratio = self.devicePixelRatioF()
+        width, height = self.width() * ratio, self.height() * ratio
+        if width / max(height, 1) > self.aspect_ratio:
+            width = height * self.aspect_ratio
+        else:
+            height = width / self.aspect_ratio
+        return QSize(max(1, round(width)), max(1, round(height)))
+
+    def show_pixmap(self, pixmap: Optional[QPixmap]):
+        self._pixmap = pixmap
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#000000"))
+        if self._pixmap is not None:
+            self._pixmap.setDevicePixelRatio(self.devicePixelRatioF())
+            size = self._pixmap.deviceIndependentSize()
+            painter.drawPixmap(round((self.width() - size.width()) / 2), round((self.height() - size.height()) / 2), self._pixmap)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.size_changed.emit()
+
+    def keyPressEvent(self, event):
+        key = event.key()
+        if key in (Qt.Key_Right, Qt.Key_Down, Qt.Key_PageDown, Qt.Key_Space, Qt.Key_Return, Qt.Key_Enter):
+            self.next_requested.emit()
+        elif key in (Qt.Key_Left, Qt.Key_Up, Qt.Key_PageUp, Qt.Key_Backspace):
+            self.previous_requested.emit()
+        elif key in (Qt.Key_B, Qt.Key_Period):
+            self.blank_toggled.emit()
+        elif key == Qt.Key_Escape:
+            self.close()
+        else:
+            super().keyPressEvent(event)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.next_requested.emit()
+        elif event.button() == Qt.RightButton:
+            self.previous_requested.emit()
+
+    def closeEvent(self, event):
+        self.closed.emit()
+        super().closeEvent(event)
@@ -1,5 +1,6 @@
 from PySide6.QtWidgets import QMainWindow, QWidget, QHBoxLayout, QSplitter
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, Signal
+from PySide6.QtGui import QKeySequence, QShortcut
 from.songbook_view import SongbookView
 from.playlist_view import PlaylistView
 from.preview_view import PreviewView
@@ -8,6 +9,25 @@ class MainWindow(QMainWindow):
     """
     Cửa sổ chính của ứng dụng, chứa 3 cột giao diện.
     """
+    quick_open_requested = Signal()
+    backup_requested = Signal()
+    export_library_requested = Signal()
+    import_library_requested = Signal()
+    sync_library_requested = Signal()
+    import_pdf_requested = Signal()
+    import_images_requested = Signal()
+    export_slide_images_requested = Signal()
+    slide_audit_requested = Signal()
+    auto_fit_playlist_requested = Signal()
+    tracing_toggled = Signal(bool)
+    query_stats_requested = Signal()
+    stall_report_requested = Signal()
+    live_start_requested = Signal()
+    live_next_requested = Signal()
+    live_previous_requested = Signal()
+    live_blank_requested = Signal()
+    live_stop_requested = Signal()
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Lyric Presenter")
@@ -27,4 +47,69 @@ class MainWindow(QMainWindow):
         # Thiết lập tỉ lệ ban đầu cho các cột
         splitter.setSizes([2, 1, 2])
 
-        self.setCentralWidget(splitter)
\ No newline at end of file
+        self.setCentralWidget(splitter)
+
+        self._create_menus()
+
+        # Phím tắt mở bảng lệnh mở nhanh bài hát
+        for key in ("Ctrl+P", "Ctrl+K"):
+            shortcut = QShortcut(QKeySequence(key), self)
+            shortcut.activated.connect(self.quick_open_requested)
+
+    def _create_menus(self):
+        file_menu = self.menuBar().addMenu("Tệp")
+        self.backup_action = file_menu.addAction("Sao lưu thư viện...")
+        self.backup_action.triggered.connect(self.backup_requested)
+        file_menu.addSeparator()
+        self.export_library_action = file_menu.addAction("Xuất thư viện (JSON Lines)...")
+        self.export_library_action.triggered.connect(self.export_library_requested)
+        self.import_library_action = file_menu.addAction("Nhập thư viện (JSON Lines)...")
+        self.import_library_action.triggered.connect(self.import_library_requested)
+        self.sync_library_action = file_menu.addAction("Đồng bộ với thư viện khác...")
+        self.sync_library_action.triggered.connect(self.sync_library_requested)
+        file_menu.addSeparator()
+        self.import_pdf_action = file_menu.addAction("Nhập bài hát từ PDF...")
+        self.import_pdf_action.triggered.connect(self.import_pdf_requested)
+        self.import_images_action = file_menu.addAction("Nhập bài hát từ ảnh...")
+        self.import_images_action.triggered.connect(self.import_images_requested)
+        file_menu.addSeparator()
+        self.export_slide_images_action = file_menu.addAction("Xuất playlist ra PDF/ảnh...")
+        self.export_slide_images_action.triggered.connect(self.export_slide_images_requested)
+
+        tools_menu = self.menuBar().addMenu("Công cụ")
+        self.slide_audit_action = tools_menu.addAction("Kiểm tra bố cục slide toàn thư viện...")
+        self.slide_audit_action.triggered.connect(self.slide_audit_requested)
+        self.auto_fit_playlist_action = tools_menu.addAction("Tự động chọn cỡ chữ lời cho cả playlist")
+        self.auto_fit_playlist_action.triggered.connect(self.auto_fit_playlist_requested)
+        tools_menu.addSeparator()
+        self.tracing_action = tools_menu.addAction("Ghi vết hiệu năng (Chrome trace)")
+        self.tracing_action.setCheckable(True)
+        self.tracing_action.toggled.connect(self.tracing_toggled)
+        self.query_stats_action = tools_menu.addAction("Thống kê truy vấn CSDL...")
+        self.query_stats_action.triggered.connect(self.query_stats_requested)
+        self.stall_report_action = tools_menu.addAction("Báo cáo giao diện bị đứng...")
+        self.stall_report_action.triggered.connect(self.stall_report_requested)
+
+        live_menu = self.menuBar().addMenu("Trình chiếu")
+        self.live_start_action = live_menu.addAction("Bắt đầu trình chiếu")
+        self.live_start_action.setShortcut(QKeySequence("F5"))
+        self.live_start_action.triggered.connect(self.live_start_requested)
+        self.live_next_action = live_menu.addAction("Slide tiếp theo")
+        self.live_next_action.setShortcut(QKeySequence("Ctrl+PgDown"))
+        self.live_next_action.triggered.connect(self.live_next_requested)
+        self.live_previous_action = live_menu.addAction("Slide trước")
+        self.live_previous_action.setShortcut(QKeySequence("Ctrl+PgUp"))
+        self.live_previous_action.triggered.connect(self.live_previous_requested)
+        self.live_blank_action = live_menu.addAction("Tắt/bật màn hình đen")
+        self.live_blank_action.setShortcut(QKeySequence("Ctrl+B"))
+        self.live_blank_action.triggered.connect(self.live_blank_requested)
+        self.live_stop_action = live_menu.addAction("Kết thúc trình chiếu")
+        self.live_stop_action.setShortcut(QKeySequence("Shift+F5"))
+        self.live_stop_action.triggered.connect(self.live_stop_requested)
+        self.set_live_active(False)
+
+    def set_live_active(self, active: bool):
+        """Bật/tắt các lệnh điều khiển trình chiếu theo trạng thái cửa sổ trình chiếu."""
+        self.live_start_action.setEnabled(not active)
+        for action in (self.live_next_action, self.live_previous_action, self.live_blank_action, self.live_stop_action):
+            action.setEnabled(active)
@@ -1,6 +1,6 @@
 # src/app/views/playlist_view.py
 
-from PySide6.QtWidgets import (QWidget, QVBoxLayout, QPushButton, QListWidget, 
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QPushButton, QListWidget, QComboBox,
                                QAbstractItemView, QListWidgetItem, QLabel, QHBoxLayout)
 from PySide6.QtCore import Signal, Qt
 
@@ -10,6 +10,7 @@ class PlaylistView(QWidget):
     Đã được đơn giản hóa, không dùng QPainter.
     """
     theme_button_clicked = Signal()
+    service_theme_selected = Signal(int) # Gửi đi theme_id của buổi trình chiếu
     export_button_clicked = Signal()
     song_selected = Signal(int)
     song_removed = Signal(int) # Gửi đi song_id
@@ -19,6 +20,8 @@ class PlaylistView(QWidget):
         super().__init__(parent)
         self.layout = QVBoxLayout(self)
         
+        self.theme_combo = QComboBox()
+        self.theme_combo.setToolTip("Theme của buổi trình chiếu (bài không chọn theme riêng dùng theme này)")
         self.theme_button = QPushButton("Thiết lập Theme")
         self.export_button = QPushButton("Xuất ra PowerPoint (.pptx)")
 
@@ -27,13 +30,17 @@ class PlaylistView(QWidget):
         self.list_widget.setDragDropMode(QAbstractItemView.InternalMove)
         self.list_widget.setAlternatingRowColors(True)
 
-        self.layout.addWidget(self.theme_button)
+        theme_row = QHBoxLayout()
+        theme_row.addWidget(self.theme_combo, 1)
+        theme_row.addWidget(self.theme_button)
+        self.layout.addLayout(theme_row)
         self.layout.addWidget(self.list_widget)
         self.layout.addWidget(self.export_button)
 
         # Kết nối tín hiệu
         self.export_button.clicked.connect(self.export_button_clicked)
         self.theme_button.clicked.connect(self.theme_button_clicked)
+        self.theme_combo.activated.connect(lambda index: self.service_theme_selected.emit(self.theme_combo.itemData(index)))
         self.list_widget.currentRowChanged.connect(self._on_song_selected)
         self.list_widget.model().rowsMoved.connect(self.playlist_reordered)
 
@@ -107,4 +114,13 @@ class PlaylistView(QWidget):
         for i in range(self.list_widget.count()):
             item = self.list_widget.item(i)
             ids.append(item.data(Qt.UserRole))
-        return ids
\ No newline at end of file
+        return ids
+
+    def set_themes(self, themes: list, current_theme_id: int):
+        """Điền danh sách theme đã lưu và chọn theme của buổi trình chiếu."""
+        self.theme_combo.blockSignals(True)
+        self.theme_combo.clear()
+        for theme in themes:
+            self.theme_combo.addItem(theme.name, theme.id)
+        self.theme_combo.setCurrentIndex(max(0, self.theme_combo.findData(current_theme_id)))
+        self.theme_combo.blockSignals(False)
@@ -1,22 +1,21 @@
 # src/app/views/preview_view.py
 
-from PySide6.QtWidgets import (QWidget, QVBoxLayout, QSpinBox, QFormLayout, 
-                               QGroupBox, QLabel, QScrollArea)
-from PySide6.QtGui import QPainter, QColor, QFont, QTextDocument
-from PySide6.QtCore import Qt, Signal, QRectF, QSize
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QSpinBox, QFormLayout, QComboBox,
+                               QGroupBox, QLabel, QScrollArea, QPushButton, QFileDialog)
+from PySide6.QtGui import QPainter
+from PySide6.QtCore import Qt, Signal, QSize
 from typing import Optional
 
-from app.models.song_model import Theme, Song
-from utils.slide_layout_engine import split_lyrics_into_slides
-from utils.text_formatter import format_lyrics_for_display
+from app.models.song_model import Song
+from app.views.dialogs import BACKGROUND_IMAGE_FILTER
+from utils.tracing import span
 
 class SingleSlidePreviewWidget(QWidget):
-    """Widget để vẽ một slide demo duy nhất."""
-    def __init__(self, text_html: str, theme: Theme, parent=None):
+    """Widget hiển thị ảnh thu nhỏ của một slide (vẽ sẵn bằng live_renderer, giống hệt slide khi xuất)."""
+    def __init__(self, pixmap, parent=None):
         super().__init__(parent)
-        self.text_html = text_html
-        self.theme = theme
-        self.aspect_ratio = 16 / 9 if theme.slide_width > 10000000 else 4 / 3
+        self.pixmap = pixmap
+        self.aspect_ratio = pixmap.width() / pixmap.height()
         self.setMinimumHeight(150)
 
     def sizeHint(self) -> QSize:
@@ -29,40 +28,20 @@ class SingleSlidePreviewWidget(QWidget):
         super().resizeEvent(event)
 
     def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-        painter.setRenderHint(QPainter.TextAntialiasing)
-
-        painter.fillRect(self.rect(), QColor(self.theme.bg_color))
-
-        lyric_font = QFont(self.theme.lyric_font_name)
-        
-        text_rect = self.rect().adjusted(
-            self.width() * 0.05, self.height() * 0.05,
-            -self.width() * 0.05, -self.height() * 0.05
-        )
-        
-        doc = QTextDocument()
-        doc.setHtml(self.text_html)
-        doc.setDefaultFont(lyric_font)
-        doc.setTextWidth(text_rect.width())
-
-        alignment = Qt.AlignmentFlag.AlignCenter
-        if self.theme.lyric_alignment == 'LEFT': alignment = Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop
-        elif self.theme.lyric_alignment == 'RIGHT': alignment = Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignTop
-        
-        option = doc.defaultTextOption()
-        option.setAlignment(alignment)
-        doc.setDefaultTextOption(option)
-        
-        painter.save()
-        painter.translate(text_rect.topLeft())
-        doc.drawContents(painter)
-        painter.restore()
+        with span("preview.paint"):
+            painter = QPainter(self)
+            painter.setRenderHint(QPainter.SmoothPixmapTransform)
+            # Giữ tỉ lệ khung hình, căn giữa theo chiều ngang
+            size = self.pixmap.size().scaled(self.size(), Qt.KeepAspectRatio)
+            painter.drawPixmap((self.width() - size.width()) // 2, 0, size.width(), size.height(), self.pixmap)
+            painter.end()
 
 class PreviewView(QWidget):
     """Cột bên phải, hiển thị bản xem trước và các tùy chọn tinh chỉnh."""
     font_size_changed = Signal(str, int)
+    auto_fit_requested = Signal()
+    song_theme_changed = Signal(object) # theme_id riêng của bài, None = dùng theme của buổi trình chiếu
+    song_background_changed = Signal(str) # Ảnh nền riêng của bài, "" = dùng ảnh nền của theme
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -76,12 +55,23 @@ class PreviewView(QWidget):
         
         self.settings_box = QGroupBox("Tùy chỉnh Font chữ cho bài hát này")
         self.settings_layout = QFormLayout()
+        self.theme_combo = QComboBox()
+        self.settings_layout.addRow("Theme:", self.theme_combo)
+        background_layout = QHBoxLayout()
+        self.background_button = QPushButton("Chọn ảnh nền riêng...")
+        self.background_clear_button = QPushButton("Dùng ảnh nền của theme")
+        background_layout.addWidget(self.background_button)
+        background_layout.addWidget(self.background_clear_button)
+        self.settings_layout.addRow("Ảnh nền:", background_layout)
         self.title_font_size_spinbox = QSpinBox()
         self.title_font_size_spinbox.setRange(10, 100)
         self.lyric_font_size_spinbox = QSpinBox()
         self.lyric_font_size_spinbox.setRange(10, 100)
         self.settings_layout.addRow("Cỡ chữ Tựa đề:", self.title_font_size_spinbox)
         self.settings_layout.addRow("Cỡ chữ Lời:", self.lyric_font_size_spinbox)
+        self.auto_fit_button = QPushButton("Tự động chọn cỡ chữ lời")
+        self.auto_fit_button.setToolTip("Cỡ chữ lớn nhất mà mỗi đoạn vẫn nằm trọn trên một slide")
+        self.settings_layout.addRow(self.auto_fit_button)
         self.settings_box.setLayout(self.settings_layout)
 
         self.layout.addWidget(self.scroll_area)
@@ -89,6 +79,22 @@ class PreviewView(QWidget):
         
         self.title_font_size_spinbox.valueChanged.connect(lambda val: self.font_size_changed.emit('title', val))
         self.lyric_font_size_spinbox.valueChanged.connect(lambda val: self.font_size_changed.emit('lyric', val))
+        self.auto_fit_button.clicked.connect(self.auto_fit_requested)
+        self.theme_combo.activated.connect(lambda index: self.song_theme_changed.emit(self.theme_combo.itemData(index)))
+        self.background_button.clicked.connect(self._pick_background)
+        self.background_clear_button.clicked.connect(lambda: self.song_background_changed.emit(""))
+
+    def _pick_background(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Chọn ảnh nền cho bài hát", "", BACKGROUND_IMAGE_FILTER)
+        if path:
+            self.song_background_changed.emit(path)
+
+    def set_themes(self, themes: list):
+        """Điền danh sách theme có thể chọn riêng cho một bài."""
+        self.theme_combo.clear()
+        self.theme_combo.addItem("(Theme của buổi trình chiếu)", None)
+        for theme in themes:
+            self.theme_combo.addItem(theme.name, theme.id)
 
     def clear_preview(self):
         """Xóa tất cả các slide demo cũ."""
@@ -97,13 +103,18 @@ class PreviewView(QWidget):
             if child.widget():
                 child.widget().deleteLater()
 
-    def update_preview(self, theme: Theme, song: Optional, title_size: int, lyric_size: int):
+    def update_preview(self, song: Optional[Song], slides: list, title_size: int, lyric_size: int,
+                       song_theme_id: Optional[int] = None, has_own_background: bool = False):
+        """Hiển thị ảnh thu nhỏ các slide của bài (slides: danh sách QPixmap) và các tùy chỉnh của bài đó."""
         self.clear_preview()
         self.settings_box.setEnabled(song is not None)
 
         if not song:
             return
 
+        self.theme_combo.setCurrentIndex(0 if song_theme_id is None else max(0, self.theme_combo.findData(song_theme_id)))
+        self.background_clear_button.setEnabled(has_own_background)
+
         self.title_font_size_spinbox.blockSignals(True)
         self.lyric_font_size_spinbox.blockSignals(True)
         self.title_font_size_spinbox.setValue(title_size)
@@ -111,23 +122,5 @@ class PreviewView(QWidget):
         self.title_font_size_spinbox.blockSignals(False)
         self.lyric_font_size_spinbox.blockSignals(False)
 
-        # 1. Tạo slide tựa đề
-        title_html = f"<div style='text-align: center; font-size: {title_size}pt; font-weight: bold; color: {theme.title_font_color};'>{song.title}</div>"
-        title_slide_widget = SingleSlidePreviewWidget(title_html, theme)
-        self.slides_layout.addWidget(title_slide_widget)
-
-        # 2. Sử dụng Layout Engine để chia lời bài hát
-        lyric_font = QFont(theme.lyric_font_name, lyric_size)
-        slide_w_px, slide_h_px = (960, 540) if theme.slide_width > 10000000 else (720, 540)
-        box_w = slide_w_px * 0.9
-        box_h = slide_h_px * 0.8
-        bounding_box = QRectF(0, 0, box_w, box_h)
-        
-        lyrics_slides = split_lyrics_into_slides(song.lyrics, lyric_font, bounding_box)
-
-        # 3. Tạo widget cho mỗi slide lời bài hát
-        for slide_text in lyrics_slides:
-            text_html = format_lyrics_for_display(slide_text, theme.title_font_color)
-            full_html = f"<div style='font-size: {lyric_size}pt; color: {theme.lyric_font_color};'>{text_html}</div>"
-            lyric_slide_widget = SingleSlidePreviewWidget(full_html, theme)
-            self.slides_layout.addWidget(lyric_slide_widget)
\ No newline at end of file
+        for pixmap in slides:
+            self.slides_layout.addWidget(SingleSlidePreviewWidget(pixmap))
@@ -0,0 +1,65 @@
+# src/app/views/query_stats_dialog.py
+
+from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
+                               QHeaderView, QLabel, QPushButton, QAbstractItemView)
+from PySide6.QtCore import Signal, Qt
+
+class QueryStatsDialog(QDialog):
+    """
+    Thống kê các câu lệnh SQL từ lúc mở ứng dụng (hoặc lần đặt lại gần nhất), tốn thời gian nhất trước.
+    Cột "Quét toàn bảng" cho biết tìm kiếm nào không dùng được chỉ mục; di chuột lên câu lệnh để xem kế hoạch.
+    """
+    reset_requested = Signal()
+
+    COLUMNS = ["Câu lệnh", "Lần gọi", "Tổng (ms)", "TB (ms)", "p95 (ms)", "Max (ms)", "Dòng", "Chậm", "Quét toàn bảng"]
+
+    def __init__(self, entries: list, summary: str, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Thống kê truy vấn CSDL")
+        self.resize(1000, 550)
+
+        self.layout = QVBoxLayout(self)
+        self.summary_label = QLabel(summary)
+        self.summary_label.setWordWrap(True)
+        self.layout.addWidget(self.summary_label)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.layout.addWidget(self.table)
+
+        bottom_layout = QHBoxLayout()
+        bottom_layout.addStretch(1)
+        self.reset_button = QPushButton("Đặt lại thống kê")
+        self.close_button = QPushButton("Đóng")
+        bottom_layout.addWidget(self.reset_button)
+        bottom_layout.addWidget(self.close_button)
+        self.layout.addLayout(bottom_layout)
+
+        self.reset_button.clicked.connect(self.reset_requested)
+        self.close_button.clicked.connect(self.accept)
+        self.populate(entries)
+
+    def populate(self, entries: list):
+        """Điền bảng từ danh sách StatementStats."""
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(entries))
+        for row, entry in enumerate(entries):
+            sql_item = QTableWidgetItem(entry.sql)
+            plan = "\n".join(entry.plan) if entry.plan else "(chưa có kế hoạch)"
+            sql_item.setToolTip(f"{entry.sql}\n\nEXPLAIN QUERY PLAN:\n{plan}")
+            self.table.setItem(row, 0, sql_item)
+            values = [entry.calls, round(entry.total_ms, 1), round(entry.mean_ms, 2), round(entry.percentile_ms(0.95), 2),
+                      round(entry.max_ms, 2), entry.rows, entry.slow_calls]
+            for column, value in enumerate(values, start=1):
+                item = QTableWidgetItem()
+                item.setData(Qt.DisplayRole, value)
+                self.table.setItem(row, column, item)
+            scan = {True: "Có", False: "Không", None: ""}[entry.full_scan]
+            self.table.setItem(row, len(self.COLUMNS) - 1, QTableWidgetItem(scan))
+        self.table.resizeColumnsToContents()
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.setSortingEnabled(True)
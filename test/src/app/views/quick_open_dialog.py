@@ -0,0 +1,61 @@
+# src/app/views/quick_open_dialog.py
+
+from PySide6.QtWidgets import (QDialog, QVBoxLayout, QLineEdit, QListWidget,
+                               QListWidgetItem, QLabel)
+from PySide6.QtCore import Signal, Qt
+
+class QuickOpenDialog(QDialog):
+    """
+    Bảng lệnh mở nhanh: gõ "NT 245" hoặc vài chữ của tựa đề rồi nhấn Enter
+    để thêm bài hát vào playlist. Kết quả được cập nhật theo từng phím gõ.
+    """
+    song_chosen = Signal(int)
+
+    def __init__(self, search_fn, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Mở nhanh bài hát")
+        self.setMinimumWidth(500)
+        # search_fn(query) -> list[SearchResult], không truy cập database
+        self.search_fn = search_fn
+
+        self.layout = QVBoxLayout(self)
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("Ví dụ: NT 245 hoặc vài chữ của tựa đề...")
+        self.results_list = QListWidget()
+        self.hint_label = QLabel("Enter: thêm vào playlist  •  ↑/↓: chọn  •  Esc: đóng")
+
+        self.layout.addWidget(self.query_input)
+        self.layout.addWidget(self.results_list)
+        self.layout.addWidget(self.hint_label)
+
+        self.query_input.textChanged.connect(self._refresh_results)
+        self.query_input.returnPressed.connect(self._choose_current)
+        self.results_list.itemActivated.connect(lambda item: self._choose_current())
+        self.query_input.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        # Cho phép dùng phím mũi tên để di chuyển trong danh sách khi đang gõ
+        if obj is self.query_input and event.type() == event.Type.KeyPress:
+            if event.key() in (Qt.Key_Down, Qt.Key_Up):
+                row = self.results_list.currentRow()
+                step = 1 if event.key() == Qt.Key_Down else -1
+                new_row = max(0, min(self.results_list.count() - 1, row + step))
+                self.results_list.setCurrentRow(new_row)
+                return True
+        return super().eventFilter(obj, event)
+
+    def _refresh_results(self, text: str):
+        self.results_list.clear()
+        for result in self.search_fn(text):
+            item = QListWidgetItem(result.label)
+            item.setData(Qt.UserRole, result.song_id)
+            self.results_list.addItem(item)
+        if self.results_list.count():
+            self.results_list.setCurrentRow(0)
+
+    def _choose_current(self):
+        item = self.results_list.currentItem()
+        if item is None:
+            return
+        self.song_chosen.emit(item.data(Qt.UserRole))
+        self.accept()
@@ -0,0 +1,57 @@
+# src/app/views/slide_audit_dialog.py
+
+from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
+                               QHeaderView, QLabel, QPushButton, QAbstractItemView)
+from PySide6.QtCore import Signal, Qt
+
+class SlideAuditDialog(QDialog):
+    """
+    Danh sách các bài hát có vấn đề về bố cục slide với theme hiện tại.
+    Nhấn đúp (hoặc Enter) vào một bài để thêm vào playlist và xem trước/chỉnh cỡ chữ.
+    """
+    song_chosen = Signal(int)
+
+    def __init__(self, results: list, summary: str, max_slides: int, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Kiểm tra bố cục slide")
+        self.resize(800, 500)
+
+        self.layout = QVBoxLayout(self)
+        self.layout.addWidget(QLabel(f"{len(results)} bài có vấn đề — {summary}"))
+
+        self.table = QTableWidget(len(results), 4)
+        self.table.setHorizontalHeaderLabels(["Bài hát", "Sách", "Số slide", "Vấn đề"])
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
+        for row, result in enumerate(results):
+            title_item = QTableWidgetItem(result.title)
+            title_item.setData(Qt.UserRole, result.song_id)
+            count_item = QTableWidgetItem()
+            count_item.setData(Qt.DisplayRole, result.slide_count)
+            self.table.setItem(row, 0, title_item)
+            self.table.setItem(row, 1, QTableWidgetItem(result.songbook_name))
+            self.table.setItem(row, 2, count_item)
+            self.table.setItem(row, 3, QTableWidgetItem(result.describe(max_slides)))
+        self.table.resizeColumnsToContents()
+        self.table.setSortingEnabled(True)
+        self.layout.addWidget(self.table)
+
+        bottom_layout = QHBoxLayout()
+        bottom_layout.addWidget(QLabel("Nhấn đúp vào một bài để thêm vào playlist"), 1)
+        self.add_button = QPushButton("Thêm vào playlist")
+        self.close_button = QPushButton("Đóng")
+        bottom_layout.addWidget(self.add_button)
+        bottom_layout.addWidget(self.close_button)
+        self.layout.addLayout(bottom_layout)
+
+        self.table.itemActivated.connect(lambda item: self._choose_current())
+        self.add_button.clicked.connect(self._choose_current)
+        self.close_button.clicked.connect(self.accept)
+
+    def _choose_current(self):
+        row = self.table.currentRow()
+        if row < 0:
+            return
+        self.song_chosen.emit(self.table.item(row, 0).data(Qt.UserRole))
@@ -2,13 +2,13 @@
 
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QPushButton, QTreeView, 
                                QHBoxLayout, QLabel)
-from PySide6.QtCore import Signal, Qt
-from PySide6.QtGui import QStandardItemModel, QStandardItem
+from PySide6.QtCore import Signal, Qt, QModelIndex
 import qtawesome as qta
 from app.constants import (
     ICON_RENAME, ICON_DELETE, ICON_ADD_SLIDE, 
     ICON_EDIT_SONG, ICON_NEW_SONG, ICON_NEW_SONGBOOK, COLOR_ADD_BUTTON, COLOR_DELETE_BUTTON, COLOR_EDIT_BUTTON
 )
+from app.models.songbook_tree_model import SongbookTreeModel, SONGBOOK_ROLE, SONG_ROLE
 from.search_filter_widget import SearchFilterWidget
 
 class SongbookView(QWidget):
@@ -30,6 +30,7 @@ class SongbookView(QWidget):
         self.playlist_song_ids = set()
 
         self.song_widgets = {}
+        self._auto_expanded = False
 
         self.add_song_button = QPushButton(qta.icon(ICON_NEW_SONG), "Thêm bài hát mới")
         self.add_songbook_button = QPushButton(qta.icon(ICON_NEW_SONGBOOK, color="#592b2b"), "Thêm Sách bài hát")
@@ -48,8 +49,12 @@ class SongbookView(QWidget):
         self.layout.addWidget(self.search_widget)
         self.layout.addWidget(self.tree_view)
         
-        self.model = QStandardItemModel()
+        self.model = SongbookTreeModel(self)
         self.tree_view.setModel(self.model)
+        # Widget của từng dòng chỉ được tạo khi dòng đó được tải vào cây
+        self.model.rowsInserted.connect(self._on_rows_inserted)
+        # Cuộn tới cuối một sách đang mở thì tải thêm trang kế tiếp
+        self.tree_view.verticalScrollBar().valueChanged.connect(self._fetch_more_if_visible)
 
         self.add_song_button.clicked.connect(self.add_song_clicked)
         self.add_songbook_button.clicked.connect(self.add_songbook_clicked)
@@ -68,36 +73,55 @@ class SongbookView(QWidget):
             widgets['edit_btn'].setEnabled(not is_in_playlist)
             widgets['delete_btn'].setEnabled(not is_in_playlist)
 
-    def populate_tree(self, songbooks):
-        """Điền dữ liệu (có thể là kết quả tìm kiếm) vào cây."""
-        self.model.clear()
-    
+    def populate_tree(self, songbooks, page_loader, expand_all: bool = False):
+        """
+        Điền các sách (có thể là kết quả tìm kiếm) vào cây. Bài hát chưa được tải;
+        page_loader(songbook_id, after_title, limit) sẽ được gọi khi sách được mở ra.
+        - expand_all: Mở tất cả các sách (dùng khi đang tìm kiếm).
+        """
+        # Ghi nhớ các sách đang mở để khôi phục sau khi tải lại (ví dụ sau khi sửa bài)
+        # (bỏ qua nếu các sách chỉ được mở tự động cho kết quả tìm kiếm)
+        expanded_ids = set()
+        if not self._auto_expanded:
+            for row in range(self.model.rowCount()):
+                index = self.model.index(row, 0)
+                if self.tree_view.isExpanded(index):
+                    expanded_ids.add(self.model.songbook_at(index).id)
+        self._auto_expanded = expand_all
+
         self.song_widgets.clear() # Xóa các widget cũ trước khi tạo lại
-        root_node = self.model.invisibleRootItem()
-
-        for sb in songbooks:
-            songbook_item = QStandardItem() 
-            songbook_item.setEditable(False)
-            root_node.appendRow(songbook_item)
-            
-            songbook_widget = self._create_songbook_widget(sb)
-            self.tree_view.setIndexWidget(songbook_item.index(), songbook_widget)
-
-            for song in sb.songs:
-                song_item = QStandardItem()
-                song_item.setEditable(False)
-                songbook_item.appendRow(song_item)
-
-                song_widget = self._create_song_widget(song)
-                self.tree_view.setIndexWidget(song_item.index(), song_widget)
-        
-        self.tree_view.expandAll()
+        self.model.set_songbooks(songbooks, page_loader)
+
+        for row, sb in enumerate(songbooks):
+            if expand_all or sb.id in expanded_ids:
+                self.tree_view.expand(self.model.index(row, 0))
+
+    def _on_rows_inserted(self, parent: QModelIndex, first: int, last: int):
+        """Tạo widget cho các dòng vừa được thêm vào mô hình."""
+        for row in range(first, last + 1):
+            index = self.model.index(row, 0, parent)
+            if parent.isValid():
+                widget = self._create_song_widget(index.data(SONG_ROLE))
+            else:
+                widget = self._create_songbook_widget(index.data(SONGBOOK_ROLE))
+            self.tree_view.setIndexWidget(index, widget)
+
+    def _fetch_more_if_visible(self, value: int):
+        """Khi dòng cuối đã tải của một sách đang mở hiện ra trong khung nhìn, tải trang tiếp theo."""
+        viewport_rect = self.tree_view.viewport().rect()
+        for row in range(self.model.rowCount()):
+            parent = self.model.index(row, 0)
+            if not self.tree_view.isExpanded(parent) or not self.model.canFetchMore(parent):
+                continue
+            last_child = self.model.index(self.model.rowCount(parent) - 1, 0, parent)
+            if self.tree_view.visualRect(last_child).intersects(viewport_rect):
+                self.model.fetchMore(parent)
 
     def _create_songbook_widget(self, songbook):
         widget = QWidget()
         layout = QHBoxLayout(widget)
         layout.setContentsMargins(0, 0, 0, 0)
-        label = QLabel(f"{songbook.name}")
+        label = QLabel(f"{songbook.name} ({songbook.song_count})")
         label.setStyleSheet("font-weight: bold;")
         rename_btn = QPushButton(qta.icon(ICON_RENAME), "")
         delete_btn = QPushButton(qta.icon(ICON_DELETE), "")
@@ -0,0 +1,95 @@
+# src/benchmarks/bench_catalog_memory.py
+"""
+Đo bộ nhớ của danh mục bài hát trong bộ nhớ ở 10k, 50k và 100k bài:
+bản ghi dataclass thường dựng qua dict(row) (cách cũ) so với bản ghi __slots__
+dựng bằng row factory, và lượng bộ nhớ thêm vào khi tải lại danh mục.
+
+Chạy từ thư mục src:
+    python -m benchmarks.bench_catalog_memory --sizes 10000 50000 100000
+"""
+
+import argparse
+import gc
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Optional
+
+from app.models.database_model import DatabaseModel
+from benchmarks.synthetic_catalog import build_database
+
+@dataclass
+class LegacySong:
+    """Bản ghi Song kiểu cũ (có __dict__), chỉ dùng để so sánh."""
+    id: int
+    songbook_id: int
+    title: str
+    lyrics: str
+    number: Optional[str] = None
+    page: Optional[str] = None
+
+def _load_legacy(db_path: str) -> list:
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    songs = [LegacySong(**dict(row)) for row in conn.execute("SELECT * FROM songs ORDER BY title")]
+    conn.close()
+    return songs
+
+def _record_overhead(songs) -> float:
+    """Số byte trung bình của riêng đối tượng bản ghi (kèm __dict__ nếu có), không tính chuỗi."""
+    total = 0
+    for song in songs:
+        total += sys.getsizeof(song)
+        if hasattr(song, '__dict__'):
+            total += sys.getsizeof(song.__dict__)
+    return total / max(1, len(songs))
+
+def _measure(load) -> tuple:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak, elapsed
+
+def run(sizes: list):
+    workdir = tempfile.mkdtemp(prefix="catalog_memory_bench_")
+    mib = 1024 * 1024
+    try:
+        print(f"{'Số bài':>8} {'Cách dựng':<22}{'Giữ lại':>10}{'Đỉnh':>10}{'Thời gian':>11}{'Bản ghi':>10}")
+        for size in sizes:
+            db_path = os.path.join(workdir, f"catalog_{size}.db")
+            build_database(db_path, size)
+
+            legacy, legacy_kept, legacy_peak, legacy_s = _measure(lambda: _load_legacy(db_path))
+            legacy_record = _record_overhead(legacy)
+            del legacy
+
+            model = DatabaseModel(db_path)
+            catalog, kept, peak, elapsed = _measure(model.get_songbooks_with_songs)
+            # Tải lại khi danh mục cũ vẫn còn được giữ (như khi Controller tải lại sau khi sửa):
+            # tựa đề không đổi được dùng chung nên phần thêm vào nhỏ hơn
+            reloaded, reload_kept, _, reload_s = _measure(model.get_songbooks_with_songs)
+            record = _record_overhead([song for sb in catalog for song in sb.songs])
+            del catalog, reloaded
+            model.close()
+
+            print(f"{size:>8,} {'dataclass + dict(row)':<22}{legacy_kept / mib:>8.1f}MB{legacy_peak / mib:>8.1f}MB{legacy_s:>10.2f}s{legacy_record:>9.0f}B")
+            print(f"{'':>8} {'__slots__ + factory':<22}{kept / mib:>8.1f}MB{peak / mib:>8.1f}MB{elapsed:>10.2f}s{record:>9.0f}B")
+            print(f"{'':>8} {'tải lại (chung tựa đề)':<22}{reload_kept / mib:>8.1f}MB{'':>10}{reload_s:>10.2f}s")
+            os.remove(db_path)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 100000])
+    args = parser.parse_args()
+    run(args.sizes)
@@ -0,0 +1,96 @@
+# src/benchmarks/bench_db_profile.py
+"""
+So sánh độ trễ ghi/đọc của DatabaseModel với cấu hình SQLite mặc định
+(journal DELETE, synchronous FULL, không mmap) và cấu hình đã tinh chỉnh (CONNECTION_PROFILE).
+
+Chạy từ thư mục src:
+    python -m benchmarks.bench_db_profile --songs 20000 --writes 300
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from app.models.database_model import DatabaseModel
+from app.models.song_model import Song
+from benchmarks.synthetic_catalog import build_database, generate_lyrics
+
+DEFAULT_PRAGMAS = [
+    "PRAGMA journal_mode = DELETE",
+    "PRAGMA synchronous = FULL",
+    "PRAGMA mmap_size = 0",
+    "PRAGMA cache_size = -2000",
+]
+
+def _timed(fn, repeat: int) -> list:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def _run_profile(db_path: str, tuned: bool, writes: int, reads: int) -> dict:
+    model = DatabaseModel(db_path)
+    if not tuned:
+        for pragma in DEFAULT_PRAGMAS:
+            model.conn.execute(pragma).fetchall()
+
+    rng = random.Random(11)
+    songbooks = model.get_songbooks()
+    song_ids = [row[0] for row in model.get_song_index_rows()]
+    counter = iter(range(10 ** 9))
+
+    def add_one():
+        sb = rng.choice(songbooks)
+        model.add_song(Song(None, sb.id, f"Bài đo {'t' if tuned else 'd'} {next(counter)}", generate_lyrics(rng)))
+
+    def update_one():
+        song = model.get_song_by_id(rng.choice(song_ids))
+        song.lyrics += "\nAmen."
+        model.update_song(song)
+
+    results = {
+        "add_song": _timed(add_one, writes),
+        "update_song": _timed(update_one, writes),
+        "get_song_by_id": _timed(lambda: model.get_song_by_id(rng.choice(song_ids)), reads),
+        "get_songs_page": _timed(lambda: model.get_songs_page(rng.choice(songbooks).id, None, 100), reads // 10),
+        "summaries": _timed(model.get_songbook_summaries, reads // 10),
+    }
+    model.close()
+    return results
+
+def run(song_count: int, writes: int, reads: int):
+    workdir = tempfile.mkdtemp(prefix="db_profile_bench_")
+    try:
+        template = os.path.join(workdir, "template.db")
+        build_database(template, song_count)
+        report = {}
+        for label, tuned in (("mặc định", False), ("tinh chỉnh", True)):
+            db_path = os.path.join(workdir, f"{'tuned' if tuned else 'default'}.db")
+            shutil.copy(template, db_path)
+            report[label] = _run_profile(db_path, tuned, writes, reads)
+
+        print(f"Thư viện giả lập: {song_count:,} bài hát — trung vị / p95 (ms)")
+        print(f"{'Thao tác':<18}" + "".join(f"{label:>24}" for label in report))
+        for operation in report["mặc định"]:
+            row = f"{operation:<18}"
+            for samples in (report[label][operation] for label in report):
+                p95 = sorted(samples)[int(len(samples) * 0.95) - 1]
+                row += f"{statistics.median(samples):>14.3f} / {p95:>7.3f}"
+            print(row)
+        return report
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--songs", type=int, default=20000)
+    parser.add_argument("--writes", type=int, default=300)
+    parser.add_argument("--reads", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.songs, args.writes, args.reads)
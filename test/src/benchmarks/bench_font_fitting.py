@@ -0,0 +1,69 @@
+# src/benchmarks/bench_font_fitting.py
+"""
+Đo thời gian tự chọn cỡ chữ lời cho một playlist giả lập (mặc định 30 bài): lần đầu (chưa có
+số đo nào được ghi nhớ), lần lặp lại, và so với cách dò từng cỡ chữ bằng cách chia slide lại.
+
+Chạy từ thư mục src:
+    python -m benchmarks.bench_font_fitting --songs 30
+"""
+
+import argparse
+import random
+import time
+
+from PySide6.QtGui import QFont, QGuiApplication
+
+from app.models.song_model import Song, Theme
+from benchmarks.synthetic_catalog import generate_lyrics
+from utils import slide_layout_engine
+from utils.font_fitting import fit_playlist_font_sizes, lyric_size_bounds
+from utils.slide_layout_engine import plan_export_slides, split_stanzas
+
+def _linear_scan(songs: list, theme: Theme) -> dict:
+    """Cách làm tay: giảm dần cỡ chữ, mỗi bước chia slide lại, tới khi số slide không vượt số đoạn."""
+    low, high = lyric_size_bounds(theme)
+    sizes = {}
+    for song in songs:
+        stanza_count = len(split_stanzas(song.lyrics))
+        size = high
+        while size > low and len(plan_export_slides(song.lyrics, QFont(theme.lyric_font_name, size), theme)) > stanza_count:
+            size -= 1
+        sizes[song.id] = size
+    return sizes
+
+def run(song_count: int, seed: int, font_size: int):
+    rng = random.Random(seed)
+    songs = [Song(id=i, songbook_id=1, title=f"Bài {i}", lyrics=generate_lyrics(rng)) for i in range(1, song_count + 1)]
+    theme = Theme(lyric_font_size=font_size)
+
+    slide_layout_engine._text_height.cache_clear()
+    start = time.perf_counter()
+    sizes = fit_playlist_font_sizes(songs, theme)
+    cold = time.perf_counter() - start
+    measured = slide_layout_engine._text_height.cache_info().currsize
+
+    start = time.perf_counter()
+    fit_playlist_font_sizes(songs, theme)
+    warm = time.perf_counter() - start
+
+    slide_layout_engine._text_height.cache_clear()
+    start = time.perf_counter()
+    _linear_scan(songs, theme)
+    linear = time.perf_counter() - start
+
+    histogram = {}
+    for size in sizes.values():
+        histogram[size] = histogram.get(size, 0) + 1
+    print(f"Tự chọn cỡ chữ cho {song_count} bài: lần đầu {cold * 1000:.1f}ms ({measured} số đo), "
+          f"lặp lại {warm * 1000:.1f}ms")
+    print(f"Dò từng cỡ chữ bằng cách chia slide lại: {linear * 1000:.1f}ms")
+    print("Cỡ chữ đã chọn: " + ", ".join(f"{size}pt x{count}" for size, count in sorted(histogram.items())))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--songs", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--font-size", type=int, default=60, help="Cỡ chữ lời của theme (giới hạn trên)")
+    args = parser.parse_args()
+    app = QGuiApplication(["bench-font-fitting", "-platform", "offscreen"])
+    run(args.songs, args.seed, args.font_size)
@@ -0,0 +1,74 @@
+# src/benchmarks/bench_image_recognition.py
+"""
+Đo quy trình nhận dạng lời từ ảnh với backend giả lập (có độ trễ mỗi yêu cầu như dịch vụ đám mây):
+gửi từng ảnh so với gửi theo lô, và lần nhập lại cùng bộ ảnh (toàn bộ lấy từ bộ nhớ đệm).
+
+Chạy từ thư mục src:
+    python -m benchmarks.bench_image_recognition --images 40 --latency 0.3
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+
+from PIL import Image, ImageDraw, ImageFont
+
+from app.models.database_model import DatabaseModel
+from benchmarks.synthetic_catalog import PDF_FONT_CANDIDATES, generate_lyrics, _line
+from utils.lyric_recognizer import FakeRecognizer, RecognitionStats, recognize_images
+
+def build_scans(directory: str, count: int, seed: int = 2024) -> list:
+    """Sinh `count` ảnh chụp trang sách giả lập (chữ đen trên nền trắng, nghiêng nhẹ, kích thước ảnh điện thoại)."""
+    rng = random.Random(seed)
+    fontfile = next((path for path in PDF_FONT_CANDIDATES if os.path.exists(path)), None)
+    font = ImageFont.truetype(fontfile, 40) if fontfile else ImageFont.load_default()
+    paths = []
+    for i in range(count):
+        image = Image.new("RGB", (3000, 4000), "white")
+        draw = ImageDraw.Draw(image)
+        text = f"{i + 1}. {_line(rng).upper()}\n\n{generate_lyrics(rng)}"
+        draw.multiline_text((200, 200), text, fill="black", font=font, spacing=18)
+        image = image.rotate(rng.uniform(-3, 3), fillcolor="white")
+        path = os.path.join(directory, f"scan_{i:04d}.jpg")
+        image.save(path, quality=85)
+        paths.append(path)
+    return paths
+
+def _run(paths, recognizer, db_model) -> RecognitionStats:
+    stats = RecognitionStats()
+    for _ in recognize_images(paths, recognizer, db_model, stats=stats):
+        pass
+    return stats
+
+def run(image_count: int, latency: float):
+    workdir = tempfile.mkdtemp(prefix="image_recognition_bench_")
+    try:
+        paths = build_scans(workdir, image_count)
+        db_path = os.path.join(workdir, "lyrics.db")
+        results = {}
+        for label, max_batch in (("từng ảnh", 1), ("lô 4 ảnh", 4)):
+            if os.path.exists(db_path):
+                os.remove(db_path)
+            model = DatabaseModel(db_path)
+            results[label] = _run(paths, FakeRecognizer(latency=latency, max_batch=max_batch), model)
+            if max_batch == 4:
+                results["nhập lại (đệm)"] = _run(paths, FakeRecognizer(latency=latency, max_batch=max_batch), model)
+            model.close()
+
+        print(f"{image_count} ảnh 3000x4000, độ trễ giả lập {latency * 1000:.0f}ms/yêu cầu, {os.cpu_count()} CPU")
+        print(f"{'Chế độ':<16}{'Thời gian':>11}{'Ảnh/s':>9}{'Yêu cầu':>9}{'Tiền xử lý':>12}{'Đệm':>7}")
+        for label, stats in results.items():
+            print(f"{label:<16}{stats.seconds:>10.2f}s{stats.images_per_second:>9.1f}{stats.requests:>9}"
+                  f"{stats.preprocess_seconds:>11.2f}s{stats.hit_rate:>7.0%}")
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--images", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.3)
+    args = parser.parse_args()
+    run(args.images, args.latency)
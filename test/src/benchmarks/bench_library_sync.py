@@ -0,0 +1,65 @@
+# src/benchmarks/bench_library_sync.py
+"""
+Đo thời gian đồng bộ delta giữa hai bản sao của cùng một thư viện:
+lần đồng bộ đầu tiên (gửi toàn bộ dòng gốc) và đồng bộ N chỉnh sửa sau đó,
+so với việc sao chép cả tệp database.
+
+Chạy từ thư mục src:
+    python -m benchmarks.bench_library_sync --songs 50000 --edits 50
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from app.models.database_model import DatabaseModel
+from app.models.song_model import Song
+from benchmarks.synthetic_catalog import build_database, generate_lyrics
+from utils.library_sync import sync_databases
+
+def run(song_count: int, edits: int):
+    workdir = tempfile.mkdtemp(prefix="library_sync_bench_")
+    try:
+        path_a = os.path.join(workdir, "a.db")
+        path_b = os.path.join(workdir, "b.db")
+        build_database(path_a, song_count)
+        start = time.perf_counter()
+        shutil.copy(path_a, path_b)
+        copy_s = time.perf_counter() - start
+
+        a, b = DatabaseModel(path_a), DatabaseModel(path_b)
+        initial = sync_databases(a, b)
+
+        rng = random.Random(5)
+        song_ids = [row[0] for row in a.get_song_index_rows()]
+        songbooks = a.get_songbooks()
+        for i in range(edits):
+            if i % 5 == 0:
+                a.add_song(Song(None, rng.choice(songbooks).id, f"Bài mới {i}", generate_lyrics(rng)))
+            else:
+                song = a.get_song_by_id(rng.choice(song_ids))
+                song.lyrics += "\nAmen."
+                a.update_song(song)
+        delta = sync_databases(b, a)
+        idle = sync_databases(a, b)
+        a.close()
+        b.close()
+
+        print(f"Thư viện giả lập: {song_count:,} bài hát ({os.path.getsize(path_a) / 1024 / 1024:.1f}MB)")
+        print(f"Sao chép cả tệp:         {copy_s * 1000:>10.1f}ms")
+        print(f"Đồng bộ lần đầu:         {initial.seconds * 1000:>10.1f}ms  ({initial.summary()})")
+        print(f"Đồng bộ {edits} chỉnh sửa:    {delta.seconds * 1000:>10.1f}ms  ({delta.summary()})")
+        print(f"Đồng bộ khi không đổi:   {idle.seconds * 1000:>10.1f}ms")
+        return {"copy_s": copy_s, "initial": initial, "delta": delta, "idle": idle}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--songs", type=int, default=50000)
+    parser.add_argument("--edits", type=int, default=50)
+    args = parser.parse_args()
+    run(args.songs, args.edits)
@@ -0,0 +1,80 @@
+# src/benchmarks/bench_lyric_storage.py
+"""
+So sánh lưu trữ lời bài hát dạng văn bản thường và dạng nén với từ điển dùng chung:
+kích thước tệp trên đĩa và độ trễ đọc.
+
+Chạy từ thư mục src:
+    python -m benchmarks.bench_lyric_storage --songs 10000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from app.models.database_model import DatabaseModel
+from benchmarks.synthetic_catalog import build_database
+from utils.lyric_compression_tool import compress_database
+
+def _measure_reads(db_path: str, reads: int, seed: int = 7) -> dict:
+    model = DatabaseModel(db_path)
+    song_ids = [row[0] for row in model.get_song_index_rows()]
+    rng = random.Random(seed)
+    picks = [rng.choice(song_ids) for _ in range(reads)]
+
+    start = time.perf_counter()
+    for song_id in picks:
+        model.get_song_by_id(song_id)
+    point_read = (time.perf_counter() - start) / reads
+
+    start = time.perf_counter()
+    total_chars = sum(len(lyrics) for lyrics in model.iter_all_lyrics())
+    full_scan = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model.get_songbook_summaries(keyword="Alleluia", search_by="lyrics")
+    lyric_search = time.perf_counter() - start
+    model.close()
+    return {"point_read_us": point_read * 1e6, "full_scan_s": full_scan,
+            "lyric_search_s": lyric_search, "chars": total_chars}
+
+def run(song_count: int, reads: int):
+    workdir = tempfile.mkdtemp(prefix="lyric_storage_bench_")
+    try:
+        plain_path = os.path.join(workdir, "plain.db")
+        packed_path = os.path.join(workdir, "compressed.db")
+        build_database(plain_path, song_count)
+        plain_model = DatabaseModel(plain_path)
+        plain_model.vacuum()
+        plain_model.close()
+        shutil.copy(plain_path, packed_path)
+
+        start = time.perf_counter()
+        compress_database(packed_path)
+        migration_s = time.perf_counter() - start
+
+        results = {}
+        for label, path in (("văn bản", plain_path), ("nén", packed_path)):
+            stats = _measure_reads(path, reads)
+            stats["size_bytes"] = os.path.getsize(path)
+            results[label] = stats
+
+        print(f"Thư viện giả lập: {song_count:,} bài hát (di chuyển sang dạng nén mất {migration_s:.2f}s)")
+        print(f"{'Chế độ':<10}{'Kích thước':>14}{'Đọc 1 bài':>14}{'Quét toàn bộ':>16}{'Tìm theo lời':>16}")
+        for label, stats in results.items():
+            print(f"{label:<10}{stats['size_bytes'] / 1024:>12,.0f}KB"
+                  f"{stats['point_read_us']:>12.1f}µs{stats['full_scan_s']:>15.3f}s{stats['lyric_search_s']:>15.3f}s")
+        ratio = results["nén"]["size_bytes"] / results["văn bản"]["size_bytes"]
+        print(f"Tỉ lệ kích thước: {ratio:.2%}")
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--songs", type=int, default=10000)
+    parser.add_argument("--reads", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.songs, args.reads)
@@ -0,0 +1,98 @@
+# src/benchmarks/bench_near_duplicates.py
+"""
+Đo thời gian phát hiện bài hát gần trùng bằng MinHash/LSH trên thư viện giả lập (mặc định 50.000 bài)
+có cài sẵn các bản sao đã sửa lời, đổi tựa đề và chuyển sang sách khác: tính chữ ký lần đầu,
+làm mới sau khi sửa vài bài, tìm toàn bộ cụm trùng và kiểm tra nhanh một bài đang nhập.
+
+Chạy từ thư mục src:
+    python -m benchmarks.bench_near_duplicates --songs 50000 --duplicates 500
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from app.models.database_model import DatabaseModel
+from benchmarks.synthetic_catalog import SYLLABLES, build_database
+from utils.near_duplicates import find_duplicate_clusters, find_similar_songs, refresh_signatures
+
+def _mutate(lyrics: str, rng: random.Random, rate: float) -> str:
+    """Thay ngẫu nhiên một tỉ lệ từ và bỏ một dòng: mô phỏng cùng bài ở sách khác."""
+    lines = lyrics.split("\n")
+    if len(lines) > 4:
+        del lines[rng.randrange(len(lines))]
+    mutated = []
+    for line in lines:
+        words = line.split(" ")
+        mutated.append(" ".join(rng.choice(SYLLABLES) if rng.random() < rate else w for w in words))
+    return "\n".join(mutated)
+
+def plant_duplicates(db_path: str, count: int, rate: float, seed: int = 7) -> list:
+    """Thêm `count` bản sao gần trùng; trả về các cặp (bài gốc, bản sao)."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    songbook_ids = [row[0] for row in conn.execute("SELECT id FROM songbooks")]
+    originals = rng.sample([row[0] for row in conn.execute("SELECT id FROM songs")], count)
+    pairs = []
+    for song_id in originals:
+        songbook_id, lyrics = conn.execute("SELECT songbook_id, lyrics FROM songs WHERE id =?", (song_id,)).fetchone()
+        target = rng.choice([sb for sb in songbook_ids if sb != songbook_id])
+        copy_id = conn.execute("INSERT INTO songs (songbook_id, title, number, page, lyrics) VALUES (?,?,?,?,?)",
+                               (target, f"Bản sao {song_id}", None, None, _mutate(lyrics, rng, rate))).lastrowid
+        pairs.append((song_id, copy_id))
+    conn.commit()
+    conn.close()
+    return pairs
+
+def run(song_count: int, duplicates: int, rate: float, workers: int):
+    workdir = tempfile.mkdtemp(prefix="near_dup_bench_")
+    try:
+        db_path = os.path.join(workdir, "lyrics.db")
+        build_database(db_path, song_count)
+        pairs = plant_duplicates(db_path, duplicates, rate)
+        db_model = DatabaseModel(db_path)
+
+        start = time.perf_counter()
+        computed = refresh_signatures(db_model, workers=workers)
+        print(f"Chữ ký lần đầu: {computed} bài trong {time.perf_counter() - start:.2f}s ({workers} tiến trình)")
+
+        start = time.perf_counter()
+        clusters = find_duplicate_clusters(db_model)
+        elapsed = time.perf_counter() - start
+        cluster_of = {song_id: i for i, cluster in enumerate(clusters) for song_id in cluster}
+        found = sum(1 for a, b in pairs if a in cluster_of and cluster_of.get(a) == cluster_of.get(b))
+        planted = {song_id for pair in pairs for song_id in pair}
+        extra = sum(1 for cluster in clusters if not planted.intersection(cluster))
+        print(f"Tìm cụm trùng: {len(clusters)} cụm trong {elapsed:.2f}s — tìm thấy {found}/{len(pairs)} cặp cài sẵn, "
+              f"{extra} cụm ngoài dự kiến")
+
+        edited = [song_id for _, song_id in pairs[:20]]
+        for song_id in edited:
+            song = db_model.get_song_by_id(song_id)
+            song.lyrics += "\nAmen."
+            db_model.update_song(song)
+        start = time.perf_counter()
+        computed = refresh_signatures(db_model, workers=workers)
+        print(f"Làm mới sau khi sửa {len(edited)} bài: {computed} bài trong {(time.perf_counter() - start) * 1000:.1f}ms")
+
+        original = db_model.get_song_by_id(pairs[0][0])
+        start = time.perf_counter()
+        matches = find_similar_songs(db_model, _mutate(original.lyrics, random.Random(1), rate))
+        print(f"Kiểm tra một bài đang nhập: {len(matches)} bài gần trùng trong "
+              f"{(time.perf_counter() - start) * 1000:.1f}ms")
+        db_model.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--songs", type=int, default=50000)
+    parser.add_argument("--duplicates", type=int, default=500)
+    parser.add_argument("--rate", type=float, default=0.05, help="Tỉ lệ từ bị thay trong mỗi bản sao")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    run(args.songs, args.duplicates, args.rate, args.workers)
@@ -0,0 +1,56 @@
+# src/benchmarks/bench_pdf_import.py
+"""
+Đo thời gian trích và tách bài hát từ một sách thánh ca PDF giả lập (mặc định 900 trang):
+trích tuần tự trong tiến trình hiện tại so với process pool, cùng bộ nhớ Python đỉnh của tiến trình chính.
+
+Chạy từ thư mục src:
+    python -m benchmarks.bench_pdf_import --pages 900
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic_catalog import build_hymnal_pdf
+from utils.pdf_importer import iter_pdf_songs
+
+def _run(pdf_path: str, workers: int) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    first_song_s = None
+    count = 0
+    for _ in iter_pdf_songs(pdf_path, workers=workers):
+        if first_song_s is None:
+            first_song_s = time.perf_counter() - start
+        count += 1
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"songs": count, "seconds": elapsed, "first_song_s": first_song_s, "peak_bytes": peak}
+
+def run(pages: int, workers: int):
+    workdir = tempfile.mkdtemp(prefix="pdf_import_bench_")
+    try:
+        pdf_path = os.path.join(workdir, "hymnal.pdf")
+        expected = build_hymnal_pdf(pdf_path, pages)
+        print(f"PDF giả lập: {pages} trang, {expected} bài hát ({os.path.getsize(pdf_path) / 1024 / 1024:.1f}MB)")
+        print(f"{'Chế độ':<22}{'Số bài':>8}{'Thời gian':>12}{'Bài đầu tiên':>15}{'Trang/s':>10}{'Bộ nhớ Python':>14}")
+        results = {}
+        for label, worker_count in (("tuần tự", 0), (f"process pool ({workers})", workers)):
+            stats = _run(pdf_path, worker_count)
+            results[label] = stats
+            print(f"{label:<22}{stats['songs']:>8}{stats['seconds']:>11.2f}s{stats['first_song_s']:>14.3f}s"
+                  f"{pages / stats['seconds']:>10.0f}{stats['peak_bytes'] / 1024 / 1024:>12.1f}MB")
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=900)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    run(args.pages, args.workers)
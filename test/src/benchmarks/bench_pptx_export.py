@@ -0,0 +1,52 @@
+# src/benchmarks/bench_pptx_export.py
+"""
+Đo thời gian và kích thước tệp khi xuất playlist giả lập ra .pptx với số bài tăng dần.
+
+Chạy từ thư mục src:
+    python -m benchmarks.bench_pptx_export --songs 10 45 90
+"""
+
+import argparse
+import os
+import random
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+
+from PySide6.QtGui import QGuiApplication
+
+from app.models.song_model import Song, Theme
+from benchmarks.synthetic_catalog import generate_lyrics
+from utils.pptx_generator import generate_presentation
+
+def run(song_counts: list, repeat: int, share_repeated_slides: bool):
+    workdir = tempfile.mkdtemp(prefix="pptx_export_bench_")
+    try:
+        for song_count in song_counts:
+            rng = random.Random(song_count)
+            songs = [Song(id=i, songbook_id=1, title=f"Bài {i}", lyrics=generate_lyrics(rng))
+                     for i in range(1, song_count + 1)]
+            output_path = os.path.join(workdir, f"deck_{song_count}.pptx")
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                generate_presentation(songs, Theme(), output_path, {}, share_repeated_slides=share_repeated_slides)
+                best = min(best, time.perf_counter() - start)
+            with zipfile.ZipFile(output_path) as archive:
+                slide_count = sum(1 for name in archive.namelist() if re.fullmatch(r"ppt/slides/slide\d+\.xml", name))
+            size = os.path.getsize(output_path)
+            print(f"{song_count} bài, {slide_count} slide: {best:.3f}s ({best * 1000 / slide_count:.2f}ms/slide), "
+                  f"{size / 1e3:.0f}KB ({size / slide_count:.0f} byte/slide)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--songs", type=int, nargs="+", default=[10, 45, 90])
+    parser.add_argument("--repeat", type=int, default=3, help="Số lần chạy mỗi cỡ, lấy lần nhanh nhất")
+    parser.add_argument("--no-share", action="store_true", help="Không dựng slide lặp lại thành layout dùng chung")
+    args = parser.parse_args()
+    app = QGuiApplication(["bench-pptx-export", "-platform", "offscreen"])
+    run(args.songs, args.repeat, not args.no_share)
@@ -0,0 +1,46 @@
+# src/benchmarks/bench_slide_image_export.py
+"""
+Đo thời gian và số ảnh giữ trong bộ nhớ khi xuất playlist giả lập ra PDF/ảnh với số bài tăng dần:
+thời gian cho mỗi slide và số ảnh giữ cùng lúc phải gần như không đổi khi playlist dài ra.
+
+Chạy từ thư mục src:
+    python -m benchmarks.bench_slide_image_export --songs 10 40 160 --format pdf
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+
+from PySide6.QtGui import QGuiApplication
+
+from app.models.song_model import Song, Theme
+from benchmarks.synthetic_catalog import generate_lyrics
+from utils.slide_image_export import export_slide_images
+
+def run(song_counts: list, output_format: str, width: int, workers: int):
+    workdir = tempfile.mkdtemp(prefix="slide_export_bench_")
+    try:
+        for song_count in song_counts:
+            rng = random.Random(song_count)
+            songs = [Song(id=i, songbook_id=1, title=f"Bài {i}", lyrics=generate_lyrics(rng))
+                     for i in range(1, song_count + 1)]
+            output_path = os.path.join(workdir, f"deck_{song_count}.{output_format}")
+            stats = export_slide_images(songs, Theme(), {}, output_path, width=width, workers=workers)
+            output_size = sum(os.path.getsize(os.path.join(workdir, name)) for name in os.listdir(workdir)
+                              if name.startswith(f"deck_{song_count}"))
+            print(f"{song_count} bài: {stats.summary()} — {stats.seconds * 1000 / stats.slides:.1f}ms/slide, "
+                  f"giữ tối đa {stats.peak_held} ảnh, {output_size / 1e6:.1f}MB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--songs", type=int, nargs="+", default=[10, 40, 160])
+    parser.add_argument("--format", choices=["pdf", "png", "jpg"], default="pdf")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    app = QGuiApplication(["bench-slide-image-export", "-platform", "offscreen"])
+    run(args.songs, args.format, args.width, args.workers)
@@ -0,0 +1,200 @@
+# src/benchmarks/suite.py
+"""
+Bộ đo hiệu năng tổng hợp trên thư viện thánh ca giả lập (1k, 10k, 100k bài) và playlist 10, 50, 200 bài:
+truy vấn CSDL, điền cây sách bài hát (Qt offscreen), chia slide, vẽ ảnh xem trước và xuất .pptx.
+
+Kết quả (trung vị/nhỏ nhất/lớn nhất, ms) được ghi ra JSON. Khi có --baseline (một tệp JSON của lần chạy
+trước), mỗi phép đo được so với lần đó; chậm hơn quá ngưỡng cho phép thì thoát với mã 1, dùng được trong CI.
+
+Chạy từ thư mục src:
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --sizes 1000 10000 --baseline bench.json --threshold 0.25 --threshold-for "tree.*=0.5"
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from PySide6.QtWidgets import QApplication
+
+from app.models.database_model import DatabaseModel
+from app.models.song_model import Theme
+from benchmarks.synthetic_catalog import build_database, generate_playlist_ids
+from utils import slide_layout_engine
+from utils.live_renderer import render_slide, song_slides
+from utils.pptx_generator import generate_presentation
+
+SUITE_VERSION = 1
+# Bề rộng ảnh xem trước (px), như ảnh thu nhỏ ở cột xem trước
+PREVIEW_WIDTH = 480
+SEARCH_KEYWORD = "chúa"
+
+def _measure(fn, repeat: int, setup=None) -> dict:
+    """Chạy fn() repeat lần (setup() trước mỗi lần, không tính giờ); trả về số liệu tính bằng ms."""
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(samples), 3), "min_ms": round(min(samples), 3),
+            "max_ms": round(max(samples), 3), "samples": len(samples)}
+
+def _clear_layout_caches():
+    """Chia slide từ đầu: bỏ các số đo chữ và cách chia slide đã ghi nhớ."""
+    slide_layout_engine._text_height.cache_clear()
+    slide_layout_engine._export_plan.cache_clear()
+
+def _catalog_cases(app, model: DatabaseModel, size: int, repeat: int) -> dict:
+    from app.views.songbook_view import SongbookView
+
+    songbooks = model.get_songbooks()
+    rng = random.Random(size)
+    view = SongbookView()
+    view.resize(500, 800)
+    view.show()
+
+    def load_page(songbook_id, after_title, limit):
+        return model.get_songs_page(songbook_id, after_title, limit)
+
+    def populate(keyword: str = ""):
+        summaries = model.get_songbook_summaries(keyword=keyword)
+        view.populate_tree(summaries, load_page, expand_all=bool(keyword))
+        app.processEvents()
+
+    results = {
+        f"db.search_title[{size}]": _measure(lambda: model.search_songs(SEARCH_KEYWORD, search_by="title"), repeat),
+        f"db.search_lyrics[{size}]": _measure(
+            lambda: model.get_songbook_summaries(keyword=SEARCH_KEYWORD, search_by="lyrics"), repeat),
+        f"db.summaries[{size}]": _measure(model.get_songbook_summaries, repeat),
+        f"db.songs_page[{size}]": _measure(lambda: model.get_songs_page(rng.choice(songbooks).id, None, 100), repeat),
+        f"tree.populate[{size}]": _measure(populate, repeat),
+        f"tree.populate_search[{size}]": _measure(lambda: populate(SEARCH_KEYWORD), repeat),
+    }
+    view.close()
+    view.deleteLater()
+    app.processEvents()
+    return results
+
+def _playlist_cases(model: DatabaseModel, size: int, repeat: int, workdir: str) -> dict:
+    song_ids = [row[0] for row in model.get_song_index_rows()]
+    songs = [model.get_song_by_id(song_id) for song_id in generate_playlist_ids(song_ids, size, seed=size)]
+    theme = Theme()
+    slide_w, slide_h = slide_layout_engine.slide_size_px(theme)
+    preview_size = (PREVIEW_WIDTH, round(PREVIEW_WIDTH * slide_h / slide_w))
+    output_path = os.path.join(workdir, f"playlist_{size}.pptx")
+
+    def layout():
+        for song in songs:
+            song_slides(song, theme, {})
+
+    def preview():
+        for song in songs:
+            for slide in song_slides(song, theme, {}):
+                render_slide(slide, *preview_size)
+
+    return {
+        f"layout.split[{size}]": _measure(layout, repeat, setup=_clear_layout_caches),
+        f"layout.split_cached[{size}]": _measure(layout, repeat),
+        f"preview.render[{size}]": _measure(preview, repeat),
+        f"export.pptx[{size}]": _measure(lambda: generate_presentation(songs, theme, output_path, {}), repeat,
+                                         setup=_clear_layout_caches),
+    }
+
+def run(app, catalog_sizes: list, playlist_sizes: list, repeat: int) -> dict:
+    workdir = tempfile.mkdtemp(prefix="bench_suite_")
+    results = {}
+    try:
+        for index, size in enumerate(catalog_sizes):
+            db_path = os.path.join(workdir, f"catalog_{size}.db")
+            start = time.perf_counter()
+            build_database(db_path, size)
+            print(f"Đã sinh thư viện {size:,} bài ({time.perf_counter() - start:.1f}s)", file=sys.stderr)
+            model = DatabaseModel(db_path)
+            results.update(_catalog_cases(app, model, size, repeat))
+            if index == 0: # Playlist chỉ phụ thuộc vào bài được chọn, không vào cỡ thư viện
+                for playlist_size in playlist_sizes:
+                    results.update(_playlist_cases(model, playlist_size, repeat, workdir))
+            model.close()
+            os.remove(db_path)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "version": SUITE_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "catalog_sizes": catalog_sizes,
+        "playlist_sizes": playlist_sizes,
+        "repeat": repeat,
+        "results": results,
+    }
+
+def _threshold_for(name: str, default: float, overrides: list) -> float:
+    """Ngưỡng của một phép đo: mẫu --threshold-for khớp sau cùng thắng, không khớp thì dùng ngưỡng chung."""
+    threshold = default
+    for pattern, value in overrides:
+        if fnmatch.fnmatchcase(name, pattern):
+            threshold = value
+    return threshold
+
+def compare(report: dict, baseline: dict, threshold: float, overrides: list) -> list:
+    """In bảng so sánh với baseline; trả về tên các phép đo chậm hơn quá ngưỡng."""
+    regressions = []
+    print(f"{'Phép đo':<30}{'Trung vị':>12}{'Baseline':>12}{'Thay đổi':>11}")
+    for name, result in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            print(f"{name:<30}{result['median_ms']:>10.2f}ms{'—':>12}")
+            continue
+        change = result["median_ms"] / max(previous["median_ms"], 1e-6) - 1
+        limit = _threshold_for(name, threshold, overrides)
+        flag = ""
+        if change > limit:
+            regressions.append(name)
+            flag = f"  CHẬM HƠN (ngưỡng {limit:+.0%})"
+        print(f"{name:<30}{result['median_ms']:>10.2f}ms{previous['median_ms']:>10.2f}ms{change:>+10.1%}{flag}")
+    return regressions
+
+def _parse_threshold(text: str) -> tuple:
+    pattern, _, value = text.rpartition("=")
+    if not pattern:
+        raise argparse.ArgumentTypeError("cần dạng MẪU=TỈ_LỆ, ví dụ 'tree.*=0.5'")
+    return pattern, float(value)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--playlists", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="ghi kết quả ra tệp JSON này")
+    parser.add_argument("--baseline", help="tệp JSON của một lần chạy trước để so sánh")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="tỉ lệ chậm hơn baseline tối đa cho phép (0.25 = chậm hơn 25%%)")
+    parser.add_argument("--threshold-for", type=_parse_threshold, action="append", default=[], metavar="MẪU=TỈ_LỆ",
+                        help="ngưỡng riêng cho các phép đo khớp mẫu (fnmatch), có thể lặp lại")
+    args = parser.parse_args()
+    app = QApplication(["bench-suite", "-platform", "offscreen"])
+
+    report = run(app, args.sizes, args.playlists, args.repeat)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    regressions = compare(report, baseline, args.threshold, args.threshold_for)
+    if regressions:
+        print(f"{len(regressions)} phép đo chậm hơn baseline quá ngưỡng: {', '.join(regressions)}")
+        sys.exit(1)
@@ -0,0 +1,139 @@
+# src/benchmarks/synthetic_catalog.py
+"""
+Sinh thư viện thánh ca tiếng Việt giả lập, có tính tất định (cùng seed cho cùng dữ liệu),
+dùng cho các bài đo hiệu năng.
+"""
+
+import os
+import random
+import sqlite3
+
+SYLLABLES = (
+    "Chúa con xin dâng lên tình yêu thương ngàn đời Mẹ Maria hiền từ ơn trời "
+    "tuôn đổ muôn dân ca ngợi vinh danh Thiên Chúa trên cao bình an dưới thế "
+    "cho người thiện tâm lòng con tín thác nơi Ngài xin thương xót chúng con "
+    "hồng ân cứu độ Thánh Thần ngự đến canh tân mặt đất Giêsu Thánh Thể nhiệm mầu "
+    "đoàn con hân hoan tiến bước về nhà Cha hy lễ tinh tuyền hương trầm bay lên"
+).split()
+
+COMMON_LINES = [
+    "Alleluia, Alleluia, Alleluia.",
+    "Lạy Chúa, xin thương xót chúng con.",
+    "Vinh danh Thiên Chúa trên các tầng trời.",
+    "Và bình an dưới thế cho người thiện tâm.",
+    "Amen. Amen. Amen.",
+]
+
+SONGBOOK_NAMES = ["Nguyện Tập", "Thánh Ca Việt Nam", "Tuyển Tập Mùa Chay",
+                  "Thánh Ca Giáng Sinh", "Dâng Hoa Đức Mẹ", "Thánh Thể"]
+
+def _line(rng: random.Random) -> str:
+    words = [rng.choice(SYLLABLES) for _ in range(rng.randint(5, 9))]
+    return " ".join(words).capitalize()
+
+def generate_lyrics(rng: random.Random) -> str:
+    """Sinh lời một bài hát: 2-4 phiên khúc, điệp khúc "ĐK." lặp lại sau mỗi phiên khúc."""
+    chorus_lines = [_line(rng) for _ in range(rng.randint(3, 5))]
+    if rng.random() < 0.5:
+        chorus_lines.append(rng.choice(COMMON_LINES))
+    chorus = "ĐK. " + "\n".join(chorus_lines)
+    stanzas = []
+    for verse_number in range(1, rng.randint(2, 4) + 1):
+        verse_lines = [_line(rng) for _ in range(rng.randint(4, 6))]
+        stanzas.append(f"{verse_number}. " + "\n".join(verse_lines))
+        stanzas.append(chorus)
+    return "\n\n".join(stanzas)
+
+def generate_catalog(song_count: int, seed: int = 2024, songbook_count: int = len(SONGBOOK_NAMES)):
+    """
+    Sinh lần lượt các bài hát (songbook_name, title, number, page, lyrics).
+    Tựa đề là duy nhất trong mỗi sách.
+    """
+    rng = random.Random(seed)
+    songbooks = SONGBOOK_NAMES[:songbook_count]
+    for i in range(song_count):
+        songbook = songbooks[i % len(songbooks)]
+        number = i // len(songbooks) + 1
+        title = f"{_line(rng)} {number}"
+        yield songbook, title, str(number), str(number // 2 + 1), generate_lyrics(rng)
+
+def generate_playlist_ids(song_ids: list, size: int, seed: int = 2024) -> list:
+    """Chọn tất định `size` bài hát cho một playlist."""
+    rng = random.Random(seed)
+    return rng.sample(song_ids, min(size, len(song_ids)))
+
+def build_database(db_path: str, song_count: int, seed: int = 2024):
+    """
+    Tạo một tệp lyrics.db giả lập với `song_count` bài hát.
+    Lược đồ được tạo bởi DatabaseModel để luôn khớp với ứng dụng.
+    """
+    from app.models.database_model import DatabaseModel
+
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    DatabaseModel(db_path).close()
+
+    conn = sqlite3.connect(db_path)
+    songbook_ids = {}
+    for name in SONGBOOK_NAMES:
+        songbook_ids[name] = conn.execute("INSERT INTO songbooks (name) VALUES (?)", (name,)).lastrowid
+    conn.executemany(
+        "INSERT INTO songs (songbook_id, title, number, page, lyrics) VALUES (?,?,?,?,?)",
+        ((songbook_ids[sb], title, number, page, lyrics)
+         for sb, title, number, page, lyrics in generate_catalog(song_count, seed))
+    )
+    conn.commit()
+    conn.close()
+
+# Phông chữ có dấu tiếng Việt để sinh PDF (nếu không có, PyMuPDF dùng Helvetica và mất dấu)
+PDF_FONT_CANDIDATES = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "C:/Windows/Fonts/arial.ttf",
+    "/Library/Fonts/Arial Unicode.ttf",
+]
+
+def build_hymnal_pdf(pdf_path: str, page_count: int, seed: int = 2024) -> int:
+    """
+    Tạo một tệp PDF sách thánh ca giả lập khoảng `page_count` trang:
+    mỗi bài bắt đầu bằng tiêu đề "N. TỰA ĐỀ" viết hoa, có đánh số trang ở cuối trang.
+    Trả về số bài hát đã ghi.
+    """
+    try:
+        import pymupdf
+    except ImportError:
+        import fitz as pymupdf
+
+    fontfile = next((path for path in PDF_FONT_CANDIDATES if os.path.exists(path)), None)
+    font = pymupdf.Font(fontfile=fontfile) if fontfile else pymupdf.Font("helv")
+    rng = random.Random(seed)
+    doc = pymupdf.open()
+    lines_per_page = 38
+    song_number = 0
+    line_on_page = 0
+
+    def new_page():
+        return doc.new_page(width=595, height=842), pymupdf.TextWriter(pymupdf.paper_rect("a4"))
+
+    def finish_page():
+        writer.append((290, 820), str(doc.page_count), font=font, fontsize=9)
+        writer.write_text(page)
+
+    page, writer = new_page()
+    full = False
+    while not full:
+        song_number += 1
+        text_lines = [f"{song_number}. {_line(rng).upper()}", ""] + generate_lyrics(rng).split("\n") + [""]
+        for text in text_lines:
+            if line_on_page >= lines_per_page:
+                if doc.page_count >= page_count:
+                    full = True # bài cuối có thể bị cắt ngang
+                    break
+                finish_page()
+                page, writer = new_page()
+                line_on_page = 0
+            writer.append((60, 60 + line_on_page * 19), text, font=font, fontsize=12)
+            line_on_page += 1
+    finish_page()
+    doc.save(pdf_path, garbage=3, deflate=True)
+    doc.close()
+    return song_number
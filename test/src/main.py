@@ -1,20 +1,29 @@
 import sys
 import os
+import multiprocessing
 from PySide6.QtWidgets import QApplication
 
 from app.models.database_model import DatabaseModel
 from app.views.main_window import MainWindow
 from app.controllers.main_controller import MainController
-from utils.resource_manager import resource_path
+from utils.resource_manager import resource_path, user_data_path, is_bundled
+from utils.tracing import enable_from_environment
 # from assets.styles.styles import STYLESHEET
 
 def main():
     """
     Hàm chính để khởi tạo và chạy ứng dụng Lyric Presenter.
     """
+    # Khi đã đóng gói, thư viện đi kèm nằm trong thư mục tạm _MEIPASS nên được mở
+    # ở chế độ chỉ đọc; thay đổi của người dùng được lưu vào lớp phủ trong thư mục dữ liệu người dùng.
+    # Có thể bật chế độ này khi phát triển bằng biến môi trường LYRIC_PRESENTER_READONLY_LIBRARY=1.
+    use_readonly_library = is_bundled() or os.environ.get("LYRIC_PRESENTER_READONLY_LIBRARY") == "1"
+    # LYRIC_PRESENTER_TRACE=<tệp .json>: ghi vết hiệu năng từ lúc khởi động, lưu ra tệp đó khi thoát
+    enable_from_environment()
+
     # Đảm bảo các thư mục cần thiết tồn tại
     data_dir = resource_path('data')
-    if not os.path.exists(data_dir):
+    if not use_readonly_library and not os.path.exists(data_dir):
         os.makedirs(data_dir)
 
     app = QApplication(sys.argv)
@@ -31,7 +40,10 @@ def main():
     # Khởi tạo các thành phần theo kiến trúc MVC
     # 1. Model: Quản lý dữ liệu
     db_path = resource_path('data/lyrics.db')
-    database_model = DatabaseModel(db_path)
+    if use_readonly_library and os.path.exists(db_path):
+        database_model = DatabaseModel(user_data_path('user_library.db'), base_path=db_path)
+    else:
+        database_model = DatabaseModel(db_path)
 
     # 2. View: Giao diện người dùng
     main_view = MainWindow()
@@ -43,4 +55,6 @@ def main():
     sys.exit(app.exec())
 
 if __name__ == '__main__':
+    # Cần cho process pool (nhập PDF) khi ứng dụng đã được đóng gói
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,123 @@
+# src/utils/background_images.py
+"""
+Ảnh nền của theme (ảnh chụp, họa tiết) được chuẩn bị một lần rồi dùng lại ở mọi nơi:
+Pillow giải mã, thu nhỏ và cắt cho phủ kín khổ slide ở độ phân giải xuất ảnh, rồi nén lại thành JPEG.
+Kết quả được lưu trên đĩa theo mã băm nội dung ảnh gốc và kích thước đích, nên cùng một ảnh
+(dù được chọn ở nhiều theme/bài, hay đổi tên tệp) chỉ được xử lý một lần.
+
+- prepare_background() chạy ở luồng nền (Worker) khi theme hoặc bài được gán ảnh nền, và khi xuất file.
+- background_image() trả về QImage đã giải mã (ghi nhớ theo tệp đã chuẩn bị) cho render_slide() ở mọi luồng,
+  dùng chung cho trình chiếu, xuất ảnh/PDF và ảnh thu nhỏ ở cột xem trước. Ở luồng giao diện chỉ dùng ảnh
+  đã chuẩn bị sẵn; slide vẽ khi ảnh chưa sẵn sàng được vẽ lại sau khi Worker chuẩn bị xong.
+- Ảnh gốc không đọc được (bị xóa, chuyển chỗ, hỏng) được ghi nhớ theo tệp và thời điểm sửa, không thử lại
+  ở mỗi slide; take_background_failures() trả về lỗi mới để báo một lần trên thanh trạng thái.
+- Tệp .pptx nhúng đúng tệp đã chuẩn bị; python-pptx gộp các ảnh trùng nội dung thành một media part.
+"""
+
+import os
+import threading
+from functools import lru_cache
+from typing import Optional
+
+from PIL import Image, ImageOps
+from PySide6.QtGui import QImage
+
+from utils.import_jobs import file_hash
+from utils.resource_manager import user_data_path
+from utils.slide_layout_engine import slide_size_px
+
+# Tăng khi cách xử lý ảnh thay đổi, để ảnh đã lưu được chuẩn bị lại
+BACKGROUND_VERSION = 1
+# Bề rộng ảnh nền đã chuẩn bị, bằng bề rộng mặc định khi xuất ảnh (chiều cao theo tỉ lệ khung hình)
+BACKGROUND_WIDTH = 1920
+JPEG_QUALITY = 85
+
+def background_size(theme) -> tuple:
+    """Kích thước (px) ảnh nền đã chuẩn bị cho khổ slide của theme."""
+    slide_w, slide_h = slide_size_px(theme)
+    return BACKGROUND_WIDTH, round(BACKGROUND_WIDTH * slide_h / slide_w)
+
+def default_cache_dir() -> str:
+    return user_data_path("backgrounds")
+
+@lru_cache(maxsize=256)
+def _source_hash(source_path: str, mtime_ns: int, size: int) -> str:
+    return file_hash(source_path)
+
+def prepared_path(source_path: str, size: tuple, cache_dir: Optional[str] = None) -> str:
+    """Đường dẫn tệp đã chuẩn bị của ảnh gốc (có thể chưa tồn tại); chỉ băm ảnh gốc, không giải mã."""
+    stat = os.stat(source_path)
+    digest = _source_hash(os.path.abspath(source_path), stat.st_mtime_ns, stat.st_size)
+    return os.path.join(cache_dir or default_cache_dir(), f"{digest[:32]}_{size[0]}x{size[1]}_v{BACKGROUND_VERSION}.jpg")
+
+def prepare_background(source_path: str, size: tuple, cache_dir: Optional[str] = None) -> str:
+    """
+    Chuẩn bị ảnh nền cho kích thước size = (rộng, cao): cắt giữa cho phủ kín, thu nhỏ, nén JPEG.
+    Trả về đường dẫn tệp đã chuẩn bị; đã có sẵn trên đĩa thì không xử lý lại.
+    """
+    target = prepared_path(source_path, size, cache_dir)
+    if os.path.exists(target):
+        return target
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with Image.open(source_path) as image:
+        image.draft("RGB", size) # JPEG lớn: giải mã thẳng ở độ phân giải nhỏ hơn, nhanh hơn nhiều
+        image = ImageOps.exif_transpose(image)
+        fitted = ImageOps.fit(image.convert("RGB"), size, Image.LANCZOS)
+    # Ghi ra tệp tạm rồi đổi tên: luồng khác không bao giờ đọc phải tệp ghi dở
+    temporary = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    fitted.save(temporary, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    os.replace(temporary, target)
+    return target
+
+# Ảnh gốc không đọc được: (đường dẫn, mtime_ns hoặc None nếu tệp không còn) -> thông báo lỗi.
+# Thử lại khi tệp được sửa hoặc chép lại chỗ cũ; mỗi lỗi chỉ báo cho người dùng một lần.
+_failures = {}
+_unreported = []
+_failures_lock = threading.Lock()
+
+def _source_mtime(source_path: str) -> Optional[int]:
+    try:
+        return os.stat(source_path).st_mtime_ns
+    except OSError:
+        return None
+
+def take_background_failures() -> list:
+    """Thông báo lỗi của các ảnh nền mới hỏng kể từ lần gọi trước (để hiện trên thanh trạng thái)."""
+    with _failures_lock:
+        messages = list(_unreported)
+        _unreported.clear()
+    return messages
+
+def theme_background(theme, prepare: bool = True, cache_dir: Optional[str] = None) -> Optional[str]:
+    """
+    Tệp ảnh nền đã chuẩn bị của theme; None nếu theme không có ảnh nền hoặc ảnh không đọc được.
+    prepare=False (luồng giao diện) chỉ trả về tệp đã chuẩn bị sẵn, không giải mã ảnh gốc.
+    """
+    if not theme.bg_image:
+        return None
+    failure_key = (theme.bg_image, _source_mtime(theme.bg_image))
+    if failure_key in _failures:
+        return None
+    try:
+        if prepare:
+            return prepare_background(theme.bg_image, background_size(theme), cache_dir)
+        target = prepared_path(theme.bg_image, background_size(theme), cache_dir)
+        return target if os.path.exists(target) else None
+    except OSError as e:
+        with _failures_lock:
+            if failure_key not in _failures:
+                _failures[failure_key] = f"{theme.bg_image}: {e}"
+                _unreported.append(_failures[failure_key])
+        return None
+
+@lru_cache(maxsize=16)
+def _decoded(prepared: str) -> QImage:
+    return QImage(prepared)
+
+def background_image(theme, prepare: bool = True) -> Optional[QImage]:
+    """
+    QImage ảnh nền của theme, giải mã một lần cho mọi slide; dùng được ở luồng nền.
+    Ở luồng giao diện gọi với prepare=False: ảnh chưa được Worker chuẩn bị xong thì trả về None.
+    """
+    prepared = theme_background(theme, prepare)
+    return _decoded(prepared) if prepared else None
@@ -0,0 +1,63 @@
+# src/utils/font_fitting.py
+"""
+Tự chọn cỡ chữ lời cho từng bài hát: cỡ lớn nhất (không vượt cỡ chữ lời của theme, không nhỏ hơn
+MIN_LYRIC_FONT_SIZE) mà mỗi đoạn (phiên khúc, điệp khúc) vẫn nằm trọn trên một slide, nên số slide
+không vượt quá số đoạn. Nếu có đoạn quá dài ngay cả ở cỡ nhỏ nhất, chọn cỡ lớn nhất vẫn giữ
+được số slide ít nhất.
+
+Cỡ chữ được tìm bằng tìm kiếm nhị phân trên slide_layout_engine; số đo chữ được ghi nhớ trong
+engine nên các lần thử cỡ chữ và các đoạn lặp lại (điệp khúc) không phải đo lại.
+"""
+
+from typing import Callable, Optional
+
+from PySide6.QtGui import QFont
+
+from utils.slide_layout_engine import export_lyric_boxes, measure_text_height, plan_export_slides, split_stanzas
+
+MIN_LYRIC_FONT_SIZE = 20
+
+def lyric_size_bounds(theme) -> tuple:
+    """Khoảng cỡ chữ lời được phép tự chọn: (nhỏ nhất, lớn nhất)."""
+    return min(MIN_LYRIC_FONT_SIZE, theme.lyric_font_size), theme.lyric_font_size
+
+def _largest_size(low: int, high: int, fits: Callable[[int], bool]) -> Optional[int]:
+    """Cỡ lớn nhất trong [low, high] thỏa `fits`, giả sử cỡ nhỏ hơn luôn dễ thỏa hơn; None nếu không cỡ nào thỏa."""
+    if not fits(low):
+        return None
+    while low < high:
+        middle = (low + high + 1) // 2
+        if fits(middle):
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+def fit_lyric_font_size(lyrics: str, theme) -> int:
+    """Cỡ chữ lời phù hợp nhất cho một bài hát với bố cục khi xuất .pptx của theme."""
+    low, high = lyric_size_bounds(theme)
+    stanzas = split_stanzas(lyrics)
+    if not stanzas:
+        return high
+    first_box, full_box = export_lyric_boxes(theme)
+
+    def stanzas_fit(size: int) -> bool:
+        font = QFont(theme.lyric_font_name, size)
+        # Đoạn đầu nằm chung slide với tựa đề
+        return (measure_text_height(stanzas[0], font, first_box) <= first_box.height()
+                and all(measure_text_height(stanza, font, full_box) <= full_box.height() for stanza in stanzas[1:]))
+
+    size = _largest_size(low, high, stanzas_fit)
+    if size is not None:
+        return size
+
+    def slide_count(size: int) -> int:
+        return len(plan_export_slides(lyrics, QFont(theme.lyric_font_name, size), theme))
+
+    fewest = slide_count(low)
+    return _largest_size(low, high, lambda size: slide_count(size) <= fewest)
+
+def fit_playlist_font_sizes(songs: list, theme, overrides: Optional[dict] = None) -> dict:
+    """Cỡ chữ lời tự chọn cho từng bài trong playlist: {song_id: cỡ chữ}, theo theme riêng của bài nếu có."""
+    overrides = overrides or {}
+    return {song.id: fit_lyric_font_size(song.lyrics, overrides.get(song.id, {}).get('theme') or theme) for song in songs}
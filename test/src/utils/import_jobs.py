@@ -0,0 +1,152 @@
+# src/utils/import_jobs.py
+"""
+Công việc nhập tệp (một tệp PDF hoặc một tập ảnh) được lưu trong lyrics.db, nên nhập cả cuốn
+sách thánh ca bị gián đoạn (đóng ứng dụng, ứng dụng bị lỗi, backend nhận dạng báo lỗi)
+vẫn tiếp tục được từ chỗ đã dừng.
+
+Mỗi trang được nhận diện bằng mã băm nội dung (ảnh: mã băm tệp ảnh; PDF: mã băm tệp + số trang)
+và đi qua các trạng thái:
+    pending -> extracted -> reviewed -> committed
+- extracted: văn bản của trang đã được lưu, lần sau không phải trích/nhận dạng lại.
+- reviewed: người dùng đã duyệt các bài trên trang; bài được chọn chờ trong bảng import_candidates.
+- committed: các bài đó đã được ghi vào thư viện, cùng giao dịch với việc chuyển trạng thái.
+Chọn lại đúng các tệp đó sẽ tiếp tục công việc cũ: chỉ các trang pending được xử lý,
+các trang đã duyệt không hiện lại trong hàng đợi duyệt.
+"""
+
+import hashlib
+from typing import Iterator, List, Optional
+
+from utils.lyric_recognizer import RecognitionStats, recognize_images
+from utils.pdf_importer import SongCandidate, SongSegmenter, iter_page_texts, page_count
+
+PAGE_PENDING = "pending"
+PAGE_EXTRACTED = "extracted"
+PAGE_REVIEWED = "reviewed"
+PAGE_COMMITTED = "committed"
+
+# Số trang tối đa đang được trích/nhận dạng cùng lúc
+MAX_PAGES_IN_FLIGHT = 32
+# Văn bản các trang vừa trích được ghi vào database theo từng nhóm này (hoặc sớm hơn, khi settled_pages vượt qua)
+SAVE_EVERY_PAGES = 16
+
+def file_hash(path: str) -> str:
+    """Mã băm SHA-256 của tệp, đọc từng khối (trùng với content_hash của cùng nội dung)."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ImportJob:
+    """Một công việc nhập đã được lưu trong database; dùng ImportJob.open() để tạo hoặc tiếp tục."""
+    def __init__(self, job_id: int, kind: str, paths: List[str], page_hashes: List[str], resumed: bool):
+        self.job_id = job_id
+        self.kind = kind
+        self.paths = paths
+        self.page_hashes = page_hashes
+        self.resumed = resumed
+        # Số trang đã có văn bản từ trước khi chạy (không phải xử lý lại)
+        self.reused_pages = 0
+        # Các trang trước chỉ số này đã được tách xong thành các bài đã trả về
+        self.settled_pages = 0
+
+    @classmethod
+    def open(cls, db_model, kind: str, paths: List[str], total_pages: Optional[int] = None) -> 'ImportJob':
+        """
+        Băm nội dung các trang rồi tìm công việc chưa xong của cùng nguồn, hoặc tạo mới.
+        Với PDF, total_pages nên được đếm sẵn ở luồng chính (PyMuPDF không an toàn với luồng phụ).
+        """
+        if kind == 'pdf':
+            digest = file_hash(paths[0])
+            total = page_count(paths[0]) if total_pages is None else total_pages
+            page_hashes = [f"{digest}:{i}" for i in range(total)]
+        elif kind == 'image':
+            page_hashes = [file_hash(path) for path in paths]
+        else:
+            raise ValueError(f"Loại công việc nhập không hợp lệ: {kind}")
+        source_key = hashlib.sha256("\n".join(page_hashes).encode()).hexdigest()
+        job_id, resumed = db_model.open_import_job(kind, source_key, list(paths), page_hashes)
+        return cls(job_id, kind, list(paths), page_hashes, resumed)
+
+    def _extract(self, pending: List[int], db_model, recognizer, workers, cancel_event, progress_callback,
+                 max_in_flight, stats) -> Iterator[tuple]:
+        """Trích/nhận dạng các trang pending, trả về (chỉ số trang, văn bản) theo thứ tự."""
+        if not pending:
+            return iter(())
+        if self.kind == 'pdf':
+            return iter_page_texts(self.paths[0], workers, cancel_event, progress_callback,
+                                   pages=pending, max_in_flight=max_in_flight)
+        results = recognize_images([self.paths[i] for i in pending], recognizer, db_model, workers,
+                                   cancel_event, progress_callback, stats,
+                                   hashes=[self.page_hashes[i] for i in pending], max_in_flight=max_in_flight)
+        return ((pending[k], text) for k, text in results)
+
+    def iter_songs(self, db_model, recognizer=None, workers: Optional[int] = None, cancel_event=None,
+                   progress_callback=None, max_in_flight: int = MAX_PAGES_IN_FLIGHT,
+                   stats: Optional[RecognitionStats] = None) -> Iterator[SongCandidate]:
+        """
+        Tách bài hát từ các trang chưa được duyệt, theo thứ tự trang. Trang đã có văn bản được
+        đọc lại từ database; trang pending được xử lý (tối đa max_in_flight trang cùng lúc)
+        và văn bản được lưu ngay khi xong, nên dừng giữa chừng cũng không mất phần đã làm.
+        """
+        pages = db_model.get_import_pages(self.job_id)
+        total = len(pages)
+        start = next((row['page_index'] for row in pages if row['state'] in (PAGE_PENDING, PAGE_EXTRACTED)), total)
+        texts = {row['page_index']: row['text'] for row in pages if row['state'] == PAGE_EXTRACTED}
+        pending = [row['page_index'] for row in pages if row['state'] == PAGE_PENDING]
+        self.reused_pages = total - len(pending)
+        self.settled_pages = start
+
+        def report(done, _):
+            progress_callback(self.reused_pages + done, total)
+
+        if progress_callback:
+            progress_callback(self.reused_pages, total)
+        extracted = self._extract(pending, db_model, recognizer, workers, cancel_event,
+                                  report if progress_callback else None, max_in_flight, stats)
+        segmenter = SongSegmenter()
+        unsaved = {}
+        try:
+            for index in range(start, total):
+                text = texts.get(index)
+                if text is None:
+                    extracted_index, text = next(extracted, (None, None))
+                    if extracted_index is None:
+                        return # Đã hủy: các trang còn lại vẫn pending
+                    unsaved[extracted_index] = text
+                    if len(unsaved) >= SAVE_EVERY_PAGES:
+                        db_model.mark_import_pages_extracted(self.job_id, unsaved)
+                        unsaved = {}
+                yield from segmenter.feed_page(index, text)
+                settled = segmenter.settled_pages
+                if unsaved and min(unsaved) < settled:
+                    # Người dùng có thể duyệt tới ranh giới bất cứ lúc nào (luồng nền vẫn chạy), mà chỉ
+                    # trang đã lưu văn bản mới được chuyển sang 'reviewed': lưu trước khi dời ranh giới
+                    db_model.mark_import_pages_extracted(self.job_id, unsaved)
+                    unsaved = {}
+                # Cập nhật sau khi đã trả về các bài: người gọi đọc giá trị này không bao giờ vượt quá phần đã nhận
+                self.settled_pages = settled
+            yield from segmenter.finish()
+            self.settled_pages = total
+        finally:
+            if unsaved:
+                db_model.mark_import_pages_extracted(self.job_id, unsaved)
+
+    def save_reviewed(self, db_model, songbook_id: int, candidates: list, settled_pages: int) -> dict:
+        """
+        Lưu kết quả duyệt rồi ghi các bài đã chọn vào thư viện. settled_pages là ranh giới
+        của các bài người dùng đã thấy: các trang trước đó được coi là đã duyệt.
+        """
+        db_model.review_import_pages(self.job_id, settled_pages, songbook_id, candidates)
+        return db_model.commit_import_job(self.job_id)
+
+def commit_interrupted_jobs(db_model) -> dict:
+    """Ghi nốt các bài đã được duyệt nhưng chưa kịp ghi vào thư viện trước khi ứng dụng bị tắt."""
+    counts = {"jobs": 0, "inserted": 0, "skipped": 0}
+    for job_id in db_model.get_import_jobs_to_commit():
+        result = db_model.commit_import_job(job_id)
+        counts["jobs"] += 1
+        counts["inserted"] += result["inserted"]
+        counts["skipped"] += result["skipped"]
+    return counts
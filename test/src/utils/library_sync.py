@@ -0,0 +1,124 @@
+# src/utils/library_sync.py
+"""
+Đồng bộ thư viện bài hát giữa các máy trình chiếu bằng cách chỉ trao đổi các dòng
+đã thay đổi từ lần đồng bộ trước (xem DatabaseModel.export_changes / apply_changes).
+
+Hai cách vận chuyển:
+- Trực tiếp giữa hai tệp database (vd. thư mục mạng, ổ USB): sync_databases(), với thư viện của
+  máy kia mở bằng open_peer() (journal rollback, không WAL: WAL không chạy trên hệ thống tệp mạng
+  và để lại tệp -wal/-shm trên ổ rời). Không đồng bộ khi máy kia đang mở chính tệp đó.
+- Thả tệp: máy gửi ghi tập thay đổi ra tệp .json.gz, máy nhận áp dụng tệp đó.
+
+Dùng từ dòng lệnh (chạy từ thư mục src):
+    python -m utils.library_sync sync lyrics.db /mnt/usb/lyrics.db
+    python -m utils.library_sync export lyrics.db changes.json.gz --since 120
+    python -m utils.library_sync apply lyrics.db changes.json.gz
+"""
+
+import argparse
+import gzip
+import json
+import time
+from dataclasses import dataclass
+
+@dataclass
+class SyncStats:
+    """Kết quả một lần đồng bộ hai chiều."""
+    pulled: int = 0     # số dòng nhận từ máy kia
+    pushed: int = 0     # số dòng gửi sang máy kia
+    applied: int = 0    # số dòng đã ghi (cả hai phía)
+    ignored: int = 0    # số dòng bị bỏ qua vì phía nhận có phiên bản mới hơn
+    skipped: int = 0    # số bài hát bỏ qua vì sách của nó đã bị xóa
+    seconds: float = 0.0
+
+    def add(self, counts: dict):
+        for key, value in counts.items():
+            setattr(self, key, getattr(self, key) + value)
+
+    def summary(self) -> str:
+        return (f"nhận {self.pulled:,}, gửi {self.pushed:,} dòng thay đổi "
+                f"(ghi {self.applied:,}, bỏ qua {self.ignored + self.skipped:,}) trong {self.seconds * 1000:.1f}ms")
+
+def open_peer(path: str):
+    """Mở thư viện của máy kia (trên thư mục mạng, ổ USB) để đồng bộ trực tiếp, không chuyển tệp sang WAL."""
+    from app.models.database_model import DatabaseModel, PEER_CONNECTION_PROFILE
+    return DatabaseModel(path, profile=PEER_CONNECTION_PROFILE)
+
+def pull_changes(local_model, remote_model) -> dict:
+    """Lấy từ remote các thay đổi mà local chưa có và áp dụng vào local."""
+    local_site = local_model.get_sync_site()
+    changeset = remote_model.export_changes(local_model.get_peer_seq(remote_model.get_sync_site()),
+                                            exclude_site=local_site)
+    counts = local_model.apply_changes(changeset)
+    counts["changes"] = len(changeset["changes"])
+    return counts
+
+def sync_databases(local_model, remote_model) -> SyncStats:
+    """
+    Đồng bộ hai chiều: nhận thay đổi của remote rồi gửi thay đổi của local.
+    Sau khi chạy, hai database có cùng nội dung sách và bài hát.
+    """
+    stats = SyncStats()
+    start = time.perf_counter()
+    if local_model.get_sync_site() == remote_model.get_sync_site():
+        # Tệp được sao chép trực tiếp: cấp định danh mới cho bản sao
+        remote_model.reset_sync_site()
+    pulled = pull_changes(local_model, remote_model)
+    stats.pulled = pulled.pop("changes")
+    stats.add(pulled)
+    pushed = pull_changes(remote_model, local_model)
+    stats.pushed = pushed.pop("changes")
+    stats.add(pushed)
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+def export_changeset(db_model, path: str, since_seq: int = 0) -> int:
+    """Ghi các thay đổi có seq > since_seq ra tệp (gzip nếu tên kết thúc bằng .gz). Trả về số dòng."""
+    changeset = db_model.export_changes(since_seq)
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'wt', encoding='utf-8') as f:
+        json.dump(changeset, f, ensure_ascii=False)
+    return len(changeset["changes"])
+
+def apply_changeset(db_model, path: str) -> dict:
+    """Áp dụng một tệp tập thay đổi do export_changeset tạo ra."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        changeset = json.load(f)
+    return db_model.apply_changes(changeset)
+
+def main():
+    from app.models.database_model import DatabaseModel
+
+    parser = argparse.ArgumentParser(description="Đồng bộ thư viện bài hát giữa các máy.")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    sync_parser = subparsers.add_parser("sync", help="Đồng bộ hai chiều giữa hai tệp database")
+    sync_parser.add_argument("db_path")
+    sync_parser.add_argument("other_db_path")
+    export_parser = subparsers.add_parser("export", help="Ghi tập thay đổi ra tệp")
+    export_parser.add_argument("db_path")
+    export_parser.add_argument("file")
+    export_parser.add_argument("--since", type=int, default=0, help="Chỉ ghi các thay đổi có seq lớn hơn")
+    apply_parser = subparsers.add_parser("apply", help="Áp dụng một tệp tập thay đổi")
+    apply_parser.add_argument("db_path")
+    apply_parser.add_argument("file")
+    args = parser.parse_args()
+
+    db_model = DatabaseModel(args.db_path)
+    try:
+        if args.action == "sync":
+            other = open_peer(args.other_db_path)
+            try:
+                print(f"Đã đồng bộ: {sync_databases(db_model, other).summary()}")
+            finally:
+                other.close()
+        elif args.action == "export":
+            count = export_changeset(db_model, args.file, args.since)
+            print(f"Đã ghi {count:,} dòng thay đổi (seq hiện tại: {db_model.get_sync_seq()})")
+        else:
+            print(f"Đã áp dụng: {apply_changeset(db_model, args.file)}")
+    finally:
+        db_model.close()
+
+if __name__ == '__main__':
+    main()
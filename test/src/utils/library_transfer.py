@@ -0,0 +1,192 @@
+# src/utils/library_transfer.py
+"""
+Xuất/nhập toàn bộ thư viện (sách, bài hát, chủ đề) dưới dạng JSON Lines, có thể nén gzip.
+
+Mỗi dòng là một bản ghi JSON độc lập, nên cả hai chiều đều đọc/ghi theo luồng
+với bộ nhớ không phụ thuộc số bài hát:
+    {"type": "header", "format": "lyric-presenter-library", "version": 1}
+    {"type": "songbook", "name": "Nguyện Tập"}
+    {"type": "theme", "name": "Mặc định", ...}
+    {"type": "song", "songbook": "Nguyện Tập", "title": "...", "number": "1", "page": "1", "lyrics": "..."}
+Bài hát tham chiếu sách theo tên (id khác nhau giữa các máy).
+
+Dùng từ dòng lệnh (chạy từ thư mục src):
+    python -m utils.library_transfer export lyrics.db thu_vien.jsonl.gz
+    python -m utils.library_transfer import lyrics.db thu_vien.jsonl.gz --on-conflict rename
+"""
+
+import argparse
+import gzip
+import io
+import json
+import os
+import time
+from dataclasses import dataclass
+
+from app.models.song_model import Song
+
+FORMAT_NAME = "lyric-presenter-library"
+FORMAT_VERSION = 1
+# Số bài hát ghi trong một giao dịch khi nhập
+IMPORT_BATCH_SIZE = 5000
+CONFLICT_MODES = ("skip", "overwrite", "rename")
+# Mức nén gzip khi xuất: mức 1 nhanh hơn mức 6 khoảng 5 lần, tệp chỉ lớn hơn ~25%
+GZIP_LEVEL = 1
+
+@dataclass
+class TransferStats:
+    """Thống kê một lần xuất/nhập."""
+    songbooks: int = 0
+    themes: int = 0
+    songs: int = 0
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    renamed: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+    @property
+    def songs_per_second(self) -> float:
+        return self.songs / self.seconds if self.seconds else 0.0
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.bytes / (1024 * 1024) / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        text = (f"{self.songs:,} bài hát, {self.songbooks} sách, {self.themes} chủ đề "
+                f"trong {self.seconds:.2f}s ({self.songs_per_second:,.0f} bài/s, {self.megabytes_per_second:.1f} MB/s)")
+        if self.inserted or self.updated or self.skipped or self.renamed:
+            text += (f" — thêm {self.inserted:,}, ghi đè {self.updated:,}, "
+                     f"bỏ qua {self.skipped:,}, đổi tên {self.renamed:,}")
+        return text
+
+def _is_gzip(path: str) -> bool:
+    with open(path, 'rb') as f:
+        return f.read(2) == b'\x1f\x8b'
+
+def _dump(record: dict) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n"
+
+def export_library(db_model, path: str, compress: bool = None, progress_callback=None) -> TransferStats:
+    """
+    Xuất thư viện ra tệp JSON Lines. Mặc định nén gzip nếu tên tệp kết thúc bằng .gz.
+    progress_callback(done, total) được gọi sau mỗi lô bài hát.
+    """
+    if compress is None:
+        compress = path.endswith('.gz')
+    stats = TransferStats()
+    start = time.perf_counter()
+    songbooks = db_model.get_songbooks()
+    names = {sb.id: sb.name for sb in songbooks}
+    total = db_model.count_songs()
+
+    opener = (lambda: gzip.open(path, 'wt', encoding='utf-8', compresslevel=GZIP_LEVEL)) if compress \
+        else (lambda: open(path, 'w', encoding='utf-8'))
+    with opener() as f:
+        f.write(_dump({"type": "header", "format": FORMAT_NAME, "version": FORMAT_VERSION}))
+        for sb in songbooks:
+            f.write(_dump({"type": "songbook", "name": sb.name}))
+            stats.songbooks += 1
+        for theme_row in db_model.get_theme_rows():
+            theme_row.pop('id', None)
+            f.write(_dump({"type": "theme", **theme_row}))
+            stats.themes += 1
+        for song in db_model.iter_songs():
+            f.write(_dump({"type": "song", "songbook": names.get(song.songbook_id, ""), "title": song.title,
+                           "number": song.number, "page": song.page, "lyrics": song.lyrics}))
+            stats.songs += 1
+            if progress_callback and stats.songs % IMPORT_BATCH_SIZE == 0:
+                progress_callback(stats.songs, total)
+
+    stats.seconds = time.perf_counter() - start
+    stats.bytes = os.path.getsize(path)
+    if progress_callback:
+        progress_callback(stats.songs, stats.songs)
+    return stats
+
+def import_library(db_model, path: str, on_conflict: str = "skip", batch_size: int = IMPORT_BATCH_SIZE,
+                   progress_callback=None) -> TransferStats:
+    """
+    Nhập thư viện từ tệp JSON Lines (tự nhận biết gzip). Bài hát được ghi theo lô
+    `batch_size` bài trong một giao dịch; trùng tựa đề trong cùng sách được xử lý
+    theo on_conflict ('skip', 'overwrite' hoặc 'rename').
+    progress_callback(done_bytes, total_bytes) tính theo số byte đã đọc của tệp.
+    """
+    if on_conflict not in CONFLICT_MODES:
+        raise ValueError(f"on_conflict phải là một trong {CONFLICT_MODES}")
+    stats = TransferStats(bytes=os.path.getsize(path))
+    start = time.perf_counter()
+    songbook_ids = {}
+    batch = []
+
+    def flush():
+        counts = db_model.import_songs_batch(batch, on_conflict)
+        for key, value in counts.items():
+            setattr(stats, key, getattr(stats, key) + value)
+        batch.clear()
+        if progress_callback:
+            progress_callback(raw.tell(), stats.bytes)
+
+    with open(path, 'rb') as raw:
+        stream = gzip.open(raw, 'rt', encoding='utf-8') if _is_gzip(path) else io.TextIOWrapper(raw, encoding='utf-8')
+        with stream:
+            for line_number, line in enumerate(stream, 1):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                kind = record.pop("type", None)
+                if kind == "song":
+                    name = record.get("songbook") or "Chưa phân loại"
+                    if name not in songbook_ids:
+                        songbook_ids[name] = db_model.ensure_songbook(name)
+                    batch.append(Song(None, songbook_ids[name], record["title"], record.get("lyrics") or "",
+                                      record.get("number"), record.get("page")))
+                    stats.songs += 1
+                    if len(batch) >= batch_size:
+                        flush()
+                elif kind == "songbook":
+                    if record["name"] not in songbook_ids:
+                        songbook_ids[record["name"]] = db_model.ensure_songbook(record["name"])
+                        stats.songbooks += 1
+                elif kind == "theme":
+                    if db_model.import_theme_row(record, overwrite=on_conflict == "overwrite"):
+                        stats.themes += 1
+                elif kind == "header":
+                    if record.get("format") != FORMAT_NAME or record.get("version", 0) > FORMAT_VERSION:
+                        raise ValueError(f"Tệp không đúng định dạng {FORMAT_NAME} phiên bản {FORMAT_VERSION}")
+                else:
+                    raise ValueError(f"Dòng {line_number}: loại bản ghi không hợp lệ: {kind!r}")
+            if batch:
+                flush()
+
+    stats.seconds = time.perf_counter() - start
+    if progress_callback:
+        progress_callback(stats.bytes, stats.bytes)
+    return stats
+
+def main():
+    from app.models.database_model import DatabaseModel
+
+    parser = argparse.ArgumentParser(description="Xuất/nhập thư viện bài hát dạng JSON Lines.")
+    parser.add_argument("action", choices=["export", "import"])
+    parser.add_argument("db_path", help="Đường dẫn tới lyrics.db")
+    parser.add_argument("file", help="Tệp .jsonl hoặc .jsonl.gz")
+    parser.add_argument("--on-conflict", choices=CONFLICT_MODES, default="skip")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    db_model = DatabaseModel(args.db_path)
+    try:
+        if args.action == "export":
+            stats = export_library(db_model, args.file)
+            print(f"Đã xuất {stats.summary()}")
+        else:
+            stats = import_library(db_model, args.file, args.on_conflict, args.batch_size)
+            print(f"Đã nhập {stats.summary()}")
+    finally:
+        db_model.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+# src/utils/live_renderer.py
+"""
+Dựng danh sách slide trình chiếu trực tiếp từ playlist và vẽ từng slide thành ảnh.
+
+Mỗi slide là một LiveSlide bất biến chứa đủ mọi thứ ảnh hưởng tới hình vẽ (kể cả theme của bài,
+trừ kích thước ảnh), nên dùng được làm khóa bộ đệm: sửa playlist, cỡ chữ hoặc theme của một bài chỉ
+sinh ra slide mới cho bài đó, các slide khác giữ nguyên khóa và ảnh đã vẽ sẵn.
+
+Theme riêng của từng bài nằm trong overrides[song_id]['theme'] (cùng chỗ với cỡ chữ riêng), với khổ
+slide của theme buổi trình chiếu. Cách chia slide được plan_export_slides ghi nhớ theo khổ slide và
+font, nên đổi theme chỉ về màu sắc chỉ phải vẽ lại.
+
+render_slide() chỉ dùng QImage/QPainter nên chạy được ở luồng nền; chuyển sang QPixmap ở luồng giao diện.
+"""
+
+from dataclasses import dataclass, field
+from typing import Optional
+
+from PySide6.QtCore import QRectF, Qt
+from PySide6.QtGui import QColor, QFont, QImage, QPainter, QTextDocument
+
+from app.models.song_model import Theme
+from utils.background_images import background_image
+from utils.slide_layout_engine import plan_export_slides, slide_size_px
+from utils.text_formatter import format_lyrics_for_display
+from utils.tracing import traced
+
+# Chiều cao dải tựa đề trên slide đầu của mỗi bài (px ở 96 DPI, bằng 1 inch như khi xuất .pptx)
+TITLE_BAND_PX = 96
+
+@dataclass(frozen=True, slots=True)
+class LiveSlide:
+    """Một slide trình chiếu; slide trống (giữa hai bài) có song_id None và không có theme."""
+    song_id: Optional[int]
+    title: str = ""
+    text: str = ""
+    title_size: int = 0
+    lyric_size: int = 0
+    # Theme không băm được (dataclass thường) nên chỉ tham gia so sánh bằng, không tham gia hash
+    theme: Optional[Theme] = field(default=None, hash=False)
+
+BLANK_SLIDE = LiveSlide(song_id=None)
+
+def song_theme(song_id: int, theme, overrides: dict):
+    """Theme dùng cho một bài: theme riêng của bài (nếu có) hoặc theme của buổi trình chiếu."""
+    return overrides.get(song_id, {}).get('theme') or theme
+
+def song_slides(song, theme, overrides: dict) -> tuple:
+    """Các slide của một bài theo đúng cách chia khi xuất .pptx: tựa đề cùng đoạn đầu, rồi các đoạn sau."""
+    theme = song_theme(song.id, theme, overrides)
+    title_size = overrides.get(song.id, {}).get('title', theme.title_font_size)
+    lyric_size = overrides.get(song.id, {}).get('lyric', theme.lyric_font_size)
+    planned = plan_export_slides(song.lyrics, QFont(theme.lyric_font_name, lyric_size), theme)
+    slides = [LiveSlide(song.id, song.title, planned[0], title_size, lyric_size, theme)]
+    slides.extend(LiveSlide(song.id, "", text, title_size, lyric_size, theme) for text in planned[1:] if text.strip())
+    return tuple(slides)
+
+def build_deck(songs: list, theme, overrides: dict) -> list:
+    """Các slide của cả playlist theo thứ tự trình chiếu, slide trống giữa hai bài như khi xuất .pptx."""
+    deck = []
+    for i, song in enumerate(songs):
+        deck.extend(song_slides(song, theme, overrides))
+        if i < len(songs) - 1:
+            deck.append(BLANK_SLIDE)
+    return deck
+
+def _draw_html(painter: QPainter, html: str, font: QFont, rect: QRectF, alignment):
+    doc = QTextDocument()
+    doc.setDefaultFont(font)
+    doc.setHtml(html)
+    doc.setTextWidth(rect.width())
+    option = doc.defaultTextOption()
+    option.setAlignment(alignment)
+    doc.setDefaultTextOption(option)
+    painter.save()
+    painter.translate(rect.topLeft())
+    doc.drawContents(painter, QRectF(0, 0, rect.width(), rect.height()))
+    painter.restore()
+
+@traced("render.slide")
+def render_slide(slide: LiveSlide, width: int, height: int, prepare_background: bool = True) -> QImage:
+    """
+    Vẽ một slide thành ảnh width x height; bố cục tính theo kích thước slide khi xuất .pptx rồi co giãn.
+    prepare_background=False (luồng giao diện): ảnh nền chưa được chuẩn bị thì vẽ slide không có ảnh nền.
+    """
+    image = QImage(width, height, QImage.Format_RGB32)
+    if slide.song_id is None:
+        image.fill(QColor("#000000"))
+        return image
+    theme = slide.theme
+    image.fill(QColor(theme.bg_color))
+
+    slide_w, slide_h = slide_size_px(theme)
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.setRenderHint(QPainter.TextAntialiasing)
+    background = background_image(theme, prepare_background)
+    if background is not None:
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        painter.drawImage(QRectF(0, 0, width, height), background)
+    painter.scale(width / slide_w, height / slide_h)
+
+    top = 0
+    if slide.title:
+        title_font = QFont(theme.title_font_name, slide.title_size)
+        title_font.setBold(theme.title_font_bold)
+        title_font.setItalic(theme.title_font_italic)
+        title_font.setUnderline(theme.title_font_underline)
+        title_html = f"<div style='font-size: {slide.title_size}pt; color: {theme.title_font_color};'>{slide.title}</div>"
+        _draw_html(painter, title_html, title_font, QRectF(0, 0, slide_w, TITLE_BAND_PX), Qt.AlignmentFlag.AlignCenter)
+        top = TITLE_BAND_PX
+
+    alignment = {'LEFT': Qt.AlignmentFlag.AlignLeft, 'RIGHT': Qt.AlignmentFlag.AlignRight,
+                 'JUSTIFY': Qt.AlignmentFlag.AlignJustify}.get(theme.lyric_alignment, Qt.AlignmentFlag.AlignHCenter)
+    lyric_font = QFont(theme.lyric_font_name, slide.lyric_size)
+    lyric_font.setBold(theme.lyric_font_bold)
+    lyric_font.setItalic(theme.lyric_font_italic)
+    lyric_font.setUnderline(theme.lyric_font_underline)
+    text_html = format_lyrics_for_display(slide.text, theme.title_font_color)
+    lyric_html = f"<div style='font-size: {slide.lyric_size}pt; color: {theme.lyric_font_color};'>{text_html}</div>"
+    # Chừa 5% lề hai bên: bề rộng bằng hộp chứa lời dùng khi chia slide
+    _draw_html(painter, lyric_html, lyric_font, QRectF(slide_w * 0.05, top, slide_w * 0.9, slide_h - top), alignment)
+    painter.end()
+    return image
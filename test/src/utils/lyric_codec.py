@@ -0,0 +1,83 @@
+# src/utils/lyric_codec.py
+
+import struct
+import zlib
+from collections import Counter
+from typing import Iterable
+
+# Định dạng lời bài hát đã nén (lưu dưới dạng BLOB trong cột `lyrics`):
+#   1 byte phiên bản | 4 byte id từ điển (big-endian) | dữ liệu raw deflate
+# Lời chưa nén luôn là TEXT nên hai dạng được phân biệt bằng kiểu dữ liệu.
+FORMAT_VERSION = 1
+_HEADER = struct.Struct(">BI")
+
+# zlib chỉ dùng được tối đa 32KB cuối của từ điển (kích thước cửa sổ)
+MAX_DICTIONARY_SIZE = 32 * 1024
+
+def train_dictionary(samples: Iterable[str], size: int = MAX_DICTIONARY_SIZE) -> bytes:
+    """
+    Huấn luyện từ điển dùng chung từ một tập lời bài hát mẫu.
+    Chọn các dòng và cụm từ xuất hiện trong nhiều bài khác nhau (ví dụ "ĐK.",
+    các câu kinh nguyện, điệp khúc quen thuộc); cụm có giá trị cao nhất được đặt
+    ở cuối từ điển vì deflate mã hóa khoảng cách gần rẻ hơn.
+    """
+    document_frequency = Counter()
+    for text in samples:
+        fragments = set()
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            fragments.add(line)
+            words = line.split()
+            for n in (2, 3, 4):
+                for i in range(len(words) - n + 1):
+                    fragments.add(" ".join(words[i:i + n]))
+        document_frequency.update(fragments)
+
+    # Điểm = số byte tiết kiệm ước tính nếu cụm này có sẵn trong từ điển
+    scored = [(count * len(fragment.encode('utf-8')), fragment)
+              for fragment, count in document_frequency.items() if count > 1]
+    scored.sort(reverse=True)
+
+    chosen = []
+    total = 0
+    for _, fragment in scored:
+        encoded = fragment.encode('utf-8') + b"\n"
+        if total + len(encoded) > size:
+            continue
+        # Bỏ qua cụm đã nằm trọn trong một cụm khác đã chọn
+        if any(fragment in existing for existing in chosen[-200:]):
+            continue
+        chosen.append(fragment)
+        total += len(encoded)
+        if total >= size - 16:
+            break
+
+    # Cụm quan trọng nhất đặt ở cuối
+    return "\n".join(reversed(chosen)).encode('utf-8')
+
+class LyricCodec:
+    """Nén/giải nén lời bài hát bằng zlib (raw deflate) với từ điển dùng chung."""
+    def __init__(self, dictionary_id: int, dictionary: bytes, level: int = 9):
+        self.dictionary_id = dictionary_id
+        self.dictionary = dictionary[-MAX_DICTIONARY_SIZE:]
+        self.level = level
+
+    def compress(self, text: str) -> bytes:
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15, 9,
+                                      zlib.Z_DEFAULT_STRATEGY, self.dictionary)
+        payload = compressor.compress(text.encode('utf-8')) + compressor.flush()
+        return _HEADER.pack(FORMAT_VERSION, self.dictionary_id) + payload
+
+    def decompress(self, blob: bytes) -> str:
+        decompressor = zlib.decompressobj(-15, self.dictionary)
+        payload = decompressor.decompress(blob[_HEADER.size:]) + decompressor.flush()
+        return payload.decode('utf-8')
+
+def dictionary_id_of(blob: bytes) -> int:
+    """Đọc id từ điển từ phần đầu của dữ liệu đã nén."""
+    version, dictionary_id = _HEADER.unpack_from(blob)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Định dạng lời nén không được hỗ trợ: phiên bản {version}")
+    return dictionary_id
@@ -0,0 +1,77 @@
+# src/utils/lyric_compression_tool.py
+"""
+Công cụ chuyển đổi chế độ lưu trữ lời bài hát của một tệp lyrics.db.
+
+Chạy từ thư mục src:
+    python -m utils.lyric_compression_tool compress ../data/lyrics.db
+    python -m utils.lyric_compression_tool decompress ../data/lyrics.db
+    python -m utils.lyric_compression_tool stats ../data/lyrics.db
+
+Nên sao lưu tệp database trước khi chuyển đổi.
+"""
+
+import argparse
+import os
+import sys
+
+from app.models.database_model import DatabaseModel
+from utils.lyric_codec import MAX_DICTIONARY_SIZE, train_dictionary
+
+def compress_database(db_path: str, dictionary_size: int = MAX_DICTIONARY_SIZE, sample_size: int = 5000) -> int:
+    """Huấn luyện từ điển từ lời bài hát hiện có rồi nén toàn bộ database. Trả về id từ điển."""
+    model = DatabaseModel(db_path)
+    try:
+        samples = []
+        for lyrics in model.iter_all_lyrics():
+            samples.append(lyrics)
+            if len(samples) >= sample_size:
+                break
+        dictionary = train_dictionary(samples, dictionary_size)
+        dictionary_id = model.enable_lyric_compression(dictionary)
+        model.vacuum()
+        return dictionary_id
+    finally:
+        model.close()
+
+def decompress_database(db_path: str):
+    """Đưa toàn bộ lời bài hát về dạng văn bản thường."""
+    model = DatabaseModel(db_path)
+    try:
+        model.disable_lyric_compression()
+        model.vacuum()
+    finally:
+        model.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chuyển đổi chế độ lưu trữ lời bài hát (nén/không nén).")
+    parser.add_argument("action", choices=["compress", "decompress", "stats"])
+    parser.add_argument("db_path")
+    parser.add_argument("--dictionary-size", type=int, default=MAX_DICTIONARY_SIZE,
+                        help="Kích thước từ điển dùng chung (byte, tối đa 32768).")
+    parser.add_argument("--sample-size", type=int, default=5000,
+                        help="Số bài hát dùng để huấn luyện từ điển.")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db_path):
+        print(f"Không tìm thấy tệp: {args.db_path}")
+        return 1
+
+    size_before = os.path.getsize(args.db_path)
+    if args.action == "compress":
+        dictionary_id = compress_database(args.db_path, args.dictionary_size, args.sample_size)
+        print(f"Đã nén lời bài hát với từ điển #{dictionary_id}.")
+    elif args.action == "decompress":
+        decompress_database(args.db_path)
+        print("Đã giải nén toàn bộ lời bài hát.")
+    else:
+        model = DatabaseModel(args.db_path)
+        mode = "nén" if model.is_lyric_compression_enabled() else "văn bản thường"
+        model.close()
+        print(f"Chế độ lưu trữ: {mode}")
+
+    size_after = os.path.getsize(args.db_path)
+    print(f"Kích thước tệp: {size_before:,} -> {size_after:,} byte")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,294 @@
+# src/utils/lyric_recognizer.py
+"""
+Nhận dạng lời bài hát từ ảnh chụp/ảnh quét, với backend thay thế được:
+- GeminiRecognizer: dịch vụ đám mây (google-generativeai), cần GEMINI_API_KEY hoặc GOOGLE_API_KEY.
+- TesseractRecognizer: chạy cục bộ, cần pytesseract và gói ngôn ngữ "vie" của Tesseract.
+- FakeRecognizer: kết quả tất định sinh từ nội dung ảnh, dùng để thử nghiệm khi không có mạng.
+
+recognize_images() chạy toàn bộ quy trình:
+1. Băm nội dung từng ảnh; ảnh đã có trong bộ nhớ đệm (bảng recognition_cache) thì không xử lý lại.
+2. Tiền xử lý các ảnh còn lại bằng Pillow trong process pool: xoay theo EXIF, chuyển ảnh xám,
+   thu nhỏ, chỉnh nghiêng.
+3. Gửi cho backend theo lô `max_batch` ảnh mỗi yêu cầu, rồi lưu kết quả vào bộ nhớ đệm.
+"""
+
+import hashlib
+import io
+import multiprocessing
+import os
+import random
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+from PIL import Image, ImageOps
+
+from utils.pdf_importer import SongSegmenter
+
+# Cạnh dài nhất của ảnh sau khi thu nhỏ: đủ rõ chữ cho OCR, nhỏ hơn nhiều so với ảnh chụp điện thoại
+MAX_IMAGE_SIDE = 2000
+# Góc nghiêng tối đa (độ) được dò và bước dò
+DESKEW_MAX_ANGLE = 5.0
+DESKEW_STEP = 0.5
+# Chuỗi phân cách giữa các trang khi gửi nhiều ảnh trong một yêu cầu
+PAGE_SEPARATOR = "=====HẾT TRANG====="
+
+@dataclass
+class RecognitionStats:
+    """Thống kê một lần nhận dạng."""
+    images: int = 0
+    cache_hits: int = 0
+    requests: int = 0
+    preprocess_seconds: float = 0.0
+    recognize_seconds: float = 0.0
+    seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.cache_hits / self.images if self.images else 0.0
+
+    @property
+    def images_per_second(self) -> float:
+        return self.images / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        return (f"{self.images} ảnh trong {self.seconds:.2f}s ({self.images_per_second:.1f} ảnh/s), "
+                f"bộ nhớ đệm {self.cache_hits}/{self.images} ({self.hit_rate:.0%}), {self.requests} yêu cầu nhận dạng")
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+# --- Tiền xử lý ảnh (chạy trong tiến trình con) ---
+def _row_profile_score(image: Image.Image) -> float:
+    """Độ phân tán của mật độ chữ theo từng hàng: lớn nhất khi các dòng chữ nằm ngang."""
+    # Thu về ảnh rộng 1 điểm ảnh: mỗi điểm là trung bình của một hàng
+    rows = list(image.resize((1, image.height), Image.BOX).getdata())
+    mean = sum(rows) / len(rows)
+    return sum((value - mean) ** 2 for value in rows)
+
+def estimate_skew(image: Image.Image) -> float:
+    """Ước lượng góc nghiêng (độ) của ảnh xám bằng cách dò góc cho phân bố theo hàng rõ nhất."""
+    thumbnail = image.copy()
+    thumbnail.thumbnail((400, 400))
+    # Đảo màu để chữ là phần sáng, phần lộ ra khi xoay là nền (đen)
+    inverted = ImageOps.invert(thumbnail).point(lambda value: 255 if value > 96 else 0)
+    best_angle, best_score = 0.0, -1.0
+    steps = int(DESKEW_MAX_ANGLE / DESKEW_STEP)
+    for i in range(-steps, steps + 1):
+        angle = i * DESKEW_STEP
+        score = _row_profile_score(inverted.rotate(angle, resample=Image.BILINEAR))
+        if score > best_score:
+            best_angle, best_score = angle, score
+    return best_angle
+
+def preprocess_image(data: bytes, max_side: int = MAX_IMAGE_SIDE) -> bytes:
+    """Xoay theo EXIF, chuyển ảnh xám, thu nhỏ và chỉnh nghiêng; trả về ảnh PNG."""
+    with Image.open(io.BytesIO(data)) as image:
+        # Với JPEG: giải mã thẳng ở độ phân giải nhỏ hơn (nhanh hơn nhiều so với giải mã đủ rồi thu nhỏ)
+        scale = min(1.0, max_side / max(image.size))
+        image.draft("L", (int(image.width * scale), int(image.height * scale)))
+        image = ImageOps.exif_transpose(image).convert("L")
+    image.thumbnail((max_side, max_side), Image.LANCZOS)
+    angle = estimate_skew(image)
+    if angle:
+        image = image.rotate(angle, resample=Image.BILINEAR, expand=True, fillcolor=255)
+    output = io.BytesIO()
+    image.save(output, format="PNG", compress_level=1)
+    return output.getvalue()
+
+# --- Các backend nhận dạng ---
+class LyricRecognizer(ABC):
+    """Giao diện chung của các backend nhận dạng; backend thiếu recognize_batch báo lỗi ngay khi khởi tạo."""
+    name = "base"
+    max_batch = 1 # số ảnh tối đa trong một yêu cầu
+
+    @abstractmethod
+    def recognize_batch(self, images: List[bytes]) -> List[str]:
+        """Nhận dạng một lô ảnh PNG đã tiền xử lý, trả về văn bản theo đúng thứ tự."""
+
+class GeminiRecognizer(LyricRecognizer):
+    """Nhận dạng bằng Google Gemini; nhiều trang được gửi trong một yêu cầu."""
+    name = "gemini"
+    PROMPT = ("Chép lại chính xác lời bài hát tiếng Việt trong các ảnh sau, giữ nguyên dấu, xuống dòng, "
+              "số câu (1., 2.) và ký hiệu điệp khúc (ĐK.). Không thêm lời giải thích. "
+              "Giữ tiêu đề bài hát ở một dòng riêng. "
+              f"Sau phần chữ của MỖI ảnh, viết một dòng '{PAGE_SEPARATOR}'.")
+
+    def __init__(self, api_key: Optional[str] = None, model_name: str = "gemini-1.5-flash", max_batch: int = 4):
+        import google.generativeai as genai
+
+        api_key = api_key or os.environ.get("GEMINI_API_KEY") or os.environ.get("GOOGLE_API_KEY")
+        if not api_key:
+            raise RuntimeError("Chưa có API key: đặt biến môi trường GEMINI_API_KEY (có thể đặt trong tệp .env).")
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+        self.max_batch = max_batch
+        self.name = f"gemini:{model_name}"
+
+    def _generate(self, images: List[bytes]) -> str:
+        parts = [self.PROMPT] + [{"mime_type": "image/png", "data": data} for data in images]
+        return self.model.generate_content(parts).text
+
+    def recognize_batch(self, images: List[bytes]) -> List[str]:
+        pages = [page.strip() for page in self._generate(images).split(PAGE_SEPARATOR)]
+        pages = [page for page in pages if page] if len(pages) > len(images) else pages
+        if len(pages) == len(images):
+            return pages
+        # Mô hình không tách trang đúng: gửi lại từng ảnh một
+        return [self._generate([data]).replace(PAGE_SEPARATOR, "").strip() for data in images]
+
+class TesseractRecognizer(LyricRecognizer):
+    """Nhận dạng cục bộ bằng Tesseract (không cần mạng, chất lượng thấp hơn với chữ viết tay)."""
+    name = "tesseract"
+
+    def __init__(self, lang: str = "vie"):
+        try:
+            import pytesseract
+        except ImportError as e:
+            raise RuntimeError("Chưa cài pytesseract và Tesseract OCR (gói ngôn ngữ 'vie').") from e
+        self._pytesseract = pytesseract
+        self.lang = lang
+        self.name = f"tesseract:{lang}"
+
+    def recognize_batch(self, images: List[bytes]) -> List[str]:
+        results = []
+        for data in images:
+            with Image.open(io.BytesIO(data)) as image:
+                results.append(self._pytesseract.image_to_string(image, lang=self.lang).strip())
+        return results
+
+class FakeRecognizer(LyricRecognizer):
+    """
+    Backend giả lập cho thử nghiệm: văn bản được sinh tất định từ nội dung ảnh
+    (hoặc lấy từ `texts` theo mã băm ảnh đã tiền xử lý). `latency` mô phỏng độ trễ mỗi yêu cầu.
+    """
+    name = "fake"
+    WORDS = "Chúa con xin dâng lên tình yêu thương Mẹ hiền ơn trời bình an vinh danh muôn đời".split()
+
+    def __init__(self, texts: Optional[dict] = None, latency: float = 0.0, max_batch: int = 4):
+        self.texts = texts or {}
+        self.latency = latency
+        self.max_batch = max_batch
+        self.calls = 0
+
+    def _text_for(self, data: bytes) -> str:
+        digest = content_hash(data)
+        if digest in self.texts:
+            return self.texts[digest]
+        rng = random.Random(digest)
+        lines = [" ".join(rng.choice(self.WORDS) for _ in range(6)).capitalize() for _ in range(8)]
+        return f"{rng.randint(1, 999)}. {' '.join(rng.choice(self.WORDS) for _ in range(3)).upper()}\n" + "\n".join(lines)
+
+    def recognize_batch(self, images: List[bytes]) -> List[str]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._text_for(data) for data in images]
+
+def create_recognizer(backend: Optional[str] = None) -> LyricRecognizer:
+    """
+    Tạo backend theo tên ('gemini', 'tesseract', 'fake') hoặc biến môi trường LYRIC_PRESENTER_OCR_BACKEND.
+    Mặc định dùng Gemini nếu có API key, ngược lại dùng Tesseract.
+    """
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+    backend = backend or os.environ.get("LYRIC_PRESENTER_OCR_BACKEND")
+    if not backend:
+        backend = "gemini" if (os.environ.get("GEMINI_API_KEY") or os.environ.get("GOOGLE_API_KEY")) else "tesseract"
+    if backend == "gemini":
+        return GeminiRecognizer()
+    if backend == "tesseract":
+        return TesseractRecognizer()
+    if backend == "fake":
+        return FakeRecognizer()
+    raise ValueError(f"Backend nhận dạng không hợp lệ: {backend}")
+
+# --- Quy trình nhận dạng ---
+def _read_file(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+def _load_and_preprocess(path: str) -> bytes:
+    """Chạy trong tiến trình con: đọc và tiền xử lý một ảnh."""
+    return preprocess_image(_read_file(path))
+
+def recognize_images(paths: List[str], recognizer: LyricRecognizer, db_model=None, workers: Optional[int] = None,
+                     cancel_event=None, progress_callback=None, stats: Optional[RecognitionStats] = None,
+                     hashes: Optional[List[str]] = None, max_in_flight: Optional[int] = None) -> Iterator[tuple]:
+    """
+    Nhận dạng các ảnh; trả về dần (chỉ số ảnh, văn bản) theo đúng thứ tự `paths`.
+    db_model (nếu có) cung cấp bộ nhớ đệm theo mã băm nội dung ảnh; hashes là mã băm đã tính sẵn.
+    Trong khi backend nhận dạng một lô, các tiến trình con đã tiền xử lý sẵn các lô kế tiếp:
+    tối đa max_in_flight ảnh (mặc định 2 lô), nên người dùng kết quả đọc chậm thì việc tiền xử lý cũng chờ theo.
+    """
+    stats = stats if stats is not None else RecognitionStats()
+    start = time.perf_counter()
+    total = len(paths)
+    if hashes is None:
+        hashes = [content_hash(_read_file(path)) for path in paths]
+    results = db_model.get_cached_recognitions(recognizer.name, hashes) if db_model is not None else {}
+    stats.images += total
+    stats.cache_hits += sum(1 for digest in hashes if digest in results)
+
+    # Ảnh trùng nội dung trong cùng lần nhập chỉ được nhận dạng một lần
+    first_index = {}
+    for i, digest in enumerate(hashes):
+        if digest not in results:
+            first_index.setdefault(digest, i)
+    unique_misses = list(first_index.values())
+    batches = [unique_misses[i:i + recognizer.max_batch] for i in range(0, len(unique_misses), recognizer.max_batch)]
+
+    next_index = 0
+
+    def ready():
+        """Trả về các ảnh liên tiếp (theo thứ tự) đã có kết quả."""
+        nonlocal next_index
+        while next_index < total and hashes[next_index] in results:
+            yield next_index, results[hashes[next_index]]
+            next_index += 1
+            if progress_callback:
+                progress_callback(next_index, total)
+
+    yield from ready()
+    if batches:
+        workers = (os.cpu_count() or 1) if workers is None else workers
+        lookahead = max(1, max_in_flight // recognizer.max_batch) if max_in_flight else 2
+        with ProcessPoolExecutor(max_workers=max(1, workers), mp_context=multiprocessing.get_context("spawn")) as pool:
+            # Tiền xử lý trước một số lô giới hạn: đủ để backend không phải chờ, bộ nhớ vẫn có giới hạn
+            pending = [[pool.submit(_load_and_preprocess, paths[i]) for i in batch] for batch in batches[:lookahead]]
+            for number, batch in enumerate(batches):
+                if cancel_event is not None and cancel_event.is_set():
+                    for futures in pending:
+                        for future in futures:
+                            future.cancel()
+                    break
+                step = time.perf_counter()
+                images = [future.result() for future in pending.pop(0)]
+                stats.preprocess_seconds += time.perf_counter() - step
+                if number + lookahead < len(batches):
+                    pending.append([pool.submit(_load_and_preprocess, paths[i]) for i in batches[number + lookahead]])
+
+                step = time.perf_counter()
+                texts = recognizer.recognize_batch(images)
+                stats.recognize_seconds += time.perf_counter() - step
+                stats.requests += 1
+                batch_results = {hashes[i]: text for i, text in zip(batch, texts)}
+                if db_model is not None:
+                    db_model.store_recognitions(recognizer.name, batch_results)
+                results.update(batch_results)
+                yield from ready()
+    stats.seconds += time.perf_counter() - start
+
+def iter_image_songs(paths: List[str], recognizer: LyricRecognizer, db_model=None, cancel_event=None,
+                     progress_callback=None, stats: Optional[RecognitionStats] = None) -> Iterator:
+    """Nhận dạng các ảnh (mỗi ảnh là một trang, theo thứ tự) và tách thành các SongCandidate."""
+    segmenter = SongSegmenter()
+    for index, text in recognize_images(paths, recognizer, db_model, cancel_event=cancel_event,
+                                        progress_callback=progress_callback, stats=stats):
+        yield from segmenter.feed_page(index, text)
+    yield from segmenter.finish()
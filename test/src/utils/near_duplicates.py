@@ -0,0 +1,195 @@
+# src/utils/near_duplicates.py
+"""
+Phát hiện bài hát gần trùng nhau (cùng một bài nhưng khác tựa đề, khác sách, lời sai khác đôi chút)
+bằng MinHash + LSH, không phải so từng cặp bài hát.
+
+- Lời được chuẩn hóa (chữ thường, bỏ dấu, bỏ số câu/"ĐK") rồi tách thành các cụm 2 từ liên tiếp.
+- Chữ ký MinHash dạng "một hoán vị" (one permutation hashing): mỗi cụm chỉ băm một lần, giá trị
+  được chia vào NUM_BINS ngăn, mỗi ngăn giữ giá trị nhỏ nhất; ngăn rỗng mượn giá trị ngăn kế bên.
+  Tỉ lệ ngăn trùng nhau giữa hai chữ ký ước lượng độ tương đồng Jaccard của hai tập cụm từ.
+- LSH: chữ ký được chia thành BANDS dải; hai bài có chung ít nhất một dải là ứng viên trùng,
+  sau đó mới so chữ ký để xác nhận.
+
+Chữ ký và khóa dải được lưu trong database (bảng song_signatures, song_lsh_bands); trigger xóa chữ ký
+khi lời bài hát thay đổi nên refresh_signatures() chỉ phải tính lại các bài mới hoặc vừa sửa.
+
+Chạy từ thư mục src:
+    python -m utils.near_duplicates ../data/lyrics.db
+"""
+
+import argparse
+import itertools
+import multiprocessing
+import os
+import unicodedata
+import zlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+NUM_BINS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_BINS // BANDS
+SHINGLE_WORDS = 2
+# Ngưỡng độ tương đồng ước lượng để coi hai bài là gần trùng
+DUPLICATE_THRESHOLD = 0.6
+# Số bài mỗi tiến trình con tính chữ ký trong một lần; ít bài hơn thì tính ngay trong tiến trình hiện tại
+SIGNATURE_BATCH = 2000
+# Dải có quá nhiều bài (lời quá ngắn/quá phổ biến) không được so từng cặp
+MAX_BUCKET_SIZE = 200
+
+_BIN_BITS = 6 # log2(NUM_BINS)
+# Giữ chữ cái a-z, mọi byte khác (số, dấu câu, xuống dòng) thành khoảng trắng
+_WORD_BYTES = bytes(c if ord("a") <= c <= ord("z") else ord(" ") for c in range(256))
+_IGNORED_WORDS = {b"dk"} # "ĐK." đánh dấu điệp khúc
+
+def normalize_words(text: str) -> List[bytes]:
+    """Chữ thường, bỏ dấu tiếng Việt, bỏ số và dấu câu; trả về danh sách từ (bytes ASCII)."""
+    text = unicodedata.normalize("NFD", text.lower().replace("đ", "d"))
+    words = text.encode("ascii", "ignore").translate(_WORD_BYTES).split()
+    return [word for word in words if word not in _IGNORED_WORDS]
+
+def _shingle_hashes(words: List[bytes]) -> set:
+    if len(words) < SHINGLE_WORDS:
+        return {zlib.crc32(word) for word in words}
+    return {zlib.crc32(b" ".join(shingle)) for shingle in zip(*(words[i:] for i in range(SHINGLE_WORDS)))}
+
+def minhash_signature(text: str) -> Optional[array]:
+    """Chữ ký NUM_BINS số 32 bit của lời bài hát; None nếu lời không có chữ nào."""
+    hashes = _shingle_hashes(normalize_words(text))
+    if not hashes:
+        return None
+    # Duyệt giá trị giảm dần: giá trị cuối cùng ghi vào mỗi ngăn là giá trị nhỏ nhất của ngăn đó
+    mins = {value & (NUM_BINS - 1): value >> _BIN_BITS for value in sorted(hashes, reverse=True)}
+    if len(mins) == NUM_BINS:
+        return array('I', (mins[i] for i in range(NUM_BINS)))
+    # Làm đầy ngăn rỗng bằng giá trị của ngăn có dữ liệu kế tiếp (vòng tròn),
+    # cộng thêm khoảng cách để hai ngăn mượn cùng một nguồn vẫn khác nhau
+    signature = array('I', bytes(4 * NUM_BINS))
+    for i in range(NUM_BINS):
+        distance = 0
+        while (i + distance) % NUM_BINS not in mins:
+            distance += 1
+        signature[i] = mins[(i + distance) % NUM_BINS] + (distance << (32 - _BIN_BITS))
+    return signature
+
+def band_keys(signature: array) -> List[int]:
+    """Khóa LSH của từng dải: số dải ở 32 bit cao, mã băm các giá trị trong dải ở 32 bit thấp."""
+    return [(band << 32) | zlib.crc32(signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes())
+            for band in range(BANDS)]
+
+def similarity(a: array, b: array) -> float:
+    """Độ tương đồng Jaccard ước lượng từ hai chữ ký."""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_BINS
+
+def _signatures(lyrics_list: List[str]) -> List[tuple]:
+    """Chạy được trong tiến trình con: lời -> (chữ ký dạng bytes, khóa dải); lời không có chữ -> (b"", [])."""
+    results = []
+    for lyrics in lyrics_list:
+        signature = minhash_signature(lyrics)
+        results.append((b"", []) if signature is None else (signature.tobytes(), band_keys(signature)))
+    return results
+
+def _entries(batch: List[tuple], signatures: List[tuple]) -> List[tuple]:
+    return [(song_id, lyrics, signature, keys) for (song_id, lyrics), (signature, keys) in zip(batch, signatures)]
+
+def refresh_signatures(db_model, workers: Optional[int] = None, progress_callback=None) -> int:
+    """
+    Tính chữ ký cho các bài chưa có (bài mới, bài vừa sửa lời). Lần đầu với thư viện lớn,
+    các lô được tính song song trong process pool. Trả về số bài đã tính.
+    """
+    batches = db_model.iter_songs_without_signature(SIGNATURE_BATCH)
+    first = next(batches, None)
+    if first is None:
+        return 0
+    if len(first) < SIGNATURE_BATCH:
+        # Trường hợp thường gặp sau khi sửa vài bài: không đáng khởi động tiến trình con
+        db_model.store_song_signatures(_entries(first, _signatures([lyrics for _, lyrics in first])))
+        return len(first)
+
+    done = 0
+
+    def store(batch, future):
+        nonlocal done
+        db_model.store_song_signatures(_entries(batch, future.result()))
+        done += len(batch)
+        if progress_callback:
+            progress_callback(done)
+
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    with ProcessPoolExecutor(max_workers=max(1, workers), mp_context=multiprocessing.get_context("spawn")) as pool:
+        # Chỉ gửi lời sang tiến trình con; lời được giữ lại ở đây để kiểm tra khi lưu
+        pending = []
+        for batch in itertools.chain([first], batches):
+            pending.append((batch, pool.submit(_signatures, [lyrics for _, lyrics in batch])))
+            if len(pending) > 2 * workers:
+                store(*pending.pop(0))
+        for batch, future in pending:
+            store(batch, future)
+    return done
+
+def find_similar_songs(db_model, lyrics: str, exclude_song_id: Optional[int] = None,
+                       threshold: float = DUPLICATE_THRESHOLD, limit: int = 5) -> List[tuple]:
+    """Các bài có lời gần giống `lyrics`: danh sách (song_id, độ tương đồng), giống nhất trước."""
+    signature = minhash_signature(lyrics)
+    if signature is None:
+        return []
+    matches = []
+    for song_id, other in db_model.get_signatures_by_band_keys(band_keys(signature)):
+        if song_id == exclude_song_id:
+            continue
+        score = similarity(signature, array('I', other))
+        if score >= threshold:
+            matches.append((song_id, score))
+    matches.sort(key=lambda match: -match[1])
+    return matches[:limit]
+
+def _find(parents: dict, item: int) -> int:
+    root = item
+    while parents[root] != root:
+        root = parents[root]
+    while parents[item] != root:
+        parents[item], item = root, parents[item]
+    return root
+
+def find_duplicate_clusters(db_model, threshold: float = DUPLICATE_THRESHOLD) -> List[List[int]]:
+    """
+    Gom các bài gần trùng thành cụm (mỗi cụm là danh sách song_id, ít nhất 2 bài).
+    Chỉ các cặp chung dải LSH mới được so chữ ký; cụm được hợp nhất bằng union-find.
+    """
+    buckets = [bucket for bucket in db_model.get_lsh_buckets() if len(bucket) <= MAX_BUCKET_SIZE]
+    signatures = {song_id: array('I', data) for song_id, data in
+                  db_model.get_song_signatures({song_id for bucket in buckets for song_id in bucket})}
+    parents = {song_id: song_id for song_id in signatures}
+    for bucket in buckets:
+        for i, a in enumerate(bucket):
+            for b in bucket[i + 1:]:
+                root_a, root_b = _find(parents, a), _find(parents, b)
+                if root_a != root_b and similarity(signatures[a], signatures[b]) >= threshold:
+                    parents[root_b] = root_a
+    clusters = {}
+    for song_id in parents:
+        clusters.setdefault(_find(parents, song_id), []).append(song_id)
+    return sorted((sorted(cluster) for cluster in clusters.values() if len(cluster) > 1), key=lambda c: c[0])
+
+def main():
+    from app.models.database_model import DatabaseModel
+
+    parser = argparse.ArgumentParser(description="Tìm các bài hát gần trùng nhau trong thư viện.")
+    parser.add_argument("db_path", help="Đường dẫn tới lyrics.db")
+    parser.add_argument("--threshold", type=float, default=DUPLICATE_THRESHOLD)
+    args = parser.parse_args()
+
+    db_model = DatabaseModel(args.db_path)
+    try:
+        refresh_signatures(db_model)
+        clusters = find_duplicate_clusters(db_model, args.threshold)
+        labels = db_model.get_song_labels([song_id for cluster in clusters for song_id in cluster])
+        for cluster in clusters:
+            print(" | ".join(f"{labels[song_id][0]} ({labels[song_id][1]})" for song_id in cluster))
+        print(f"{len(clusters)} cụm bài hát gần trùng")
+    finally:
+        db_model.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+# src/utils/pdf_importer.py
+"""
+Nhập bài hát từ tệp PDF của sách thánh ca bằng PyMuPDF.
+
+- Văn bản được trích từng trang, chia thành từng phần PAGES_PER_TASK trang và chạy
+  song song trong một process pool (PyMuPDF giữ GIL và không an toàn với luồng).
+  Chỉ tối đa 2 phần/tiến trình (hoặc max_in_flight trang) được xử lý cùng lúc nên bộ nhớ
+  không phụ thuộc số trang.
+- SongSegmenter tách bài hát theo tiêu đề dạng "123. TỰA ĐỀ VIẾT HOA"; các trang được
+  đưa vào theo thứ tự nên bài hát trải dài nhiều trang vẫn được ghép đúng.
+- Kết quả là một luồng SongCandidate để người dùng duyệt trước khi lưu.
+"""
+
+import multiprocessing
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from typing import Iterator, List, Optional
+
+try:
+    import pymupdf
+except ImportError: # PyMuPDF cũ chỉ có tên module fitz
+    import fitz as pymupdf
+
+# Số trang mỗi tiến trình con xử lý trong một lần (mở tệp một lần cho cả phần)
+PAGES_PER_TASK = 24
+
+# "12. TỰA ĐỀ", "12) TỰA ĐỀ", "12 - TỰA ĐỀ"
+HEADING_RE = re.compile(r"^\s*(\d{1,4})\s*[.)\-–:]?\s+(\S.{1,80}?)\s*$")
+# Dòng chỉ có số trang: "12", "- 12 -"
+PAGE_NUMBER_RE = re.compile(r"^\s*[-–]?\s*\d{1,4}\s*[-–]?\s*$")
+
+@dataclass(slots=True)
+class SongCandidate:
+    """Một bài hát tách được từ tệp, chờ người dùng duyệt."""
+    title: str
+    lyrics: str
+    number: Optional[str] = None
+    page: Optional[str] = None
+    approved: bool = True
+
+def page_count(path: str) -> int:
+    with pymupdf.open(path) as doc:
+        return doc.page_count
+
+def _extract_pages(path: str, indexes: List[int]) -> List[str]:
+    """Chạy trong tiến trình con: trích văn bản các trang có chỉ số trong indexes."""
+    # Không dùng sort=True: sắp xếp lại khối chữ theo tọa độ chậm hơn ~18 lần,
+    # trong khi sách in thông thường đã có thứ tự nội dung đúng
+    with pymupdf.open(path) as doc:
+        return [doc[i].get_text("text") for i in indexes]
+
+def _split_tasks(pages: List[int], per_task: int) -> List[List[int]]:
+    return [pages[i:i + per_task] for i in range(0, len(pages), per_task)]
+
+def iter_page_texts(path: str, workers: Optional[int] = None, cancel_event=None,
+                    progress_callback=None, pages: Optional[List[int]] = None,
+                    max_in_flight: Optional[int] = None) -> Iterator[tuple]:
+    """
+    Duyệt (chỉ số trang, văn bản) theo đúng thứ tự trang.
+    progress_callback(số trang đã xong, tổng số trang); cancel_event (threading.Event) để dừng giữa chừng.
+    pages: chỉ trích các trang này (tăng dần), ví dụ khi tiếp tục một công việc nhập dở.
+    max_in_flight: số trang tối đa đang được trích cùng lúc; người dùng kết quả đọc chậm thì
+    các tiến trình con cũng dừng lại chờ (áp lực ngược), mặc định 2 phần/tiến trình.
+
+    PyMuPDF không an toàn khi chạy trong luồng phụ (có thể làm sập tiến trình), nên mặc định
+    mọi lời gọi PyMuPDF đều chạy trong các tiến trình con, kể cả khi chỉ có một CPU.
+    workers=0: trích ngay trong tiến trình hiện tại — chỉ dùng khi gọi từ luồng chính.
+    """
+    workers = (os.cpu_count() or 1) if workers is None else workers
+
+    if workers == 0:
+        if pages is None:
+            pages = list(range(page_count(path)))
+        done = 0
+        for task in _split_tasks(pages, PAGES_PER_TASK):
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            yield from zip(task, _extract_pages(path, task))
+            done += len(task)
+            if progress_callback:
+                progress_callback(done, len(pages))
+        return
+
+    # Mỗi phần nhỏ lại khi giới hạn số trang đang xử lý thấp, để mọi tiến trình vẫn có việc
+    per_task = PAGES_PER_TASK
+    if max_in_flight:
+        per_task = max(1, min(PAGES_PER_TASK, max_in_flight // (2 * workers)))
+    tasks_in_flight = max(1, max_in_flight // per_task) if max_in_flight else 2 * workers
+
+    # "spawn" thay vì fork: không sao chép các luồng đang chạy của ứng dụng Qt sang tiến trình con
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        if pages is None:
+            pages = list(range(pool.submit(page_count, path).result()))
+        tasks = iter(_split_tasks(pages, per_task))
+        pending = deque((task, pool.submit(_extract_pages, path, task)) for task in islice(tasks, tasks_in_flight))
+        done = 0
+        while pending:
+            task, future = pending.popleft()
+            texts = future.result()
+            next_task = next(tasks, None)
+            if next_task:
+                pending.append((next_task, pool.submit(_extract_pages, path, next_task)))
+            yield from zip(task, texts)
+            done += len(task)
+            if progress_callback:
+                progress_callback(done, len(pages))
+            if cancel_event is not None and cancel_event.is_set():
+                for _, future in pending:
+                    future.cancel()
+                return
+
+def _heading(line: str) -> Optional[tuple]:
+    """Trả về (số, tựa đề) nếu dòng là tiêu đề bài hát: có số thứ tự và phần chữ gần như viết hoa toàn bộ."""
+    match = HEADING_RE.match(line)
+    if not match:
+        return None
+    letters = [c for c in match.group(2) if c.isalpha()]
+    if len(letters) < 2 or sum(c.isupper() for c in letters) < 0.8 * len(letters):
+        return None # "1. Lời phiên khúc..." là số câu, không phải tiêu đề
+    return match.group(1), match.group(2)
+
+def _clean_title(title: str) -> str:
+    title = " ".join(title.split())
+    if title.isupper():
+        title = title[:1] + title[1:].lower()
+    return title
+
+def _clean_lyrics(lines: List[str]) -> str:
+    """Bỏ dòng số trang, gộp nhiều dòng trống liên tiếp thành một."""
+    cleaned = []
+    for line in lines:
+        line = line.rstrip()
+        if PAGE_NUMBER_RE.match(line):
+            continue
+        if not line.strip():
+            if cleaned and cleaned[-1]:
+                cleaned.append("")
+            continue
+        cleaned.append(line.strip())
+    return "\n".join(cleaned).strip()
+
+class SongSegmenter:
+    """
+    Ghép các trang (theo thứ tự) thành bài hát. Mỗi lần feed_page trả về các bài đã hoàn tất;
+    phần văn bản trước tiêu đề đầu tiên (bìa, mục lục) thành bài chưa được chọn để người dùng tự quyết.
+    """
+    def __init__(self):
+        self._number = None
+        self._title = None
+        self._page = None
+        self._page_index = 0
+        self._next_page_index = 0
+        self._lines = []
+
+    @property
+    def settled_pages(self) -> int:
+        """Chỉ số trang đầu tiên còn nội dung chưa được trả về (các trang trước đó đã tách xong)."""
+        if self._title is not None or self._lines:
+            return self._page_index
+        return self._next_page_index
+
+    def _flush(self) -> List[SongCandidate]:
+        lyrics = _clean_lyrics(self._lines)
+        self._lines = []
+        if self._title is None:
+            if not lyrics:
+                return []
+            first_line = lyrics.split("\n", 1)[0]
+            return [SongCandidate(_clean_title(first_line[:80]), lyrics, None, self._page, approved=False)]
+        return [SongCandidate(_clean_title(self._title), lyrics, self._number, self._page, approved=bool(lyrics))]
+
+    def feed_page(self, page_index: int, text: str) -> List[SongCandidate]:
+        finished = []
+        if self._title is None and self._lines:
+            # Văn bản không thuộc bài nào: mỗi trang là một ứng viên riêng
+            finished.extend(self._flush())
+        if self._title is None:
+            self._page = str(page_index + 1)
+            self._page_index = page_index
+        for line in text.splitlines():
+            heading = _heading(line)
+            if heading:
+                finished.extend(self._flush())
+                self._number, self._title = heading
+                self._page = str(page_index + 1)
+                self._page_index = page_index
+            else:
+                self._lines.append(line)
+        self._next_page_index = page_index + 1
+        return finished
+
+    def finish(self) -> List[SongCandidate]:
+        return self._flush()
+
+def iter_pdf_songs(path: str, workers: Optional[int] = None, cancel_event=None,
+                   progress_callback=None) -> Iterator[SongCandidate]:
+    """Trích và tách bài hát từ tệp PDF, trả về dần từng bài khi đã hoàn tất."""
+    segmenter = SongSegmenter()
+    for page_index, text in iter_page_texts(path, workers, cancel_event, progress_callback):
+        yield from segmenter.feed_page(page_index, text)
+    yield from segmenter.finish()
@@ -1,165 +1,289 @@
 # src/utils/pptx_generator.py
 
+import re
+from collections import Counter
+from copy import deepcopy
+from dataclasses import astuple
+from itertools import count
+from typing import Optional
+from xml.sax.saxutils import quoteattr
+
 from pptx import Presentation
 from pptx.util import Inches, Pt
-from pptx.enum.text import PP_ALIGN
 from pptx.dml.color import RGBColor
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.packuri import PackURI
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls
+from pptx.parts.slide import SlideLayoutPart
 from PySide6.QtGui import QFont
-from PySide6.QtCore import QRectF
 
 from app.models.song_model import Theme, Song
-from.slide_layout_engine import split_lyrics_into_slides
+from.background_images import theme_background
+from.slide_layout_engine import plan_export_slides
 from.text_formatter import PREFIXES_TO_HIGHLIGHT
+from.tracing import counter, traced
+
+# Slide lời lặp lại từ chừng này lần trở lên mới được dựng thành layout dùng chung
+# (ít hơn thì layout riêng tốn chỗ hơn phần tiết kiệm được)
+MIN_SHARED_REPEATS = 3
+
+_ALIGNMENTS = {"CENTER": "ctr", "LEFT": "l", "RIGHT": "r", "JUSTIFY": "just"}
+_BODY_IDX = 1
+
+class _CompiledTheme:
+    """
+    Theme được dịch một lần thành slide master và các layout của tệp .pptx: nền nằm trên master,
+    vị trí khung chữ và định dạng mặc định (font, cỡ, màu, căn lề) nằm trên placeholder của layout.
+    Slide chỉ còn chứa chữ và những gì khác với theme (cỡ chữ riêng của bài, tiền tố được tô màu).
+
+    Theme riêng của một bài (primary là theme của buổi trình chiếu đã dịch) dùng chung slide master
+    và layout chuyển tiếp; nền của nó nằm trên các layout của riêng nó.
+    Ảnh nền là tệp đã chuẩn bị sẵn (utils.background_images); mỗi ảnh chỉ được nhúng một lần
+    dù được nhiều master/layout dùng.
+    """
+    def __init__(self, prs, theme: Theme, primary: "_CompiledTheme" = None):
+        self.prs = prs
+        self.theme = theme
+        is_widescreen = theme.slide_width > 10000000
+        self.width = Inches(13.333) if is_widescreen else Inches(10)
+        self.height = Inches(7.5)
+        self.title_height = Inches(1)
+        self.background = theme_background(theme)
+
+        if primary is None:
+            base_layout = prs.slide_layouts[6] # Layout 6 thường là "Blank"
+            self.master = base_layout.slide_master
+            default_layouts = list(self.master.slide_layouts)
+            # Tên part của layout mới được đánh số tiếp từ đây: next_partname() duyệt lại mọi part mỗi lần gọi
+            self._layout_numbers = count(int(re.search(r"(\d+)\.xml$", prs.part.package.next_partname(
+                "/ppt/slideLayouts/slideLayout%d.xml")).group(1)))
+            _set_background(self.master, theme.bg_color, self.background)
+            suffix = ""
+        else:
+            base_layout = primary.transition_layout
+            self.master = primary.master
+            self._layout_numbers = primary._layout_numbers
+            suffix = f" ({theme.name})"
+
+        self.title_layout = self.add_layout(base_layout, "Tựa đề và lời" + suffix)
+        self._add_placeholder(self.title_layout, 'title', None, "Tựa đề", 0, self.title_height, self._title_style())
+        self._add_placeholder(self.title_layout, 'body', _BODY_IDX, "Lời", self.title_height,
+                              self.height - self.title_height, self.lyric_style())
+        self.lyric_layout = self.add_layout(base_layout, "Lời" + suffix)
+        self._add_placeholder(self.lyric_layout, 'body', _BODY_IDX, "Lời", 0, self.height, self.lyric_style())
+
+        if primary is None:
+            self.transition_layout = self.add_layout(base_layout, "Chuyển tiếp")
+            _set_background(self.transition_layout, "#000000")
+            # Các layout mặc định của mẫu không còn được dùng: bỏ đi cho tệp nhỏ hơn
+            for layout in default_layouts:
+                self.master.slide_layouts.remove(layout)
+        else:
+            self.transition_layout = primary.transition_layout
+            _set_background(self.title_layout, theme.bg_color, self.background)
+            _set_background(self.lyric_layout, theme.bg_color, self.background)
+        self._owns_master = primary is None
+
+    def add_layout(self, base_layout, name: str):
+        """
+        Thêm một slide layout rỗng (bản sao của base_layout, không có placeholder) vào slide master.
+        python-pptx không có API tạo layout, nên part và quan hệ master <-> layout được tạo trực tiếp.
+        """
+        element = deepcopy(base_layout._element)
+        # Bỏ các placeholder (ngày, chân trang, số slide) và phần mở rộng của layout gốc
+        for placeholder in element.xpath('./p:cSld/p:spTree/p:sp[p:nvSpPr/p:nvPr/p:ph]'):
+            placeholder.getparent().remove(placeholder)
+        for extension_list in element.xpath('./p:cSld/p:extLst'):
+            extension_list.getparent().remove(extension_list)
+        # Nền (ảnh nền tham chiếu tới quan hệ của layout gốc) được đặt lại cho layout mới khi cần
+        for background in element.xpath('./p:cSld/p:bg'):
+            background.getparent().remove(background)
+        partname = PackURI(f"/ppt/slideLayouts/slideLayout{next(self._layout_numbers)}.xml")
+        layout_part = SlideLayoutPart(partname, base_layout.part.content_type, self.prs.part.package, element)
+        layout_part.relate_to(self.master.part, RT.SLIDE_MASTER)
+        rId = self.master.part.relate_to(layout_part, RT.SLIDE_LAYOUT)
+
+        # Id của layout phải khác mọi id layout/master khác trong tệp
+        layout_id_list = self.master._element.get_or_add_sldLayoutIdLst()
+        used_ids = [int(entry.get('id')) for entry in layout_id_list.sldLayoutId_lst if entry.get('id')]
+        used_ids += [int(entry.get('id')) for entry in self.prs.part._element.xpath('./p:sldMasterIdLst/p:sldMasterId')]
+        entry = layout_id_list._add_sldLayoutId(rId=rId)
+        entry.set('id', str(max(used_ids) + 1))
+
+        layout = layout_part.slide_layout
+        layout.name = name
+        return layout
+
+    def lyric_style(self) -> str:
+        theme = self.theme
+        return _list_style(theme.lyric_font_name, theme.lyric_font_size, theme.lyric_font_color, theme.lyric_font_bold,
+                           theme.lyric_font_italic, theme.lyric_font_underline, _ALIGNMENTS.get(theme.lyric_alignment, "ctr"))
+
+    def _title_style(self) -> str:
+        theme = self.theme
+        return _list_style(theme.title_font_name, theme.title_font_size, theme.title_font_color, theme.title_font_bold,
+                           theme.title_font_italic, theme.title_font_underline, "ctr")
 
-def generate_presentation(songs: list, theme: Theme, output_path: str, overrides: dict):
+    def _add_placeholder(self, layout, kind: str, idx, name: str, top, height, list_style: str):
+        spTree = layout._element.cSld.spTree
+        shape_id = max(int(i) for i in spTree.xpath('.//p:cNvPr/@id')) + 1
+        idx_attr = f' idx="{idx}"' if idx is not None else ""
+        spTree.append(parse_xml(
+            f'<p:sp {nsdecls("a", "p")}><p:nvSpPr><p:cNvPr id="{shape_id}" name="{name}"/>'
+            f'<p:cNvSpPr><a:spLocks noGrp="1"/></p:cNvSpPr><p:nvPr><p:ph type="{kind}"{idx_attr}/></p:nvPr></p:nvSpPr>'
+            f'<p:spPr><a:xfrm><a:off x="0" y="{int(top)}"/><a:ext cx="{int(self.width)}" cy="{int(height)}"/></a:xfrm></p:spPr>'
+            f'<p:txBody>{_BODY_PROPERTIES}{list_style}<a:p><a:endParaRPr/></a:p></p:txBody></p:sp>'))
+
+    def add_shared_lyric_layout(self, name: str, text: str, lyric_size: int):
+        """Layout chứa sẵn một slide lời lặp lại (điệp khúc): các slide lặp lại chỉ tham chiếu tới layout này."""
+        layout = self.add_layout(self.lyric_layout, name)
+        spTree = layout._element.cSld.spTree
+        shape_id = max(int(i) for i in spTree.xpath('.//p:cNvPr/@id')) + 1
+        # Chữ trên layout không phải placeholder nên không kế thừa định dạng: mang theo lstStyle của lời
+        textbox = parse_xml(
+            f'<p:sp {nsdecls("a", "p")}><p:nvSpPr><p:cNvPr id="{shape_id}" name="Lời"/><p:cNvSpPr txBox="1"/><p:nvPr/></p:nvSpPr>'
+            f'<p:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="{int(self.width)}" cy="{int(self.height)}"/></a:xfrm>'
+            f'<a:prstGeom prst="rect"><a:avLst/></a:prstGeom><a:noFill/></p:spPr>'
+            f'<p:txBody>{_BODY_PROPERTIES}{self.lyric_style()}<a:p/></p:txBody></p:sp>')
+        spTree.append(textbox)
+        _fill_lyric_paragraph(textbox.txBody.p_lst[0], text, self.theme, lyric_size)
+        if not self._owns_master:
+            _set_background(layout, self.theme.bg_color, self.background)
+        return layout
+
+_BODY_PROPERTIES = '<a:bodyPr wrap="square" anchor="t"><a:noAutofit/></a:bodyPr>'
+
+def _list_style(font_name: str, size: int, color: str, bold: bool, italic: bool, underline: bool, alignment: str) -> str:
+    """lstStyle mức 1: căn lề, không gạch đầu dòng, và định dạng chữ mặc định."""
+    return (f'<a:lstStyle><a:lvl1pPr marL="0" indent="0" algn="{alignment}">'
+            f'<a:spcBef><a:spcPts val="0"/></a:spcBef><a:buNone/>'
+            f'<a:defRPr sz="{size * 100}" b="{int(bold)}" i="{int(italic)}" u="{"sng" if underline else "none"}">'
+            f'<a:solidFill><a:srgbClr val="{color[1:].upper()}"/></a:solidFill><a:latin typeface={quoteattr(font_name)}/>'
+            f'</a:defRPr></a:lvl1pPr></a:lstStyle>')
+
+def _set_background(slide_like, color: str, image_path: Optional[str] = None):
+    """Nền màu, hoặc ảnh nền kéo giãn phủ kín slide (python-pptx gộp các ảnh trùng nội dung thành một media part)."""
+    if image_path is None:
+        fill = slide_like.background.fill
+        fill.solid()
+        fill.fore_color.rgb = RGBColor.from_string(color[1:])
+        return
+    _, rId = slide_like.part.get_or_add_image_part(image_path)
+    cSld = slide_like._element.cSld
+    for background in cSld.xpath('./p:bg'):
+        cSld.remove(background)
+    cSld.insert(0, parse_xml(
+        f'<p:bg {nsdecls("a", "p", "r")}><p:bgPr><a:blipFill dpi="0" rotWithShape="1"><a:blip r:embed="{rId}"/>'
+        f'<a:stretch><a:fillRect/></a:stretch></a:blipFill><a:effectLst/></p:bgPr></p:bg>'))
+
+@traced("export.pptx")
+def generate_presentation(songs: list, theme: Theme, output_path: str, overrides: dict, share_repeated_slides: bool = True):
     """
     Tạo một tệp PowerPoint với bố cục chuyên nghiệp hơn.
+    Theme được dịch một lần thành slide master và layout (_CompiledTheme); mỗi slide chỉ chứa chữ.
+    Bài có theme riêng (overrides[song_id]['theme']) dùng bộ layout của theme đó.
+    Slide lời lặp lại (điệp khúc) được dựng một lần thành một slide layout riêng; mỗi lần lặp
+    chỉ là một slide rỗng dùng layout đó, nên tệp nhỏ hơn và sửa điệp khúc một chỗ là đủ.
     """
     prs = Presentation()
     prs.slide_width = theme.slide_width
     prs.slide_height = theme.slide_height # 6858000
-    blank_slide_layout = prs.slide_layouts[6] # Layout 6 thường là "Blank"
+    # Theme đã dịch theo giá trị (cùng id nhưng khác ảnh nền riêng của bài là hai theme khác nhau)
+    compiled_themes = {astuple(theme): _CompiledTheme(prs, theme)}
 
-    # Xác định kích thước slide bằng Inches để định vị textbox
-    is_widescreen = theme.slide_width > 10000000
-    slide_width_inches = Inches(13.333) if is_widescreen else Inches(10)
-    slide_height_inches = Inches(7.5)
+    # --- 0. Chia slide cho cả playlist trước, để biết slide lời nào lặp lại ---
+    plans = []
+    for song in songs:
+        song_theme = overrides.get(song.id, {}).get('theme') or theme
+        theme_key = astuple(song_theme)
+        if theme_key not in compiled_themes:
+            compiled_themes[theme_key] = _CompiledTheme(prs, song_theme, compiled_themes[astuple(theme)])
+        lyric_size = overrides.get(song.id, {}).get('lyric', song_theme.lyric_font_size)
+        lyric_font = QFont(song_theme.lyric_font_name, lyric_size)
+        # Slide đầu tiên chứa tựa đề và đoạn lời đầu; các đoạn sau trên slide toàn màn hình
+        plans.append((compiled_themes[theme_key], lyric_size, plan_export_slides(song.lyrics, lyric_font, song_theme)))
+    repeated = Counter((id(compiled), slide_text, lyric_size) for compiled, lyric_size, planned_slides in plans
+                       for slide_text in planned_slides[1:] if slide_text.strip())
+    shared_layouts = {}
 
     for i, song in enumerate(songs):
         # --- 1. Lấy tất cả các đoạn lời bài hát đã được chia ---
-        lyric_size = overrides.get(song.id, {}).get('lyric', theme.lyric_font_size)
-        lyric_font = QFont(theme.lyric_font_name, lyric_size)
-        
-        # Bounding box cho engine chia slide (chỉ dùng cho phần lời)
-        slide_w_px, slide_h_px = (960, 540) if is_widescreen else (720, 540)
-        # Box cho slide đầu tiên (sau khi trừ đi title)
-        box_h_first = (slide_height_inches.emu - Inches(1).emu) / 914400.0 * 96
-        # Box cho các slide sau (toàn màn hình)
-        box_h_full = slide_height_inches.emu / 914400.0 * 96
-        
-        # Chia lời bài hát thành 2 phần: phần cho slide đầu và phần còn lại
-        first_slide_lyric_chunk = "" # Sửa: Khởi tạo là chuỗi rỗng
-        remaining_lyrics = song.lyrics
-        
-        # Tạm thời chia slide đầu tiên
-        temp_bounding_box = QRectF(0, 0, slide_w_px * 0.9, box_h_first * 0.9)
-        temp_slides = split_lyrics_into_slides(song.lyrics, lyric_font, temp_bounding_box)
-        if temp_slides:
-            first_slide_lyric_chunk = temp_slides[0] # Sửa: Chỉ lấy slide đầu tiên
-            # Lấy phần lời còn lại
-            # Sửa: Tính toán phần lời còn lại dựa trên độ dài của chuỗi đã lấy
-            remaining_lyrics = song.lyrics[len(first_slide_lyric_chunk):].lstrip()
-
-        # Chia phần lời còn lại cho các slide sau
-        full_bounding_box = QRectF(0, 0, slide_w_px * 0.9, box_h_full * 0.9)
-        lyrics_slides_remaining = split_lyrics_into_slides(remaining_lyrics, lyric_font, full_bounding_box)
+        compiled, lyric_size, planned_slides = plans[i]
+        song_theme = compiled.theme
+        first_slide_lyric_chunk = planned_slides[0]
+        lyrics_slides_remaining = planned_slides[1:]
 
         # --- 2. Tạo Slide Tựa đề (có lời) ---
-        slide = prs.slides.add_slide(blank_slide_layout)
-        background = slide.background
-        fill = background.fill
-        fill.solid()
-        fill.fore_color.rgb = RGBColor.from_string(theme.bg_color[1:])
-
-        # --- 2a. Thêm Textbox cho Tựa đề ---
-        title_size = overrides.get(song.id, {}).get('title', theme.title_font_size)
-        txBox_title = slide.shapes.add_textbox(Inches(0), Inches(0), slide_width_inches, Inches(1))
-        tf_title = txBox_title.text_frame
-        p_title = tf_title.paragraphs[0] # Sửa: Lấy đoạn văn đầu tiên
-        p_title.text = song.title
-        p_title.alignment = PP_ALIGN.CENTER
-        font_title = p_title.font
-        font_title.name = theme.title_font_name
-        font_title.size = Pt(title_size)
-        font_title.color.rgb = RGBColor.from_string(theme.title_font_color[1:])
-        font_title.bold = theme.title_font_bold
-        font_title.italic = theme.title_font_italic
-        font_title.underline = theme.title_font_underline
-
-        # --- 2b. Thêm Textbox cho phần lời đầu tiên ---
+        slide = prs.slides.add_slide(compiled.title_layout)
+        title_size = overrides.get(song.id, {}).get('title', song_theme.title_font_size)
+        p_title = slide.shapes.title.text_frame.paragraphs[0]
+        run_title = p_title.add_run()
+        run_title.text = song.title
+        if title_size != song_theme.title_font_size:
+            run_title.font.size = Pt(title_size)
+
+        body = slide.placeholders[_BODY_IDX]
         if first_slide_lyric_chunk:
-            txBox_content = slide.shapes.add_textbox(Inches(0), Inches(1), slide_width_inches, slide_height_inches - Inches(1))
-            tf_content = txBox_content.text_frame
-            tf_content.word_wrap = True
-            p_content = tf_content.paragraphs[0] # Sửa: Lấy đoạn văn đầu tiên
-            # Áp dụng logic tô màu và định dạng
-            _apply_lyric_formatting(p_content, first_slide_lyric_chunk, theme, lyric_size)
+            _fill_lyric_paragraph(body.text_frame.paragraphs[0]._p, first_slide_lyric_chunk, song_theme, lyric_size)
+        else:
+            body._element.getparent().remove(body._element)
 
         # --- 3. Tạo các slide lời bài hát tiếp theo ---
         for slide_text in lyrics_slides_remaining:
             if not slide_text.strip(): continue # Bỏ qua các slide trống
-            
-            slide = prs.slides.add_slide(blank_slide_layout)
-            background = slide.background
-            fill = background.fill
-            fill.solid()
-            fill.fore_color.rgb = RGBColor.from_string(theme.bg_color[1:])
-
-            # Tạo một textbox duy nhất chiếm toàn bộ slide
-            txBox_full = slide.shapes.add_textbox(Inches(0), Inches(0), slide_width_inches, slide_height_inches)
-            tf_full = txBox_full.text_frame
-            tf_full.word_wrap = True
-            p_full = tf_full.paragraphs[0] # Sửa: Lấy đoạn văn đầu tiên
-            # Áp dụng logic tô màu và định dạng
-            _apply_lyric_formatting(p_full, slide_text, theme, lyric_size)
+
+            key = (id(compiled), slide_text, lyric_size)
+            if share_repeated_slides and repeated[key] >= MIN_SHARED_REPEATS:
+                # Slide lặp lại: lời nằm trên layout dùng chung, slide chỉ tham chiếu tới layout đó
+                if key not in shared_layouts:
+                    shared_layouts[key] = compiled.add_shared_lyric_layout(
+                        f"Lời lặp lại {len(shared_layouts) + 1}", slide_text, lyric_size)
+                prs.slides.add_slide(shared_layouts[key])
+                continue
+
+            slide = prs.slides.add_slide(compiled.lyric_layout)
+            _fill_lyric_paragraph(slide.placeholders[_BODY_IDX].text_frame.paragraphs[0]._p, slide_text, song_theme, lyric_size)
 
         # --- 4. Slide chuyển tiếp ---
         if i < len(songs) - 1:
-            slide = prs.slides.add_slide(blank_slide_layout)
-            background = slide.background
-            fill = background.fill
-            fill.solid()
-            fill.fore_color.rgb = RGBColor.from_string("000000")
+            prs.slides.add_slide(compiled.transition_layout)
 
+    counter("export.pptx", slides=len(prs.slides), shared_layouts=len(shared_layouts), themes=len(compiled_themes))
     prs.save(output_path)
 
-def _apply_lyric_formatting(p: 'Paragraph', text: str, theme: Theme, lyric_size: int):
-    """Hàm trợ giúp để áp dụng định dạng cho một đoạn văn bản lời bài hát."""
-    # Đặt các thuộc tính chung cho cả đoạn văn
-    if theme.lyric_alignment == "CENTER":
-        p.alignment = PP_ALIGN.CENTER
-    elif theme.lyric_alignment == "LEFT":
-        p.alignment = PP_ALIGN.LEFT
-    elif theme.lyric_alignment == "RIGHT":
-        p.alignment = PP_ALIGN.RIGHT
-    elif theme.lyric_alignment == "JUSTIFY":
-        p.alignment = PP_ALIGN.JUSTIFY
-
-    # Logic tô màu bằng cách thêm các "run"
+def _fill_lyric_paragraph(p, text: str, theme: Theme, lyric_size: int):
+    """
+    Điền lời vào một đoạn văn (phần tử a:p): định dạng mặc định đến từ layout, nên run chỉ mang
+    cỡ chữ khi khác theme và màu/font tựa đề cho tiền tố được tô màu. Xuống dòng là ngắt dòng mềm (a:br).
+    """
+    run_properties = f'<a:rPr sz="{lyric_size * 100}"/>' if lyric_size != theme.lyric_font_size else ""
     stripped_text = text.lstrip()
     found_prefix = None
     for prefix in PREFIXES_TO_HIGHLIGHT:
         if stripped_text.startswith(prefix):
             found_prefix = prefix
             break
-    
+
+    runs = []
     if found_prefix:
-        run1 = p.add_run()
-        run1.text = found_prefix
-        font1 = run1.font
-        font1.name = theme.title_font_name
-        font1.color.rgb = RGBColor.from_string(theme.title_font_color[1:])
-        font1.size = Pt(lyric_size)
-        font1.bold = theme.lyric_font_bold
-        font1.italic = theme.lyric_font_italic
-        font1.underline = theme.lyric_font_underline
-        
-        run2 = p.add_run()
-        run2.text = text[len(found_prefix):]
-        font2 = run2.font
-        font2.name = theme.lyric_font_name
-        font2.size = Pt(lyric_size)
-        font2.color.rgb = RGBColor.from_string(theme.lyric_font_color[1:])
-        font2.bold = theme.lyric_font_bold
-        font2.italic = theme.lyric_font_italic
-        font2.underline = theme.lyric_font_underline
-    else:
-        run = p.add_run()
-        run.text = text
-        font = run.font
-        font.name = theme.lyric_font_name
-        font.size = Pt(lyric_size)
-        font.color.rgb = RGBColor.from_string(theme.lyric_font_color[1:])
-        font.bold = theme.lyric_font_bold
-        font.italic = theme.lyric_font_italic
-        font.underline = theme.lyric_font_underline
\ No newline at end of file
+        size_attr = f' sz="{lyric_size * 100}"' if run_properties else ""
+        runs.append(f'<a:r><a:rPr{size_attr}><a:solidFill><a:srgbClr val="{theme.title_font_color[1:].upper()}"/>'
+                    f'</a:solidFill><a:latin typeface={quoteattr(theme.title_font_name)}/></a:rPr>'
+                    f'<a:t>{_escape(found_prefix)}</a:t></a:r>')
+        text = text[len(found_prefix):]
+    for n, line in enumerate(text.split("\n")):
+        if n:
+            runs.append(f'<a:br>{run_properties}</a:br>')
+        if line:
+            runs.append(f'<a:r>{run_properties}<a:t>{_escape(line)}</a:t></a:r>')
+    for child in list(p):
+        p.remove(child)
+    for run in parse_xml(f'<a:p {nsdecls("a")}>{"".join(runs)}</a:p>'):
+        p.append(run)
+
+# Ký tự điều khiển không được phép trong XML (có thể lẫn vào lời nhập từ PDF/ảnh)
+_INVALID_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+def _escape(text: str) -> str:
+    return _INVALID_XML_CHARS.sub("", text).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
@@ -0,0 +1,283 @@
+# src/utils/query_stats.py
+"""
+Thống kê truy vấn SQL của DatabaseModel: kết nối được mở bằng InstrumentedConnection nên mọi câu lệnh
+(conn.execute, cursor.execute, executemany) đều được đo mà không phải sửa từng chỗ gọi.
+
+- Mỗi câu lệnh (chuẩn hóa khoảng trắng và danh sách "?, ?, ?") có: số lần gọi, tổng/lớn nhất thời gian,
+  biểu đồ phân bố độ trễ, số dòng trả về. Thời gian của một lần gọi gồm execute và mọi lần lấy dòng
+  (fetch*/duyệt cursor), không tính thời gian xử lý của người gọi giữa các lần lấy dòng.
+- Câu lệnh chậm hơn SLOW_QUERY_MS được ghi vào nhật ký xoay vòng (slow_queries.log trong thư mục
+  dữ liệu người dùng) kèm EXPLAIN QUERY PLAN; kế hoạch được lấy một lần cho mỗi câu lệnh.
+- Kế hoạch có "SCAN <bảng>" không dùng chỉ mục là quét toàn bảng (full_scan).
+
+Xem thống kê trong menu Công cụ, hoặc chạy các truy vấn tìm kiếm thường gặp trên một thư viện thật:
+    python -m utils.query_stats ../data/lyrics.db
+"""
+
+import argparse
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from typing import List, Optional
+
+from utils.resource_manager import diagnostic_logger
+
+SLOW_QUERY_MS = 50.0
+# Cận trên (ms) các ngăn của biểu đồ độ trễ; ngăn cuối chứa mọi lần chậm hơn
+HISTOGRAM_BOUNDS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+SLOW_LOG_FILE = "slow_queries.log"
+
+_SPACES = re.compile(r"\s+")
+_PARAMETER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_FULL_SCAN = re.compile(r"SCAN (?!CONSTANT ROW)(?!.*\b(?:USING|VIRTUAL TABLE)\b)")
+# Chỉ các câu lệnh này mới có kế hoạch truy vấn đáng xem (PRAGMA, CREATE... thì không)
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+def normalize_sql(sql: str) -> str:
+    """Khóa thống kê của câu lệnh: gộp khoảng trắng và danh sách tham số IN (?, ?, ...) dài ngắn khác nhau."""
+    return _PARAMETER_LIST.sub("?, …", _SPACES.sub(" ", sql).strip())
+
+def explain_query_plan(conn: sqlite3.Connection, sql: str, parameters=()) -> Optional[List[str]]:
+    """Các dòng EXPLAIN QUERY PLAN của câu lệnh; None nếu câu lệnh không giải thích được."""
+    try:
+        # Cursor thường (không đo) để lời gọi này không tự xuất hiện trong thống kê
+        rows = sqlite3.Cursor(conn).execute("EXPLAIN QUERY PLAN " + sql, parameters).fetchall()
+    except sqlite3.Error:
+        return None
+    return [row[3] for row in rows]
+
+@dataclass
+class StatementStats:
+    sql: str
+    calls: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    rows: int = 0
+    slow_calls: int = 0
+    histogram: list = field(default_factory=lambda: [0] * (len(HISTOGRAM_BOUNDS_MS) + 1))
+    plan: Optional[List[str]] = None
+    last_parameters: Optional[tuple] = None # để giải thích kế hoạch khi cần (chỉ câu SELECT)
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.calls if self.calls else 0.0
+
+    def percentile_ms(self, fraction: float) -> float:
+        """Cận trên của ngăn chứa phân vị `fraction` (ước lượng từ biểu đồ); ngăn cuối dùng max_ms."""
+        target = fraction * self.calls
+        seen = 0
+        for bound, count in zip(HISTOGRAM_BOUNDS_MS, self.histogram):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    @property
+    def full_scan(self) -> Optional[bool]:
+        """Kế hoạch có quét toàn bảng không; None nếu chưa có kế hoạch."""
+        if self.plan is None:
+            return None
+        return any(_FULL_SCAN.match(line) for line in self.plan)
+
+class QueryStats:
+    """Thống kê dùng chung cho mọi kết nối (kể cả kết nối của luồng nền); an toàn giữa các luồng."""
+    def __init__(self, slow_threshold_ms: float = SLOW_QUERY_MS):
+        self.slow_threshold_ms = slow_threshold_ms
+        self._lock = threading.Lock()
+        self._statements = {}
+        self._logger = None
+
+    def record(self, conn: sqlite3.Connection, sql: str, parameters, elapsed_ms: float, rows: int):
+        key = normalize_sql(sql)
+        statement = sql.lstrip()[:7].upper()
+        slow = elapsed_ms >= self.slow_threshold_ms
+        with self._lock:
+            entry = self._statements.get(key)
+            if entry is None:
+                entry = self._statements[key] = StatementStats(key)
+            entry.calls += 1
+            entry.total_ms += elapsed_ms
+            entry.max_ms = max(entry.max_ms, elapsed_ms)
+            entry.rows += rows
+            entry.histogram[_bucket(elapsed_ms)] += 1
+            if statement.startswith(("SELECT", "WITH")):
+                entry.last_parameters = parameters
+            if slow:
+                entry.slow_calls += 1
+            need_plan = slow and entry.plan is None and statement.startswith(_EXPLAINABLE)
+        if not slow:
+            return
+        if need_plan:
+            entry.plan = explain_query_plan(conn, sql, parameters)
+        self._log_slow(key, elapsed_ms, rows, entry.plan)
+
+    def explain_pending(self, conn: sqlite3.Connection) -> int:
+        """Lấy kế hoạch cho mọi câu SELECT đã ghi nhận mà chưa có (để biết truy vấn nào quét toàn bảng)."""
+        with self._lock:
+            pending = [entry for entry in self._statements.values()
+                       if entry.plan is None and entry.last_parameters is not None]
+        for entry in pending:
+            entry.plan = explain_query_plan(conn, entry.sql, entry.last_parameters)
+        return len(pending)
+
+    def snapshot(self) -> List[StatementStats]:
+        """Bản sao thống kê hiện tại, tốn thời gian nhất trước."""
+        with self._lock:
+            entries = [replace(entry, histogram=list(entry.histogram)) for entry in self._statements.values()]
+        return sorted(entries, key=lambda entry: -entry.total_ms)
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+
+    def report(self) -> str:
+        """Bảng thống kê dạng văn bản, kèm kế hoạch của các câu lệnh quét toàn bảng."""
+        lines = [f"{'Lần gọi':>8}{'Tổng ms':>10}{'TB ms':>9}{'p95 ms':>9}{'Max ms':>9}{'Dòng':>9}  Quét  Câu lệnh"]
+        for entry in self.snapshot():
+            scan = {True: "TOÀN", False: "", None: "?"}[entry.full_scan]
+            lines.append(f"{entry.calls:>8}{entry.total_ms:>10.1f}{entry.mean_ms:>9.2f}{entry.percentile_ms(0.95):>9.2f}"
+                         f"{entry.max_ms:>9.2f}{entry.rows:>9}  {scan:<4}  {entry.sql[:120]}")
+            if entry.full_scan:
+                lines.extend(f"{'':>62}↳ {line}" for line in entry.plan)
+        return "\n".join(lines)
+
+    def _log_slow(self, sql: str, elapsed_ms: float, rows: int, plan: Optional[List[str]]):
+        if self._logger is None:
+            self._logger = diagnostic_logger("slow_queries", SLOW_LOG_FILE)
+        self._logger.info(f"{elapsed_ms:.1f}ms {rows} dòng | {sql} | kế hoạch: {'; '.join(plan or ['?'])}")
+
+def _bucket(elapsed_ms: float) -> int:
+    for index, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+        if elapsed_ms <= bound:
+            return index
+    return len(HISTOGRAM_BOUNDS_MS)
+
+# Thống kê của cả tiến trình
+QUERY_STATS = QueryStats()
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Cursor đo thời gian và đếm dòng của từng câu lệnh. Một lần gọi kết thúc (và được ghi vào QUERY_STATS)
+    khi đã lấy hết dòng, khi cursor chạy câu lệnh khác, bị đóng hoặc được giải phóng.
+    """
+    _sql = None
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            super().execute(sql, parameters)
+        finally:
+            self._sql, self._parameters, self._elapsed, self._rows = sql, parameters, time.perf_counter() - start, 0
+        if self.description is None: # Không trả về dòng nào (INSERT, UPDATE, PRAGMA gán...)
+            self._finish()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            QUERY_STATS.record(self.connection, sql, (), (time.perf_counter() - start) * 1000, 0)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, 0 if row is None else 1)
+        if row is None:
+            self._finish()
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        start = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._fetched(start, len(rows))
+        if len(rows) < size:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows))
+        self._finish()
+        return rows
+
+    def __iter__(self):
+        next_row = super().__next__
+        while True:
+            start = time.perf_counter()
+            try:
+                row = next_row()
+            except StopIteration:
+                self._fetched(start, 0)
+                self._finish()
+                return
+            self._fetched(start, 1)
+            yield row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        if self._sql is not None: # Cursor bị bỏ khi chưa lấy hết dòng (ví dụ chỉ fetchone một lần)
+            self._finish()
+
+    def _fetched(self, start: float, rows: int):
+        if self._sql is not None:
+            self._elapsed += time.perf_counter() - start
+            self._rows += rows
+
+    def _finish(self):
+        if self._sql is None:
+            return
+        sql, self._sql = self._sql, None
+        QUERY_STATS.record(self.connection, sql, self._parameters, self._elapsed * 1000, self._rows)
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Kết nối có cursor mặc định là InstrumentedCursor (dùng qua sqlite3.connect(..., factory=...))."""
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+def main():
+    from app.models.database_model import DatabaseModel
+    # Khi chạy bằng python -m, module này là __main__; DatabaseModel ghi vào bản utils.query_stats
+    from utils.query_stats import QUERY_STATS
+
+    parser = argparse.ArgumentParser(description="Chạy các truy vấn tìm kiếm thường gặp trên một thư viện và in thống kê truy vấn.")
+    parser.add_argument("db_path", help="Đường dẫn tới lyrics.db")
+    parser.add_argument("--keyword", default="chúa", help="từ khóa tìm kiếm thử")
+    args = parser.parse_args()
+
+    db_model = DatabaseModel(args.db_path)
+    try:
+        QUERY_STATS.reset()
+        songbooks = db_model.get_songbooks()
+        for search_by in ("title", "lyrics", "number", "page"):
+            keyword = "1" if search_by in ("number", "page") else args.keyword
+            db_model.get_songbook_summaries(keyword=keyword, search_by=search_by)
+            db_model.search_songs(keyword, search_by=search_by)
+        db_model.get_songbook_summaries()
+        for songbook in songbooks[:5]:
+            page = db_model.get_songs_page(songbook.id, None, 100)
+            if page:
+                db_model.get_songs_page(songbook.id, page[-1].title, 100)
+                db_model.get_song_by_id(page[0].id)
+        db_model.explain_recorded_queries()
+        print(QUERY_STATS.report())
+    finally:
+        db_model.close()
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,7 @@
 import sys
 import os
+import logging
+from logging.handlers import RotatingFileHandler
 
 def resource_path(relative_path: str) -> str:
     """
@@ -14,4 +16,44 @@ def resource_path(relative_path: str) -> str:
         # Giả định rằng thư mục gốc của dự án là thư mục cha của thư mục 'src'
         base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 
-    return os.path.join(base_path, relative_path)
\ No newline at end of file
+    return os.path.join(base_path, relative_path)
+
+APP_DATA_DIR_NAME = "LyricPresenter"
+
+def user_data_path(relative_path: str = "") -> str:
+    """
+    Lấy đường dẫn trong thư mục dữ liệu của người dùng (ghi được, tồn tại lâu dài),
+    khác với thư mục tạm _MEIPASS của PyInstaller. Thư mục được tạo nếu chưa có.
+    - Windows: %APPDATA%\\LyricPresenter
+    - macOS: ~/Library/Application Support/LyricPresenter
+    - Linux: $XDG_DATA_HOME/LyricPresenter (mặc định ~/.local/share/LyricPresenter)
+    """
+    if sys.platform.startswith("win"):
+        root = os.environ.get("APPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        root = os.path.expanduser("~/Library/Application Support")
+    else:
+        root = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    base_path = os.path.join(root, APP_DATA_DIR_NAME)
+    os.makedirs(base_path, exist_ok=True)
+    return os.path.join(base_path, relative_path)
+
+# Kích thước tối đa và số bản cũ giữ lại của các tệp nhật ký chẩn đoán
+LOG_MAX_BYTES = 1_000_000
+LOG_BACKUPS = 3
+
+def diagnostic_logger(name: str, filename: str) -> logging.Logger:
+    """Logger ghi vào một tệp nhật ký xoay vòng trong thư mục dữ liệu người dùng (tạo handler một lần)."""
+    logger = logging.getLogger(f"lyric_presenter.{name}")
+    if not logger.handlers:
+        handler = RotatingFileHandler(user_data_path(filename), encoding="utf-8",
+                                      maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS)
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+def is_bundled() -> bool:
+    """True khi ứng dụng đang chạy từ bản đóng gói PyInstaller."""
+    return getattr(sys, 'frozen', False) or hasattr(sys, '_MEIPASS')
\ No newline at end of file
@@ -0,0 +1,166 @@
+# src/utils/slide_audit.py
+"""
+Kiểm tra bố cục slide của toàn bộ thư viện với theme hiện tại, trước khi phát hiện ra lúc đang trình chiếu:
+- Dòng quá dài: rộng hơn hộp chứa lời nên bị ngắt xuống dòng giữa chừng.
+- Slide bị tràn: một slide cao hơn hộp chứa lời (dòng quá dài bị ngắt thành quá nhiều dòng).
+- Slide chỉ có một dòng (dòng mồ côi) khi bài hát có nhiều slide.
+- Số slide quá nhiều (hơn MAX_SLIDES_PER_SONG).
+
+Bài hát được chia slide bằng đúng slide_layout_engine như khi xuất .pptx, chạy song song trong
+process pool (mỗi tiến trình con có QGuiApplication riêng để đo chữ). Kết quả được lưu theo
+bài hát và khóa bố cục của theme (bảng slide_audit); trigger xóa kết quả khi lời bài hát thay đổi,
+nên lần kiểm tra sau chỉ xử lý các bài mới hoặc vừa sửa.
+
+Chạy từ thư mục src:
+    python -m utils.slide_audit ../data/lyrics.db
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+
+from PySide6.QtGui import QFont, QFontMetrics, QGuiApplication
+
+from utils.slide_layout_engine import export_lyric_boxes, measure_text_height, plan_export_slides, slide_size_px
+
+# Tăng khi cách chia slide thay đổi, để kết quả đã lưu không còn được dùng
+LAYOUT_VERSION = 2
+MAX_SLIDES_PER_SONG = 10
+# Số bài mỗi tiến trình con kiểm tra trong một lần; ít bài hơn thì kiểm tra ngay trong luồng hiện tại
+AUDIT_BATCH = 200
+
+@dataclass(slots=True)
+class SlideAuditResult:
+    """Một bài hát có vấn đề về bố cục slide."""
+    song_id: int
+    title: str
+    songbook_name: str
+    slide_count: int
+    long_lines: int
+    orphan_slides: int
+    overflow_slides: int
+
+    def describe(self, max_slides: int = MAX_SLIDES_PER_SONG) -> str:
+        issues = []
+        if self.overflow_slides:
+            issues.append(f"{self.overflow_slides} slide bị tràn")
+        if self.long_lines:
+            issues.append(f"{self.long_lines} dòng quá dài")
+        if self.orphan_slides:
+            issues.append(f"{self.orphan_slides} slide chỉ có một dòng")
+        if self.slide_count > max_slides:
+            issues.append(f"{self.slide_count} slide")
+        return "; ".join(issues)
+
+@dataclass
+class SlideAuditStats:
+    audited: int = 0
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        return f"đã kiểm tra {self.audited} bài mới/vừa sửa trong {self.seconds:.1f}s"
+
+def layout_key(theme) -> str:
+    """Khóa của các thuộc tính theme ảnh hưởng tới cách chia slide."""
+    width, height = slide_size_px(theme)
+    return f"v{LAYOUT_VERSION}|{width}x{height}|{theme.lyric_font_name}|{theme.lyric_font_size}"
+
+def audit_lyrics(lyrics: str, theme) -> tuple:
+    """Chia slide như khi xuất .pptx; trả về (số slide, số dòng quá dài, số slide một dòng, số slide bị tràn)."""
+    font = QFont(theme.lyric_font_name, theme.lyric_font_size)
+    metrics = QFontMetrics(font)
+    first_box, full_box = export_lyric_boxes(theme)
+    slides = plan_export_slides(lyrics, font, theme)
+
+    distinct_lines = {line.strip() for line in lyrics.split("\n")}
+    long_lines = sum(1 for line in distinct_lines if line and metrics.horizontalAdvance(line) > full_box.width())
+    orphan_slides = overflow_slides = 0
+    for index, slide in enumerate(slides):
+        box = first_box if index == 0 else full_box
+        if len(slides) > 1 and sum(1 for line in slide.split("\n") if line.strip()) == 1:
+            orphan_slides += 1
+        if measure_text_height(slide, font, box) > box.height():
+            overflow_slides += 1
+    return len(slides), long_lines, orphan_slides, overflow_slides
+
+def _init_worker(platform_name: str):
+    """Khởi tạo tiến trình con: cần QGuiApplication để đo chữ, cùng nền tảng Qt với ứng dụng để số đo khớp nhau."""
+    global _app
+    if QGuiApplication.instance() is None:
+        _app = QGuiApplication(["slide-audit", "-platform", platform_name])
+
+def _audit_batch(theme, lyrics_list: List[str]) -> List[tuple]:
+    return [audit_lyrics(lyrics, theme) for lyrics in lyrics_list]
+
+def run_slide_audit(db_model, theme, workers: Optional[int] = None, cancel_event=None,
+                    progress_callback=None) -> SlideAuditStats:
+    """
+    Kiểm tra các bài chưa có kết quả với khóa bố cục của theme và lưu kết quả.
+    Phải được gọi khi đã có QGuiApplication (ứng dụng, hoặc main() của module này).
+    """
+    stats = SlideAuditStats()
+    start = time.perf_counter()
+    key = layout_key(theme)
+    song_ids = db_model.get_song_ids_without_audit(key)
+    total = len(song_ids)
+
+    def store(batch, results):
+        db_model.store_slide_audit(key, [(song_id, lyrics, *counts)
+                                         for (song_id, lyrics), counts in zip(batch, results)])
+        stats.audited += len(batch)
+        if progress_callback:
+            progress_callback(stats.audited, total)
+
+    batches = db_model.iter_song_lyrics(song_ids, AUDIT_BATCH)
+    if total <= AUDIT_BATCH:
+        # Vài bài vừa sửa: không đáng khởi động tiến trình con
+        for batch in batches:
+            store(batch, _audit_batch(theme, [lyrics for _, lyrics in batch]))
+    else:
+        workers = (os.cpu_count() or 1) if workers is None else workers
+        with ProcessPoolExecutor(max_workers=max(1, workers), mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(QGuiApplication.platformName(),)) as pool:
+            pending = []
+            for batch in batches:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                pending.append((batch, pool.submit(_audit_batch, theme, [lyrics for _, lyrics in batch])))
+                if len(pending) > 2 * workers:
+                    batch, future = pending.pop(0)
+                    store(batch, future.result())
+            for batch, future in pending:
+                store(batch, future.result())
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+def get_audit_report(db_model, theme, max_slides: int = MAX_SLIDES_PER_SONG) -> List[SlideAuditResult]:
+    """Các bài có vấn đề theo kết quả đã lưu của theme này, nặng nhất trước."""
+    return [SlideAuditResult(*row) for row in db_model.get_slide_audit_problems(layout_key(theme), max_slides)]
+
+def main():
+    from app.models.database_model import DatabaseModel
+
+    parser = argparse.ArgumentParser(description="Kiểm tra bố cục slide của toàn bộ thư viện với theme đã lưu.")
+    parser.add_argument("db_path", help="Đường dẫn tới lyrics.db")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-slides", type=int, default=MAX_SLIDES_PER_SONG)
+    args = parser.parse_args()
+
+    app = QGuiApplication.instance() or QGuiApplication(["slide-audit", "-platform", "offscreen"])
+    db_model = DatabaseModel(args.db_path)
+    try:
+        theme = db_model.get_theme()
+        stats = run_slide_audit(db_model, theme, args.workers)
+        report = get_audit_report(db_model, theme, args.max_slides)
+        for result in report:
+            print(f"{result.title} ({result.songbook_name}): {result.describe(args.max_slides)}")
+        print(f"{len(report)} bài có vấn đề; {stats.summary()}")
+    finally:
+        db_model.close()
+
+if __name__ == '__main__':
+    main()
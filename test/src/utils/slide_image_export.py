@@ -0,0 +1,137 @@
+# src/utils/slide_image_export.py
+"""
+Xuất playlist thành chuỗi ảnh (PNG/JPEG) hoặc một tệp PDF nhiều trang, cho nơi trình chiếu
+bằng PDF/ảnh thay vì PowerPoint. Slide được chia đúng như khi xuất .pptx (live_renderer.build_deck)
+và vẽ bằng QPainter/QImage ở một nhóm luồng nền.
+
+- Slide giống hệt nhau (slide trống giữa hai bài, điệp khúc lặp lại) chỉ được vẽ một lần:
+  ảnh PNG/JPEG đã mã hóa được ghi lại cho mỗi lần lặp; với PDF, cùng một QImage được vẽ lại
+  nên Qt chỉ nhúng ảnh đó một lần vào tệp.
+- Chỉ tối đa 2 x số luồng slide đang được vẽ cùng lúc, và kết quả chỉ được giữ tới lần dùng
+  cuối cùng, nên thời gian và bộ nhớ cho mỗi slide gần như không đổi khi playlist dài ra.
+"""
+
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice, QMarginsF, QRectF, QSizeF
+from PySide6.QtGui import QPageLayout, QPageSize, QPainter, QPdfWriter
+
+from utils.live_renderer import build_deck, render_slide
+from utils.slide_layout_engine import slide_size_px
+from utils.tracing import counter, traced
+
+IMAGE_FORMATS = {".png": "PNG", ".jpg": "JPG", ".jpeg": "JPG"}
+# Bề rộng ảnh mặc định (chiều cao theo tỉ lệ khung hình của theme)
+DEFAULT_IMAGE_WIDTH = 1920
+JPEG_QUALITY = 90
+
+@dataclass
+class ImageExportStats:
+    slides: int = 0
+    rendered: int = 0
+    # Số ảnh (đã vẽ xong hoặc đang vẽ) giữ trong bộ nhớ cùng lúc nhiều nhất
+    peak_held: int = 0
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        return f"{self.slides} slide ({self.rendered} slide khác nhau được vẽ) trong {self.seconds:.1f}s"
+
+def image_paths(output_path: str, count: int) -> list:
+    """Tên tệp ảnh cho từng slide: slides.png -> slides_001.png, slides_002.png,..."""
+    stem, ext = os.path.splitext(output_path)
+    digits = max(3, len(str(count)))
+    return [f"{stem}_{i:0{digits}d}{ext}" for i in range(1, count + 1)]
+
+def _encode(image, image_format: str) -> bytes:
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, image_format, JPEG_QUALITY if image_format == "JPG" else -1)
+    buffer.close()
+    return data.data()
+
+def _render_task(slide, width: int, height: int, image_format: Optional[str]):
+    """Chạy ở luồng nền: vẽ (và mã hóa, nếu xuất ảnh) một slide."""
+    image = render_slide(slide, width, height)
+    return image if image_format is None else _encode(image, image_format)
+
+def _iter_rendered(deck: list, width: int, height: int, image_format: Optional[str],
+                   workers: int, stats: ImageExportStats):
+    """
+    Trả về kết quả vẽ của từng slide theo thứ tự. Mỗi slide khác nhau được vẽ một lần, tối đa
+    2 x workers slide đang vẽ cùng lúc; kết quả được bỏ đi sau lần xuất hiện cuối cùng của slide đó.
+    """
+    unique = list(dict.fromkeys(deck))
+    remaining = Counter(deck)
+    results, futures = {}, {}
+    next_unique = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        def fill():
+            nonlocal next_unique
+            while next_unique < len(unique) and len(futures) < 2 * workers:
+                slide = unique[next_unique]
+                futures[slide] = pool.submit(_render_task, slide, width, height, image_format)
+                next_unique += 1
+
+        for slide in deck:
+            if slide not in results:
+                # Slide chưa vẽ luôn là slide khác nhau kế tiếp theo thứ tự xuất hiện
+                fill()
+                results[slide] = futures.pop(slide).result()
+                stats.rendered += 1
+                fill()
+                stats.peak_held = max(stats.peak_held, len(results) + len(futures))
+            yield results[slide]
+            remaining[slide] -= 1
+            if not remaining[slide]:
+                del results[slide]
+
+@traced("export.slide_images")
+def export_slide_images(songs: list, theme, overrides: dict, output_path: str, width: int = DEFAULT_IMAGE_WIDTH,
+                        workers: Optional[int] = None, progress_callback=None) -> ImageExportStats:
+    """
+    Xuất playlist ra PDF (output_path đuôi .pdf) hoặc chuỗi ảnh PNG/JPEG (đặt tên theo image_paths()).
+    progress_callback(done, total) được gọi sau mỗi slide.
+    """
+    ext = os.path.splitext(output_path)[1].lower()
+    if ext != ".pdf" and ext not in IMAGE_FORMATS:
+        raise ValueError(f"Định dạng xuất không được hỗ trợ: {ext}")
+    stats = ImageExportStats()
+    start = time.perf_counter()
+    workers = max(1, (os.cpu_count() or 1) if workers is None else workers)
+    deck = build_deck(songs, theme, overrides)
+    stats.slides = len(deck)
+    slide_w, slide_h = slide_size_px(theme)
+    height = round(width * slide_h / slide_w)
+
+    if ext == ".pdf":
+        writer = QPdfWriter(output_path)
+        writer.setResolution(96)
+        writer.setPageLayout(QPageLayout(QPageSize(QSizeF(slide_w / 96, slide_h / 96), QPageSize.Inch),
+                                         QPageLayout.Portrait, QMarginsF(0, 0, 0, 0)))
+        painter = QPainter(writer)
+        try:
+            page_rect = QRectF(0, 0, slide_w, slide_h)
+            for index, image in enumerate(_iter_rendered(deck, width, height, None, workers, stats)):
+                if index:
+                    writer.newPage()
+                painter.drawImage(page_rect, image)
+                if progress_callback:
+                    progress_callback(index + 1, len(deck))
+        finally:
+            painter.end()
+    else:
+        paths = image_paths(output_path, len(deck))
+        for index, data in enumerate(_iter_rendered(deck, width, height, IMAGE_FORMATS[ext], workers, stats)):
+            with open(paths[index], 'wb') as f:
+                f.write(data)
+            if progress_callback:
+                progress_callback(index + 1, len(deck))
+    stats.seconds = time.perf_counter() - start
+    counter("export.slide_images", slides=stats.slides, rendered=stats.rendered, peak_held=stats.peak_held)
+    return stats
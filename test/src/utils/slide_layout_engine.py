@@ -1,8 +1,51 @@
 # src/utils/slide_layout_engine.py
 
+import re
+from functools import lru_cache
+
 from PySide6.QtGui import QFont, QFontMetrics
-from PySide6.QtCore import QRectF, Qt
+from PySide6.QtCore import QRect, QRectF, Qt
+
+from utils.tracing import counter, is_tracing, traced
+
+@lru_cache(maxsize=64)
+def _metrics(font_description: str) -> QFontMetrics:
+    font = QFont()
+    font.fromString(font_description)
+    return QFontMetrics(font)
+
+@lru_cache(maxsize=65536)
+def _text_height(font_description: str, width: int, height: int, text: str) -> int:
+    return _metrics(font_description).boundingRect(QRect(0, 0, width, height), Qt.TextFlag.TextWordWrap, text).height()
+
+def measure_text_height(text: str, font: QFont, bounding_box: QRectF) -> int:
+    """
+    Chiều cao của đoạn văn bản khi ngắt dòng theo bề rộng của hộp giới hạn.
+    Kết quả được ghi nhớ theo (font, hộp, văn bản): chia lại cùng bài với cùng cỡ chữ
+    (xem trước, xuất file, tự chọn cỡ chữ) không phải đo lại.
+    """
+    rect = bounding_box.toRect()
+    return _text_height(font.toString(), rect.width(), rect.height(), text)
+
+# Dòng mở đầu một đoạn kể cả khi không có dòng trống phía trước: "1.", "2)", "ĐK.", "ĐK:"
+_STANZA_START = re.compile(r"\s*(\d+[.)]|ĐK[.:])", re.IGNORECASE)
 
+def split_stanzas(lyrics: str) -> list[str]:
+    """Tách lời thành các đoạn (phiên khúc, điệp khúc): phân cách bởi dòng trống hoặc dòng bắt đầu bằng số câu/"ĐK."."""
+    stanzas = []
+    current = []
+    for line in lyrics.strip().split('\n'):
+        if not line.strip() or (current and _STANZA_START.match(line)):
+            if current:
+                stanzas.append("\n".join(current))
+            current = [line] if line.strip() else []
+        else:
+            current.append(line)
+    if current:
+        stanzas.append("\n".join(current))
+    return stanzas
+
+@traced("layout.split_lyrics_into_slides")
 def split_lyrics_into_slides(lyrics: str, font: QFont, bounding_box: QRectF) -> list[str]:
     """
     Chia lời bài hát thành các slide dựa trên kích thước font và một hộp giới hạn (bounding box).
@@ -10,7 +53,6 @@ def split_lyrics_into_slides(lyrics: str, font: QFont, bounding_box: QRectF) ->
     if not lyrics:
         return [""]
 
-    metrics = QFontMetrics(font)
     lines = lyrics.strip().split('\n')
     
     slides = []
@@ -20,10 +62,7 @@ def split_lyrics_into_slides(lyrics: str, font: QFont, bounding_box: QRectF) ->
         test_lines = current_slide_lines + [line]
         test_text = "\n".join(test_lines)
         
-        # <<< SỬA LỖI Ở ĐÂY: Chuyển đổi QRectF thành QRect bằng.toRect() >>>
-        required_rect = metrics.boundingRect(bounding_box.toRect(), Qt.TextFlag.TextWordWrap, test_text)
-        
-        if required_rect.height() > bounding_box.height() and current_slide_lines:
+        if measure_text_height(test_text, font, bounding_box) > bounding_box.height() and current_slide_lines:
             slides.append("\n".join(current_slide_lines))
             current_slide_lines = [line]
         else:
@@ -32,4 +71,76 @@ def split_lyrics_into_slides(lyrics: str, font: QFont, bounding_box: QRectF) ->
     if current_slide_lines:
         slides.append("\n".join(current_slide_lines))
         
-    return slides if slides else [""]
\ No newline at end of file
+    return slides if slides else [""]
+
+# Kích thước slide (px ở 96 DPI) dùng để chia lời, theo tỉ lệ khung hình của theme
+def slide_size_px(theme) -> tuple:
+    return (960, 540) if theme.slide_width > 10000000 else (720, 540)
+
+# Thuộc tính theme quyết định cách chia slide (khổ slide, font và cỡ chữ lời);
+# các thuộc tính còn lại (màu, nền, căn lề, font tựa đề, in đậm...) chỉ ảnh hưởng tới hình vẽ
+LAYOUT_FIELDS = ("slide_width", "slide_height", "lyric_font_name", "lyric_font_size")
+THEME_UNCHANGED, THEME_PAINT_ONLY, THEME_LAYOUT = "unchanged", "paint", "layout"
+
+def classify_theme_change(old_theme, new_theme) -> str:
+    """
+    Phân loại thay đổi giữa hai theme: THEME_LAYOUT nếu khác một thuộc tính trong LAYOUT_FIELDS
+    (phải chia slide lại), THEME_PAINT_ONLY nếu chỉ khác màu/kiểu chữ (dùng lại bố cục, chỉ vẽ lại).
+    """
+    if old_theme is None or any(getattr(old_theme, name) != getattr(new_theme, name) for name in LAYOUT_FIELDS):
+        return THEME_LAYOUT
+    return THEME_UNCHANGED if old_theme == new_theme else THEME_PAINT_ONLY
+
+def _export_boxes(slide_w_px: int) -> tuple:
+    slide_h_px = 7.5 * 96
+    first_box = QRectF(0, 0, slide_w_px * 0.9, (slide_h_px - 96) * 0.9)
+    full_box = QRectF(0, 0, slide_w_px * 0.9, slide_h_px * 0.9)
+    return first_box, full_box
+
+def export_lyric_boxes(theme) -> tuple:
+    """
+    Hộp chứa lời theo bố cục của tệp .pptx xuất ra: (slide đầu tiên, bên dưới tựa đề cao 1 inch;
+    các slide sau, toàn màn hình). Chừa 10% lề như khi chia slide lúc xuất.
+    """
+    return _export_boxes(slide_size_px(theme)[0])
+
+def plan_stanza_slides(lyrics: str, font: QFont, first_box: QRectF, full_box: QRectF) -> list[str]:
+    """
+    Chia lời theo đoạn: mỗi đoạn bắt đầu một slide mới và nằm trọn trên slide đó nếu vừa,
+    đoạn quá cao mới bị chia tiếp theo chiều cao. Slide đầu dùng first_box, các slide sau dùng full_box.
+    Đoạn lặp lại (điệp khúc) chỉ được chia một lần; mọi lần lặp dùng lại đúng các slide đó,
+    nên nội dung của chúng giống hệt nhau.
+    """
+    stanzas = split_stanzas(lyrics)
+    if not stanzas:
+        return [""]
+
+    first_slides = split_lyrics_into_slides(stanzas[0], font, first_box)
+    slides = [first_slides[0]]
+    remaining = "\n".join(stanzas[0].split('\n')[first_slides[0].count('\n') + 1:])
+    if remaining.strip():
+        slides.extend(split_lyrics_into_slides(remaining, font, full_box))
+
+    layouts = {}
+    for stanza in stanzas[1:]:
+        if stanza not in layouts:
+            layouts[stanza] = split_lyrics_into_slides(stanza, font, full_box)
+        slides.extend(layouts[stanza])
+    return slides
+
+@lru_cache(maxsize=4096)
+def _export_plan(slide_w_px: int, font_description: str, lyrics: str) -> tuple:
+    font = QFont()
+    font.fromString(font_description)
+    return tuple(plan_stanza_slides(lyrics, font, *_export_boxes(slide_w_px)))
+
+def plan_export_slides(lyrics: str, font: QFont, theme) -> list[str]:
+    """
+    Chia lời như khi xuất .pptx: đoạn đầu nằm chung slide với tựa đề, các đoạn sau trên slide toàn màn hình.
+    Kết quả được ghi nhớ theo (khổ slide, font, lời) nên đổi theme chỉ về màu sắc không phải chia lại.
+    """
+    planned = list(_export_plan(slide_size_px(theme)[0], font.toString(), lyrics))
+    if is_tracing():
+        info = _export_plan.cache_info()
+        counter("layout.plan_cache", hits=info.hits, misses=info.misses)
+    return planned
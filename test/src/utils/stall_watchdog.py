@@ -0,0 +1,163 @@
+# src/utils/stall_watchdog.py
+"""
+Phát hiện giao diện bị đứng: một QTimer trên luồng giao diện đập nhịp đều đặn, một luồng canh gác
+kiểm tra nhịp đó. Khi vòng lặp sự kiện không phản hồi quá ngân sách (mặc định 100ms), luồng canh gác
+chụp stack Python của luồng chính (sys._current_frames) nhiều lần cho tới khi giao diện chạy lại.
+
+Mỗi lần đứng được quy về một đoạn mã: hàm sâu nhất thuộc mã nguồn của ứng dụng trên stack, xuất hiện
+nhiều nhất trong các lần chụp. Các lần đứng được gộp theo đoạn mã đó thành báo cáo (menu Công cụ)
+và ghi vào nhật ký xoay vòng stalls.log trong thư mục dữ liệu người dùng.
+
+Ngân sách chỉnh bằng biến môi trường LYRIC_PRESENTER_STALL_MS (0 = tắt).
+"""
+
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from PySide6.QtCore import QObject, Qt, QTimer
+
+from utils.resource_manager import diagnostic_logger
+
+STALL_ENV = "LYRIC_PRESENTER_STALL_MS"
+DEFAULT_BUDGET_MS = 100
+STALL_LOG_FILE = "stalls.log"
+# Số lần đứng gần nhất được giữ lại cho báo cáo
+MAX_STALLS = 500
+# Số khung cuối cùng của stack được giữ lại cho mỗi lần chụp
+MAX_FRAMES = 30
+
+# Thư mục src: khung thuộc mã của ứng dụng là khung có tệp nằm trong thư mục này
+_SOURCE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Các lớp đo đạc bọc quanh mã thật (decorator ghi vết, cursor thống kê) không được coi là nơi gây đứng
+_INSTRUMENTATION = {os.path.join(_SOURCE_ROOT, "utils", name) for name in ("tracing.py", "query_stats.py", "stall_watchdog.py")}
+
+def budget_from_environment() -> int:
+    """Ngân sách (ms) từ LYRIC_PRESENTER_STALL_MS, mặc định DEFAULT_BUDGET_MS; 0 = tắt canh gác."""
+    try:
+        return max(0, int(os.environ.get(STALL_ENV, DEFAULT_BUDGET_MS)))
+    except ValueError:
+        return DEFAULT_BUDGET_MS
+
+def _is_app_frame(frame: traceback.FrameSummary) -> bool:
+    return frame.filename.startswith(_SOURCE_ROOT) and frame.filename not in _INSTRUMENTATION
+
+def _describe(frame: traceback.FrameSummary) -> str:
+    return f"{os.path.relpath(frame.filename, _SOURCE_ROOT)}:{frame.lineno} {frame.name}"
+
+@dataclass
+class Stall:
+    started: float # time.time() lúc bắt đầu đứng
+    duration_ms: float
+    stacks: List[List[traceback.FrameSummary]] = field(default_factory=list)
+
+    def _app_stacks(self) -> list:
+        """(khung sâu nhất, các khung của ứng dụng) của từng lần chụp có mã ứng dụng trên stack."""
+        result = []
+        for stack in self.stacks:
+            app_frames = [frame for frame in stack if _is_app_frame(frame)]
+            if app_frames:
+                innermost = app_frames[-1]
+                result.append((f"{os.path.relpath(innermost.filename, _SOURCE_ROOT)} {innermost.name}", app_frames))
+        return result
+
+    @property
+    def location(self) -> str:
+        """Hàm sâu nhất thuộc mã ứng dụng (tệp và tên hàm), xuất hiện nhiều nhất trong các lần chụp."""
+        counts = Counter(location for location, _ in self._app_stacks())
+        return counts.most_common(1)[0][0] if counts else "(không chụp được stack của mã ứng dụng)"
+
+    def format_stack(self) -> str:
+        """Các khung của ứng dụng trong một lần chụp dừng tại location (lần chụp cuối có thể đã ra khỏi đoạn mã đó)."""
+        location = self.location
+        frames = next((frames for where, frames in self._app_stacks() if where == location), [])
+        return "\n".join(f"    {_describe(frame)}  {frame.line or ''}".rstrip() for frame in frames)
+
+class StallWatchdog(QObject):
+    """
+    Canh gác vòng lặp sự kiện của luồng giao diện. Phải được tạo trên luồng giao diện (luồng chính);
+    chi phí khi giao diện chạy bình thường chỉ là một nhịp QTimer và một lần kiểm tra ở luồng canh gác.
+    """
+    def __init__(self, budget_ms: int = DEFAULT_BUDGET_MS, parent=None):
+        super().__init__(parent)
+        self.budget_ms = budget_ms
+        self.stalls = deque(maxlen=MAX_STALLS)
+        self._main_thread_id = threading.main_thread().ident
+        self._last_beat = time.monotonic()
+        self._samples = [] # các stack chụp được trong lần đứng hiện tại
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._logger = None
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.setInterval(max(1, budget_ms // 2))
+        self._timer.timeout.connect(self._beat)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._timer.start()
+        self._thread = threading.Thread(target=self._watch, name="stall-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._timer.stop()
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _beat(self):
+        """Chạy trên luồng giao diện: nhịp cách nhịp trước quá ngân sách nghĩa là vừa hết một lần đứng."""
+        now = time.monotonic()
+        with self._lock:
+            gap_ms = (now - self._last_beat) * 1000
+            self._last_beat = now
+            stacks, self._samples = self._samples, []
+        if gap_ms > self.budget_ms:
+            self._record(Stall(time.time() - gap_ms / 1000, gap_ms, stacks))
+
+    def _watch(self):
+        """Luồng canh gác: khi nhịp trễ quá ngân sách thì chụp stack của luồng chính, lặp lại tới khi hết đứng."""
+        interval = max(0.001, self.budget_ms / 4000)
+        while not self._stop.wait(interval):
+            with self._lock:
+                stalled = (time.monotonic() - self._last_beat) * 1000 > self.budget_ms
+            if not stalled:
+                continue
+            frame = sys._current_frames().get(self._main_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)[-MAX_FRAMES:]
+            del frame
+            with self._lock:
+                self._samples.append(stack)
+
+    def _record(self, stall: Stall):
+        self.stalls.append(stall)
+        if self._logger is None:
+            self._logger = diagnostic_logger("stalls", STALL_LOG_FILE)
+        self._logger.info(f"Giao diện đứng {stall.duration_ms:.0f}ms tại {stall.location}\n{stall.format_stack()}")
+
+    def report(self, limit: Optional[int] = None) -> str:
+        """Các lần đứng gộp theo đoạn mã, tổng thời gian đứng nhiều nhất trước; kèm stack của lần lâu nhất."""
+        groups = {}
+        for stall in list(self.stalls):
+            groups.setdefault(stall.location, []).append(stall)
+        ranked = sorted(groups.items(), key=lambda item: -sum(stall.duration_ms for stall in item[1]))
+        lines = []
+        for location, stalls in ranked[:limit]:
+            longest = max(stalls, key=lambda stall: stall.duration_ms)
+            total = sum(stall.duration_ms for stall in stalls)
+            lines.append(f"{len(stalls)} lần, tổng {total:.0f}ms, lâu nhất {longest.duration_ms:.0f}ms — {location}")
+            if longest.stacks:
+                lines.append(longest.format_stack())
+        return "\n".join(lines)
@@ -0,0 +1,140 @@
+# src/utils/tracing.py
+"""
+Ghi vết (tracing) nhẹ cho các đường nóng: thao tác của người dùng, truy vấn CSDL, chia slide,
+vẽ xem trước và xuất file. Vết được ghi theo định dạng Chrome trace JSON, mở bằng chrome://tracing
+hoặc https://ui.perfetto.dev để xem một thao tác chậm theo từng khoảng (span).
+
+- span(name, **args): khối with đo một khoảng thời gian; traced(name): decorator tương tự cho hàm.
+- traced_methods(category, include): decorator cho lớp, đo mọi phương thức có tên thỏa include.
+- counter(name, **values): ghi các bộ đếm (số slide đã tạo, số lần trúng bộ nhớ đệm...).
+- Bật bằng biến môi trường LYRIC_PRESENTER_TRACE=<tệp .json> (ghi ra khi thoát) hoặc lệnh
+  "Ghi vết hiệu năng" trong menu Công cụ. Khi tắt, mỗi span chỉ tốn một lần kiểm tra cờ.
+"""
+
+import atexit
+import inspect
+import json
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+from typing import Optional
+
+TRACE_ENV = "LYRIC_PRESENTER_TRACE"
+# Số sự kiện giữ lại tối đa; vết chạy lâu chỉ giữ phần mới nhất
+MAX_EVENTS = 500_000
+
+_enabled = False
+_events = deque(maxlen=MAX_EVENTS)
+_thread_names = {}
+_origin_ns = time.perf_counter_ns()
+_PID = os.getpid()
+
+def _now_us() -> float:
+    return (time.perf_counter_ns() - _origin_ns) / 1000
+
+def _record(event: dict):
+    thread = threading.current_thread()
+    event["pid"] = _PID
+    event["tid"] = thread.ident
+    _thread_names[thread.ident] = thread.name
+    _events.append(event) # deque.append an toàn giữa các luồng
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name: str, args: dict):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = _now_us()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        _record({"name": self.name, "cat": self.name.split(".", 1)[0], "ph": "X",
+                 "ts": self.start, "dur": _now_us() - self.start, "args": self.args})
+        return False
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+def is_tracing() -> bool:
+    return _enabled
+
+def span(name: str, **args):
+    """Khối with đo một khoảng; tên có dạng "nhóm.việc" (nhóm dùng làm category trong trình xem vết)."""
+    return _Span(name, args) if _enabled else _NULL_SPAN
+
+def counter(name: str, **values):
+    """Ghi giá trị hiện tại của một hoặc nhiều bộ đếm (hiện thành biểu đồ trong trình xem vết)."""
+    if _enabled:
+        _record({"name": name, "ph": "C", "ts": _now_us(), "args": values})
+
+def traced(name: Optional[str] = None):
+    """Decorator đo mỗi lần gọi hàm; mặc định tên span là module.hàm."""
+    def decorate(fn):
+        span_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__qualname__}"
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(span_name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def traced_methods(category: str, include):
+    """
+    Decorator cho lớp: đo mọi phương thức (định nghĩa trong lớp) có tên thỏa include(name), span "category.tên".
+    Hàm sinh (generator) bị bỏ qua: lời gọi chỉ tạo ra generator, phần việc thật chạy lúc duyệt.
+    """
+    def decorate(cls):
+        for attr, value in list(vars(cls).items()):
+            if inspect.isfunction(value) and not inspect.isgeneratorfunction(value) and include(attr):
+                setattr(cls, attr, traced(f"{category}.{attr.lstrip('_')}")(value))
+        return cls
+    return decorate
+
+def start_tracing():
+    """Bật ghi vết, bỏ các sự kiện của lần ghi trước."""
+    global _enabled
+    _events.clear()
+    _enabled = True
+
+def stop_tracing(path: Optional[str] = None) -> int:
+    """Tắt ghi vết; có path thì ghi vết ra tệp. Trả về số sự kiện đã ghi được."""
+    global _enabled
+    _enabled = False
+    if path:
+        write_trace(path)
+    return len(_events)
+
+def write_trace(path: str):
+    """Ghi các sự kiện đã thu được ra tệp Chrome trace JSON."""
+    metadata = [{"name": "process_name", "ph": "M", "pid": _PID, "args": {"name": "Lyric Presenter"}}]
+    metadata += [{"name": "thread_name", "ph": "M", "pid": _PID, "tid": tid, "args": {"name": name}}
+                 for tid, name in list(_thread_names.items())]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": metadata + list(_events), "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+
+def enable_from_environment() -> Optional[str]:
+    """Bật ghi vết nếu có biến môi trường LYRIC_PRESENTER_TRACE; vết được ghi ra tệp đó khi ứng dụng thoát."""
+    path = os.environ.get(TRACE_ENV)
+    if not path:
+        return None
+    start_tracing()
+    atexit.register(lambda: _enabled and stop_tracing(path))
+    return path
@@ -0,0 +1,51 @@
+# src/utils/worker.py
+
+import traceback
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+class WorkerSignals(QObject):
+    """Tín hiệu của Worker; được phát từ luồng nền và nhận ở luồng giao diện."""
+    finished = Signal(object)   # kết quả trả về của hàm
+    error = Signal(str)         # thông báo lỗi
+    progress = Signal(int, int) # (đã xong, tổng)
+    partial = Signal(object)    # kết quả từng phần, gửi dần trong khi hàm đang chạy
+
+class Worker(QRunnable):
+    """
+    Chạy một hàm tốn thời gian trong QThreadPool để không làm đứng giao diện.
+    Nếu with_progress=True, hàm sẽ nhận thêm tham số progress_callback(done, total);
+    nếu with_partial=True, hàm nhận thêm partial_callback(result) để gửi dần kết quả.
+    """
+    def __init__(self, fn, *args, with_progress: bool = False, with_partial: bool = False, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        if with_progress:
+            self.kwargs['progress_callback'] = self.signals.progress.emit
+        if with_partial:
+            self.kwargs['partial_callback'] = self.signals.partial.emit
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
+
+def start_worker(worker: Worker, priority: int = 0):
+    """Đưa Worker vào thread pool dùng chung của ứng dụng."""
+    QThreadPool.globalInstance().start(worker, priority)
+    return worker
+
+def cancel_worker(worker: Worker) -> bool:
+    """Bỏ một Worker còn đang xếp hàng (chưa chạy) khỏi thread pool; trả về True nếu đã bỏ được."""
+    try:
+        return QThreadPool.globalInstance().tryTake(worker)
+    except RuntimeError:
+        return False # Worker đã chạy xong và được thread pool giải phóng
+
@@ -0,0 +1,42 @@
+# tests/conftest.py
+"""
+Cấu hình chung của bộ kiểm thử. Chạy từ thư mục test:
+    python -m pytest -q tests
+Mã nguồn được import như khi chạy từ thư mục src (app..., utils...).
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC_DIR)
+# Không cần màn hình; nhật ký chẩn đoán (slow_queries.log, stalls.log) ghi vào thư mục tạm
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ["XDG_DATA_HOME"] = tempfile.mkdtemp(prefix="lyric_tests_")
+
+from app.models.database_model import DatabaseModel
+
+@pytest.fixture(scope="session")
+def qapp():
+    from PySide6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication(["tests"])
+
+@pytest.fixture
+def open_model(tmp_path):
+    """Mở DatabaseModel trên một tệp trong tmp_path theo tên; mọi model được đóng khi kết thúc test."""
+    models = []
+
+    def open_(name: str = "lyrics.db", **kwargs) -> DatabaseModel:
+        model = DatabaseModel(str(tmp_path / name), **kwargs)
+        models.append(model)
+        return model
+    yield open_
+    for model in models:
+        model.close()
+
+@pytest.fixture
+def db_model(open_model) -> DatabaseModel:
+    return open_model()
@@ -0,0 +1,65 @@
+# tests/test_background_images.py
+
+import os
+
+import pytest
+from PIL import Image
+from PySide6.QtGui import QColor
+
+from app.controllers.prefetch_controller import SlidePrefetchController
+from app.models.song_model import Song, Theme
+from utils import background_images
+from utils.background_images import background_size, prepare_background, take_background_failures, theme_background
+
+@pytest.fixture
+def theme(tmp_path) -> Theme:
+    """Theme nền đen với ảnh nền đỏ chưa được chuẩn bị (mỗi test một ảnh khác nội dung)."""
+    path = str(tmp_path / "nen.jpg")
+    Image.new("RGB", (800, 600), (220, 0, 0)).save(path, "JPEG", comment=str(tmp_path).encode())
+    return Theme(bg_color="#000000", bg_image=path)
+
+def _corner(pixmap) -> QColor:
+    return pixmap.toImage().pixelColor(2, 2)
+
+def test_gui_lookup_never_prepares(theme, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+
+    assert theme_background(theme, prepare=False, cache_dir=cache_dir) is None
+    assert not os.path.exists(cache_dir)
+    prepared = prepare_background(theme.bg_image, background_size(theme), cache_dir)
+    assert theme_background(theme, prepare=False, cache_dir=cache_dir) == prepared
+
+def test_thumbnails_are_redrawn_once_backgrounds_are_prepared(qapp, theme):
+    prefetch = SlidePrefetchController()
+    song = Song(1, 1, "Xin vâng", "Lời một")
+
+    before = prefetch.thumbnails(song, theme, {})
+    assert _corner(before[0]).red() < 40 # vẽ ở luồng giao diện: chưa có ảnh nền
+    assert prefetch.thumbnails(song, theme, {}) is before
+    theme_background(theme) # Worker chuẩn bị ảnh nền
+    prefetch.backgrounds_prepared()
+
+    assert _corner(prefetch.thumbnails(song, theme, {})[0]).red() > 180
+
+def test_unreadable_image_is_reported_once(theme, monkeypatch):
+    source = theme.bg_image
+    with open(source, "rb") as f:
+        content = f.read()
+    with open(source, "wb") as f:
+        f.write("không phải ảnh".encode())
+    take_background_failures()
+
+    assert theme_background(theme) is None
+    assert [message.split(":")[0] for message in take_background_failures()] == [source]
+    opened = []
+    monkeypatch.setattr(background_images.Image, "open", lambda *args: opened.append(args))
+    assert theme_background(theme) is None and theme_background(theme, prepare=False) is None
+    assert opened == [] and take_background_failures() == []
+    monkeypatch.undo()
+
+    os.remove(source)
+    assert theme_background(theme) is None
+    assert len(take_background_failures()) == 1 # tệp bị xóa: lỗi mới, báo một lần
+    with open(source, "wb") as f:
+        f.write(content)
+    assert theme_background(theme) is not None
@@ -0,0 +1,137 @@
+# tests/test_import_jobs.py
+
+import pytest
+
+from utils.import_jobs import (PAGE_COMMITTED, PAGE_EXTRACTED, PAGE_PENDING, PAGE_REVIEWED, SAVE_EVERY_PAGES,
+                               ImportJob, commit_interrupted_jobs, file_hash)
+from utils.lyric_recognizer import FakeRecognizer
+
+# Văn bản nhận dạng của ba trang ảnh: bài 1 kéo sang trang 2, bài 3 nằm trọn trang 3
+PAGE_TEXTS = [
+    "1. XIN VÂNG\nLời một\nLời hai",
+    "Lời ba\n2. HỒNG ÂN\nLời bốn",
+    "3. KINH HÒA BÌNH\nLời năm",
+]
+# Tựa đề sau khi chuẩn hóa chữ hoa
+TITLES = ["Xin vâng", "Hồng ân", "Kinh hòa bình"]
+
+@pytest.fixture
+def recognizer():
+    return FakeRecognizer()
+
+def _write_pages(db_model, recognizer, directory, texts: list) -> list:
+    """Các tệp ảnh mà kết quả nhận dạng đã có trong bộ nhớ đệm (không cần chạy backend)."""
+    paths = []
+    for index, text in enumerate(texts):
+        path = directory / f"page{index}.png"
+        path.write_bytes(f"ảnh {index}".encode())
+        paths.append(str(path))
+    db_model.store_recognitions(recognizer.name, {file_hash(path): text for path, text in zip(paths, texts)})
+    return paths
+
+@pytest.fixture
+def pages(db_model, recognizer, tmp_path) -> list:
+    return _write_pages(db_model, recognizer, tmp_path, PAGE_TEXTS)
+
+@pytest.fixture
+def songbook_id(db_model) -> int:
+    return db_model.add_songbook("Nguyện Tập")
+
+def _states(db_model, job: ImportJob) -> list:
+    return [row['state'] for row in db_model.get_import_pages(job.job_id)]
+
+def test_new_job_starts_pending_and_reopens(db_model, pages):
+    job = ImportJob.open(db_model, "image", pages)
+    again = ImportJob.open(db_model, "image", pages)
+
+    assert not job.resumed and again.resumed and again.job_id == job.job_id
+    assert _states(db_model, job) == [PAGE_PENDING] * 3
+
+def test_iterating_extracts_every_page(db_model, pages, recognizer):
+    job = ImportJob.open(db_model, "image", pages)
+
+    songs = list(job.iter_songs(db_model, recognizer))
+
+    assert [(song.number, song.title) for song in songs] == list(zip("123", TITLES))
+    assert songs[0].lyrics == "Lời một\nLời hai\nLời ba"
+    assert _states(db_model, job) == [PAGE_EXTRACTED] * 3
+    assert job.settled_pages == 3
+
+def test_stopping_early_keeps_extracted_text(db_model, pages, recognizer):
+    job = ImportJob.open(db_model, "image", pages)
+    songs = job.iter_songs(db_model, recognizer)
+    next(songs) # bài 1 hoàn tất khi đọc tới tiêu đề trên trang 2
+    songs.close()
+
+    assert _states(db_model, job) == [PAGE_EXTRACTED, PAGE_EXTRACTED, PAGE_PENDING]
+    resumed = ImportJob.open(db_model, "image", pages)
+    assert len(list(resumed.iter_songs(db_model, recognizer))) == 3
+    assert resumed.reused_pages == 2
+
+def test_review_and_commit_marks_pages(db_model, pages, recognizer, songbook_id):
+    job = ImportJob.open(db_model, "image", pages)
+    songs = list(job.iter_songs(db_model, recognizer))
+
+    counts = job.save_reviewed(db_model, songbook_id, songs, job.settled_pages)
+
+    assert counts["inserted"] == 3
+    assert _states(db_model, job) == [PAGE_COMMITTED] * 3
+    assert db_model.conn.execute("SELECT status FROM import_jobs WHERE id = ?", (job.job_id,)).fetchone()[0] == "done"
+    assert not ImportJob.open(db_model, "image", pages).resumed
+
+def test_partial_review_resumes_after_reviewed_pages(db_model, pages, recognizer, songbook_id):
+    job = ImportJob.open(db_model, "image", pages)
+    songs = job.iter_songs(db_model, recognizer)
+    first = next(songs)
+    assert job.settled_pages == 0 # trang 1 chưa xong khi bài 1 được trả về
+    next(songs)
+    settled = job.settled_pages
+    songs.close()
+
+    job.save_reviewed(db_model, songbook_id, [first], settled)
+
+    assert settled == 1
+    assert _states(db_model, job) == [PAGE_COMMITTED, PAGE_EXTRACTED, PAGE_EXTRACTED]
+    resumed = ImportJob.open(db_model, "image", pages)
+    assert resumed.resumed
+    # Phần cuối bài 1 ở đầu trang 2 thành ứng viên chưa chọn; người dùng đã lưu bài 1 nên bỏ qua
+    assert [song.title for song in resumed.iter_songs(db_model, recognizer) if song.approved] == TITLES[1:]
+
+def test_interrupted_commit_is_finished_on_startup(db_model, pages, recognizer, songbook_id):
+    job = ImportJob.open(db_model, "image", pages)
+    songs = list(job.iter_songs(db_model, recognizer))
+    db_model.review_import_pages(job.job_id, job.settled_pages, songbook_id, songs) # tắt trước khi commit
+
+    assert _states(db_model, job) == [PAGE_REVIEWED] * 3
+    assert commit_interrupted_jobs(db_model) == {"jobs": 1, "inserted": 3, "skipped": 0}
+    assert _states(db_model, job) == [PAGE_COMMITTED] * 3
+    assert commit_interrupted_jobs(db_model)["jobs"] == 0
+
+def test_new_job_reuses_text_of_same_pages(db_model, pages, recognizer):
+    first = ImportJob.open(db_model, "image", pages)
+    list(first.iter_songs(db_model, recognizer))
+
+    subset = ImportJob.open(db_model, "image", pages[1:])
+
+    assert not subset.resumed
+    assert _states(db_model, subset) == [PAGE_EXTRACTED] * 2
+
+def test_review_while_extracting_covers_unsaved_pages(db_model, recognizer, tmp_path, songbook_id):
+    total = SAVE_EVERY_PAGES + 4
+    paths = _write_pages(db_model, recognizer, tmp_path, [f"{n}. BAI SO {n}\nLời bài {n}" for n in range(1, total + 1)])
+    job = ImportJob.open(db_model, "image", paths)
+    songs = job.iter_songs(db_model, recognizer)
+    seen = [next(songs) for _ in range(SAVE_EVERY_PAGES + 2)]
+    settled = job.settled_pages
+
+    # Người dùng duyệt khi luồng nền còn đang trích: ranh giới đã vượt qua nhóm trang chưa ghi đầy
+    job.save_reviewed(db_model, songbook_id, seen[:settled], settled)
+    rest = list(songs)
+
+    assert settled == SAVE_EVERY_PAGES + 1
+    assert _states(db_model, job) == [PAGE_COMMITTED] * settled + [PAGE_EXTRACTED] * (total - settled)
+    resumed = ImportJob.open(db_model, "image", paths)
+    remaining = list(resumed.iter_songs(db_model, recognizer))
+    assert [song.title for song in remaining] == [song.title for song in seen[settled:] + rest]
+    resumed.save_reviewed(db_model, songbook_id, remaining, resumed.settled_pages)
+    assert db_model.conn.execute("SELECT status FROM import_jobs WHERE id = ?", (job.job_id,)).fetchone()[0] == "done"
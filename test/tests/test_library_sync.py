@@ -0,0 +1,118 @@
+# tests/test_library_sync.py
+
+import os
+
+import pytest
+
+from app.models.song_model import Song
+from utils.library_sync import apply_changeset, export_changeset, open_peer, sync_databases
+
+def _content(model) -> set:
+    """Nội dung so sánh được giữa hai máy: (tên sách, tựa đề, lời), không phụ thuộc id."""
+    names = {sb.id: sb.name for sb in model.get_songbooks()}
+    return {(names[song.songbook_id], song.title, song.lyrics) for song in model.iter_songs()}
+
+def _song(model, title: str) -> Song:
+    return next(song for song in model.iter_songs() if song.title == title)
+
+@pytest.fixture
+def pair(open_model):
+    """Hai máy đã đồng bộ một lần, cùng có sách "Nguyện Tập" với bài "Xin Vâng"."""
+    a, b = open_model("a.db"), open_model("b.db")
+    songbook_id = a.add_songbook("Nguyện Tập")
+    a.add_song(Song(None, songbook_id, "Xin Vâng", "Lời gốc", "1"))
+    sync_databases(a, b)
+    return a, b
+
+def test_sync_converges_both_ways(open_model):
+    a, b = open_model("a.db"), open_model("b.db")
+    a.add_song(Song(None, a.add_songbook("Nguyện Tập"), "Xin Vâng", "Lời A"))
+    b.add_song(Song(None, b.add_songbook("Thánh Ca"), "Hồng Ân", "Lời B"))
+
+    stats = sync_databases(a, b)
+
+    assert _content(a) == _content(b) == {("Nguyện Tập", "Xin Vâng", "Lời A"), ("Thánh Ca", "Hồng Ân", "Lời B")}
+    assert stats.pulled == 2 and stats.pushed == 2
+
+def test_second_sync_sends_nothing(pair):
+    a, b = pair
+
+    stats = sync_databases(a, b)
+
+    assert (stats.pulled, stats.pushed, stats.applied) == (0, 0, 0)
+
+def test_later_edit_wins_conflict(pair):
+    a, b = pair
+    song_a = _song(a, "Xin Vâng")
+    song_a.lyrics = "Sửa ở A"
+    a.update_song(song_a)
+    song_b = _song(b, "Xin Vâng")
+    for lyrics in ("Sửa ở B", "Sửa lại ở B"):
+        song_b.lyrics = lyrics
+        b.update_song(song_b)
+
+    stats = sync_databases(a, b)
+
+    assert _content(a) == _content(b) == {("Nguyện Tập", "Xin Vâng", "Sửa lại ở B")}
+    assert (stats.pulled, stats.pushed) == (1, 0) # bản sửa của A bị ghi đè trước khi gửi đi
+
+def test_concurrent_edits_tie_break_on_site(pair):
+    a, b = pair
+    for model, lyrics in ((a, "Sửa ở A"), (b, "Sửa ở B")):
+        song = _song(model, "Xin Vâng")
+        song.lyrics = lyrics
+        model.update_song(song)
+    expected = "Sửa ở A" if a.get_sync_site() > b.get_sync_site() else "Sửa ở B"
+
+    sync_databases(a, b)
+
+    assert _content(a) == _content(b) == {("Nguyện Tập", "Xin Vâng", expected)}
+
+def test_later_delete_wins_over_edit(pair):
+    a, b = pair
+    song = _song(a, "Xin Vâng")
+    song.lyrics = "Sửa ở A"
+    a.update_song(song)
+    song = _song(b, "Xin Vâng")
+    song.lyrics = "Sửa ở B"
+    b.update_song(song)
+    b.delete_song(song.id)
+
+    sync_databases(a, b)
+
+    assert _content(a) == _content(b) == set()
+
+def test_copied_file_gets_new_site(open_model, tmp_path):
+    a = open_model("a.db")
+    a.add_song(Song(None, a.add_songbook("Nguyện Tập"), "Xin Vâng", "Lời gốc"))
+    a.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    (tmp_path / "copy.db").write_bytes((tmp_path / "a.db").read_bytes())
+    copy = open_model("copy.db")
+    copy.add_song(Song(None, copy.get_songbooks()[0].id, "Hồng Ân", "Lời bản sao"))
+
+    sync_databases(a, copy)
+
+    assert a.get_sync_site() != copy.get_sync_site()
+    assert _content(a) == _content(copy)
+
+def test_changeset_file_round_trip(pair, open_model, tmp_path):
+    a, _ = pair
+    path = str(tmp_path / "changes.json.gz")
+    c = open_model("c.db")
+
+    assert export_changeset(a, path) == 2
+    assert apply_changeset(c, path)["applied"] == 2
+    assert _content(c) == _content(a)
+
+def test_peer_is_opened_without_wal(open_model, tmp_path):
+    peer_path = str(tmp_path / "peer.db")
+    open_model("peer.db").close() # tệp tạo bằng cấu hình thường (WAL)
+
+    peer = open_peer(peer_path)
+    try:
+        assert peer.conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+        sync_databases(open_model("local.db"), peer)
+    finally:
+        peer.close()
+    assert not os.path.exists(peer_path + "-wal")
+    assert not os.path.exists(peer_path + "-shm")
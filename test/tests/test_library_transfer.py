@@ -0,0 +1,72 @@
+# tests/test_library_transfer.py
+
+import pytest
+
+from app.models.song_model import Song
+from utils import library_transfer
+from utils.library_transfer import export_library, import_library
+
+def _fill(model, songbook: str, titles: list, lyrics: str = "Lời cũ") -> int:
+    songbook_id = model.add_songbook(songbook)
+    for number, title in enumerate(titles, 1):
+        model.add_song(Song(None, songbook_id, title, lyrics, str(number)))
+    return songbook_id
+
+def _titles(model) -> set:
+    return {(row[1], row[2]) for row in model.get_song_index_rows()}
+
+@pytest.fixture
+def exported(db_model, tmp_path):
+    """Tệp .jsonl.gz của thư viện nguồn: sách "Nguyện Tập" với ba bài."""
+    _fill(db_model, "Nguyện Tập", ["Xin Vâng", "Kinh Hòa Bình", "Hồng Ân"], lyrics="Lời mới")
+    path = str(tmp_path / "library.jsonl.gz")
+    export_library(db_model, path)
+    return path
+
+def test_export_progress_reports_song_total(db_model, tmp_path, monkeypatch):
+    monkeypatch.setattr(library_transfer, "IMPORT_BATCH_SIZE", 10)
+    _fill(db_model, "Nguyện Tập", [f"Bài {i}" for i in range(15)])
+    _fill(db_model, "Thánh Ca", [f"Bài {i}" for i in range(10)])
+    calls = []
+
+    stats = export_library(db_model, str(tmp_path / "out.jsonl"), progress_callback=lambda done, total: calls.append((done, total)))
+
+    assert stats.songs == 25
+    assert calls == [(10, 25), (20, 25), (25, 25)]
+
+def test_import_skip_keeps_existing_songs(open_model, exported):
+    target = open_model("target.db")
+    _fill(target, "Nguyện Tập", ["Xin Vâng"])
+
+    stats = import_library(target, exported, on_conflict="skip")
+
+    assert (stats.songs, stats.inserted, stats.skipped, stats.updated, stats.renamed) == (3, 2, 1, 0, 0)
+    kept = target.search_songs("Xin Vâng")[0].songs[0]
+    assert kept.lyrics == "Lời cũ"
+
+def test_import_overwrite_replaces_lyrics(open_model, exported):
+    target = open_model("target.db")
+    _fill(target, "Nguyện Tập", ["Xin Vâng"])
+
+    stats = import_library(target, exported, on_conflict="overwrite")
+
+    assert (stats.inserted, stats.updated, stats.skipped) == (2, 1, 0)
+    assert target.count_songs() == 3
+    assert target.search_songs("Xin Vâng")[0].songs[0].lyrics == "Lời mới"
+
+def test_import_rename_adds_numbered_copies(open_model, exported):
+    target = open_model("target.db")
+    songbook_id = _fill(target, "Nguyện Tập", ["Xin Vâng", "Xin Vâng (2)"])
+
+    stats = import_library(target, exported, on_conflict="rename")
+
+    assert (stats.inserted, stats.renamed, stats.skipped) == (2, 1, 0)
+    assert (songbook_id, "Xin Vâng (3)") in _titles(target)
+    assert target.count_songs() == 5
+
+def test_import_rejects_unknown_format(db_model, tmp_path):
+    path = tmp_path / "other.jsonl"
+    path.write_text('{"type": "header", "format": "other", "version": 1}\n', encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        import_library(db_model, str(path))
@@ -0,0 +1,80 @@
+# tests/test_near_duplicates.py
+
+import random
+
+import pytest
+
+from app.models.song_model import Song
+from utils.near_duplicates import (BANDS, band_keys, find_duplicate_clusters, find_similar_songs, minhash_signature,
+                                   normalize_words, refresh_signatures, similarity)
+
+WORDS = ("chúa con xin dâng lên tình yêu thương mẹ hiền ơn trời bình an vinh danh muôn đời "
+         "ngợi khen thánh giá đồi cao lệ rơi đêm đông hồng ân tràn đầy suối nguồn").split()
+
+def _lyrics(seed: int, words: int = 120) -> str:
+    rng = random.Random(seed)
+    lines = [" ".join(rng.choice(WORDS) for _ in range(8)) for _ in range(words // 8)]
+    return "\n".join(lines)
+
+def _edit(lyrics: str, every: int = 40) -> str:
+    """Thay một từ sau mỗi `every` từ (lỗi chép tay giữa hai sách)."""
+    words = lyrics.split(" ")
+    for i in range(0, len(words), every):
+        words[i] = "halleluia"
+    return " ".join(words)
+
+def test_normalize_drops_accents_numbers_and_chorus_mark():
+    assert normalize_words("1. Đức Mẹ Hằng Cứu Giúp!\nĐK. Xin vâng") == [b"duc", b"me", b"hang", b"cuu", b"giup",
+                                                                         b"xin", b"vang"]
+
+def test_signature_ignores_formatting():
+    text = _lyrics(1)
+    reformatted = "1. " + text.upper().replace("\n", "\n\nĐK. ")
+
+    assert minhash_signature(text) == minhash_signature(reformatted)
+    assert minhash_signature("123 ... !!") is None
+
+def test_similarity_tracks_overlap():
+    original = minhash_signature(_lyrics(1))
+
+    assert similarity(original, minhash_signature(_lyrics(1))) == 1.0
+    assert similarity(original, minhash_signature(_edit(_lyrics(1)))) >= 0.7
+    assert similarity(original, minhash_signature(_lyrics(2))) < 0.3
+
+def test_band_keys_carry_band_number():
+    keys = band_keys(minhash_signature(_lyrics(1)))
+
+    assert [key >> 32 for key in keys] == list(range(BANDS))
+
+@pytest.fixture
+def library(db_model) -> dict:
+    """Hai bài có bản chép ở sách khác (một bản sửa vài từ) và một bài không trùng với bài nào."""
+    first, second = db_model.add_songbook("Nguyện Tập"), db_model.add_songbook("Thánh Ca")
+    texts = {"a": _lyrics(1), "a_copy": _lyrics(1), "a_edited": _edit(_lyrics(1)),
+             "b": _lyrics(2), "b_edited": _edit(_lyrics(2), every=30), "c": _lyrics(3)}
+    ids = {}
+    for name, text in texts.items():
+        songbook_id = first if name in ("a", "b", "c") else second
+        ids[name] = db_model.add_song(Song(None, songbook_id, name, text))
+    refresh_signatures(db_model)
+    return ids
+
+def test_clusters_group_near_duplicates(db_model, library):
+    clusters = find_duplicate_clusters(db_model)
+
+    assert clusters == [sorted(library[name] for name in ("a", "a_copy", "a_edited")),
+                        sorted(library[name] for name in ("b", "b_edited"))]
+
+def test_find_similar_excludes_the_song_itself(db_model, library):
+    matches = find_similar_songs(db_model, _lyrics(2), exclude_song_id=library["b"])
+
+    assert [song_id for song_id, _ in matches] == [library["b_edited"]]
+
+def test_refresh_only_recomputes_changed_songs(db_model, library):
+    assert refresh_signatures(db_model) == 0
+    song = db_model.get_song_by_id(library["c"])
+    song.lyrics = _lyrics(1)
+    db_model.update_song(song)
+
+    assert refresh_signatures(db_model) == 1
+    assert library["c"] in find_duplicate_clusters(db_model)[0]
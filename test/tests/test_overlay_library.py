@@ -0,0 +1,103 @@
+# tests/test_overlay_library.py
+
+import hashlib
+import sqlite3
+
+import pytest
+
+from app.models.database_model import OVERLAY_ID_START
+from app.models.song_model import Song
+
+@pytest.fixture
+def base_path(open_model, tmp_path):
+    """Thư viện đi kèm: sách "Nguyện Tập" (bài 1, 2) và "Thánh Ca" (bài 3), đã đóng."""
+    base = open_model("base.db")
+    first = base.add_songbook("Nguyện Tập")
+    second = base.add_songbook("Thánh Ca")
+    for songbook_id, title in ((first, "Xin Vâng"), (first, "Kinh Hòa Bình"), (second, "Hồng Ân")):
+        base.add_song(Song(None, songbook_id, title, f"Lời {title}"))
+    base.close()
+    return str(tmp_path / "base.db")
+
+@pytest.fixture
+def overlay(open_model, base_path):
+    return open_model("user_library.db", base_path=base_path)
+
+def _titles(model) -> dict:
+    return {row[0]: row[2] for row in model.get_song_index_rows()}
+
+def _digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def test_reads_merge_base_library(overlay):
+    assert sorted(_titles(overlay).values()) == ["Hồng Ân", "Kinh Hòa Bình", "Xin Vâng"]
+    assert [sb.name for sb in overlay.get_songbooks()] == ["Nguyện Tập", "Thánh Ca"]
+
+def test_new_rows_get_ids_from_overlay_range(overlay):
+    songbook_id = overlay.add_songbook("Sách Mới")
+    song_id = overlay.add_song(Song(None, songbook_id, "Bài Mới", "Lời"))
+
+    assert songbook_id > OVERLAY_ID_START and song_id > OVERLAY_ID_START
+
+def test_id_range_starts_above_larger_base_ids(open_model, tmp_path):
+    base = open_model("big_base.db")
+    songbook_id = base.add_songbook("Nguyện Tập")
+    base.conn.execute("INSERT INTO songs (id, songbook_id, title, lyrics) VALUES (?, ?, 'Cuối', '')",
+                      (OVERLAY_ID_START + 500, songbook_id))
+    base.conn.commit()
+    base.close()
+    overlay = open_model("user.db", base_path=str(tmp_path / "big_base.db"))
+
+    assert overlay.add_song(Song(None, songbook_id, "Bài Mới", "")) > OVERLAY_ID_START + 500
+
+def test_id_range_survives_reopen(open_model, base_path):
+    overlay = open_model("user.db", base_path=base_path)
+    first_id = overlay.add_song(Song(None, overlay.get_songbooks()[0].id, "Bài Mới", ""))
+    overlay.close()
+    reopened = open_model("user.db", base_path=base_path)
+
+    assert reopened.add_song(Song(None, reopened.get_songbooks()[0].id, "Bài Khác", "")) == first_id + 1
+
+def test_deleting_base_song_leaves_tombstone(overlay, base_path):
+    before = _digest(base_path)
+    song_id = next(song_id for song_id, title in _titles(overlay).items() if title == "Xin Vâng")
+
+    overlay.delete_song(song_id)
+
+    assert "Xin Vâng" not in _titles(overlay).values()
+    assert [tuple(row) for row in overlay.conn.execute("SELECT kind, id FROM main.overlay_tombstones")] == [("song", song_id)]
+    assert _digest(base_path) == before
+
+def test_deleting_base_songbook_hides_its_songs(overlay):
+    songbook_id = next(sb.id for sb in overlay.get_songbooks() if sb.name == "Nguyện Tập")
+
+    overlay.delete_songbook(songbook_id)
+
+    assert list(_titles(overlay).values()) == ["Hồng Ân"]
+    assert [sb.name for sb in overlay.get_songbooks()] == ["Thánh Ca"]
+
+def test_editing_base_song_shadows_it(overlay, base_path):
+    song = overlay.get_song_by_id(next(song_id for song_id, title in _titles(overlay).items() if title == "Hồng Ân"))
+    song.lyrics = "Lời đã sửa"
+
+    overlay.update_song(song)
+
+    assert overlay.get_song_by_id(song.id).lyrics == "Lời đã sửa"
+    assert len(_titles(overlay)) == 3
+    with sqlite3.connect(base_path) as base:
+        assert base.execute("SELECT lyrics FROM songs WHERE id = ?", (song.id,)).fetchone()[0] == "Lời Hồng Ân"
+
+def test_duplicate_of_base_song_is_rejected(overlay):
+    songbook_id = overlay.get_songbooks()[0].id
+
+    assert overlay.add_song(Song(None, songbook_id, "Xin Vâng", "")) is None
+    assert overlay.add_songbook("Thánh Ca") is None
+
+def test_clone_sees_overlay_changes(overlay):
+    overlay.delete_song(next(song_id for song_id, title in _titles(overlay).items() if title == "Xin Vâng"))
+    clone = overlay.clone()
+    try:
+        assert sorted(_titles(clone).values()) == ["Hồng Ân", "Kinh Hòa Bình"]
+    finally:
+        clone.close()
@@ -0,0 +1,79 @@
+# tests/test_pptx_export.py
+
+import pytest
+from pptx import Presentation
+
+from app.models.song_model import Song, Theme
+from utils.pptx_generator import MIN_SHARED_REPEATS, generate_presentation
+
+CHORUS = "ĐK. Xin vâng, xin vâng\nNhư lời Thiên Sứ truyền"
+
+def _song(song_id: int, verses: int, chorus: str = CHORUS) -> Song:
+    stanzas = []
+    for n in range(1, verses + 1):
+        stanzas += [f"{n}. Lời phiên khúc {n} của bài {song_id}\nCâu thứ hai", chorus]
+    return Song(song_id, 1, f"Bài {song_id}", "\n\n".join(stanzas))
+
+@pytest.fixture
+def export(qapp, tmp_path):
+    """Xuất playlist ra .pptx rồi mở lại bằng python-pptx."""
+    def export_(songs, theme=None, overrides=None, **kwargs):
+        path = str(tmp_path / "playlist.pptx")
+        generate_presentation(songs, theme or Theme(), path, overrides or {}, **kwargs)
+        return Presentation(path)
+    return export_
+
+def _texts(shapes) -> list:
+    return [shape.text_frame.text for shape in shapes if shape.has_text_frame and shape.text_frame.text]
+
+def _shared_layouts(prs) -> list:
+    return [layout for layout in prs.slide_master.slide_layouts if layout.name.startswith("Lời lặp lại")]
+
+def test_theme_is_compiled_into_layouts(export):
+    prs = export([_song(1, 1), _song(2, 1, chorus="ĐK. Điệp khúc khác")])
+
+    assert [layout.name for layout in prs.slide_master.slide_layouts] == ["Tựa đề và lời", "Lời", "Chuyển tiếp"]
+    assert [slide.slide_layout.name for slide in prs.slides] == ["Tựa đề và lời", "Lời", "Chuyển tiếp",
+                                                                 "Tựa đề và lời", "Lời"]
+    # Định dạng nằm trên layout: trên slide chỉ tiền tố "ĐK." được tô màu có rPr riêng, không có cỡ chữ
+    chorus_xml = prs.slides[1].shapes._spTree.xml
+    assert chorus_xml.count("<a:rPr") == 1 and 'sz="' not in chorus_xml
+
+def test_repeated_chorus_shares_one_layout(export):
+    prs = export([_song(1, MIN_SHARED_REPEATS)])
+
+    shared = _shared_layouts(prs)
+    chorus_slides = [slide for slide in prs.slides if slide.slide_layout.name.startswith("Lời lặp lại")]
+    assert len(shared) == 1 and len(chorus_slides) == MIN_SHARED_REPEATS
+    assert _texts(shared[0].shapes) == [CHORUS.replace("\n", "\x0b")]
+    assert all(len(slide.shapes) == 0 for slide in chorus_slides)
+
+def test_chorus_is_shared_across_songs(export):
+    prs = export([_song(song_id, 1) for song_id in range(1, MIN_SHARED_REPEATS + 1)])
+
+    assert len(_shared_layouts(prs)) == 1
+
+def test_rare_repeats_stay_on_slides(export):
+    prs = export([_song(1, MIN_SHARED_REPEATS - 1)])
+
+    assert _shared_layouts(prs) == []
+    assert sum(CHORUS.replace("\n", "\x0b") in _texts(slide.shapes) for slide in prs.slides) == MIN_SHARED_REPEATS - 1
+
+def test_sharing_can_be_turned_off(export):
+    prs = export([_song(1, MIN_SHARED_REPEATS)], share_repeated_slides=False)
+
+    assert _shared_layouts(prs) == []
+    assert sum(CHORUS.replace("\n", "\x0b") in _texts(slide.shapes) for slide in prs.slides) == MIN_SHARED_REPEATS
+
+def test_song_theme_gets_its_own_layouts(export):
+    song_theme = Theme(id=2, name="Mùa Chay", bg_color="#330033", lyric_font_size=28)
+    prs = export([_song(1, 1), _song(2, 1)], overrides={2: {"theme": song_theme}})
+
+    names = [slide.slide_layout.name for slide in prs.slides]
+    assert names[-2:] == ["Tựa đề và lời (Mùa Chay)", "Lời (Mùa Chay)"]
+    assert len(prs.slide_masters) == 1
+
+def test_size_override_is_the_only_run_property(export):
+    prs = export([_song(1, 1)], overrides={1: {"lyric": 20}})
+
+    assert 'sz="2000"' in prs.slides[1].shapes._spTree.xml
@@ -0,0 +1,100 @@
+# tests/test_query_stats.py
+
+import sqlite3
+
+import pytest
+
+from utils import query_stats
+from utils.query_stats import QUERY_STATS, InstrumentedConnection, normalize_sql
+
+class FakeClock:
+    """Thay time.perf_counter của module: thời gian chỉ trôi khi SQL gọi tick(ms) hoặc khi test gọi advance."""
+    def __init__(self):
+        self.now = 0.0
+
+    def perf_counter(self) -> float:
+        return self.now
+
+    def advance(self, ms: float) -> float:
+        self.now += ms / 1000
+        return ms
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(query_stats, "time", clock)
+    return clock
+
+@pytest.fixture
+def conn(clock):
+    """Kết nối đo đạc tới bảng t có 10 dòng; thống kê được đặt lại sau khi tạo dữ liệu."""
+    conn = sqlite3.connect(":memory:", factory=InstrumentedConnection)
+    conn.create_function("tick", 1, clock.advance)
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.executemany("INSERT INTO t (name) VALUES (?)", [(f"dòng {i}",) for i in range(10)])
+    QUERY_STATS.reset()
+    yield conn
+    conn.close()
+    QUERY_STATS.reset()
+
+def _entry(sql: str):
+    return next(entry for entry in QUERY_STATS.snapshot() if entry.sql == normalize_sql(sql))
+
+@pytest.mark.parametrize("read", [
+    lambda cursor: cursor.fetchall(),
+    lambda cursor: list(cursor),
+    lambda cursor: [cursor.fetchmany(3) for _ in range(4)],
+    lambda cursor: [cursor.fetchone() for _ in range(11)],
+], ids=["fetchall", "iterate", "fetchmany", "fetchone"])
+def test_rows_and_time_cover_every_fetch(conn, read):
+    read(conn.execute("SELECT tick(2) FROM t"))
+
+    entry = _entry("SELECT tick(2) FROM t")
+    assert (entry.calls, entry.rows) == (1, 10)
+    assert entry.total_ms == pytest.approx(20)
+
+def test_time_between_fetches_is_not_counted(conn, clock):
+    cursor = conn.execute("SELECT tick(1) FROM t")
+    for _ in cursor:
+        clock.advance(100) # người gọi xử lý từng dòng
+
+    assert _entry("SELECT tick(1) FROM t").total_ms == pytest.approx(10)
+
+def test_abandoned_cursor_is_recorded_on_next_execute(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT id FROM t").fetchone()
+    cursor.execute("SELECT name FROM t WHERE id = ?", (1,)).fetchall()
+
+    assert (_entry("SELECT id FROM t").calls, _entry("SELECT id FROM t").rows) == (1, 1)
+    assert _entry("SELECT name FROM t WHERE id = ?").rows == 1
+
+def test_statements_without_rows_are_recorded_once(conn):
+    conn.execute("UPDATE t SET name = 'x' WHERE id < 4")
+    conn.executemany("INSERT INTO t (name) VALUES (?)", [("a",), ("b",)])
+
+    assert [(_entry(sql).calls, _entry(sql).rows) for sql in
+            ("UPDATE t SET name = 'x' WHERE id < 4", "INSERT INTO t (name) VALUES (?)")] == [(1, 0), (1, 0)]
+
+def test_parameter_lists_and_whitespace_share_one_entry(conn):
+    conn.execute("SELECT id FROM t WHERE id IN (?, ?)", (1, 2)).fetchall()
+    conn.execute("SELECT id\n  FROM t   WHERE id IN (?,?,?)", (1, 2, 3)).fetchall()
+
+    entry = _entry("SELECT id FROM t WHERE id IN (?, ?)")
+    assert (entry.calls, entry.rows) == (2, 5)
+
+def test_slow_select_gets_plan_and_histogram(conn, monkeypatch):
+    monkeypatch.setattr(QUERY_STATS, "slow_threshold_ms", 15)
+    conn.execute("SELECT tick(2) FROM t WHERE name LIKE '%dòng%'").fetchall()
+    conn.execute("SELECT tick(2) FROM t WHERE id = 3").fetchall()
+
+    slow = _entry("SELECT tick(2) FROM t WHERE name LIKE '%dòng%'")
+    fast = _entry("SELECT tick(2) FROM t WHERE id = 3")
+    assert slow.slow_calls == 1 and slow.full_scan
+    assert fast.slow_calls == 0 and fast.plan is None
+    assert slow.histogram[query_stats._bucket(20)] == 1 and slow.percentile_ms(0.95) == pytest.approx(20)
+
+def test_explain_pending_fills_plans_of_recorded_selects(conn):
+    conn.execute("SELECT name FROM t WHERE id = ?", (3,)).fetchall()
+
+    assert QUERY_STATS.explain_pending(conn) == 1
+    assert _entry("SELECT name FROM t WHERE id = ?").full_scan is False
@@ -0,0 +1,71 @@
+# tests/test_stall_watchdog.py
+
+import os
+from traceback import FrameSummary
+
+import pytest
+
+from utils.stall_watchdog import _SOURCE_ROOT, Stall, StallWatchdog
+
+def _frame(path: str, name: str, lineno: int = 10) -> FrameSummary:
+    """Khung stack giả; path tương đối so với thư mục src, hoặc tuyệt đối cho mã thư viện."""
+    filename = path if os.path.isabs(path) else os.path.join(_SOURCE_ROOT, path)
+    return FrameSummary(filename, lineno, name, line=f"{name}()")
+
+MAIN = _frame("main.py", "main")
+EXEC = _frame("/usr/lib/python3/site-packages/PySide6/QtWidgets.py", "exec")
+PREVIEW = _frame("app/controllers/main_controller.py", "_update_preview", 840)
+RENDER = _frame("utils/live_renderer.py", "render_slide", 95)
+TRACED = _frame("utils/tracing.py", "wrapper")
+QT_PAINT = _frame("/usr/lib/python3/site-packages/PySide6/QtGui.py", "drawContents")
+
+def test_location_is_most_frequent_innermost_app_frame():
+    stall = Stall(0.0, 300, [
+        [MAIN, EXEC, PREVIEW, TRACED, RENDER, QT_PAINT], # thư viện Qt ở trong cùng: bỏ qua
+        [MAIN, EXEC, PREVIEW, TRACED, RENDER],
+        [MAIN, EXEC, PREVIEW, TRACED], # lớp ghi vết không phải nơi gây đứng
+    ])
+
+    assert stall.location == "utils/live_renderer.py render_slide"
+    assert stall.format_stack().splitlines() == [
+        "    main.py:10 main  main()",
+        "    app/controllers/main_controller.py:840 _update_preview  _update_preview()",
+        "    utils/live_renderer.py:95 render_slide  render_slide()",
+    ]
+
+def test_instrumentation_frames_are_skipped():
+    stall = Stall(0.0, 300, [[MAIN, PREVIEW, TRACED], [MAIN, PREVIEW, TRACED], [MAIN, PREVIEW, TRACED, RENDER]])
+
+    assert stall.location == "app/controllers/main_controller.py _update_preview"
+
+def test_stall_without_app_frames():
+    stall = Stall(0.0, 150, [[EXEC, QT_PAINT], [TRACED]])
+
+    assert stall.location == "(không chụp được stack của mã ứng dụng)"
+    assert stall.format_stack() == ""
+
+@pytest.fixture
+def watchdog(qapp):
+    watchdog = StallWatchdog(budget_ms=50)
+    yield watchdog
+    watchdog.stop()
+
+def test_report_groups_by_location_and_ranks_by_total(watchdog):
+    render_stack = [[MAIN, PREVIEW, RENDER]]
+    preview_stack = [[MAIN, PREVIEW]]
+    watchdog.stalls.extend([Stall(0.0, 120, render_stack), Stall(1.0, 400, preview_stack),
+                            Stall(2.0, 200, render_stack), Stall(3.0, 250, render_stack)])
+
+    lines = watchdog.report().splitlines()
+
+    assert lines[0] == "3 lần, tổng 570ms, lâu nhất 250ms — utils/live_renderer.py render_slide"
+    assert "1 lần, tổng 400ms, lâu nhất 400ms — app/controllers/main_controller.py _update_preview" in lines
+    assert len(watchdog.report(limit=1).splitlines()) == 1 + len(render_stack[0])
+
+def test_stop_joins_the_watch_thread(watchdog):
+    watchdog.start()
+    thread = watchdog._thread
+
+    watchdog.stop()
+
+    assert watchdog._thread is None and not thread.is_alive()
@@ -0,0 +1,30 @@
+# tests/test_title_pool.py
+
+SONGS = 12_000 # lớn hơn giới hạn cố định cũ của bộ nhớ tựa đề
+
+def _fill(db_model) -> list:
+    songbook_ids = [db_model.add_songbook("Nguyện Tập"), db_model.add_songbook("Thánh Ca")]
+    db_model.conn.executemany("INSERT INTO songs (songbook_id, title, lyrics) VALUES (?, ?, '')",
+                              ((songbook_ids[n % 2], f"Bài {n:05d}") for n in range(SONGS)))
+    db_model.conn.commit()
+    return songbook_ids
+
+def _titles(catalog) -> list:
+    return [song.title for songbook in catalog for song in songbook.songs]
+
+def test_reload_shares_every_title(db_model):
+    _fill(db_model)
+    first = _titles(db_model.get_songbooks_with_songs())
+    second = _titles(db_model.get_songbooks_with_songs())
+
+    assert len(second) == SONGS
+    assert all(a is b for a, b in zip(first, second))
+
+def test_pool_follows_the_catalog(db_model):
+    songbook_ids = _fill(db_model)
+    db_model.get_songbooks_with_songs()
+    db_model.delete_songbook(songbook_ids[0]) # bài trong sách bị xóa theo, không qua delete_song
+
+    db_model.get_songbooks_with_songs()
+
+    assert len(db_model._title_pool) == SONGS // 2
@@ -0,0 +1,79 @@
+# tests/test_tracing.py
+
+import json
+import threading
+
+import pytest
+
+from utils import tracing
+from utils.tracing import counter, span, start_tracing, stop_tracing, traced_methods, write_trace
+
+@traced_methods("demo", lambda name: not name.startswith("_"))
+class Library:
+    def load(self, n: int) -> list:
+        return list(self.songs(n))
+
+    def songs(self, n: int):
+        yield from range(n)
+
+    def fail(self):
+        raise ValueError("lỗi")
+
+    def _helper(self):
+        return "bên trong"
+
+@pytest.fixture
+def trace():
+    """Ghi vết trong lúc chạy test; luôn tắt lại để không ảnh hưởng test khác."""
+    start_tracing()
+    yield
+    stop_tracing()
+
+def _spans() -> list:
+    return [(event["name"], event["args"]) for event in tracing._events if event["ph"] == "X"]
+
+def test_only_included_plain_functions_are_wrapped():
+    assert hasattr(Library.load, "__wrapped__") and hasattr(Library.fail, "__wrapped__")
+    assert not hasattr(Library.songs, "__wrapped__") # hàm sinh: việc thật chạy lúc duyệt
+    assert not hasattr(Library._helper, "__wrapped__")
+
+def test_nothing_is_recorded_while_off():
+    stop_tracing()
+    tracing._events.clear()
+
+    Library().load(3)
+    with span("demo.block"):
+        counter("demo.count", value=1)
+
+    assert len(tracing._events) == 0
+
+def test_spans_and_errors_are_recorded(trace):
+    library = Library()
+    library.load(3)
+    with pytest.raises(ValueError):
+        library.fail()
+    library._helper()
+
+    assert _spans() == [("demo.load", {}), ("demo.fail", {"error": "ValueError"})]
+
+def test_written_trace_is_chrome_json(trace, tmp_path):
+    worker = threading.Thread(target=lambda: Library().load(2), name="worker-thử")
+    worker.start()
+    worker.join()
+    with span("demo.block", songs=2):
+        counter("demo.cache", hits=3, misses=1)
+    path = str(tmp_path / "trace.json")
+
+    write_trace(path)
+
+    with open(path, encoding="utf-8") as f:
+        events = json.load(f)["traceEvents"]
+    spans = [event for event in events if event["ph"] == "X"]
+    assert [(event["name"], event["cat"], event["args"]) for event in spans] == [
+        ("demo.load", "demo", {}), ("demo.block", "demo", {"songs": 2})]
+    assert all(event["dur"] >= 0 and {"pid", "tid", "ts"} <= set(event) for event in spans)
+    assert [event["args"] for event in events if event["ph"] == "C"] == [{"hits": 3, "misses": 1}]
+    thread_names = {event["tid"]: event["args"]["name"] for event in events
+                    if event["ph"] == "M" and event["name"] == "thread_name"}
+    assert thread_names[spans[0]["tid"]] == "worker-thử"
+    assert thread_names[spans[1]["tid"]] == threading.current_thread().name